@@ -2,8 +2,8 @@ import os
 from flask import Flask, request, redirect, url_for
 from flask_cors import CORS
 from flask_login import LoginManager
-from flasgger import Flasgger
 from flask_login import current_user
+from app.api_docs import configure_api_docs
 from app.config import PathManager, SettingsLoader
 from app.database import db
 from app.database.config import configure_database
@@ -62,6 +62,19 @@ def create_app():
     # Registrar singleton para sesiones
     DatabaseSession.get_instance(app)
     
+    # Medir tiempo, SQL y templates por endpoint (antes de otros before_request)
+    if SettingsLoader.get_bool('metricas', 'instrumentacion', True):
+        from app.instrumentacion import InstrumentacionRequests
+        desarrollo = app.debug or os.environ.get('FLASK_ENV') == 'development' or os.environ.get('TESTING') == '1'
+        InstrumentacionRequests.instalar(
+            app,
+            umbral_lento_ms=SettingsLoader.get_int('metricas', 'umbral_lento_ms', 500),
+            # Detector de N+1: por defecto sólo en desarrollo y tests
+            detectar_n_mas_uno=SettingsLoader.get_bool('metricas', 'detectar_n_mas_uno', desarrollo),
+            umbral_n_mas_uno=SettingsLoader.get_int('metricas', 'n_mas_uno_umbral', 5),
+            n_mas_uno_estricto=SettingsLoader.get_bool('metricas', 'n_mas_uno_estricto', False),
+        )
+    
     # Configurar Flask-Login (permite deshabilitarlo para tests con FLASK_LOGIN_DISABLED=1)
     if os.environ.get('FLASK_LOGIN_DISABLED') == '1':
         app.config['LOGIN_DISABLED'] = True
@@ -87,40 +100,8 @@ def create_app():
             if not current_user.is_authenticated:
                 return redirect(url_for('main.login', next=request.url))
     
-    # Configurar Flasgger para documentación Swagger/OpenAPI
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": 'apispec',
-                "route": '/apispec.json',
-                "rule_filter": lambda rule: rule.rule.startswith('/api/'),
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/api/docs"
-    }
-    
-    flasgger = Flasgger(
-        app=app,
-        config=swagger_config,
-        template={
-            "swagger": "2.0",
-            "info": {
-                "title": "API - Sistema de Gestión Odontológico",
-                "description": "Documentación interactiva de endpoints disponibles. Los endpoints /api/* retornan JSON para integración con herramientas externas.",
-                "version": "1.0.0",
-                "contact": {
-                    "name": "Soporte"
-                }
-            },
-            "host": "localhost:5000",
-            "basePath": "/",
-            "schemes": ["http"],
-        }
-    )
+    # Documentación Swagger/OpenAPI (Flasgger se importa recién en el primer /api/docs)
+    configure_api_docs(app)
     
     # Registrar custom Jinja2 filters
     @app.template_filter('empty_fallback')
@@ -153,11 +134,16 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(finanzas_bp)
     
-    # Registrar tareas periódicas (scheduler)
-    # Registrar tareas periódicas (scheduler) salvo en modo testing
+    # Registrar tareas periódicas (scheduler) salvo en modo testing. APScheduler
+    # arranca después del primer request para no demorar la primera página;
+    # las colas de WhatsApp sí arrancan ya (los webhooks no pueden esperar)
     if not app.config.get('TESTING') and os.environ.get('DISABLE_SCHEDULER') != '1':
-        from app.scheduler import register_background_tasks
-        register_background_tasks(app)
+        from app.scheduler import diferir_background_tasks
+        from app.services.whatsapp import ColaSalienteWorker
+        from app.adapters.whatsapp import WhatsAppEventQueue
+        diferir_background_tasks(app)
+        ColaSalienteWorker.iniciar(app)
+        WhatsAppEventQueue.iniciar(app)
     else:
         app.logger.info("Scheduler deshabilitado en modo testing")
     
@@ -3,13 +3,22 @@ Inicializador del módulo WhatsApp adapter.
 """
 
 from .webhook_handler import (
+    IncomingMessage,
+    StatusUpdate,
+    WebhookEvent,
     WhatsAppWebhookHandler,
     WhatsAppWebhookValidator,
     WhatsAppPayloadParser,
     WhatsAppMessageFormatter,
 )
+from .event_queue import WhatsAppEventQueue, procesar_evento
 
 __all__ = [
+    "IncomingMessage",
+    "StatusUpdate",
+    "WebhookEvent",
+    "WhatsAppEventQueue",
+    "procesar_evento",
     "WhatsAppWebhookHandler",
     "WhatsAppWebhookValidator",
     "WhatsAppPayloadParser",
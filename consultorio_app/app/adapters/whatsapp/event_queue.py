@@ -0,0 +1,215 @@
+"""
+Cola de eventos del webhook de WhatsApp, particionada por usuario.
+
+Los eventos de un mismo channel_user_id se procesan de a uno y en el orden en
+que llegaron (la conversación avanza paso a paso); los de usuarios distintos
+corren en paralelo en un pool de hilos. El webhook sólo encola y responde a Meta.
+
+Los mensajes ya vistos (mismo message id de WhatsApp) se descartan al encolar,
+antes de cualquier cambio de estado: Meta reenvía el webhook cuando tardamos en
+responder. El registro de ids lo lleva DeduplicadorMensajes (LRU + SQLite).
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+from app.config import SettingsLoader
+from app.metricas import Metricas
+from app.security import RateLimiter
+from app.services import ConversationService
+from app.services.whatsapp import DeduplicadorMensajes, EncolarMensajeService
+from .webhook_handler import IncomingMessage, StatusUpdate, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _clave_usuario(evento: WebhookEvent) -> str:
+    if isinstance(evento, IncomingMessage):
+        return evento.channel_user_id
+    return evento.recipient_id
+
+
+def procesar_evento(evento: WebhookEvent) -> None:
+    """Procesa un evento: los mensajes de texto pasan por el ConversationService."""
+    if isinstance(evento, StatusUpdate):
+        if evento.estado == 'failed':
+            logger.warning(f"WhatsApp informó fallo de envío {evento.message_id} a {evento.recipient_id}: {evento.errores}")
+        else:
+            logger.debug(f"Estado {evento.estado} para {evento.message_id}")
+        return
+
+    if evento.tipo != 'text' or not evento.texto:
+        logger.debug(f"Mensaje {evento.message_id} de tipo {evento.tipo} ignorado")
+        return
+
+    # El límite se aplica antes de tocar la conversación: el mensaje excedido se descarta
+    allowed, limit_message = RateLimiter.check_rate_limit(evento.channel_user_id)
+    if not allowed:
+        logger.warning(f"Rate limit exceeded for {evento.channel_user_id}: mensaje {evento.message_id} descartado ({limit_message})")
+        return
+
+    reply = ConversationService.handle_message(evento.channel_user_id, evento.texto)
+    message = getattr(reply, 'message', None)
+    if message:
+        mensaje = EncolarMensajeService.execute(evento.channel_user_id, texto=message)
+        logger.info(f"Reply queued for {evento.channel_user_id} (mensaje {mensaje.id})")
+
+
+class WhatsAppEventQueue:
+    """Cola por usuario con pool de hilos compartido."""
+
+    _app = None
+    _procesar: Optional[Callable[[WebhookEvent], None]] = None
+    _pendientes: Dict[str, Deque[WebhookEvent]] = {}
+    _listos: "queue.Queue[Optional[str]]" = queue.Queue()
+    _hilos: List[threading.Thread] = []
+    _en_curso = 0
+    _lock = threading.Lock()
+    _vacia = threading.Condition(_lock)
+
+    @staticmethod
+    def iniciar(app, hilos: int = None, procesar: Callable[[WebhookEvent], None] = None) -> None:
+        """
+        Arranca el pool de hilos (una sola vez por proceso).
+
+        Mientras no se inicie, despachar procesa los eventos en el hilo que llama
+        (modo testing).
+
+        Args:
+            app: App Flask; cada evento se procesa dentro de su app_context (None: sin contexto)
+            hilos: Cantidad de hilos (default [whatsapp] eventos_hilos o 4)
+            procesar: Función que procesa un evento (default procesar_evento)
+        """
+        cls = WhatsAppEventQueue
+        with cls._lock:
+            if cls._hilos:
+                return
+            cls._app = app
+            cls._procesar = procesar
+            hilos = hilos or SettingsLoader.get_int('whatsapp', 'eventos_hilos', 4)
+            for numero in range(hilos):
+                hilo = threading.Thread(target=cls._bucle, name=f'eventos-whatsapp-{numero}', daemon=True)
+                hilo.start()
+                cls._hilos.append(hilo)
+        atexit.register(cls.detener)
+        logger.info(f"Cola de eventos de WhatsApp iniciada con {hilos} hilo(s)")
+
+    @staticmethod
+    def detener(timeout: float = 5.0) -> None:
+        """Termina los hilos; los eventos que no llegaron a procesarse se descartan."""
+        cls = WhatsAppEventQueue
+        with cls._lock:
+            hilos, cls._hilos = cls._hilos, []
+            cls._pendientes.clear()
+            cls._app = None
+            cls._procesar = None
+        for _ in hilos:
+            cls._listos.put(None)
+        for hilo in hilos:
+            hilo.join(timeout)
+
+    @staticmethod
+    def despachar(eventos: Iterable[WebhookEvent]) -> int:
+        """
+        Encola los eventos en la partición de su usuario, descartando los repetidos.
+
+        Returns:
+            Cantidad de eventos encolados
+        """
+        cls = WhatsAppEventQueue
+        nuevos: List[WebhookEvent] = []
+        for evento in eventos:
+            if isinstance(evento, IncomingMessage) and evento.message_id:
+                try:
+                    if not DeduplicadorMensajes.registrar(evento.message_id):
+                        logger.info(f"Mensaje {evento.message_id} repetido: se descarta")
+                        continue
+                except Exception as exc:
+                    # Sin registro no se pierde el mensaje: se procesa igual
+                    logger.warning(f"No se pudo registrar el mensaje {evento.message_id}: {exc}")
+            nuevos.append(evento)
+
+        with cls._lock:
+            if cls._hilos:
+                for evento in nuevos:
+                    clave = _clave_usuario(evento)
+                    pendientes = cls._pendientes.get(clave)
+                    if pendientes is None:
+                        # Nadie atiende a este usuario: queda listo para el próximo hilo libre
+                        cls._pendientes[clave] = deque([evento])
+                        cls._listos.put(clave)
+                    else:
+                        pendientes.append(evento)
+                return len(nuevos)
+
+        for evento in nuevos:
+            cls._ejecutar(evento)
+        return len(nuevos)
+
+    @staticmethod
+    def esperar_vacia(timeout: float = None) -> bool:
+        """Bloquea hasta que no queden eventos pendientes ni en curso (tests y apagado)."""
+        cls = WhatsAppEventQueue
+        with cls._vacia:
+            return cls._vacia.wait_for(lambda: not cls._pendientes and cls._en_curso == 0, timeout)
+
+    @staticmethod
+    def profundidad() -> Dict[str, int]:
+        """Eventos esperando, usuarios con eventos y eventos en curso."""
+        cls = WhatsAppEventQueue
+        with cls._lock:
+            return {
+                'pendientes': sum(len(pendientes) for pendientes in cls._pendientes.values()),
+                'usuarios': len(cls._pendientes),
+                'en_curso': cls._en_curso,
+            }
+
+    @staticmethod
+    def _bucle() -> None:
+        """Toma un usuario listo y procesa sus eventos en orden hasta vaciarlo."""
+        cls = WhatsAppEventQueue
+        while True:
+            clave = cls._listos.get()
+            if clave is None:
+                return
+            while True:
+                with cls._lock:
+                    pendientes = cls._pendientes.get(clave)
+                    if not pendientes:
+                        # La partición vacía se borra: el próximo evento vuelve a ponerla en listos
+                        cls._pendientes.pop(clave, None)
+                        cls._vacia.notify_all()
+                        break
+                    evento = pendientes.popleft()
+                    cls._en_curso += 1
+                try:
+                    cls._ejecutar(evento)
+                finally:
+                    with cls._lock:
+                        cls._en_curso -= 1
+
+    @staticmethod
+    def _ejecutar(evento: WebhookEvent) -> None:
+        cls = WhatsAppEventQueue
+        procesar = cls._procesar or procesar_evento
+        try:
+            if cls._app is not None:
+                with cls._app.app_context():
+                    procesar(evento)
+            else:
+                procesar(evento)
+        except Exception:
+            logger.exception(f"Error procesando evento de WhatsApp {evento.message_id}")
+
+
+def _colector_metricas():
+    profundidad = WhatsAppEventQueue.profundidad()
+    yield 'whatsapp_eventos_pendientes', 'gauge', 'Eventos del webhook esperando en la cola por usuario', [({}, profundidad['pendientes'])]
+    yield 'whatsapp_eventos_en_curso', 'gauge', 'Eventos del webhook procesándose', [({}, profundidad['en_curso'])]
+
+
+Metricas.registrar_colector(_colector_metricas)
@@ -3,8 +3,8 @@ WhatsApp Webhook Handler.
 
 Responsabilidades:
 - Validar firma/token del webhook
-- Parsear payload de WhatsApp
-- Delegar al ConversationService
+- Parsear payload de WhatsApp en eventos tipados (todas las entries/changes)
+- Delegar al ConversationService (directo o vía cola por usuario)
 - Retornar respuesta HTTP
 - NO contiene lógica de negocio (eso está en ConversationService)
 """
@@ -13,7 +13,38 @@ import hmac
 import hashlib
 import json
 import os
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List, NamedTuple, Union, Callable
+
+
+class IncomingMessage(NamedTuple):
+    """Mensaje entrante de un usuario."""
+
+    message_id: str
+    channel_user_id: str
+    tipo: str
+    texto: str
+    timestamp: Optional[int]
+    phone_number_id: Optional[str]
+
+
+class StatusUpdate(NamedTuple):
+    """Cambio de estado (sent/delivered/read/failed) de un mensaje que enviamos."""
+
+    message_id: str
+    recipient_id: str
+    estado: str
+    timestamp: Optional[int]
+    errores: List[Dict[str, Any]]
+
+
+WebhookEvent = Union[IncomingMessage, StatusUpdate]
+
+
+def _timestamp(valor) -> Optional[int]:
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
 
 
 class WhatsAppWebhookValidator:
@@ -64,52 +95,95 @@ class WhatsAppPayloadParser:
     """Parsea payloads del webhook de WhatsApp."""
 
     @staticmethod
-    def extract_message_info(payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    def parse_events(payload: Dict[str, Any]) -> List[WebhookEvent]:
         """
-        Extrae channel_user_id y texto del mensaje del payload.
+        Convierte el payload completo en eventos tipados, en el orden recibido.
+
+        Meta agrupa varias entries, changes, mensajes y estados en un mismo POST:
+        se recorren todos. Los repetidos dentro del payload (mismo message id, o
+        mismo id y estado) se descartan.
 
         Returns:
-            Tupla (channel_user_id, texto) o None si payload inválido
+            Lista de IncomingMessage y StatusUpdate (vacía si el payload es inválido)
         """
-        try:
-            entry = payload.get('entry', [{}])[0]
-            change = entry.get('changes', [{}])[0]
-            value = change.get('value', {})
-            messages = value.get('messages', [])
-
-            if not messages:
-                return None
-
-            msg = messages[0]
-            channel_user_id = msg.get('from')
+        eventos: List[WebhookEvent] = []
+        vistos = set()
+        if not isinstance(payload, dict):
+            return eventos
+
+        for entry in payload.get('entry') or []:
+            if not isinstance(entry, dict):
+                continue
+            for change in entry.get('changes') or []:
+                if not isinstance(change, dict):
+                    continue
+                value = change.get('value') or {}
+                if not isinstance(value, dict):
+                    continue
+                phone_number_id = (value.get('metadata') or {}).get('phone_number_id')
+
+                for msg in value.get('messages') or []:
+                    if not isinstance(msg, dict) or not msg.get('from'):
+                        continue
+                    message_id = msg.get('id') or ''
+                    if message_id:
+                        if ('msg', message_id) in vistos:
+                            continue
+                        vistos.add(('msg', message_id))
+                    tipo = msg.get('type') or ''
+                    texto = (msg.get('text') or {}).get('body', '') if tipo == 'text' else ''
+                    eventos.append(IncomingMessage(
+                        message_id=message_id,
+                        channel_user_id=msg['from'],
+                        tipo=tipo,
+                        texto=texto or '',
+                        timestamp=_timestamp(msg.get('timestamp')),
+                        phone_number_id=phone_number_id,
+                    ))
+
+                for status in value.get('statuses') or []:
+                    if not isinstance(status, dict) or not status.get('id'):
+                        continue
+                    clave = ('status', status['id'], status.get('status'))
+                    if clave in vistos:
+                        continue
+                    vistos.add(clave)
+                    eventos.append(StatusUpdate(
+                        message_id=status['id'],
+                        recipient_id=status.get('recipient_id') or '',
+                        estado=status.get('status') or '',
+                        timestamp=_timestamp(status.get('timestamp')),
+                        errores=list(status.get('errors') or []),
+                    ))
+        return eventos
 
-            if msg.get('type') != 'text':
-                return None
-
-            text = msg.get('text', {}).get('body', '')
+    @staticmethod
+    def extract_message_info(payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        Extrae channel_user_id y texto del primer mensaje del payload.
 
-            if not channel_user_id or not text:
-                return None
+        Se mantiene por compatibilidad: para procesar lotes usar parse_events.
 
-            return (channel_user_id, text)
-        except (KeyError, IndexError, TypeError):
-            return None
+        Returns:
+            Tupla (channel_user_id, texto) o None si payload inválido
+        """
+        for evento in WhatsAppPayloadParser.parse_events(payload):
+            if isinstance(evento, IncomingMessage):
+                if evento.tipo != 'text' or not evento.texto:
+                    return None
+                return (evento.channel_user_id, evento.texto)
+        return None
 
     @staticmethod
     def is_status_update(payload: Dict[str, Any]) -> bool:
         """
-        Detecta si el payload es una actualización de estado (no un mensaje).
+        Detecta si el payload trae sólo actualizaciones de estado (ningún mensaje).
 
         Returns:
             True si es update de estado; False si es mensaje
         """
-        try:
-            entry = payload.get('entry', [{}])[0]
-            change = entry.get('changes', [{}])[0]
-            value = change.get('value', {})
-            return bool(value.get('statuses'))
-        except (KeyError, IndexError, TypeError):
-            return False
+        eventos = WhatsAppPayloadParser.parse_events(payload)
+        return bool(eventos) and all(isinstance(e, StatusUpdate) for e in eventos)
 
 
 class WhatsAppMessageFormatter:
@@ -134,19 +208,32 @@ class WhatsAppMessageFormatter:
 class WhatsAppWebhookHandler:
     """Handler principal del webhook. Orquesta validación, parsing y delegación."""
 
-    def __init__(self, verify_token: str):
+    def __init__(self, verify_token: str, despachar: Optional[Callable[[List[WebhookEvent]], None]] = None):
+        """
+        Args:
+            verify_token: Token de verificación del webhook
+            despachar: Si se indica, recibe los eventos parseados (ej: la cola por
+                usuario) y el handler no llama al ConversationService
+        """
         self.verify_token = verify_token
+        self.despachar = despachar
+        self.events: List[WebhookEvent] = []
+        self.replies: List[Tuple[str, str]] = []
         self.last_reply_message: Optional[str] = None
 
     def handle_webhook(
         self,
         body: str,
         signature_header: str,
-        conversation_service,
+        conversation_service=None,
     ) -> Tuple[Dict[str, Any], int]:
         """
         Procesa un webhook entrante y retorna (response_dict, status_code).
+
+        El body se parsea una sola vez; los eventos quedan en self.events.
         """
+        self.events = []
+        self.replies = []
         self.last_reply_message = None
 
         if not WhatsAppWebhookValidator.validate_signature(
@@ -161,20 +248,24 @@ class WhatsAppWebhookHandler:
         except json.JSONDecodeError:
             return ({"error": "Invalid JSON"}, 400)
 
-        if WhatsAppPayloadParser.is_status_update(payload):
-            return (WhatsAppMessageFormatter.format_webhook_ack(), 200)
+        self.events = WhatsAppPayloadParser.parse_events(payload)
 
-        message_info = WhatsAppPayloadParser.extract_message_info(payload)
-        if not message_info:
+        if self.despachar is not None:
+            if self.events:
+                self.despachar(self.events)
             return (WhatsAppMessageFormatter.format_webhook_ack(), 200)
 
-        channel_user_id, text = message_info
-
-        try:
-            reply = conversation_service.handle_message(channel_user_id, text)
-            self.last_reply_message = getattr(reply, "message", None)
-        except Exception:
-            return ({"error": "Service error"}, 500)
+        for evento in self.events:
+            if not isinstance(evento, IncomingMessage) or evento.tipo != 'text' or not evento.texto:
+                continue
+            try:
+                reply = conversation_service.handle_message(evento.channel_user_id, evento.texto)
+            except Exception:
+                return ({"error": "Service error"}, 500)
+            message = getattr(reply, "message", None)
+            if message:
+                self.replies.append((evento.channel_user_id, message))
+                self.last_reply_message = message
 
         return (WhatsAppMessageFormatter.format_webhook_ack(), 200)
 
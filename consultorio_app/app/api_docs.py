@@ -0,0 +1,109 @@
+"""
+Documentación Swagger/OpenAPI de /api/* con Flasgger, cargado recién al usarla.
+
+Flasgger (y jsonschema, mistune, yaml que arrastra) pesa en el arranque y casi
+nadie abre /api/docs. Las rutas se registran al crear la app (Flask no permite
+agregar rutas después del primer request) pero apuntan a estáticos y templates
+de Flasgger por ruta de archivo; el paquete se importa en el primer request a
+/api/docs o /apispec.json.
+
+Las URLs y los nombres de endpoint son los mismos que registraba Flasgger
+(flasgger.apidocs, flasgger.apispec, flasgger.static, ...).
+"""
+
+import importlib.util
+import os
+import threading
+
+from flask import Blueprint, current_app, jsonify, redirect, url_for
+
+SWAGGER_CONFIG = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": 'apispec',
+            "route": '/apispec.json',
+            "rule_filter": lambda rule: rule.rule.startswith('/api/'),
+            "model_filter": lambda tag: True,
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/api/docs"
+}
+
+SWAGGER_TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "API - Sistema de Gestión Odontológico",
+        "description": "Documentación interactiva de endpoints disponibles. Los endpoints /api/* retornan JSON para integración con herramientas externas.",
+        "version": "1.0.0",
+        "contact": {
+            "name": "Soporte"
+        }
+    },
+    "host": "localhost:5000",
+    "basePath": "/",
+    "schemes": ["http"],
+}
+
+_lock = threading.Lock()
+
+
+def _directorio_flasgger() -> str:
+    """Carpeta del paquete flasgger, sin importarlo."""
+    spec = importlib.util.find_spec('flasgger')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError("flasgger no está instalado")
+    return list(spec.submodule_search_locations)[0]
+
+
+def _obtener_swagger():
+    """Instancia de Flasgger de la app actual (se importa y arma la primera vez)."""
+    app = current_app._get_current_object()
+    swagger = app.extensions.get('flasgger')
+    if swagger is None:
+        with _lock:
+            swagger = app.extensions.get('flasgger')
+            if swagger is None:
+                from flasgger import Swagger
+                swagger = Swagger(config=dict(SWAGGER_CONFIG), template=SWAGGER_TEMPLATE)
+                # Sin init_app (registraría rutas): sólo arma el spec de esta app
+                swagger.app = app
+                app.extensions['flasgger'] = swagger
+    return swagger
+
+
+def _apidocs():
+    from flasgger.base import APIDocsView
+    return APIDocsView(view_args={'config': _obtener_swagger().config}).get()
+
+
+def _apispec():
+    return jsonify(_obtener_swagger().get_apispecs(endpoint='apispec'))
+
+
+def _oauth_redirect():
+    from flasgger.base import OAuthRedirect
+    return OAuthRedirect().get()
+
+
+def configure_api_docs(app) -> None:
+    """Registra /api/docs, /apispec.json y los estáticos de Swagger UI."""
+    raiz = _directorio_flasgger()
+    blueprint = Blueprint(
+        'flasgger',
+        __name__,
+        template_folder=os.path.join(raiz, 'ui3', 'templates'),
+        static_folder=os.path.join(raiz, 'ui3', 'static'),
+        static_url_path=SWAGGER_CONFIG['static_url_path'],
+    )
+    blueprint.add_url_rule(SWAGGER_CONFIG['specs_route'], 'apidocs', _apidocs)
+    blueprint.add_url_rule('/oauth2-redirect.html', 'oauth_redirect', _oauth_redirect)
+    blueprint.add_url_rule('/apidocs/index.html', view_func=lambda: redirect(url_for('flasgger.apidocs')))
+    for spec in SWAGGER_CONFIG['specs']:
+        blueprint.add_url_rule(spec['route'], spec['endpoint'], _apispec)
+    app.register_blueprint(blueprint)
+
+
+__all__ = ["configure_api_docs", "SWAGGER_CONFIG", "SWAGGER_TEMPLATE"]
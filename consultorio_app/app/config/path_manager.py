@@ -99,6 +99,32 @@ class PathManager:
         backups_dir.mkdir(exist_ok=True)
         return backups_dir
     
+    @classmethod
+    def get_renders_dir(cls) -> Path:
+        """
+        Directorio para imágenes renderizadas en el servidor (odontogramas).
+        Se crea automáticamente si no existe.
+
+        Returns:
+            Path: Ruta absoluta a data/renders/
+        """
+        renders_dir = cls.get_data_dir() / 'renders'
+        renders_dir.mkdir(exist_ok=True)
+        return renders_dir
+
+    @classmethod
+    def get_calibracion_dir(cls) -> Path:
+        """
+        Directorio para las versiones de calibración de slots del odontograma.
+        Se crea automáticamente si no existe.
+
+        Returns:
+            Path: Ruta absoluta a data/calibracion/
+        """
+        calibracion_dir = cls.get_data_dir() / 'calibracion'
+        calibracion_dir.mkdir(exist_ok=True)
+        return calibracion_dir
+
     @classmethod
     def get_db_path(cls) -> Path:
         """
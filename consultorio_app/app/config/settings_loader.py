@@ -68,23 +68,54 @@ class SettingsLoader:
         
         config['database'] = {
             'db_name': 'consultorio.db',
-            'backup_retention': '10'
+            'backup_retention': '10',
+            'busy_timeout_seconds': '30'
         }
         
         config['logging'] = {
             'level': 'INFO',
             'max_file_size_mb': '10',
-            'backup_count': '10'
+            'backup_count': '10',
+            'store_enabled': 'true',
+            'store_retencion_dias': '30',
+            'cola_max': '10000'
+        }
+        
+        config['metricas'] = {
+            'instrumentacion': 'true',
+            'umbral_lento_ms': '500',
+            'n_mas_uno_umbral': '5',
+            'n_mas_uno_estricto': 'false',
+            'perfilador': 'true',
+            'perfilador_max_segundos': '60'
+        }
+        
+        config['servidor'] = {
+            'modo': 'produccion',
+            'hilos': '8',
+            'backlog': '64',
+            'timeout_segundos': '30',
+            'espera_cierre_segundos': '15'
         }
         
         config['scheduler'] = {
-            'update_interval_minutes': '5'
+            'update_interval_minutes': '5',
+            'recordatorios_hora': '10'
         }
         
         config['whatsapp'] = {
             'phone_number_id': '',
             'access_token': '',
-            'verify_token': ''
+            'verify_token': '',
+            'api_base_url': '',
+            'recordatorio_plantilla': 'recordatorio_turno',
+            'recordatorio_idioma': 'es_AR',
+            'mensajes_por_segundo': '10',
+            'cola_hilos': '4',
+            'http_pool_size': '10',
+            'eventos_hilos': '4',
+            'dedup_ttl_horas': '168',
+            'dedup_en_memoria': '10000'
         }
         
         # Crear directorio si no existe
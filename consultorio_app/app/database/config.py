@@ -1,6 +1,19 @@
 import os
 from flask import Flask
-from app.config import PathManager
+from app.config import PathManager, SettingsLoader
+
+
+def opciones_engine_sqlite() -> dict:
+    """
+    Opciones de engine para SQLite en archivo.
+
+    El timeout es el busy timeout de SQLite: cuánto espera una conexión por el
+    lock de escritura (ej: BEGIN IMMEDIATE al agendar) antes de fallar con
+    "database is locked".
+    """
+    timeout = SettingsLoader.get_int('database', 'busy_timeout_seconds', 30)
+    return {"connect_args": {"timeout": timeout}}
+
 
 def configure_database(app: Flask):
     """
@@ -16,6 +29,7 @@ def configure_database(app: Flask):
         # Usar PathManager para obtener path dinámico de la base de datos
         db_path = PathManager.get_db_path()
         app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opciones_engine_sqlite()
     
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SQLALCHEMY_ECHO"] = False  # Cambiar a True para ver las consultas SQL
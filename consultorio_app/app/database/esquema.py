@@ -0,0 +1,53 @@
+"""
+Versión del esquema guardada en la propia base (PRAGMA user_version).
+
+Al arrancar, run.py compara la huella de los modelos con la guardada en la
+base: si coinciden, el esquema ya está al día y se saltea create_all (un
+PRAGMA table_info por tabla) y las consultas de datos iniciales. Cualquier
+cambio en tablas, columnas o índices de los modelos cambia la huella y fuerza
+la verificación completa en el siguiente arranque.
+"""
+
+import zlib
+
+from sqlalchemy import text
+
+from app.database import db
+
+
+def huella_esquema(metadata=None) -> int:
+    """Entero positivo de 31 bits que identifica tablas, columnas e índices de los modelos."""
+    metadata = metadata if metadata is not None else db.metadata
+    partes = []
+    for nombre in sorted(metadata.tables):
+        tabla = metadata.tables[nombre]
+        partes.append(nombre)
+        for columna in tabla.columns:
+            partes.append(
+                f"{columna.name}:{columna.type.compile(dialect=db.engine.dialect)}:"
+                f"{int(columna.nullable)}:{int(columna.primary_key)}"
+            )
+        partes.extend(sorted(f"ix:{indice.name}" for indice in tabla.indexes))
+    huella = zlib.crc32("|".join(partes).encode('utf-8')) & 0x7FFFFFFF
+    # 0 es el valor de una base sin marcar
+    return huella or 1
+
+
+def version_guardada() -> int:
+    """PRAGMA user_version de la base (0 si nunca se marcó)."""
+    return db.session.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def esquema_actualizado() -> bool:
+    """True si la base fue marcada con la huella de los modelos actuales."""
+    return version_guardada() == huella_esquema()
+
+
+def marcar_esquema_actualizado() -> None:
+    """Guarda la huella actual en la base (después de create_all y migraciones)."""
+    # PRAGMA no admite parámetros; la huella es un int propio
+    db.session.execute(text(f"PRAGMA user_version = {int(huella_esquema())}"))
+    db.session.commit()
+
+
+__all__ = ["huella_esquema", "version_guardada", "esquema_actualizado", "marcar_esquema_actualizado"]
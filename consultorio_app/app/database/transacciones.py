@@ -0,0 +1,26 @@
+"""Helpers de transacciones para SQLite.
+
+pysqlite abre las transacciones en modo DEFERRED recién en el primer INSERT/UPDATE,
+así que un "SELECT para verificar + INSERT" corre con la verificación fuera de
+la transacción: dos requests concurrentes pueden pasar la verificación y
+escribir ambos. Con BEGIN IMMEDIATE el lock de escritura se toma antes de leer,
+y la verificación y la escritura se confirman juntas.
+"""
+from sqlalchemy.orm import Session
+
+
+def iniciar_transaccion_inmediata(session: Session) -> None:
+    """
+    Toma el lock de escritura de SQLite antes de una sección "verificar y escribir".
+
+    Sólo emite BEGIN IMMEDIATE si la conexión DBAPI no está ya dentro de una
+    transacción (si ya hubo escrituras, SQLite ya tiene el lock reservado).
+    El commit/rollback lo sigue haciendo el caso de uso como siempre.
+    En otros motores no hace nada.
+    """
+    connection = session.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    dbapi_connection = connection.connection.dbapi_connection
+    if not dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
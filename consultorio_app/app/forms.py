@@ -166,6 +166,21 @@ class TurnoForm(FlaskForm):
         validators=[Optional(), Length(max=500)]
     )
     
+    profesional_id = SelectField(
+        'Profesional',
+        coerce=int,
+        default=0,
+        validators=[Optional()]
+    )
+    
+    sillon = IntegerField(
+        'Sillón',
+        validators=[
+            Optional(),
+            NumberRange(min=1, max=20, message='El sillón debe estar entre 1 y 20')
+        ]
+    )
+    
     estado = SelectField(
         'Estado',
         choices=[
@@ -0,0 +1,520 @@
+"""
+Instrumentación de requests: tiempo total, SQL y render de templates por endpoint.
+
+Por cada request se mide:
+- Tiempo de punta a punta (before_request -> teardown_request)
+- Cantidad de sentencias SQL y tiempo en la base (eventos before/after_cursor_execute)
+- Tiempo de render de templates (señales before_render_template/template_rendered)
+
+Las mediciones se agregan por endpoint en histogramas tipo HDR (buckets
+log-lineales, error relativo acotado, memoria fija) y los requests que superan
+el umbral se loggean con sus sentencias. También se exportan en /admin/metrics
+(ver app.metricas), junto con las escrituras en SQLite y el estado del pool.
+
+Detector de N+1 (desarrollo y tests): agrupa las sentencias de cada request
+por forma (SQL normalizado) y avisa cuando la misma forma se repite más de
+UMBRAL_N_MAS_UNO veces, con la pila de la app que la disparó. En modo estricto
+además lanza ConsultasRepetidasError en el punto de la consulta.
+ContadorConsultas hace lo mismo para un bloque de código (fixture
+presupuesto_consultas de los tests).
+
+REGLA DE SEGURIDAD: se loggea el SQL sin parámetros (nunca los valores).
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from flask import request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metricas import LIMITES_LATENCIA, Metricas
+
+logger = logging.getLogger('app.instrumentacion')
+
+# Las escrituras incluyen la espera por el lock de SQLite (busy timeout)
+DB_ESCRITURA_SEGUNDOS = Metricas.histograma(
+    'db_escritura_segundos', 'Duración de las sentencias de escritura en SQLite (incluye la espera por el lock)'
+)
+DB_BLOQUEOS = Metricas.contador('db_bloqueos_total', 'Errores "database is locked" de SQLite')
+_SENTENCIAS_ESCRITURA = ('INSERT', 'UPDATE', 'DELETE', 'BEGIN', 'REPLACE')
+
+_DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+_LISTA_PARAMETROS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class ConsultasRepetidasError(RuntimeError):
+    """La misma forma de sentencia se ejecutó demasiadas veces en un request (N+1)."""
+
+    def __init__(self, forma: str, cantidad: int, pila: List[str]):
+        self.forma = forma
+        self.cantidad = cantidad
+        self.pila = pila
+        super().__init__(
+            f"Consulta repetida {cantidad} veces en el mismo request (N+1): {forma}\n" + "\n".join(pila)
+        )
+
+
+def normalizar_sentencia(statement: str) -> str:
+    """Forma de una sentencia: sin espacios de más, literales ni largo de listas IN."""
+    forma = _LITERALES.sub('?', ' '.join(statement.split()))
+    return _LISTA_PARAMETROS.sub('(?...)', forma)
+
+
+def pila_de_la_app(limite: int = 8) -> List[str]:
+    """Frames del código de la app que llevaron a la consulta actual (el más interno al final)."""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(_DIRECTORIO_APP) and not frame.filename.endswith('instrumentacion.py')
+    ]
+    return [
+        f"  {os.path.relpath(frame.filename, os.path.dirname(_DIRECTORIO_APP))}:{frame.lineno} en {frame.name}: {frame.line}"
+        for frame in frames[-limite:]
+    ]
+
+
+class HistogramaLatencias:
+    """
+    Histograma de latencias con buckets log-lineales (estilo HDR).
+
+    Los valores se registran en microsegundos. Debajo de 2*SUB_BUCKETS µs el
+    valor es exacto; arriba, cada potencia de 2 se divide en SUB_BUCKETS partes
+    iguales, así que el error relativo de un percentil es menor a 1/SUB_BUCKETS.
+    No es thread-safe: quien lo comparte lo protege con su lock.
+    """
+
+    SUB_BUCKETS = 16
+    MAX_EXPONENTE = 36  # ~19 horas
+
+    _BITS_SUB = SUB_BUCKETS.bit_length()
+
+    __slots__ = ('conteos', 'cantidad', 'suma_us', 'maximo_us')
+
+    def __init__(self):
+        self.conteos: List[int] = [0] * (2 * self.SUB_BUCKETS + self.MAX_EXPONENTE * self.SUB_BUCKETS)
+        self.cantidad = 0
+        self.suma_us = 0
+        self.maximo_us = 0
+
+    @staticmethod
+    def _indice(valor_us: int) -> int:
+        sub = HistogramaLatencias.SUB_BUCKETS
+        if valor_us < 2 * sub:
+            return valor_us
+        exponente = min(valor_us.bit_length() - HistogramaLatencias._BITS_SUB, HistogramaLatencias.MAX_EXPONENTE)
+        return 2 * sub + (exponente - 1) * sub + min((valor_us >> exponente) - sub, sub - 1)
+
+    @staticmethod
+    def limite_superior(indice: int) -> int:
+        """Mayor valor (µs) que cae en el bucket `indice`."""
+        sub = HistogramaLatencias.SUB_BUCKETS
+        if indice < 2 * sub:
+            return indice
+        exponente, resto = divmod(indice - 2 * sub, sub)
+        exponente += 1
+        return ((sub + resto + 1) << exponente) - 1
+
+    def registrar(self, segundos: float) -> None:
+        valor_us = max(0, int(segundos * 1_000_000))
+        self.conteos[self._indice(valor_us)] += 1
+        self.cantidad += 1
+        self.suma_us += valor_us
+        if valor_us > self.maximo_us:
+            self.maximo_us = valor_us
+
+    def percentil(self, p: float) -> float:
+        """Valor (en ms) por debajo del cual queda el p% de las mediciones."""
+        if not self.cantidad:
+            return 0.0
+        objetivo = max(1, int(round(p / 100 * self.cantidad + 0.5)))
+        acumulado = 0
+        for indice, conteo in enumerate(self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return min(self.limite_superior(indice), self.maximo_us) / 1000
+        return self.maximo_us / 1000
+
+    def acumulado_hasta(self, limite_ms: float) -> int:
+        """Mediciones menores o iguales a `limite_ms` (redondeado al bucket)."""
+        limite_us = int(limite_ms * 1000)
+        return sum(
+            conteo for indice, conteo in enumerate(self.conteos)
+            if conteo and self.limite_superior(indice) <= limite_us
+        )
+
+    def copia(self) -> 'HistogramaLatencias':
+        otro = HistogramaLatencias()
+        otro.conteos = list(self.conteos)
+        otro.cantidad, otro.suma_us, otro.maximo_us = self.cantidad, self.suma_us, self.maximo_us
+        return otro
+
+
+class EstadisticasEndpoint:
+    """Acumulado de un endpoint (protegido por su propio lock)."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.lock = threading.Lock()
+        self.duracion = HistogramaLatencias()
+        self.sql_sentencias = 0
+        self.sql_segundos = 0.0
+        self.template_segundos = 0.0
+        self.lentos = 0
+        self.errores = 0
+
+
+class MedicionRequest:
+    """Lo medido durante un request (vive en un thread-local)."""
+
+    __slots__ = (
+        'inicio', 'sql_sentencias', 'sql_segundos', 'sentencias',
+        'template_segundos', 'inicios_template', 'status', 'formas', 'repetidas',
+    )
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_sentencias = 0
+        self.sql_segundos = 0.0
+        self.sentencias: List[tuple] = []
+        self.template_segundos = 0.0
+        self.inicios_template: List[float] = []
+        self.status = 500
+        self.formas: Dict[str, int] = {}
+        # forma -> pila de la primera vez que superó el umbral
+        self.repetidas: Dict[str, List[str]] = {}
+
+
+class InstrumentacionRequests:
+    """Middleware de medición por endpoint (hooks de Flask + eventos de SQLAlchemy)."""
+
+    UMBRAL_LENTO_MS = 500
+    MAX_SENTENCIAS_LOG = 50
+    MAX_LARGO_SENTENCIA = 300
+
+    # Detector de N+1 (lo activa create_app en desarrollo y tests)
+    DETECTAR_N_MAS_UNO = False
+    UMBRAL_N_MAS_UNO = 5
+    N_MAS_UNO_ESTRICTO = False
+
+    _actual = threading.local()
+    _endpoints: Dict[str, EstadisticasEndpoint] = {}
+    _lock = threading.Lock()
+    _eventos_instalados = False
+
+    @staticmethod
+    def instalar(
+        app,
+        umbral_lento_ms: Optional[int] = None,
+        detectar_n_mas_uno: Optional[bool] = None,
+        umbral_n_mas_uno: Optional[int] = None,
+        n_mas_uno_estricto: Optional[bool] = None,
+    ) -> None:
+        """Registra los hooks en la app (y, una sola vez por proceso, en SQLAlchemy)."""
+        cls = InstrumentacionRequests
+        if umbral_lento_ms is not None:
+            cls.UMBRAL_LENTO_MS = umbral_lento_ms
+        if detectar_n_mas_uno is not None:
+            cls.DETECTAR_N_MAS_UNO = detectar_n_mas_uno
+        if umbral_n_mas_uno is not None:
+            cls.UMBRAL_N_MAS_UNO = umbral_n_mas_uno
+        if n_mas_uno_estricto is not None:
+            cls.N_MAS_UNO_ESTRICTO = n_mas_uno_estricto
+        app.before_request(cls._iniciar)
+        app.after_request(cls._registrar_status)
+        app.teardown_request(cls._finalizar)
+
+        with cls._lock:
+            if cls._eventos_instalados:
+                return
+            event.listen(Engine, 'before_cursor_execute', cls._antes_sql)
+            event.listen(Engine, 'after_cursor_execute', cls._despues_sql)
+            event.listen(Engine, 'handle_error', cls._error_sql)
+            # Señales globales: sólo miden si el hilo tiene una medición activa
+            before_render_template.connect(cls._antes_template)
+            template_rendered.connect(cls._despues_template)
+            Metricas.registrar_colector(_colector_metricas)
+            cls._eventos_instalados = True
+
+    @staticmethod
+    def medicion_actual() -> Optional[MedicionRequest]:
+        return getattr(InstrumentacionRequests._actual, 'medicion', None)
+
+    # --- Hooks de Flask ---
+
+    @staticmethod
+    def _iniciar() -> None:
+        InstrumentacionRequests._actual.medicion = MedicionRequest()
+
+    @staticmethod
+    def _registrar_status(response):
+        medicion = InstrumentacionRequests.medicion_actual()
+        if medicion is not None:
+            medicion.status = response.status_code
+        return response
+
+    @staticmethod
+    def _finalizar(error=None) -> None:
+        cls = InstrumentacionRequests
+        medicion = cls.medicion_actual()
+        if medicion is None:
+            return
+        cls._actual.medicion = None
+        duracion = time.perf_counter() - medicion.inicio
+        endpoint = request.endpoint or 'sin_endpoint'
+        lento = duracion * 1000 >= cls.UMBRAL_LENTO_MS
+
+        estadisticas = cls._endpoints.get(endpoint)
+        if estadisticas is None:
+            with cls._lock:
+                estadisticas = cls._endpoints.setdefault(endpoint, EstadisticasEndpoint(endpoint))
+        with estadisticas.lock:
+            estadisticas.duracion.registrar(duracion)
+            estadisticas.sql_sentencias += medicion.sql_sentencias
+            estadisticas.sql_segundos += medicion.sql_segundos
+            estadisticas.template_segundos += medicion.template_segundos
+            estadisticas.lentos += lento
+            estadisticas.errores += error is not None or medicion.status >= 500
+
+        if lento:
+            cls._loggear_lento(endpoint, duracion, medicion)
+        if medicion.repetidas:
+            cls._loggear_repetidas(endpoint, medicion)
+
+    @staticmethod
+    def _loggear_lento(endpoint: str, duracion: float, medicion: MedicionRequest) -> None:
+        cls = InstrumentacionRequests
+        lineas = [
+            f"Request lento: {request.method} {endpoint} {duracion * 1000:.0f} ms "
+            f"(status {medicion.status}, SQL {medicion.sql_sentencias} sentencias / {medicion.sql_segundos * 1000:.0f} ms, "
+            f"templates {medicion.template_segundos * 1000:.0f} ms)"
+        ]
+        for sentencia, segundos in medicion.sentencias:
+            lineas.append(f"  {segundos * 1000:7.1f} ms  {sentencia}")
+        omitidas = medicion.sql_sentencias - len(medicion.sentencias)
+        if omitidas > 0:
+            lineas.append(f"  ... {omitidas} sentencias más")
+        logger.warning("\n".join(lineas))
+
+    @staticmethod
+    def _loggear_repetidas(endpoint: str, medicion: MedicionRequest) -> None:
+        lineas = [f"Posible N+1 en {request.method} {endpoint}:"]
+        for forma, pila in medicion.repetidas.items():
+            lineas.append(f"  {medicion.formas[forma]}x {forma[:InstrumentacionRequests.MAX_LARGO_SENTENCIA]}")
+            lineas.extend(pila)
+        logger.warning("\n".join(lineas))
+
+    # --- Eventos de SQLAlchemy ---
+
+    @staticmethod
+    def _antes_sql(conn, cursor, statement, parameters, context, executemany) -> None:
+        InstrumentacionRequests._actual.inicio_sql = time.perf_counter()
+
+    @staticmethod
+    def _despues_sql(conn, cursor, statement, parameters, context, executemany) -> None:
+        cls = InstrumentacionRequests
+        inicio = getattr(cls._actual, 'inicio_sql', None)
+        if inicio is None:
+            return
+        segundos = time.perf_counter() - inicio
+        cls._actual.inicio_sql = None
+        if statement.lstrip()[:7].upper().startswith(_SENTENCIAS_ESCRITURA):
+            DB_ESCRITURA_SEGUNDOS.observar(segundos)
+        medicion = cls.medicion_actual()
+        if medicion is None:
+            return
+        medicion.sql_sentencias += 1
+        medicion.sql_segundos += segundos
+        if len(medicion.sentencias) < cls.MAX_SENTENCIAS_LOG:
+            medicion.sentencias.append((' '.join(statement.split())[:cls.MAX_LARGO_SENTENCIA], segundos))
+        if cls.DETECTAR_N_MAS_UNO:
+            cls._contar_forma(medicion, statement)
+
+    @staticmethod
+    def _contar_forma(medicion: MedicionRequest, statement: str) -> None:
+        cls = InstrumentacionRequests
+        forma = normalizar_sentencia(statement)
+        cantidad = medicion.formas.get(forma, 0) + 1
+        medicion.formas[forma] = cantidad
+        if cantidad == cls.UMBRAL_N_MAS_UNO + 1:
+            pila = pila_de_la_app()
+            medicion.repetidas[forma] = pila
+            if cls.N_MAS_UNO_ESTRICTO:
+                raise ConsultasRepetidasError(forma, cantidad, pila)
+
+    @staticmethod
+    def _error_sql(contexto) -> None:
+        InstrumentacionRequests._actual.inicio_sql = None
+        if 'database is locked' in str(contexto.original_exception):
+            DB_BLOQUEOS.inc()
+
+    # --- Señales de templates ---
+
+    @staticmethod
+    def _antes_template(sender, template, context, **extra) -> None:
+        medicion = InstrumentacionRequests.medicion_actual()
+        if medicion is not None:
+            medicion.inicios_template.append(time.perf_counter())
+
+    @staticmethod
+    def _despues_template(sender, template, context, **extra) -> None:
+        medicion = InstrumentacionRequests.medicion_actual()
+        if medicion is not None and medicion.inicios_template:
+            segundos = time.perf_counter() - medicion.inicios_template.pop()
+            # Un render_template anidado ya está contado en el de afuera
+            if not medicion.inicios_template:
+                medicion.template_segundos += segundos
+
+    # --- Consultas ---
+
+    @staticmethod
+    def estadisticas() -> List[dict]:
+        """Resumen por endpoint (copias, se pueden usar sin lock)."""
+        resultado = []
+        for estadisticas in list(InstrumentacionRequests._endpoints.values()):
+            with estadisticas.lock:
+                histograma = estadisticas.duracion.copia()
+                fila = {
+                    'endpoint': estadisticas.endpoint,
+                    'requests': histograma.cantidad,
+                    'lentos': estadisticas.lentos,
+                    'errores': estadisticas.errores,
+                    'sql_sentencias': estadisticas.sql_sentencias,
+                    'sql_ms': estadisticas.sql_segundos * 1000,
+                    'template_ms': estadisticas.template_segundos * 1000,
+                }
+            cantidad = histograma.cantidad or 1
+            fila.update({
+                'histograma': histograma,
+                'p50_ms': histograma.percentil(50),
+                'p95_ms': histograma.percentil(95),
+                'p99_ms': histograma.percentil(99),
+                'max_ms': histograma.maximo_us / 1000,
+                'promedio_ms': histograma.suma_us / 1000 / cantidad,
+                'sql_por_request': fila['sql_sentencias'] / cantidad,
+                'sql_ms_por_request': fila['sql_ms'] / cantidad,
+                'template_ms_por_request': fila['template_ms'] / cantidad,
+            })
+            resultado.append(fila)
+        return resultado
+
+    @staticmethod
+    def top_lentos(cantidad: int = 10) -> List[dict]:
+        """Endpoints ordenados por p95 (el más lento primero)."""
+        return sorted(
+            InstrumentacionRequests.estadisticas(),
+            key=lambda fila: (fila['p95_ms'], fila['max_ms']),
+            reverse=True,
+        )[:cantidad]
+
+    @staticmethod
+    def reiniciar() -> None:
+        with InstrumentacionRequests._lock:
+            InstrumentacionRequests._endpoints.clear()
+
+
+
+def _colector_metricas():
+    """Requests por endpoint (desde los histogramas HDR), pool de conexiones y caches."""
+    requests_, sql, sql_segundos, templates, errores = [], [], [], [], []
+    for fila in InstrumentacionRequests.estadisticas():
+        endpoint = fila['endpoint']
+        etiquetas = {'blueprint': endpoint.rsplit('.', 1)[0] if '.' in endpoint else '', 'endpoint': endpoint}
+        histograma = fila['histograma']
+        buckets = [(limite, histograma.acumulado_hasta(limite * 1000)) for limite in LIMITES_LATENCIA]
+        buckets.append((float('inf'), histograma.cantidad))
+        requests_.append((etiquetas, (buckets, histograma.suma_us / 1_000_000, histograma.cantidad)))
+        sql.append((etiquetas, fila['sql_sentencias']))
+        sql_segundos.append((etiquetas, fila['sql_ms'] / 1000))
+        templates.append((etiquetas, fila['template_ms'] / 1000))
+        errores.append((etiquetas, fila['errores']))
+    yield 'http_request_segundos', 'histogram', 'Duración de los requests por blueprint y endpoint', requests_
+    yield 'http_request_errores_total', 'counter', 'Requests con error (status 5xx o excepción)', errores
+    yield 'http_sql_sentencias_total', 'counter', 'Sentencias SQL ejecutadas durante requests', sql
+    yield 'http_sql_segundos_total', 'counter', 'Tiempo en SQL durante requests', sql_segundos
+    yield 'http_template_segundos_total', 'counter', 'Tiempo de render de templates', templates
+
+    from app.database import db
+    pool = db.engine.pool
+    estado = []
+    for nombre in ('size', 'checkedin', 'checkedout', 'overflow'):
+        metodo = getattr(pool, nombre, None)
+        if callable(metodo):
+            estado.append(({'estado': nombre}, metodo()))
+    yield 'db_pool_conexiones', 'gauge', f'Conexiones del pool ({type(pool).__name__})', estado
+
+    consultas = {}
+    for etiquetas, valor in Metricas.contador(
+        'cache_consultas_total', 'Consultas a caches en memoria', ('cache', 'resultado')
+    ).muestras():
+        consultas.setdefault(etiquetas['cache'], {})[etiquetas['resultado']] = valor
+    yield 'cache_hit_ratio', 'gauge', 'Fracción de consultas resueltas por el cache', [
+        ({'cache': cache}, valores.get('hit', 0) / total)
+        for cache, valores in sorted(consultas.items())
+        if (total := valores.get('hit', 0) + valores.get('miss', 0))
+    ]
+
+
+class ContadorConsultas:
+    """
+    Cuenta las sentencias SQL que ejecuta el hilo actual dentro de un bloque.
+
+    Uso:
+        with ContadorConsultas() as consultas:
+            client.get('/turnos')
+        consultas.total, consultas.repetidas(umbral=5)
+    """
+
+    def __init__(self):
+        self.sentencias: List[str] = []
+        self.formas: Dict[str, int] = {}
+        self.pilas: Dict[str, List[str]] = {}
+        self._hilo = None
+
+    def __enter__(self) -> 'ContadorConsultas':
+        self._hilo = threading.get_ident()
+        event.listen(Engine, 'after_cursor_execute', self._registrar)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(Engine, 'after_cursor_execute', self._registrar)
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if threading.get_ident() != self._hilo:
+            return
+        forma = normalizar_sentencia(statement)
+        self.sentencias.append(forma)
+        self.formas[forma] = self.formas.get(forma, 0) + 1
+        if forma not in self.pilas:
+            self.pilas[forma] = pila_de_la_app()
+
+    @property
+    def total(self) -> int:
+        return len(self.sentencias)
+
+    def repetidas(self, umbral: int = InstrumentacionRequests.UMBRAL_N_MAS_UNO) -> Dict[str, int]:
+        """Formas ejecutadas más de `umbral` veces."""
+        return {forma: cantidad for forma, cantidad in self.formas.items() if cantidad > umbral}
+
+    def resumen(self) -> str:
+        """Formas de sentencia con su cantidad y la pila de la primera ejecución."""
+        lineas = [f"{self.total} sentencias SQL:"]
+        for forma, cantidad in sorted(self.formas.items(), key=lambda item: -item[1]):
+            lineas.append(f"  {cantidad}x {forma[:InstrumentacionRequests.MAX_LARGO_SENTENCIA]}")
+            lineas.extend(f"    {linea.strip()}" for linea in self.pilas[forma][-3:])
+        return "\n".join(lineas)
+
+
+__all__ = [
+    "ConsultasRepetidasError",
+    "ContadorConsultas",
+    "HistogramaLatencias",
+    "InstrumentacionRequests",
+    "normalizar_sentencia",
+]
+
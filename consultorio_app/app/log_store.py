@@ -0,0 +1,305 @@
+"""
+Store estructurado de logs en SQLite, con búsqueda full-text sobre el mensaje.
+
+Complementa a los archivos .log: cada registro se guarda también como fila
+(timestamp, nivel, logger, canal, mensaje, datos JSON) en logs/registros.db,
+una base aparte de la del consultorio para no competir por su lock.
+
+- Append-only: sólo se inserta; la retención borra por antigüedad.
+- Las escrituras van en lotes desde el hilo del QueueListener (nunca desde el
+  hilo del request): SQLiteLogHandler junta registros y los inserta de a muchos.
+- La búsqueda usa índices por fecha y logger y una tabla FTS5 sobre el mensaje.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Canales: a qué archivo .log corresponde cada registro
+CANAL_APP = 'app'
+CANAL_WHATSAPP = 'whatsapp'
+CANAL_SECURITY = 'security'
+CANAL_ERRORS = 'errors'
+
+_ESQUEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS registros (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        nivel INTEGER NOT NULL,
+        nivel_nombre TEXT NOT NULL,
+        logger TEXT NOT NULL,
+        canal TEXT NOT NULL,
+        mensaje TEXT NOT NULL,
+        datos TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_registros_ts ON registros (ts)",
+    "CREATE INDEX IF NOT EXISTS ix_registros_canal_ts ON registros (canal, ts)",
+    "CREATE INDEX IF NOT EXISTS ix_registros_logger_ts ON registros (logger, ts)",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS registros_fts
+    USING fts5(mensaje, content='registros', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS registros_ai AFTER INSERT ON registros BEGIN
+        INSERT INTO registros_fts (rowid, mensaje) VALUES (new.id, new.mensaje);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS registros_ad AFTER DELETE ON registros BEGIN
+        INSERT INTO registros_fts (registros_fts, rowid, mensaje) VALUES ('delete', old.id, old.mensaje);
+    END
+    """,
+)
+
+
+def canal_de(nombre_logger: str) -> str:
+    """Canal (archivo .log) al que va un logger."""
+    raiz = nombre_logger.split('.', 1)[0]
+    if raiz == CANAL_WHATSAPP:
+        return CANAL_WHATSAPP
+    if raiz == CANAL_SECURITY:
+        return CANAL_SECURITY
+    return CANAL_APP
+
+
+class LogStore:
+    """Acceso a logs/registros.db (escritura en lotes y consultas)."""
+
+    _ruta: Optional[Path] = None
+
+    @staticmethod
+    def inicializar(ruta: Path) -> None:
+        """Crea el esquema si no existe y deja la ruta configurada."""
+        conexion = LogStore._conectar(ruta)
+        try:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            for sentencia in _ESQUEMA:
+                conexion.execute(sentencia)
+            conexion.commit()
+        finally:
+            conexion.close()
+        LogStore._ruta = Path(ruta)
+
+    @staticmethod
+    def disponible() -> bool:
+        return LogStore._ruta is not None
+
+    @staticmethod
+    def _conectar(ruta: Path = None) -> sqlite3.Connection:
+        conexion = sqlite3.connect(str(ruta or LogStore._ruta), timeout=5, check_same_thread=False)
+        conexion.row_factory = sqlite3.Row
+        return conexion
+
+    @staticmethod
+    def insertar(conexion: sqlite3.Connection, filas: List[tuple]) -> None:
+        """Inserta un lote en una sola transacción."""
+        with conexion:
+            conexion.executemany(
+                "INSERT INTO registros (ts, nivel, nivel_nombre, logger, canal, mensaje, datos) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                filas,
+            )
+
+    @staticmethod
+    def buscar(
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        logger: Optional[str] = None,
+        nivel: Optional[str] = None,
+        texto: Optional[str] = None,
+        canal: Optional[str] = None,
+        limite: int = 200,
+    ) -> List[Dict[str, Any]]:
+        """
+        Registros que cumplen los filtros, del más reciente al más viejo.
+
+        Args:
+            desde / hasta: Rango de fechas (inclusive)
+            logger: Nombre del logger; incluye a sus hijos (ej: 'app.services')
+            nivel: Nivel exacto (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+            texto: Palabras que deben aparecer en el mensaje (búsqueda full-text, por prefijo)
+            canal: app, whatsapp, security o errors (errors = nivel ERROR o mayor)
+            limite: Máximo de registros
+
+        Returns:
+            Lista de dicts con id, ts (datetime), nivel, logger, canal, mensaje y datos
+        """
+        if not LogStore.disponible():
+            return []
+
+        condiciones, parametros = [], []
+        if desde:
+            condiciones.append('r.ts >= ?')
+            parametros.append(desde.timestamp())
+        if hasta:
+            condiciones.append('r.ts <= ?')
+            parametros.append(hasta.timestamp())
+        if logger:
+            condiciones.append("(r.logger = ? OR r.logger LIKE ? ESCAPE '\\')")
+            parametros += [logger, LogStore._escapar_like(logger) + '.%']
+        if nivel:
+            condiciones.append('r.nivel_nombre = ?')
+            parametros.append(nivel.upper())
+        if canal == CANAL_ERRORS:
+            condiciones.append('r.nivel >= ?')
+            parametros.append(logging.ERROR)
+        elif canal:
+            condiciones.append('r.canal = ?')
+            parametros.append(canal)
+
+        consulta = 'SELECT r.* FROM registros r'
+        terminos = LogStore._consulta_fts(texto)
+        if terminos:
+            consulta += ' JOIN registros_fts f ON f.rowid = r.id'
+            condiciones.append('registros_fts MATCH ?')
+            parametros.append(terminos)
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        consulta += ' ORDER BY r.ts DESC, r.id DESC LIMIT ?'
+        parametros.append(int(limite))
+
+        conexion = LogStore._conectar()
+        try:
+            filas = conexion.execute(consulta, parametros).fetchall()
+        finally:
+            conexion.close()
+        return [
+            {
+                'id': fila['id'],
+                'ts': datetime.fromtimestamp(fila['ts']),
+                'nivel': fila['nivel_nombre'],
+                'logger': fila['logger'],
+                'canal': fila['canal'],
+                'mensaje': fila['mensaje'],
+                'datos': json.loads(fila['datos']) if fila['datos'] else {},
+            }
+            for fila in filas
+        ]
+
+    @staticmethod
+    def _escapar_like(texto: str) -> str:
+        """Texto literal para un patrón LIKE con ESCAPE '\\' (ej: lista_espera)."""
+        return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def _consulta_fts(texto: Optional[str]) -> str:
+        """Convierte el texto del usuario en una consulta FTS5 segura (todas las palabras, por prefijo)."""
+        palabras = [p.replace('"', '""') for p in (texto or '').split() if p.strip('"')]
+        return ' AND '.join(f'"{palabra}"*' for palabra in palabras)
+
+    @staticmethod
+    def purgar(dias: int) -> int:
+        """
+        Borra los registros más viejos que `dias` días.
+
+        Returns:
+            Cantidad de registros borrados
+        """
+        if not LogStore.disponible():
+            return 0
+        limite = (datetime.now() - timedelta(days=dias)).timestamp()
+        conexion = LogStore._conectar()
+        try:
+            with conexion:
+                borrados = conexion.execute('DELETE FROM registros WHERE ts < ?', (limite,)).rowcount
+        finally:
+            conexion.close()
+        return borrados
+
+    @staticmethod
+    def formatear(registro: Dict[str, Any]) -> str:
+        """Línea con el mismo formato que los archivos .log."""
+        return (
+            f"{registro['ts'].strftime('%Y-%m-%d %H:%M:%S')} | {registro['nivel']:<8} | "
+            f"{registro['logger']} | {registro['mensaje']}\n"
+        )
+
+
+class SQLiteLogHandler(logging.Handler):
+    """
+    Handler que inserta en LogStore por lotes.
+
+    Pensado para correr detrás de un QueueListener: emit sólo agrega a un buffer;
+    el lote se escribe al llegar a TAMANO_LOTE registros o cada INTERVALO_FLUSH
+    segundos (hilo propio), lo que ocurra primero.
+    """
+
+    TAMANO_LOTE = 200
+    INTERVALO_FLUSH = 1.0
+
+    # Atributos estándar de LogRecord: el resto (extra=...) va a la columna datos
+    _ATRIBUTOS_ESTANDAR = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self._buffer: List[tuple] = []
+        self._conexion: Optional[sqlite3.Connection] = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._flush_periodico, name='log-store-flush', daemon=True)
+        self._hilo.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            datos = {
+                clave: valor for clave, valor in vars(record).items()
+                if clave not in self._ATRIBUTOS_ESTANDAR and not clave.startswith('_')
+            }
+            self._buffer.append((
+                record.created,
+                record.levelno,
+                record.levelname,
+                record.name,
+                canal_de(record.name),
+                record.getMessage(),
+                json.dumps(datos, ensure_ascii=False, default=str) if datos else None,
+            ))
+            if len(self._buffer) >= self.TAMANO_LOTE:
+                self._escribir()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._escribir()
+        finally:
+            self.release()
+
+    def _escribir(self) -> None:
+        """Inserta el buffer (llamar con el lock del handler tomado)."""
+        if not self._buffer or not LogStore.disponible():
+            return
+        lote, self._buffer = self._buffer, []
+        try:
+            if self._conexion is None:
+                self._conexion = LogStore._conectar()
+            LogStore.insertar(self._conexion, lote)
+        except sqlite3.Error:
+            # Un log que no se pudo guardar no debe tirar la app: queda en los archivos .log
+            pass
+
+    def _flush_periodico(self) -> None:
+        while not self._detener.wait(self.INTERVALO_FLUSH):
+            self.flush()
+
+    def close(self) -> None:
+        self._detener.set()
+        self.flush()
+        self.acquire()
+        try:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+        finally:
+            self.release()
+        super().close()
+
+
+__all__ = ["LogStore", "SQLiteLogHandler", "canal_de"]
@@ -4,15 +4,85 @@ Configuración de logging para la aplicación.
 Proporciona logging estructurado con niveles apropriados para
 desarrollo y producción.
 
+Los handlers de archivo (y el store SQLite) no corren en el hilo que loggea:
+los loggers sólo tienen un QueueHandler hacia una cola acotada, y un único
+QueueListener en segundo plano escribe en disco y rota. Si la cola se llena,
+primero se descartan los DEBUG.
+
 REGLA DE SEGURIDAD: Nunca loggear datos clínicos (nombres, DNI, diagnósticos, montos)
 Solo loggear IDs numéricos y eventos técnicos.
 """
 
 import os
+import atexit
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import sys
 from app.config import PathManager, SettingsLoader
+from app.log_store import LogStore, SQLiteLogHandler, canal_de
+
+# Listener en segundo plano que escribe todos los handlers de archivo (uno por proceso)
+_log_listener = None
+_log_queue_handler = None
+_log_loggers = []
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler sobre una cola acotada que nunca bloquea por mucho tiempo.
+
+    - Con la cola por encima de UMBRAL_PRESION, los DEBUG se descartan.
+    - Con la cola llena, el resto espera hasta ESPERA_MAXIMA segundos y, si
+      sigue llena, también se descarta. Los descartes se cuentan.
+    """
+
+    UMBRAL_PRESION = 0.8
+    ESPERA_MAXIMA = 0.5
+
+    def __init__(self, cola: queue.Queue):
+        super().__init__(cola)
+        self._umbral = int(cola.maxsize * self.UMBRAL_PRESION) if cola.maxsize > 0 else None
+        self._lock_contadores = threading.Lock()
+        self.descartados_debug = 0
+        self.descartados = 0
+
+    def enqueue(self, record):
+        if record.levelno <= logging.DEBUG and self._umbral is not None and self.queue.qsize() >= self._umbral:
+            with self._lock_contadores:
+                self.descartados_debug += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno <= logging.DEBUG:
+                with self._lock_contadores:
+                    self.descartados_debug += 1
+                return
+            try:
+                self.queue.put(record, timeout=self.ESPERA_MAXIMA)
+            except queue.Full:
+                with self._lock_contadores:
+                    self.descartados += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener cuyo stop() espera lugar en la cola acotada para el centinela."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class CanalFilter(logging.Filter):
+    """Deja pasar sólo los registros de un canal (app, whatsapp, security)."""
+
+    def __init__(self, canal: str):
+        super().__init__()
+        self.canal = canal
+
+    def filter(self, record):
+        return canal_de(record.name) == self.canal
 
 
 class SanitizingFormatter(logging.Formatter):
@@ -48,6 +118,7 @@ def configure_logging(app):
     - logs/whatsapp.log - Eventos de WhatsApp
     - logs/security.log - Eventos de seguridad (login, permisos)
     - logs/errors.log - Solo errores y excepciones
+    - logs/registros.db - Store SQLite con todos los registros (búsqueda del panel admin)
     
     Usa PathManager para determinar ubicación dinámica de logs
     (desarrollo vs PyInstaller).
@@ -74,7 +145,8 @@ def configure_logging(app):
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     
-    # Limpiar handlers existentes (evitar duplicados en reloads)
+    # Detener el listener anterior (reloads) y limpiar handlers existentes (evitar duplicados)
+    detener_logging()
     root_logger.handlers.clear()
     
     # Formato de logs con timestamp y nivel
@@ -94,6 +166,9 @@ def configure_logging(app):
     max_bytes = SettingsLoader.get_int('logging', 'max_file_size_mb', 10) * 1024 * 1024
     backup_count = SettingsLoader.get_int('logging', 'backup_count', 10)
     
+    # Handlers que atiende el listener; cada uno filtra su canal
+    file_handlers = []
+    
     # === Handler principal (app.log) ===
     try:
         app_handler = RotatingFileHandler(
@@ -104,7 +179,8 @@ def configure_logging(app):
         )
         app_handler.setLevel(log_level)
         app_handler.setFormatter(log_format)
-        root_logger.addHandler(app_handler)
+        app_handler.addFilter(CanalFilter('app'))
+        file_handlers.append(app_handler)
     except Exception as e:
         print(f"ERROR: No se pudo configurar app.log: {e}", file=sys.stderr)
     
@@ -118,7 +194,8 @@ def configure_logging(app):
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(log_format)
-        root_logger.addHandler(error_handler)
+        error_handler.addFilter(CanalFilter('app'))
+        file_handlers.append(error_handler)
     except Exception as e:
         print(f"ERROR: No se pudo configurar errors.log: {e}", file=sys.stderr)
     
@@ -126,6 +203,7 @@ def configure_logging(app):
     whatsapp_logger = logging.getLogger('whatsapp')
     whatsapp_logger.setLevel(log_level)
     whatsapp_logger.propagate = False  # No propagar al root
+    whatsapp_logger.handlers.clear()
     
     try:
         whatsapp_handler = RotatingFileHandler(
@@ -136,7 +214,8 @@ def configure_logging(app):
         )
         whatsapp_handler.setLevel(log_level)
         whatsapp_handler.setFormatter(log_format)
-        whatsapp_logger.addHandler(whatsapp_handler)
+        whatsapp_handler.addFilter(CanalFilter('whatsapp'))
+        file_handlers.append(whatsapp_handler)
     except Exception as e:
         print(f"ERROR: No se pudo configurar whatsapp.log: {e}", file=sys.stderr)
     
@@ -144,6 +223,7 @@ def configure_logging(app):
     security_logger = logging.getLogger('security')
     security_logger.setLevel(logging.INFO)
     security_logger.propagate = False
+    security_logger.handlers.clear()
     
     try:
         security_handler = RotatingFileHandler(
@@ -154,10 +234,22 @@ def configure_logging(app):
         )
         security_handler.setLevel(logging.INFO)
         security_handler.setFormatter(log_format)
-        security_logger.addHandler(security_handler)
+        security_handler.addFilter(CanalFilter('security'))
+        file_handlers.append(security_handler)
     except Exception as e:
         print(f"ERROR: No se pudo configurar security.log: {e}", file=sys.stderr)
     
+    # === Store estructurado (SQLite + FTS) ===
+    if SettingsLoader.get_bool('logging', 'store_enabled', True):
+        try:
+            LogStore.inicializar(log_dir / 'registros.db')
+            file_handlers.append(SQLiteLogHandler())
+        except Exception as e:
+            print(f"ERROR: No se pudo configurar registros.db: {e}", file=sys.stderr)
+    
+    # === Cola acotada + listener único ===
+    _iniciar_listener(file_handlers, [root_logger, whatsapp_logger, security_logger])
+    
     # Configurar loggers de módulos de la app
     logging.getLogger('app.services').setLevel(log_level)
     logging.getLogger('app.adapters').setLevel(log_level)
@@ -179,4 +271,65 @@ def configure_logging(app):
     root_logger.info("=" * 60)
 
 
-__all__ = ["configure_logging"]
+def _iniciar_listener(handlers, loggers):
+    """Conecta los loggers a la cola y arranca el QueueListener que escribe en disco."""
+    global _log_listener, _log_queue_handler, _log_loggers
+    capacidad = SettingsLoader.get_int('logging', 'cola_max', 10000)
+    cola = queue.Queue(maxsize=capacidad)
+    _log_queue_handler = BoundedQueueHandler(cola)
+    _log_loggers = list(loggers)
+    for logger in _log_loggers:
+        logger.addHandler(_log_queue_handler)
+    _log_listener = DrainingQueueListener(cola, *handlers, respect_handler_level=True)
+    _log_listener.start()
+
+
+def detener_logging():
+    """
+    Vacía la cola de logs, detiene el listener y cierra los archivos.
+
+    Se llama al salir (atexit), al reconfigurar y antes de os._exit en /shutdown
+    (que no ejecuta atexit).
+    """
+    global _log_listener, _log_queue_handler, _log_loggers
+    listener, _log_listener = _log_listener, None
+    queue_handler, _log_queue_handler = _log_queue_handler, None
+    loggers, _log_loggers = _log_loggers, []
+    if queue_handler is not None:
+        for logger in loggers:
+            logger.removeHandler(queue_handler)
+    if listener is None:
+        return
+    # stop() encola el centinela y espera a que el listener procese todo lo anterior
+    listener.stop()
+    for handler in listener.handlers:
+        try:
+            handler.flush()
+            handler.close()
+        except Exception:
+            pass
+    if queue_handler.descartados or queue_handler.descartados_debug:
+        print(
+            f"[logging] Registros descartados por cola llena: {queue_handler.descartados} "
+            f"(DEBUG: {queue_handler.descartados_debug})",
+            file=sys.stderr,
+        )
+
+
+def estadisticas_logging():
+    """Estado de la cola de logs (para métricas)."""
+    queue_handler = _log_queue_handler
+    if queue_handler is None:
+        return {'en_cola': 0, 'capacidad': 0, 'descartados': 0, 'descartados_debug': 0}
+    return {
+        'en_cola': queue_handler.queue.qsize(),
+        'capacidad': queue_handler.queue.maxsize,
+        'descartados': queue_handler.descartados,
+        'descartados_debug': queue_handler.descartados_debug,
+    }
+
+
+atexit.register(detener_logging)
+
+
+__all__ = ["configure_logging", "detener_logging", "estadisticas_logging"]
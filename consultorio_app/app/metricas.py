@@ -0,0 +1,292 @@
+"""
+Métricas del proceso en formato de texto de Prometheus.
+
+Contadores e histogramas baratos de actualizar desde cualquier hilo: cada hilo
+escribe en su propia celda (sin locks ni contención) y la exportación suma las
+celdas. El lock sólo se toma la primera vez que un hilo usa una métrica, al
+terminar el hilo (su celda se acumula en una base) y al exportar.
+
+- Métricas "push": se declaran a nivel de módulo donde ocurre el evento
+  (ej: RATE_LIMIT_RECHAZOS = Metricas.contador(...)) y se actualizan en línea.
+- Métricas "pull": valores que ya existen en otro lado (tamaño de una cola,
+  estado del pool) se leen al exportar, con Metricas.registrar_colector.
+
+No depende de Flask: lo pueden usar servicios, adapters y el scheduler.
+"""
+
+import bisect
+import math
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Límites (en segundos) por defecto de los histogramas de latencia
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (etiquetas, valor) de una muestra; para histogramas el valor es (buckets acumulados, suma, cantidad)
+Muestra = Tuple[Dict[str, str], object]
+
+
+class _Duena:
+    """Marca por hilo: cuando el hilo termina se libera y su celda pasa a la base."""
+
+    __slots__ = ('__weakref__',)
+
+
+class _Celdas:
+    """
+    Una lista de números por hilo; sólo el hilo dueño escribe en la suya.
+
+    Al terminar un hilo su celda se suma a `_base` y se descarta: con un hilo
+    por conexión (servidor de desarrollo) la cantidad de celdas queda acotada
+    por los hilos vivos.
+    """
+
+    __slots__ = ('_local', '_celdas', '_base', '_lock', '_largo')
+
+    def __init__(self, largo: int):
+        self._local = threading.local()
+        self._celdas: List[list] = []
+        self._base = [0] * largo
+        self._lock = threading.Lock()
+        self._largo = largo
+
+    def propia(self) -> list:
+        try:
+            return self._local.celda
+        except AttributeError:
+            celda = [0] * self._largo
+            duena = _Duena()
+            with self._lock:
+                self._celdas.append(celda)
+            self._local.celda = celda
+            self._local.duena = duena
+            weakref.finalize(duena, self._retirar, celda)
+            return celda
+
+    def _retirar(self, celda: list) -> None:
+        """Pasa la celda de un hilo terminado a la base."""
+        with self._lock:
+            for indice, valor in enumerate(celda):
+                self._base[indice] += valor
+            # Por identidad: otra celda viva puede tener los mismos valores
+            for posicion, otra in enumerate(self._celdas):
+                if otra is celda:
+                    del self._celdas[posicion]
+                    break
+
+    def cantidad(self) -> int:
+        """Celdas de hilos vivos (tests)."""
+        return len(self._celdas)
+
+    def sumar(self) -> list:
+        # Con el lock: una celda no puede contarse a la vez en la base y en la lista
+        with self._lock:
+            total = list(self._base)
+            for celda in self._celdas:
+                for indice, valor in enumerate(celda):
+                    total[indice] += valor
+        return total
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._base[:] = [0] * self._largo
+            for celda in self._celdas:
+                celda[:] = [0] * self._largo
+
+
+class Contador:
+    """Contador monótono."""
+
+    __slots__ = ('_celdas',)
+
+    def __init__(self):
+        self._celdas = _Celdas(1)
+
+    def inc(self, cantidad: float = 1) -> None:
+        self._celdas.propia()[0] += cantidad
+
+    def valor(self) -> float:
+        return self._celdas.sumar()[0]
+
+    def reiniciar(self) -> None:
+        self._celdas.reiniciar()
+
+
+class Histograma:
+    """Histograma con límites fijos (buckets de Prometheus)."""
+
+    __slots__ = ('limites', '_celdas')
+
+    def __init__(self, limites: Sequence[float] = LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        # Un conteo por límite + el bucket +Inf + la suma
+        self._celdas = _Celdas(len(self.limites) + 2)
+
+    def observar(self, valor: float) -> None:
+        celda = self._celdas.propia()
+        celda[bisect.bisect_left(self.limites, valor)] += 1
+        celda[-1] += valor
+
+    def valor(self) -> Tuple[List[Tuple[float, int]], float, int]:
+        """(buckets acumulados [(límite, cantidad)], suma, cantidad)."""
+        total = self._celdas.sumar()
+        acumulado, buckets = 0, []
+        for limite, conteo in zip(self.limites + (math.inf,), total[:-1]):
+            acumulado += conteo
+            buckets.append((limite, acumulado))
+        return buckets, total[-1], acumulado
+
+    def reiniciar(self) -> None:
+        self._celdas.reiniciar()
+
+
+class Familia:
+    """Métrica con etiquetas: una instancia de Contador/Histograma por combinación de valores."""
+
+    def __init__(self, nombre: str, tipo: str, ayuda: str, etiquetas: Sequence[str], fabrica: Callable[[], object]):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._fabrica = fabrica
+        self._hijos: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def con(self, *valores: str):
+        """Métrica para esos valores de etiquetas (en el orden declarado)."""
+        hijo = self._hijos.get(valores)
+        if hijo is None:
+            with self._lock:
+                hijo = self._hijos.setdefault(valores, self._fabrica())
+        return hijo
+
+    # Atajos para familias sin etiquetas
+    def inc(self, cantidad: float = 1) -> None:
+        self.con().inc(cantidad)
+
+    def observar(self, valor: float) -> None:
+        self.con().observar(valor)
+
+    def muestras(self) -> List[Muestra]:
+        return [
+            (dict(zip(self.etiquetas, valores)), hijo.valor())
+            for valores, hijo in sorted(self._hijos.items())
+        ]
+
+    def reiniciar(self) -> None:
+        for hijo in list(self._hijos.values()):
+            hijo.reiniciar()
+
+
+class Metricas:
+    """Registro de métricas del proceso y exportación en texto de Prometheus."""
+
+    PREFIJO = 'consultorio_'
+
+    _familias: Dict[str, Familia] = {}
+    _colectores: List[Callable[[], Iterable[tuple]]] = []
+    _lock = threading.Lock()
+
+    @staticmethod
+    def contador(nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Familia:
+        """Declara (o devuelve, si ya existe) un contador. El nombre va sin prefijo y termina en _total."""
+        return Metricas._registrar(nombre, 'counter', ayuda, etiquetas, Contador)
+
+    @staticmethod
+    def histograma(nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                   limites: Sequence[float] = LIMITES_LATENCIA) -> Familia:
+        """Declara (o devuelve, si ya existe) un histograma. El nombre va sin prefijo."""
+        return Metricas._registrar(nombre, 'histogram', ayuda, etiquetas, lambda: Histograma(limites))
+
+    @staticmethod
+    def _registrar(nombre, tipo, ayuda, etiquetas, fabrica) -> Familia:
+        cls = Metricas
+        nombre = cls.PREFIJO + nombre
+        with cls._lock:
+            familia = cls._familias.get(nombre)
+            if familia is None:
+                familia = cls._familias[nombre] = Familia(nombre, tipo, ayuda, etiquetas, fabrica)
+                if not familia.etiquetas:
+                    # Sin etiquetas se exporta en cero desde el arranque
+                    familia.con()
+            return familia
+
+    @staticmethod
+    def registrar_colector(colector: Callable[[], Iterable[tuple]]) -> None:
+        """
+        Registra una función que se llama al exportar.
+
+        Debe devolver tuplas (nombre sin prefijo, tipo, ayuda, [muestras]) donde
+        cada muestra es (dict de etiquetas, valor). Para 'histogram' el valor es
+        (buckets acumulados [(límite, cantidad)], suma, cantidad).
+        """
+        with Metricas._lock:
+            if colector not in Metricas._colectores:
+                Metricas._colectores.append(colector)
+
+    @staticmethod
+    def exportar() -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)."""
+        cls = Metricas
+        lineas: List[str] = []
+        for familia in list(cls._familias.values()):
+            cls._escribir(lineas, familia.nombre, familia.tipo, familia.ayuda, familia.muestras())
+        for colector in list(cls._colectores):
+            try:
+                for nombre, tipo, ayuda, muestras in colector():
+                    cls._escribir(lineas, cls.PREFIJO + nombre, tipo, ayuda, muestras)
+            except Exception as exc:
+                # Un colector roto no debe dejar sin métricas al resto
+                lineas.append(f"# colector {getattr(colector, '__name__', colector)} falló: {_escapar_comentario(str(exc))}")
+        return "\n".join(lineas) + "\n"
+
+    @staticmethod
+    def _escribir(lineas: List[str], nombre: str, tipo: str, ayuda: str, muestras: List[Muestra]) -> None:
+        lineas.append(f"# HELP {nombre} {_escapar_comentario(ayuda)}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, valor in muestras:
+            if tipo == 'histogram':
+                buckets, suma, cantidad = valor
+                for limite, acumulado in buckets:
+                    le = {'le': '+Inf' if limite == math.inf else _numero(limite)}
+                    lineas.append(f"{nombre}_bucket{_etiquetas({**etiquetas, **le})} {acumulado}")
+                lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(suma)}")
+                lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {cantidad}")
+            else:
+                lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+
+    @staticmethod
+    def reiniciar() -> None:
+        """Pone en cero las métricas declaradas (tests); los colectores quedan."""
+        for familia in list(Metricas._familias.values()):
+            familia.reiniciar()
+
+
+def _numero(valor: Optional[float]) -> str:
+    if valor is None:
+        return 'NaN'
+    if isinstance(valor, float):
+        if math.isinf(valor):
+            return '+Inf' if valor > 0 else '-Inf'
+        if valor.is_integer():
+            return str(int(valor))
+        return repr(valor)
+    return str(valor)
+
+
+def _etiquetas(etiquetas: Dict[str, str]) -> str:
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar_etiqueta(valor)}"' for clave, valor in etiquetas.items()) + '}'
+
+
+def _escapar_etiqueta(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _escapar_comentario(texto: str) -> str:
+    return texto.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+__all__ = ["Metricas", "Contador", "Histograma", "LIMITES_LATENCIA"]
@@ -13,6 +13,10 @@ from .odontograma import Odontograma, OdontogramaCara
 from .conversation import Conversation
 from .usuario import Usuario
 from .gasto import Gasto
+from .lista_espera import ListaEspera, ListaEsperaFranja
+from .recordatorio import RecordatorioTurno
+from .mensaje_saliente import MensajeSaliente
+from .mensaje_procesado import MensajeProcesado
 
 # Lista de todos los modelos para facilitar la importación
 __all__ = [
@@ -30,5 +34,10 @@ __all__ = [
     'OdontogramaCara',
     'Conversation',
     'Usuario',
-    'Gasto'
+    'Gasto',
+    'ListaEspera',
+    'ListaEsperaFranja',
+    'RecordatorioTurno',
+    'MensajeSaliente',
+    'MensajeProcesado',
 ]
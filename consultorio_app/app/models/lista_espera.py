@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Time, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.database import db
+
+
+class ListaEspera(db.Model):
+    """Paciente en espera de un turno que se libere dentro de sus franjas aceptables."""
+    __tablename__ = "lista_espera"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
+    paciente = relationship("Paciente", back_populates="lista_espera")
+    duracion = Column(Integer, default=30, nullable=False)  # Minutos que necesita el turno
+    detalle = Column(String, nullable=True)
+    activa = Column(Boolean, default=True, nullable=False)
+    ofertas_enviadas = Column(Integer, default=0, nullable=False)
+    ultima_oferta_en = Column(DateTime, nullable=True)
+    creado_en = Column(DateTime, default=datetime.now, nullable=False)
+
+    franjas = relationship("ListaEsperaFranja", back_populates="entrada", cascade="all, delete-orphan")
+
+    def __str__(self):
+        return f"Lista de espera {self.id} - paciente {self.paciente_id} ({self.duracion}min)"
+
+
+class ListaEsperaFranja(db.Model):
+    """Día de la semana y ventana horaria aceptable para una entrada de la lista de espera."""
+    __tablename__ = "lista_espera_franjas"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entrada_id = Column(Integer, ForeignKey("lista_espera.id"), nullable=False)
+    entrada = relationship("ListaEspera", back_populates="franjas")
+    dia_semana = Column(Integer, nullable=False)  # 0=lunes .. 6=domingo
+    hora_desde = Column(Time, nullable=False)
+    hora_hasta = Column(Time, nullable=False)
+
+    # El matcher busca por día exacto y rango de horas: no recorre toda la lista
+    __table_args__ = (
+        Index("ix_lista_espera_franjas_dia_hora", "dia_semana", "hora_desde", "hora_hasta"),
+    )
+
+    def __str__(self):
+        return f"{self.dia_semana} {self.hora_desde.strftime('%H:%M')}-{self.hora_hasta.strftime('%H:%M')}"
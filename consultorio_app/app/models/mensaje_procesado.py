@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Index
+from app.database import db
+
+
+class MensajeProcesado(db.Model):
+    """
+    Message id de WhatsApp ya procesado (deduplicación de webhooks).
+
+    Sobrevive a los reinicios: si Meta reenvía un webhook que ya se atendió,
+    el mensaje no vuelve a pasar por el ConversationService.
+    """
+    __tablename__ = "mensajes_procesados"
+
+    message_id = Column(String, primary_key=True)
+    recibido_en = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_mensajes_procesados_recibido_en", "recibido_en"),
+    )
+
+    def __repr__(self):
+        return f"<MensajeProcesado {self.message_id} {self.recibido_en}>"
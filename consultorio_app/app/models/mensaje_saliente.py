@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.database import db
+
+
+class MensajeSaliente(db.Model):
+    """
+    Mensaje de WhatsApp pendiente de envío (outbox).
+
+    Los workers de la cola lo envían en segundo plano; los mensajes de un mismo
+    destinatario salen en orden de id, y los que agotan los reintentos quedan
+    en estado 'muerto' para revisión manual.
+    """
+    __tablename__ = "mensajes_salientes"
+
+    # Estados del envío
+    PENDIENTE = 'pendiente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    MUERTO = 'muerto'
+
+    # Tipos de mensaje
+    TEXTO = 'texto'
+    PLANTILLA = 'plantilla'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    destinatario = Column(String, nullable=False)
+    tipo = Column(String, nullable=False, default=TEXTO)
+    contenido = Column(Text, nullable=False)  # JSON: {"texto"} o {"plantilla", "idioma", "parametros"}
+    clave = Column(String, nullable=True, unique=True)  # Idempotencia opcional
+    estado = Column(String, nullable=False, default=PENDIENTE)
+    intentos = Column(Integer, default=0, nullable=False)
+    proximo_intento_en = Column(DateTime, default=datetime.now, nullable=False)
+    ultimo_error = Column(String, nullable=True)
+    message_id = Column(String, nullable=True)
+    creado_en = Column(DateTime, default=datetime.now, nullable=False)
+    enviado_en = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_mensajes_salientes_estado_proximo", "estado", "proximo_intento_en"),
+        Index("ix_mensajes_salientes_destinatario", "destinatario", "id"),
+    )
+
+    def __str__(self):
+        return f"Mensaje {self.id} a {self.destinatario} ({self.estado}, {self.intentos} intentos)"
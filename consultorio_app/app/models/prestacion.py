@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload, joinedload
 from app.database import db
 
 class Prestacion(db.Model):
@@ -15,6 +15,12 @@ class Prestacion(db.Model):
     turnos = relationship("Turno", back_populates="prestacion")
     practicas_assoc = relationship("PrestacionPractica", back_populates="prestacion")
 
+    @staticmethod
+    def opciones_codigos():
+        """Opción de carga para usar get_codigos() en listados sin una consulta por prestación."""
+        from .prestacion_practica import PrestacionPractica
+        return selectinload(Prestacion.practicas_assoc).joinedload(PrestacionPractica.practica)
+
     def get_codigos(self) -> list[str]:
         codigos = []
         if self.practicas_assoc:
@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.database import db
+
+
+class RecordatorioTurno(db.Model):
+    """
+    Recordatorio de turno por WhatsApp.
+
+    `clave` es la clave de idempotencia (turno + fecha + hora): encolar dos veces
+    el mismo turno no crea un segundo recordatorio, y reprogramarlo sí.
+    """
+    __tablename__ = "recordatorios_turno"
+
+    # Estados del envío
+    PENDIENTE = 'pendiente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    ERROR = 'error'
+    DESCARTADO = 'descartado'  # El turno se canceló o se reprogramó antes del envío
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    clave = Column(String, nullable=False, unique=True)
+    turno_id = Column(Integer, ForeignKey("turnos.id", ondelete="CASCADE"), nullable=False)
+    turno = relationship("Turno")
+    telefono = Column(String, nullable=False)
+    plantilla = Column(String, nullable=False)
+    idioma = Column(String, nullable=False)
+    parametros = Column(Text, nullable=True)  # JSON con las variables de la plantilla
+    estado = Column(String, nullable=False, default=PENDIENTE)
+    intentos = Column(Integer, default=0, nullable=False)
+    message_id = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    creado_en = Column(DateTime, default=datetime.now, nullable=False)
+    enviado_en = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_recordatorios_turno_estado", "estado", "id"),
+    )
+
+    def __str__(self):
+        return f"Recordatorio {self.clave} ({self.estado})"
@@ -8,7 +8,7 @@ class Turno(db.Model):
     id = Column(Integer, primary_key=True)
     paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
     paciente = relationship("Paciente", back_populates="turnos")
-    fecha = Column(Date, nullable=False)
+    fecha = Column(Date, nullable=False, index=True)
     hora = Column(Time, nullable=False)
     duracion = Column(Integer, default=30, nullable=False)  # Duración en minutos (default 30)
     detalle = Column(String, nullable=True)
@@ -21,6 +21,10 @@ class Turno(db.Model):
     cambios_estado = relationship("CambioEstado", back_populates="turno", cascade="all, delete-orphan")
     prestacion_id = Column(Integer, ForeignKey("prestaciones.id"), nullable=True)
     prestacion = relationship("Prestacion", back_populates="turnos")
+    # Agenda multi-profesional / multi-sillón (opcionales)
+    profesional_id = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
+    profesional = relationship('Usuario')
+    sillon = Column(Integer, nullable=True)
 
     def __str__(self):
         return f"Turno {self.id} - {self.fecha} {self.hora} ({self.duracion}min) - {self.estado or 'Pendiente'}"
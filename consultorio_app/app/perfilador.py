@@ -0,0 +1,197 @@
+"""
+Perfilador por muestreo para diagnosticar lentitud en producción.
+
+Un hilo aparte toma cada `intervalo` segundos la pila de todos los hilos del
+proceso con sys._current_frames() (requests, scheduler, workers de WhatsApp) y
+cuenta cuántas veces aparece cada pila. El resultado se exporta en formato
+"collapsed stacks" (una línea por pila: frames separados por ';' y la
+cantidad de muestras), que leen flamegraph.pl, speedscope y similares.
+
+Es seguro dejarlo en los builds de producción:
+- No depende de nada nativo ni instala hooks: fuera de una medición no cuesta nada.
+- Una sola medición a la vez, con duración máxima y pilas truncadas.
+- El costo por muestra es recorrer los frames; con el intervalo por defecto
+  (10 ms) el overhead es de un pequeño porcentaje de un core mientras dura.
+
+No depende de Flask.
+"""
+
+import functools
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+
+class PerfiladorOcupadoError(RuntimeError):
+    """Ya hay una medición en curso."""
+
+
+class Perfil:
+    """Resultado de una medición: cantidad de muestras por pila."""
+
+    def __init__(self, pilas: Counter, muestras: int, duracion: float, intervalo: float, truncadas: int):
+        self.pilas = pilas
+        self.muestras = muestras
+        self.duracion = duracion
+        self.intervalo = intervalo
+        self.truncadas = truncadas
+
+    def plegado(self) -> str:
+        """Pilas en formato collapsed (raíz primero), de la más frecuente a la menos."""
+        return ''.join(f"{pila} {cantidad}\n" for pila, cantidad in self.pilas.most_common())
+
+    def resumen(self) -> Dict[str, object]:
+        return {
+            'muestras': self.muestras,
+            'pilas': len(self.pilas),
+            'duracion_s': round(self.duracion, 3),
+            'intervalo_ms': round(self.intervalo * 1000, 3),
+            'truncadas': self.truncadas,
+        }
+
+
+class PerfiladorMuestreo:
+    """Mediciones por muestreo de todos los hilos del proceso."""
+
+    MAX_SEGUNDOS = 60.0
+    INTERVALO_DEFECTO = 0.01
+    INTERVALO_MINIMO = 0.001
+    MAX_PROFUNDIDAD = 128
+    # Tope de pilas distintas: las que no entran se cuentan en una sola línea
+    MAX_PILAS = 20000
+    PILA_DESCARTADA = '[pilas descartadas]'
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def ocupado() -> bool:
+        return PerfiladorMuestreo._lock.locked()
+
+    @staticmethod
+    def perfilar(
+        segundos: float,
+        intervalo: float = INTERVALO_DEFECTO,
+        max_segundos: Optional[float] = None,
+    ) -> Perfil:
+        """
+        Muestrea todos los hilos durante `segundos` y devuelve el perfil.
+
+        Bloquea al hilo que llama (que no aparece en el perfil) mientras un hilo
+        'perfilador' toma las muestras.
+
+        Args:
+            segundos: Duración; se recorta a [0, max_segundos] (NaN = 0, inf = máximo)
+            intervalo: Segundos entre muestras; mínimo INTERVALO_MINIMO (no finito = INTERVALO_DEFECTO)
+            max_segundos: Tope de duración (por defecto MAX_SEGUNDOS)
+
+        Raises:
+            PerfiladorOcupadoError: Si ya hay una medición en curso
+        """
+        cls = PerfiladorMuestreo
+        # Acotar sin confiar en NaN: con min/max quedaría NaN y el muestreo no terminaría
+        maximo = float(max_segundos or cls.MAX_SEGUNDOS)
+        if not math.isfinite(maximo) or maximo <= 0:
+            maximo = cls.MAX_SEGUNDOS
+        segundos = float(segundos)
+        segundos = 0.0 if math.isnan(segundos) else min(max(segundos, 0.0), maximo)
+        intervalo = float(intervalo)
+        if not math.isfinite(intervalo):
+            intervalo = cls.INTERVALO_DEFECTO
+        intervalo = max(intervalo, cls.INTERVALO_MINIMO)
+
+        if not cls._lock.acquire(blocking=False):
+            raise PerfiladorOcupadoError("Ya hay una medición del perfilador en curso")
+        try:
+            resultado = {}
+            excluir = {threading.get_ident()}
+            hilo = threading.Thread(
+                target=lambda: resultado.update(perfil=cls._muestrear(segundos, intervalo, excluir)),
+                name='perfilador',
+                daemon=True,
+            )
+            hilo.start()
+            hilo.join()
+            return resultado['perfil']
+        finally:
+            cls._lock.release()
+
+    @staticmethod
+    def _muestrear(segundos: float, intervalo: float, excluir: set) -> Perfil:
+        cls = PerfiladorMuestreo
+        excluir = excluir | {threading.get_ident()}
+        pilas: Counter = Counter()
+        etiquetas: Dict[Tuple[object, int], str] = {}
+        nombres: Dict[int, str] = {}
+        muestras = truncadas = 0
+
+        inicio = time.perf_counter()
+        fin = inicio + segundos
+        proxima = inicio
+        while True:
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident in excluir:
+                    continue
+                nombre = nombres.get(ident)
+                if nombre is None:
+                    nombres.update((h.ident, h.name) for h in threading.enumerate())
+                    nombre = nombres.setdefault(ident, f"hilo-{ident}")
+                pila = cls._pila(frame, nombre, etiquetas)
+                if pila not in pilas and len(pilas) >= cls.MAX_PILAS:
+                    pila = f"{nombre};{cls.PILA_DESCARTADA}"
+                    truncadas += 1
+                pilas[pila] += 1
+            # No retener frames (y sus locals) entre muestras
+            frames = frame = None
+            muestras += 1
+
+            proxima += intervalo
+            ahora = time.perf_counter()
+            if proxima >= fin:
+                break
+            if proxima > ahora:
+                time.sleep(proxima - ahora)
+            else:
+                # Atrasados (GIL ocupado): no acumular muestras pendientes
+                proxima = ahora
+
+        return Perfil(pilas, muestras, time.perf_counter() - inicio, intervalo, truncadas)
+
+    @staticmethod
+    def _pila(frame, nombre_hilo: str, etiquetas: Dict[Tuple[object, int], str]) -> str:
+        """Pila del frame como 'hilo;raíz;...;hoja'."""
+        cls = PerfiladorMuestreo
+        partes = []
+        while frame is not None and len(partes) < cls.MAX_PROFUNDIDAD:
+            clave = (frame.f_code, frame.f_lineno)
+            etiqueta = etiquetas.get(clave)
+            if etiqueta is None:
+                etiqueta = etiquetas[clave] = cls._etiqueta(*clave)
+            partes.append(etiqueta)
+            frame = frame.f_back
+        if frame is not None:
+            partes.append('[pila truncada]')
+        partes.append(nombre_hilo.replace(';', ':'))
+        return ';'.join(reversed(partes))
+
+    @staticmethod
+    def _etiqueta(codigo, linea: int) -> str:
+        etiqueta = f"{codigo.co_name} ({_ruta_corta(codigo.co_filename)}:{linea})"
+        return etiqueta.replace(';', ':').replace('\n', ' ')
+
+
+@functools.lru_cache(maxsize=4096)
+def _ruta_corta(archivo: str) -> str:
+    """Ruta relativa a la entrada de sys.path que la contiene (app/..., flask/...)."""
+    prefijos = sorted({os.path.join(os.path.abspath(p), '') for p in sys.path if p}, key=len, reverse=True)
+    for prefijo in prefijos:
+        if archivo.startswith(prefijo):
+            return archivo[len(prefijo):].replace(os.sep, '/')
+    return archivo.replace(os.sep, '/')
+
+
+__all__ = ["PerfiladorMuestreo", "Perfil", "PerfiladorOcupadoError"]
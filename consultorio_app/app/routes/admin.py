@@ -5,15 +5,22 @@ Rutas exclusivas para el rol ADMIN.
 from flask import Blueprint, render_template, abort, request, jsonify, current_app, redirect, url_for, flash
 from flask_login import login_required, current_user
 from functools import wraps
+import math
 import os
+import time
 import logging
 from datetime import datetime
-from app.config import PathManager
+from app.config import PathManager, SettingsLoader
+from app.log_store import LogStore
+from app.instrumentacion import InstrumentacionRequests
+from app.metricas import Metricas
+from app.perfilador import PerfiladorMuestreo, PerfiladorOcupadoError
 from app.models import Usuario, Paciente, Turno, Prestacion
 from app.database import db
 from app.database.utils import backup_database
 from sqlalchemy import text
 from app.services.testing.run_tests_service import RunTestsService
+from app.services.visor_logs import LeerLogsService
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -68,9 +75,7 @@ def dashboard():
     log_file = PathManager.get_logs_dir() / 'app.log'
     if log_file.exists():
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                log_lines = f.readlines()[-50:]  # Últimas 50 líneas
-                log_lines.reverse()  # Más recientes primero
+            log_lines = LeerLogsService.execute(log_file, 50)  # Más recientes primero
         except Exception as e:
             log_lines = [f"Error leyendo log: {str(e)}"]
     else:
@@ -93,13 +98,18 @@ def dashboard():
                 ).strftime('%Y-%m-%d %H:%M:%S')
             })
     
+    # Endpoints más lentos desde que arrancó el proceso (por p95)
+    endpoints_lentos = InstrumentacionRequests.top_lentos(10)
+    
     return render_template(
         'admin/dashboard.html',
         stats=stats,
         db_info=db_info,
         log_lines=log_lines,
         usuarios=usuarios,
-        backups=backups
+        backups=backups,
+        endpoints_lentos=endpoints_lentos,
+        umbral_lento_ms=InstrumentacionRequests.UMBRAL_LENTO_MS
     )
 
 
@@ -138,6 +148,18 @@ def crear_backup():
     return redirect(url_for('admin.dashboard'))
 
 
+def _parse_fecha_filtro(valor):
+    """Fecha de los filtros de logs (input datetime-local o sólo fecha); None si vacía o inválida."""
+    if not valor:
+        return None
+    for formato in ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+    return None
+
+
 @admin_bp.route('/logs')
 @login_required
 @admin_required
@@ -150,11 +172,20 @@ def ver_logs():
         - level: DEBUG, INFO, WARNING, ERROR (default: todos)
         - lines: número de líneas a mostrar (default: 200)
         - search: búsqueda de texto
+        - desde / hasta: rango de fechas (YYYY-MM-DDTHH:MM)
+        - logger: nombre del logger (incluye sus hijos)
+    
+    Con búsqueda, rango, logger o log_type=todos se consulta el store SQLite
+    (índices + FTS); si no, se leen las últimas líneas del archivo.
     """
     log_type = request.args.get('log_type', 'app')
     level_filter = request.args.get('level', '')
     lines_count = int(request.args.get('lines', 200))
     search_term = request.args.get('search', '')
+    logger_filter = request.args.get('logger', '').strip()
+    desde = _parse_fecha_filtro(request.args.get('desde'))
+    hasta = _parse_fecha_filtro(request.args.get('hasta'))
+    consulta_ms = None
     
     # Mapeo de tipos de log a archivos
     logs_dir = PathManager.get_logs_dir()
@@ -173,7 +204,28 @@ def ver_logs():
         'ultima_modificacion': None
     }
     
-    if log_file.exists():
+    usar_store = LogStore.disponible() and (
+        log_type == 'todos' or search_term or logger_filter or desde or hasta
+    )
+    
+    if usar_store:
+        inicio = time.perf_counter()
+        try:
+            registros = LogStore.buscar(
+                desde=desde,
+                hasta=hasta,
+                logger=logger_filter or None,
+                nivel=level_filter or None,
+                texto=search_term or None,
+                canal=None if log_type == 'todos' else log_type,
+                limite=lines_count,
+            )
+            log_lines = [LogStore.formatear(registro) for registro in registros]
+        except Exception as e:
+            log_lines = [f"Error consultando el store de logs: {str(e)}"]
+            logger.error(f"Error consultando el store de logs: {e}")
+        consulta_ms = round((time.perf_counter() - inicio) * 1000, 1)
+    elif log_file.exists():
         file_info['existe'] = True
         file_info['tamano'] = log_file.stat().st_size
         file_info['ultima_modificacion'] = datetime.fromtimestamp(
@@ -181,21 +233,13 @@ def ver_logs():
         ).strftime('%Y-%m-%d %H:%M:%S')
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                all_lines = f.readlines()
-                
-                # Filtrar por nivel si se especificó
-                if level_filter:
-                    all_lines = [line for line in all_lines if level_filter in line]
-                
-                # Filtrar por término de búsqueda
-                if search_term:
-                    all_lines = [line for line in all_lines if search_term.lower() in line.lower()]
-                
-                # Tomar últimas N líneas
-                log_lines = all_lines[-lines_count:]
-                log_lines.reverse()  # Más recientes primero
-                
+            # Lee desde el final (y sigue por los rotados) hasta juntar N líneas
+            log_lines = LeerLogsService.execute(
+                log_file,
+                lines_count,
+                nivel=level_filter,
+                busqueda=search_term,
+            )
         except Exception as e:
             log_lines = [f"Error leyendo log: {str(e)}"]
             logger.error(f"Error leyendo {log_file}: {e}")
@@ -209,8 +253,12 @@ def ver_logs():
         level_filter=level_filter,
         lines_count=lines_count,
         search_term=search_term,
+        logger_filter=logger_filter,
+        desde=request.args.get('desde', ''),
+        hasta=request.args.get('hasta', ''),
+        consulta_ms=consulta_ms,
         file_info=file_info,
-        log_types=['app', 'whatsapp', 'security', 'errors'],
+        log_types=['app', 'whatsapp', 'security', 'errors', 'todos'],
         log_levels=['DEBUG', 'INFO', 'WARNING', 'ERROR']
     )
 
@@ -242,3 +290,69 @@ def download_log(log_type):
         as_attachment=True,
         download_name=f"{log_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
     )
+
+
+@admin_bp.route('/whatsapp/metricas')
+@login_required
+@admin_required
+def whatsapp_metricas():
+    """Métricas del pool HTTP de la Graph API y estado de la cola saliente."""
+    from app.services.whatsapp import ColaSalienteWorker, GraphHttpClient
+
+    return jsonify({
+        "http": GraphHttpClient.metricas(),
+        "cola": ColaSalienteWorker.contar_por_estado(),
+    })
+
+
+@admin_bp.route('/metrics')
+@login_required
+@admin_required
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    return current_app.response_class(
+        Metricas.exportar(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@admin_bp.route('/perfil', methods=['POST'])
+@login_required
+@admin_required
+def perfil():
+    """
+    Perfila todos los hilos por muestreo durante N segundos.
+
+    Parámetros (form o query): segundos (por defecto 10) e intervalo_ms (por
+    defecto 10). Devuelve un archivo .folded (collapsed stacks) para abrir con
+    speedscope o flamegraph.pl.
+    """
+    if not SettingsLoader.get_bool('metricas', 'perfilador', True):
+        abort(404)
+
+    try:
+        segundos = float(request.values.get('segundos', 10))
+        intervalo_ms = float(request.values.get('intervalo_ms', PerfiladorMuestreo.INTERVALO_DEFECTO * 1000))
+    except ValueError:
+        return jsonify({"error": "segundos e intervalo_ms deben ser numéricos"}), 400
+    if not (math.isfinite(segundos) and math.isfinite(intervalo_ms)) or segundos <= 0 or intervalo_ms <= 0:
+        return jsonify({"error": "segundos e intervalo_ms deben ser números positivos"}), 400
+
+    usuario = current_user.username if current_user.is_authenticated else 'anónimo'
+    logger.info(f"Perfilando {segundos:g} s (intervalo {intervalo_ms:g} ms) por usuario {usuario}")
+    try:
+        resultado = PerfiladorMuestreo.perfilar(
+            segundos,
+            intervalo_ms / 1000,
+            max_segundos=SettingsLoader.get_int('metricas', 'perfilador_max_segundos', 60),
+        )
+    except PerfiladorOcupadoError as e:
+        return jsonify({"error": str(e)}), 409
+    logger.info(f"Perfil terminado: {resultado.resumen()}")
+
+    respuesta = current_app.response_class(resultado.plegado(), mimetype='text/plain; charset=utf-8')
+    respuesta.headers['Content-Disposition'] = (
+        f"attachment; filename=perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+    )
+    respuesta.headers['X-Perfil-Muestras'] = str(resultado.muestras)
+    return respuesta
@@ -10,7 +10,9 @@ from app.database.session import DatabaseSession
 from app.models import Paciente, Turno, Prestacion, Estado, CambioEstado
 from app.services.practica import ListarPracticasService
 from app.services.paciente import BuscarPacientesService
-from app.services.common import PacienteNoEncontradoError
+from app.services.common import OdontoAppError, PacienteNoEncontradoError
+from app.services.turno import AgendarSerieTurnosService, ProyeccionAgenda
+from app.services.lista_espera import AgregarListaEsperaService
 from . import main_bp
 
 
@@ -44,6 +46,7 @@ def _actualizar_no_atendidos(session):
     )
     
     cambios = 0
+    fechas_cambiadas = set()
     for turno in vencidos:
         es_vencido = False
         
@@ -57,10 +60,12 @@ def _actualizar_no_atendidos(session):
         if es_vencido:
             turno.estado_id = estados.get('NoAtendido')
             turno.estado = 'NoAtendido'
+            fechas_cambiadas.add(turno.fecha)
             cambios += 1
     
     if cambios:
         session.commit()
+        ProyeccionAgenda.invalidar(*fechas_cambiadas)
     
     return cambios
 
@@ -221,6 +226,174 @@ def api_listar_turnos():
     return jsonify({'turnos': turnos_data, 'cantidad': len(turnos_data)})
 
 
+@main_bp.route('/api/turnos/serie', methods=['POST'])
+@login_required
+def api_agendar_serie_turnos():
+    """Schedule a recurring appointment series
+    ---
+    tags:
+      - Turnos
+    consumes:
+      - application/json
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required: [paciente_id, fecha_inicio, hora]
+          properties:
+            paciente_id:
+              type: integer
+            fecha_inicio:
+              type: string
+              format: date
+            hora:
+              type: string
+              example: "10:30"
+            duracion:
+              type: integer
+              default: 30
+            cada_semanas:
+              type: integer
+              default: 4
+            dia_semana:
+              type: integer
+              description: 0=lunes .. 6=domingo
+            cantidad:
+              type: integer
+            hasta:
+              type: string
+              format: date
+            detalle:
+              type: string
+            profesional_id:
+              type: integer
+            sillon:
+              type: integer
+    responses:
+      200:
+        description: Scheduled appointments and per-occurrence conflicts with alternatives
+      400:
+        description: Invalid recurrence rule or appointment data
+    """
+    datos = request.get_json(silent=True) or {}
+    try:
+        fecha_inicio = datetime.strptime(datos['fecha_inicio'], '%Y-%m-%d').date()
+        hora = datetime.strptime(datos['hora'], '%H:%M').time()
+        hasta = datetime.strptime(datos['hasta'], '%Y-%m-%d').date() if datos.get('hasta') else None
+        paciente_id = int(datos['paciente_id'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'paciente_id, fecha_inicio (AAAA-MM-DD) y hora (HH:MM) son requeridos'}), 400
+
+    try:
+        resultado = AgendarSerieTurnosService.execute(
+            paciente_id=paciente_id,
+            fecha_inicio=fecha_inicio,
+            hora=hora,
+            duracion=datos.get('duracion', 30),
+            cada_semanas=datos.get('cada_semanas', 4),
+            dia_semana=datos.get('dia_semana'),
+            cantidad=datos.get('cantidad'),
+            hasta=hasta,
+            detalle=datos.get('detalle'),
+            profesional_id=datos.get('profesional_id'),
+            sillon=datos.get('sillon'),
+        )
+    except OdontoAppError as exc:
+        return jsonify({'error': exc.mensaje}), 400
+
+    return jsonify({
+        'agendados': [
+            {'id': t.id, 'fecha': t.fecha.isoformat(), 'hora': t.hora.isoformat()}
+            for t in resultado['agendados']
+        ],
+        'conflictos': [
+            {
+                'fecha': c['fecha'].isoformat(),
+                'hora': c['hora'].isoformat(),
+                'motivo': c['motivo'],
+                'alternativas': [
+                    {'fecha': a['fecha'].isoformat(), 'hora': a['hora'].isoformat()}
+                    for a in c['alternativas']
+                ],
+            }
+            for c in resultado['conflictos']
+        ],
+    })
+
+
+@main_bp.route('/api/lista-espera', methods=['POST'])
+@login_required
+def api_agregar_lista_espera():
+    """Add a patient to the waitlist
+    ---
+    tags:
+      - Turnos
+    consumes:
+      - application/json
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required: [paciente_id, franjas]
+          properties:
+            paciente_id:
+              type: integer
+            duracion:
+              type: integer
+              default: 30
+            detalle:
+              type: string
+            franjas:
+              type: array
+              items:
+                type: object
+                properties:
+                  dia_semana:
+                    type: integer
+                    description: 0=lunes .. 5=sábado
+                  desde:
+                    type: string
+                    example: "09:00"
+                  hasta:
+                    type: string
+                    example: "12:00"
+    responses:
+      201:
+        description: Waitlist entry created
+      400:
+        description: Invalid data
+    """
+    datos = request.get_json(silent=True) or {}
+    try:
+        paciente_id = int(datos['paciente_id'])
+        franjas = [
+            (
+                int(f['dia_semana']),
+                datetime.strptime(f['desde'], '%H:%M').time(),
+                datetime.strptime(f['hasta'], '%H:%M').time(),
+            )
+            for f in datos.get('franjas') or []
+        ]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'paciente_id y franjas (dia_semana, desde HH:MM, hasta HH:MM) son requeridos'}), 400
+
+    try:
+        entrada = AgregarListaEsperaService.execute(
+            paciente_id=paciente_id,
+            franjas=franjas,
+            duracion=datos.get('duracion', 30),
+            detalle=datos.get('detalle'),
+        )
+    except OdontoAppError as exc:
+        return jsonify({'error': exc.mensaje}), 400
+
+    return jsonify({'id': entrada.id, 'paciente_id': entrada.paciente_id, 'duracion': entrada.duracion}), 201
+
+
 @main_bp.route('/api/turnos/<int:id>')
 @login_required
 def api_ver_turno(id: int):
@@ -1,5 +1,5 @@
 from datetime import date
-from flask import render_template, redirect, url_for, request, flash
+from flask import render_template, redirect, url_for, request, flash, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import Paciente, Turno, Prestacion
 from app.services.turno.listar_turnos_service import ListarTurnosService
@@ -89,6 +89,15 @@ def shutdown():
     
     logout_user()
     
+    # Servidor de producción (run.py): deja de aceptar, espera los requests en curso
+    # y recién después hace el backup final
+    servidor = current_app.extensions.get('servidor_wsgi')
+    if servidor is not None:
+        print("[SHUTDOWN] Deteniendo servidor...")
+        servidor.solicitar_detencion()
+        flash('Aplicación cerrando...', 'info')
+        return redirect(url_for('main.login'))
+    
     # Crear backup antes de apagar
     try:
         from app.database.utils import backup_database
@@ -104,6 +113,9 @@ def shutdown():
         import time
         time.sleep(1)
         print("[EXIT] Cerrando aplicación por solicitud del usuario.")
+        # os._exit no ejecuta atexit: vaciar la cola de logs a mano
+        from app.logging_config import detener_logging
+        detener_logging()
         os._exit(0)
     
     closer = threading.Thread(target=close_app, daemon=True)
@@ -1,8 +1,7 @@
 import os
-import json
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
-from flask import render_template, request, redirect, url_for, flash, jsonify, send_from_directory, current_app
+from flask import render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file, current_app
 from flask_login import login_required, current_user
 from app.models import Prestacion, ObraSocial, Localidad, Paciente
 from app.forms import PacienteForm
@@ -15,6 +14,8 @@ from app.services.paciente import (
 from app.services.odontograma import (
   ObtenerOdontogramaService,
   CrearVersionOdontogramaService,
+  RenderizarOdontogramaService,
+  CalibracionSlotsService,
 )
 from app.services.common import (
     PacienteNoEncontradoError,
@@ -22,6 +23,9 @@ from app.services.common import (
     DatosInvalidosPacienteError,
     LocalidadNoEncontradaError,
     PacienteError,
+    OdontogramaError,
+    OdontogramaNoEncontradoError,
+    CalibracionInvalidaError,
 )
 from . import main_bp
 
@@ -45,20 +49,56 @@ def media_file(filename: str):
     return send_from_directory(media_dir, safe_path)
 
 
+def _respuesta_calibracion(calibracion, inmutable: bool):
+  """Arma la respuesta JSON de una calibración con ETag fuerte."""
+  resp = current_app.response_class(calibracion.contenido, mimetype='application/json')
+  resp.set_etag(calibracion.etag)
+  if inmutable:
+    # La URL versionada nunca cambia de contenido
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 31536000
+    resp.cache_control.immutable = True
+  else:
+    resp.cache_control.no_cache = True
+  return resp.make_conditional(request)
+
+
+@main_bp.route('/odontograma/slots', methods=['GET'])
+@login_required
+def obtener_slots_odontograma():
+  """Devuelve la calibración vigente (revalidada por ETag en cada uso)."""
+  return _respuesta_calibracion(CalibracionSlotsService.obtener(), inmutable=False)
+
+
+@main_bp.route('/odontograma/slots/v<int:version>.json')
+@login_required
+def obtener_slots_odontograma_version(version: int):
+  """Devuelve una versión puntual de la calibración (las guardadas, cacheables indefinidamente)."""
+  calibracion = CalibracionSlotsService.obtener_version(version)
+  if calibracion is None:
+    return jsonify({"error": "Versión de calibración no encontrada"}), 404
+  # v0 es el JSON de fábrica: su URL no cambia aunque una actualización cambie el archivo
+  return _respuesta_calibracion(calibracion, inmutable=calibracion.version > 0)
+
+
 @main_bp.route('/odontograma/slots', methods=['POST'])
 @login_required
 def guardar_slots_odontograma():
-  """Guarda la configuración de slots calibrados para el odontograma."""
+  """Guarda la configuración de slots calibrados para el odontograma como una versión nueva."""
   data = request.get_json(silent=True) or {}
-  if 'config' not in data or 'teeth' not in data:
-    return jsonify({"error": "Payload inválido"}), 400
-  slots_path = os.path.join(current_app.root_path, 'media', 'odontograma_slots.json')
   try:
-    with open(slots_path, 'w', encoding='utf-8') as f:
-      json.dump(data, f, ensure_ascii=False, indent=2)
-    return jsonify({"ok": True})
-  except Exception:
+    calibracion = CalibracionSlotsService.guardar(data)
+  except CalibracionInvalidaError:
+    return jsonify({"error": "Payload inválido"}), 400
+  except OSError:
     return jsonify({"error": "No se pudo guardar la calibración"}), 500
+  # La calibración es parte de la clave de caché: descartar renders viejos
+  RenderizarOdontogramaService.invalidar_cache()
+  return jsonify({
+    "ok": True,
+    "version": calibracion.version,
+    "url": url_for('main.obtener_slots_odontograma_version', version=calibracion.version),
+  })
 
 
 @main_bp.route('/pacientes')
@@ -154,6 +194,9 @@ def ver_paciente(id: int):
         description: Paciente no encontrado
     """
     try:
+        # Primero el odontograma: la primera vez lo crea y hace commit, lo que
+        # expiraría las prestaciones ya cargadas (y el template las recargaría de a una)
+        odontograma, _, desactualizado_odonto, ultima_prestacion = ObtenerOdontogramaService.obtener_actual(id)
         detalle = BuscarPacientesService.obtener_detalle_completo(id)
     except PacienteNoEncontradoError:
         return redirect(url_for('main.listar_pacientes'))
@@ -166,9 +209,6 @@ def ver_paciente(id: int):
       'total_turnos': detalle.get('total_turnos', 0),
       'total_prestaciones': detalle.get('total_prestaciones', 0),
     }
-
-    # Obtener estado del odontograma (si está desactualizado)
-    odontograma, _, desactualizado_odonto, ultima_prestacion = ObtenerOdontogramaService.obtener_actual(id)
     
     # Marcar prestaciones posteriores al odontograma
     prestaciones_nuevas = set()
@@ -213,18 +253,48 @@ def ver_odontograma_paciente(id: int):
         else:
             odontograma, versiones, desactualizado, ultima_prestacion = ObtenerOdontogramaService.obtener_actual(id)
 
+        # Pre-generar la versión imprimible para que cargue instantáneamente desde caché
+        RenderizarOdontogramaService.encolar_render(odontograma.id, 'pdf')
+
         return render_template(
             'pacientes/odontograma.html',
             odontograma=odontograma,
             versiones=versiones,
             desactualizado=desactualizado,
             ultima_prestacion=ultima_prestacion,
+            calibracion_version=CalibracionSlotsService.obtener().version,
         )
     except ValueError as e:
         flash(str(e), 'error')
         return redirect(url_for('main.ver_paciente', id=id))
 
 
+@main_bp.route('/pacientes/<int:id>/odontograma/<int:odontograma_id>/render.<any(png, pdf):formato>')
+@login_required
+def render_odontograma(id: int, odontograma_id: int, formato: str):
+    """Sirve el odontograma renderizado en el servidor (PNG/PDF) desde la caché en disco.
+
+    Query params:
+        - descargar: si es 1, fuerza la descarga en lugar de abrir en el navegador
+    """
+    try:
+        ruta = RenderizarOdontogramaService.obtener_render(
+            odontograma_id, formato, esperar=True, paciente_id=id
+        )
+    except OdontogramaNoEncontradoError as e:
+        return jsonify({"error": str(e)}), 404
+    except OdontogramaError as e:
+        return jsonify({"error": str(e)}), 500
+
+    return send_file(
+        str(ruta),
+        mimetype=RenderizarOdontogramaService.FORMATOS[formato],
+        as_attachment=request.args.get('descargar') == '1',
+        download_name=f"odontograma_{id}_{odontograma_id}.{formato}",
+        max_age=0,
+    )
+
+
 @main_bp.route('/pacientes/<int:id>/eliminar', methods=['POST'])
 @login_required
 def eliminar_paciente(id: int):
@@ -313,6 +383,7 @@ def crear_version_odontograma(id: int):
             nota_general=nota_general,
             base_odontograma_id=base_id,
         )
+        RenderizarOdontogramaService.encolar_render(nuevo.id, 'pdf')
 
         # Consultar última prestación para marcar desactualización
         _, _, _, ultima_prestacion = ObtenerOdontogramaService.obtener_actual(id)
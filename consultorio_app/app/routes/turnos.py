@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, date
 from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required
-from app.models import Paciente, Estado, Turno, CambioEstado
+from app.models import Paciente, Estado, Turno, CambioEstado, Usuario
 from app.forms import TurnoForm
 from app.services.turno import (
     AgendarTurnoService,
@@ -27,30 +27,52 @@ from . import main_bp
 @main_bp.route('/turnos')
 @login_required
 def listar_turnos():
-    """Muestra la agenda de turnos en vista semanal.
+    """Muestra la agenda de turnos en vista semanal, diaria o mensual.
     
     Parámetros opcionales:
-    - fecha_inicio: primera fecha de la semana (YYYY-MM-DD). Si no se proporciona, usa la semana actual
+    - fecha_inicio: fecha de referencia (YYYY-MM-DD). Si no se proporciona, usa hoy
+    - vista: 'semana' (default, Lunes a Sábado), 'dia' o 'mes'
+    - agrupar: 'dia' (default), 'sillon' o 'profesional' (columnas por sillón/profesional)
     
-    Retorna vista de agenda con semana completa (Lunes a Sábado) con turnos organizados por hora
+    Retorna vista de agenda con turnos organizados por hora (o grilla mensual)
     """
     fecha_inicio_str = request.args.get('fecha_inicio')
+    vista = request.args.get('vista', 'semana')
+    if vista not in ('semana', 'dia', 'mes'):
+        vista = 'semana'
+    agrupar = request.args.get('agrupar', 'dia')
+    if agrupar not in ObtenerAgendaService.AGRUPACIONES:
+        agrupar = 'dia'
     
     # Parsear fecha si está presente
     if fecha_inicio_str:
         try:
             fecha_inicio = datetime.strptime(fecha_inicio_str, '%Y-%m-%d').date()
         except ValueError:
-            from datetime import date
             fecha_inicio = date.today()
     else:
-        from datetime import date
         fecha_inicio = date.today()
     
-    # Obtener estructura de agenda para la semana usando nuevo servicio
-    datos_agenda = ObtenerAgendaService.obtener_semana_agenda(fecha_inicio)
+    if vista == 'mes':
+        datos_agenda = ObtenerAgendaService.obtener_mes_agenda(fecha_inicio)
+        return render_template('turnos/agenda_mes.html', vista=vista, agrupar=agrupar, **datos_agenda)
+
+    if vista == 'dia':
+        datos_agenda = ObtenerAgendaService.obtener_dia_agenda(fecha_inicio, agrupar)
+        datos_agenda.update({
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_inicio,
+            'anterior': datos_agenda['dia_anterior'],
+            'siguiente': datos_agenda['dia_siguiente'],
+        })
+    else:
+        datos_agenda = ObtenerAgendaService.obtener_semana_agenda(fecha_inicio, agrupar)
+        datos_agenda.update({
+            'anterior': datos_agenda['semana_anterior'],
+            'siguiente': datos_agenda['semana_siguiente'],
+        })
     
-    return render_template('turnos/agenda.html', **datos_agenda)
+    return render_template('turnos/agenda.html', vista=vista, agrupar=agrupar, **datos_agenda)
 
 
 @main_bp.route('/pacientes/<int:paciente_id>/turnos')
@@ -94,6 +116,12 @@ def nuevo_turno():
         ('Confirmado', 'Confirmado'),
         ('Pendiente', 'Pendiente'),
     ]
+    form.profesional_id.choices = [
+        (0, '--- Sin asignar ---'),
+        *[(u.id, u.nombre_completo) for u in Usuario.query.filter(
+            Usuario.activo.is_(True), Usuario.rol.in_(['DUEÑA', 'ODONTOLOGA'])
+        ).order_by(Usuario.apellido).all()]
+    ]
     
     # Pre-cargar paciente si viene en la URL
     paciente_id_url = request.args.get('paciente_id', type=int)
@@ -112,6 +140,8 @@ def nuevo_turno():
                 hora=form.hora.data,
                 duracion=duracion_total,
                 detalle=form.detalle.data,
+                profesional_id=form.profesional_id.data or None,
+                sillon=form.sillon.data,
             )
             flash('Turno creado exitosamente', 'success')
             return redirect(url_for('main.ver_paciente', id=form.paciente_id.data))
@@ -3,10 +3,7 @@ Rutas para webhooks (WhatsApp, etc).
 """
 
 from flask import Blueprint, request, current_app, jsonify
-from app.adapters.whatsapp import WhatsAppWebhookHandler
-from app.services import ConversationService
-from app.services.whatsapp import WhatsAppMessageService
-from app.security import RateLimiter
+from app.adapters.whatsapp import WhatsAppEventQueue, WhatsAppWebhookHandler
 import os
 import logging
 
@@ -50,48 +47,12 @@ def whatsapp_webhook():
         # Log de entrada
         logger.debug(f"Webhook received from {request.remote_addr}")
         
-        handler = WhatsAppWebhookHandler(verify_token)
-        response_data, status = handler.handle_webhook(
-            body,
-            signature,
-            ConversationService
-        )
-        
-        # Si la respuesta fue procesada exitosamente, intentar enviar mensaje
-        if status == 200 and response_data.get('status') == 'received' and getattr(handler, 'last_reply_message', None):
-            try:
-                # Extraer información del webhook
-                import json
-                payload = json.loads(body)
-                
-                # Información del mensaje
-                from app.adapters.whatsapp.webhook_handler import WhatsAppPayloadParser
-                message_info = WhatsAppPayloadParser.extract_message_info(payload)
-                
-                if message_info:
-                    channel_user_id, _ = message_info
-                    
-                    # Verificar rate limit
-                    allowed, limit_message = RateLimiter.check_rate_limit(channel_user_id)
-                    if not allowed:
-                        logger.warning(f"Rate limit exceeded for {channel_user_id}")
-                        # El rate limit se debe aplicar antes de procesar, 
-                        # pero por ahora solo lo logueamos
-                    
-                    # Enviar respuesta vía WhatsApp (reply_message ya contiene el texto)
-                    success, result = WhatsAppMessageService.send_text_message(
-                        channel_user_id,
-                        handler.last_reply_message
-                    )
-                    
-                    if success:
-                        logger.info(f"Message sent successfully to {channel_user_id}")
-                    else:
-                        logger.error(f"Failed to send message to {channel_user_id}: {result}")
-            
-            except Exception as e:
-                logger.exception(f"Error sending WhatsApp message: {str(e)}")
-                # No fallar el webhook por error en envío
+        # El body se parsea una sola vez: todos los mensajes y estados del lote
+        # van a la cola por usuario y a Meta se le responde enseguida
+        handler = WhatsAppWebhookHandler(verify_token, despachar=WhatsAppEventQueue.despachar)
+        response_data, status = handler.handle_webhook(body, signature)
+        if handler.events:
+            logger.debug(f"Webhook: {len(handler.events)} evento(s) despachados")
         
         return jsonify(response_data), status
     
@@ -2,21 +2,38 @@
 Tareas periódicas para mantenimiento de la aplicación.
 """
 
+import threading
+import time
 from datetime import datetime, date
 
+from app.config import SettingsLoader
 from app.database import db
 from app.models import Conversation, Turno, Estado
 from app.services.turno.cambiar_estado_turno_service import CambiarEstadoTurnoService
+from app.services.recordatorio import EncolarRecordatoriosService, EnviarRecordatoriosService
+from app.services.whatsapp import DeduplicadorMensajes
+from app.services.conversacion import CacheConversaciones
+from app.security import RateLimiter
+from app.log_store import LogStore
+from app.metricas import Metricas
+
+JOB_SEGUNDOS = Metricas.histograma(
+    'scheduler_job_segundos', 'Duración de los jobs del scheduler', ('job',),
+    limites=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOBS = Metricas.contador('scheduler_jobs_total', 'Ejecuciones de jobs del scheduler por resultado (ok, error)', ('job', 'resultado'))
 
 
 def cleanup_expired_conversations():
     """
     Elimina conversaciones que han expirado.
     
-    Debe ejecutarse periodicamente (ej: cada 5 minutos) para mantener
-    la tabla conversations limpia de intentos abandonados.
+    ConversationService ya ignora una conversación vencida al cargarla (y el
+    cache la desaloja por TTL), así que esto es sólo limpieza: corre cada hora
+    para mantener la tabla conversations sin intentos abandonados.
     """
     now = datetime.utcnow()
+    CacheConversaciones.purgar_vencidas()
     
     # Buscar conversaciones expiradas
     expired_count = Conversation.query.filter(
@@ -91,6 +108,58 @@ def actualizar_turnos_no_atendidos():
     return cambios
 
 
+def enviar_recordatorios_turnos():
+    """
+    Encola los recordatorios de los turnos de mañana y envía los pendientes.
+
+    Corre cada 15 minutos en lugar de una vez al día: si la PC del consultorio
+    estaba apagada a la hora configurada, los recordatorios salen al encenderla.
+    Encolar es idempotente, así que repetirlo no duplica mensajes.
+    """
+    hora_envio = SettingsLoader.get_int('scheduler', 'recordatorios_hora', 10)
+    encolados = 0
+    if datetime.now().hour >= hora_envio:
+        encolados = EncolarRecordatoriosService.execute()
+    resumen = EnviarRecordatoriosService.execute()
+
+    if encolados or resumen['enviados']:
+        print(f"[scheduler] Recordatorios encolados: {encolados}, enviados: {resumen['enviados']}")
+    return resumen
+
+
+def purgar_mensajes_procesados():
+    """Borra los message ids de WhatsApp cuyo TTL de deduplicación ya venció."""
+    borrados = DeduplicadorMensajes.purgar()
+    if borrados:
+        print(f"[scheduler] Message ids de WhatsApp purgados: {borrados}")
+    return borrados
+
+
+def purgar_log_store():
+    """Aplica la retención del store de logs ([logging] store_retencion_dias)."""
+    dias = SettingsLoader.get_int('logging', 'store_retencion_dias', 30)
+    borrados = LogStore.purgar(dias)
+    if borrados:
+        print(f"[scheduler] Registros de log purgados: {borrados}")
+    return borrados
+
+
+def medir_job(job_id, fn):
+    """Envuelve un job para registrar su duración y resultado en las métricas."""
+    def wrapper():
+        inicio = time.perf_counter()
+        resultado = 'error'
+        try:
+            valor = fn()
+            resultado = 'ok'
+            return valor
+        finally:
+            JOB_SEGUNDOS.con(job_id).observar(time.perf_counter() - inicio)
+            JOBS.con(job_id, resultado).inc()
+    wrapper.__name__ = getattr(fn, '__name__', job_id)
+    return wrapper
+
+
 def register_background_tasks(app):
     """
     Registra tareas periodicas usando APScheduler.
@@ -104,6 +173,10 @@ def register_background_tasks(app):
         register_background_tasks(app)
         app.run()
     """
+    existente = getattr(app, 'extensions', {}).get('apscheduler')
+    if existente is not None:
+        return existente
+
     try:
         from apscheduler.schedulers.background import BackgroundScheduler
 
@@ -128,11 +201,11 @@ def register_background_tasks(app):
 
         scheduler = BackgroundScheduler()
         
-        # Cleanup de conversaciones cada 5 minutos
+        # Cleanup de conversaciones cada hora (el vencimiento lo resuelve ConversationService)
         scheduler.add_job(
-            _with_app_context(cleanup_expired_conversations),
+            medir_job('cleanup_conversations', _with_app_context(cleanup_expired_conversations)),
             'interval',
-            minutes=5,
+            minutes=60,
             id='cleanup_conversations',
             name='Cleanup conversaciones expiradas',
             replace_existing=True
@@ -140,13 +213,53 @@ def register_background_tasks(app):
 
         # Actualizar turnos vencidos a NoAtendido cada 5 minutos
         scheduler.add_job(
-            _with_app_context(actualizar_turnos_no_atendidos),
+            medir_job('actualizar_turnos_vencidos', _with_app_context(actualizar_turnos_no_atendidos)),
             'interval',
             minutes=5,
             id='actualizar_turnos_vencidos',
             name='Actualizar turnos vencidos',
             replace_existing=True
         )
+
+        # Recordatorios de turnos por WhatsApp
+        scheduler.add_job(
+            medir_job('recordatorios_turnos', _with_app_context(enviar_recordatorios_turnos)),
+            'interval',
+            minutes=15,
+            id='recordatorios_turnos',
+            name='Recordatorios de turnos por WhatsApp',
+            replace_existing=True
+        )
+
+        # Barrido del rate limiter: usuarios que ya recuperaron el cupo
+        scheduler.add_job(
+            medir_job('rate_limiter_cleanup', RateLimiter.cleanup_old_entries),
+            'interval',
+            minutes=RateLimiter.CLEANUP_INTERVAL_MINUTES,
+            id='rate_limiter_cleanup',
+            name='Barrido del rate limiter de WhatsApp',
+            replace_existing=True
+        )
+
+        # Purga de message ids ya vencidos (deduplicación de webhooks)
+        scheduler.add_job(
+            medir_job('purgar_mensajes_procesados', _with_app_context(purgar_mensajes_procesados)),
+            'interval',
+            hours=6,
+            id='purgar_mensajes_procesados',
+            name='Purgar message ids de WhatsApp vencidos',
+            replace_existing=True
+        )
+        
+        # Retención del store de logs, una vez al día
+        scheduler.add_job(
+            medir_job('purgar_log_store', purgar_log_store),
+            'interval',
+            hours=24,
+            id='purgar_log_store',
+            name='Retención del store de logs',
+            replace_existing=True
+        )
         
         with app.app_context():
             scheduler.start()
@@ -163,8 +276,38 @@ def register_background_tasks(app):
         return None
 
 
+def diferir_background_tasks(app):
+    """
+    Registra las tareas periódicas cuando termina de enviarse el primer request.
+
+    APScheduler (y los jobs que importa) no entran en el tiempo de arranque ni
+    en la primera página. En modo reloader sólo arranca en el proceso que
+    atiende requests.
+    """
+    lock = threading.Lock()
+    pendiente = [True]
+
+    def iniciar():
+        with lock:
+            if not pendiente[0]:
+                return
+            pendiente[0] = False
+        register_background_tasks(app)
+
+    @app.after_request
+    def _iniciar_scheduler_tras_primer_request(response):
+        if pendiente[0]:
+            response.call_on_close(iniciar)
+        return response
+
+
 __all__ = [
     "cleanup_expired_conversations",
     "actualizar_turnos_no_atendidos",
+    "enviar_recordatorios_turnos",
+    "purgar_mensajes_procesados",
+    "purgar_log_store",
+    "medir_job",
     "register_background_tasks",
+    "diferir_background_tasks",
 ]
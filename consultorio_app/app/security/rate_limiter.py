@@ -1,77 +1,113 @@
 """
-Rate limiting simple por usuario/canal para prevenir abuso.
+Rate limiting por usuario/canal para prevenir abuso.
+
+Algoritmo GCRA (equivalente a un token bucket): por usuario se guarda un único
+float, el "tiempo teórico de llegada" (TAT) del próximo mensaje. Consultar y
+actualizar es O(1) en tiempo y memoria, sin listas de timestamps.
+
+- Reloj monotónico: un cambio de hora del sistema no libera ni bloquea a nadie.
+- El store se reparte en shards, cada uno con su lock, para que los hilos de la
+  cola de eventos no compitan por un lock global.
+- Un usuario cuyo TAT ya pasó equivale a uno nuevo: cleanup_old_entries lo borra.
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
 import threading
+import time
+from typing import Dict, List, Tuple
+
+from app.metricas import Metricas
+
+RECHAZOS = Metricas.contador('rate_limit_rechazos_total', 'Mensajes rechazados por el rate limiter de WhatsApp')
 
-# Lock para thread-safety
-_rate_limit_lock = threading.RLock()
 
-# Store de rate limits: {channel_user_id: [(timestamp, count), ...]}
-_rate_limit_store: Dict[str, list] = {}
+class _Shard:
+    __slots__ = ("lock", "tat")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tat: Dict[str, float] = {}
 
 
 class RateLimiter:
-    """Rate limiter simple en memoria."""
-    
+    """Rate limiter GCRA en memoria."""
+
     # Configuración
-    REQUESTS_PER_MINUTE = 5  # Máximo 5 mensajes por minuto por usuario
+    REQUESTS_PER_MINUTE = 5  # Máximo 5 mensajes por minuto por usuario (ráfaga incluida)
     CLEANUP_INTERVAL_MINUTES = 10
-    
+    SHARDS = 16
+
+    _shards: List[_Shard] = [_Shard() for _ in range(SHARDS)]
+
+    @staticmethod
+    def _shard(channel_user_id: str) -> _Shard:
+        return RateLimiter._shards[hash(channel_user_id) % RateLimiter.SHARDS]
+
     @staticmethod
     def check_rate_limit(channel_user_id: str) -> Tuple[bool, str]:
         """
-        Verifica si el usuario ha excedido el rate limit.
-        
+        Verifica si el usuario ha excedido el rate limit y, si no, consume un lugar.
+
         Args:
             channel_user_id: ID del usuario (ej: número de WhatsApp)
-        
+
         Returns:
             Tupla (allowed, message)
             - (True, "") si está dentro del límite
             - (False, "Rate limit exceeded...") si excedió
         """
-        with _rate_limit_lock:
-            now = datetime.utcnow()
-            window_start = now - timedelta(minutes=1)
-            
-            if channel_user_id not in _rate_limit_store:
-                _rate_limit_store[channel_user_id] = [(now, 1)]
-                return True, ""
-            
-            # Limpiar registros viejos (> 1 minuto)
-            records = _rate_limit_store[channel_user_id]
-            records = [(ts, count) for ts, count in records if ts > window_start]
-            
-            # Contar mensajes en ventana
-            message_count = sum(count for _, count in records)
-            
-            if message_count >= RateLimiter.REQUESTS_PER_MINUTE:
-                return False, f"Rate limit exceeded. Max {RateLimiter.REQUESTS_PER_MINUTE} messages per minute."
-            
-            # Agregar nuevo registro
-            records.append((now, 1))
-            _rate_limit_store[channel_user_id] = records
-            
+        intervalo = 60.0 / RateLimiter.REQUESTS_PER_MINUTE
+        # Tolerancia: permite una ráfaga de REQUESTS_PER_MINUTE mensajes seguidos
+        tolerancia = intervalo * (RateLimiter.REQUESTS_PER_MINUTE - 1)
+        shard = RateLimiter._shard(channel_user_id)
+        with shard.lock:
+            now = time.monotonic()
+            tat = max(shard.tat.get(channel_user_id, now), now)
+            if tat - now > tolerancia:
+                espera = tat - tolerancia - now
+                RECHAZOS.inc()
+                return False, (
+                    f"Rate limit exceeded. Max {RateLimiter.REQUESTS_PER_MINUTE} messages per minute. "
+                    f"Retry in {espera:.0f}s."
+                )
+            shard.tat[channel_user_id] = tat + intervalo
             return True, ""
-    
+
     @staticmethod
-    def cleanup_old_entries():
-        """Limpia entradas antiguas del store (ejecutar periódicamente)."""
-        with _rate_limit_lock:
-            now = datetime.utcnow()
-            cleanup_window = now - timedelta(minutes=RateLimiter.CLEANUP_INTERVAL_MINUTES)
-            
-            for channel_user_id in list(_rate_limit_store.keys()):
-                records = _rate_limit_store[channel_user_id]
-                records = [(ts, count) for ts, count in records if ts > cleanup_window]
-                
-                if not records:
-                    del _rate_limit_store[channel_user_id]
-                else:
-                    _rate_limit_store[channel_user_id] = records
+    def cleanup_old_entries() -> int:
+        """
+        Borra los usuarios que ya recuperaron el cupo completo (ejecutar periódicamente).
+
+        Returns:
+            Cantidad de entradas borradas
+        """
+        borrados = 0
+        for shard in RateLimiter._shards:
+            with shard.lock:
+                now = time.monotonic()
+                vencidos = [clave for clave, tat in shard.tat.items() if tat <= now]
+                for clave in vencidos:
+                    del shard.tat[clave]
+                borrados += len(vencidos)
+        return borrados
+
+    @staticmethod
+    def reset() -> None:
+        """Vacía el store (tests)."""
+        for shard in RateLimiter._shards:
+            with shard.lock:
+                shard.tat.clear()
+
+    @staticmethod
+    def size() -> int:
+        """Cantidad de usuarios con estado en memoria."""
+        return sum(len(shard.tat) for shard in RateLimiter._shards)
+
+
+def _colector_metricas():
+    yield 'rate_limit_usuarios', 'gauge', 'Usuarios con estado en el rate limiter', [({}, RateLimiter.size())]
+
+
+Metricas.registrar_colector(_colector_metricas)
 
 
 __all__ = ["RateLimiter"]
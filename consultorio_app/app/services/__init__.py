@@ -4,9 +4,11 @@ Módulo de servicios refactorizado siguiendo arquitectura de casos de uso.
 Estructura por dominio funcional:
 - paciente/: Crear, editar, buscar pacientes
 - turno/: Agendar, cambiar estado de turnos
+- lista_espera/: Lista de espera y ofertas de turnos liberados
+- recordatorio/: Recordatorios de turnos por WhatsApp
 - localidad/: Buscar, crear localidades
 - obra_social/: Buscar obras sociales
-- odontograma/: Obtener, crear versiones de odontogramas
+- odontograma/: Obtener, crear versiones y renderizar odontogramas
 - prestacion/: Listar prestaciones
 - practica/: Listar prácticas
 - common/: Excepciones y validadores reutilizables
@@ -20,82 +22,85 @@ Principios arquitectónicos:
 - Excepciones propias para errores de negocio
 """
 
+import importlib
 
-# Nuevos services por dominio
-from .common import (
-    OdontoAppError,
-    PacienteError,
-    PacienteNoEncontradoError,
-    PacienteDuplicadoError,
-    DatosInvalidosPacienteError,
-    LocalidadError,
-    LocalidadNoEncontradaError,
-    TurnoError,
-    TurnoNoEncontradoError,
-    TurnoSolapamientoError,
-    TurnoFechaInvalidaError,
-    TurnoHoraInvalidaError,
-    TurnoDuracionInvalidaError,
-    TransicionEstadoInvalidaError,
-    EstadoFinalError,
-    TurnoYaAtendidoError,
-    TurnoPendienteEliminableError,
-    OdontogramaError,
-    OdontogramaNoEncontradoError,
-    ConversacionError,
-    MensajeInvalidoError,
-    BaseDatosError,
-    TransactionError,
-    ValidadorPaciente,
-    ValidadorTurno,
-    ValidadorLocalidad,
-)
+# Nombre exportado -> submódulo que lo define. Se importan recién al usarse
+# (PEP 562): importar un service puntual no carga todos los dominios.
+_EXPORTS = {
+    'OdontoAppError': '.common',
+    'PacienteError': '.common',
+    'PacienteNoEncontradoError': '.common',
+    'PacienteDuplicadoError': '.common',
+    'DatosInvalidosPacienteError': '.common',
+    'LocalidadError': '.common',
+    'LocalidadNoEncontradaError': '.common',
+    'TurnoError': '.common',
+    'TurnoNoEncontradoError': '.common',
+    'TurnoSolapamientoError': '.common',
+    'TurnoFechaInvalidaError': '.common',
+    'TurnoHoraInvalidaError': '.common',
+    'TurnoDuracionInvalidaError': '.common',
+    'TransicionEstadoInvalidaError': '.common',
+    'EstadoFinalError': '.common',
+    'TurnoYaAtendidoError': '.common',
+    'TurnoPendienteEliminableError': '.common',
+    'OdontogramaError': '.common',
+    'OdontogramaNoEncontradoError': '.common',
+    'CalibracionInvalidaError': '.common',
+    'ConversacionError': '.common',
+    'MensajeInvalidoError': '.common',
+    'BaseDatosError': '.common',
+    'TransactionError': '.common',
+    'ValidadorPaciente': '.common',
+    'ValidadorTurno': '.common',
+    'ValidadorLocalidad': '.common',
+    'CrearPacienteService': '.paciente',
+    'EditarPacienteService': '.paciente',
+    'BuscarPacientesService': '.paciente',
+    'AgendarTurnoService': '.turno',
+    'AgendarSerieTurnosService': '.turno',
+    'CambiarEstadoTurnoService': '.turno',
+    'ObtenerAgendaService': '.turno',
+    'ListarTurnosService': '.turno',
+    'ObtenerHorariosService': '.turno',
+    'EliminarTurnoService': '.turno',
+    'AgregarListaEsperaService': '.lista_espera',
+    'BuscarCandidatosListaEsperaService': '.lista_espera',
+    'OfrecerTurnoLiberadoService': '.lista_espera',
+    'EncolarRecordatoriosService': '.recordatorio',
+    'EnviarRecordatoriosService': '.recordatorio',
+    'BuscarLocalidadesService': '.localidad',
+    'CrearLocalidadService': '.localidad',
+    'BuscarObrasSocialesService': '.obra_social',
+    'ObtenerOdontogramaService': '.odontograma',
+    'CrearVersionOdontogramaService': '.odontograma',
+    'RenderizarOdontogramaService': '.odontograma',
+    'CalibracionSlotsService': '.odontograma',
+    'ListarPrestacionesService': '.prestacion',
+    'CrearPrestacionService': '.prestacion',
+    'ListarPracticasService': '.practica',
+    'CrearPracticaService': '.practica',
+    'EditarPracticaService': '.practica',
+    'EliminarPracticaService': '.practica',
+    'ConversationService': '.conversacion.conversation_service',
+    'ConversationReply': '.conversacion.conversation_service',
+    'CacheConversaciones': '.conversacion.cache_conversaciones',
+    'EstadoConversacion': '.conversacion.cache_conversaciones',
+}
 
-from .paciente import (
-    CrearPacienteService,
-    EditarPacienteService,
-    BuscarPacientesService,
-)
 
-from .turno import (
-    AgendarTurnoService,
-    CambiarEstadoTurnoService,
-    ObtenerAgendaService,
-    ListarTurnosService,
-    ObtenerHorariosService,
-    EliminarTurnoService,
-)
+def __getattr__(nombre):
+    modulo = _EXPORTS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), nombre)
+    globals()[nombre] = valor
+    return valor
 
-from .localidad import (
-    BuscarLocalidadesService,
-    CrearLocalidadService,
-)
 
-from .obra_social import (
-    BuscarObrasSocialesService,
-)
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
-from .odontograma import (
-    ObtenerOdontogramaService,
-    CrearVersionOdontogramaService,
-)
-
-from .prestacion import (
-    ListarPrestacionesService,
-    CrearPrestacionService,
-)
-
-from .practica import (
-    ListarPracticasService,
-    CrearPracticaService,
-    EditarPracticaService,
-    EliminarPracticaService,
-)
-
-from .conversacion.conversation_service import (
-    ConversationService,
-    ConversationReply,
-)
 
 __all__ = [
     # Legacy utils
@@ -124,6 +129,7 @@ __all__ = [
     'TurnoPendienteEliminableError',
     'OdontogramaError',
     'OdontogramaNoEncontradoError',
+    'CalibracionInvalidaError',
     'ConversacionError',
     'MensajeInvalidoError',
     'BaseDatosError',
@@ -139,12 +145,22 @@ __all__ = [
     
     # Turno services
     'AgendarTurnoService',
+    'AgendarSerieTurnosService',
     'CambiarEstadoTurnoService',
     'ObtenerAgendaService',
     'ListarTurnosService',
     'ObtenerHorariosService',
     'EliminarTurnoService',
     
+    # Lista de espera services
+    'AgregarListaEsperaService',
+    'BuscarCandidatosListaEsperaService',
+    'OfrecerTurnoLiberadoService',
+    
+    # Recordatorio services
+    'EncolarRecordatoriosService',
+    'EnviarRecordatoriosService',
+    
     # Localidad services
     'BuscarLocalidadesService',
     'CrearLocalidadService',
@@ -155,6 +171,8 @@ __all__ = [
     # Odontograma services
     'ObtenerOdontogramaService',
     'CrearVersionOdontogramaService',
+    'RenderizarOdontogramaService',
+    'CalibracionSlotsService',
     
     # Prestacion services
     'ListarPrestacionesService',
@@ -169,4 +187,6 @@ __all__ = [
     # Conversacion services
     'ConversationService',
     'ConversationReply',
+    'CacheConversaciones',
+    'EstadoConversacion',
 ]
@@ -23,6 +23,7 @@ from .exceptions import (
     EstadoTurnoInvalidoError,
     OdontogramaError,
     OdontogramaNoEncontradoError,
+    CalibracionInvalidaError,
     ConversacionError,
     MensajeInvalidoError,
     BaseDatosError,
@@ -64,6 +65,7 @@ __all__ = [
     'EstadoTurnoInvalidoError',
     'OdontogramaError',
     'OdontogramaNoEncontradoError',
+    'CalibracionInvalidaError',
     'ConversacionError',
     'MensajeInvalidoError',
     'BaseDatosError',
@@ -187,6 +187,16 @@ class OdontogramaNoEncontradoError(OdontogramaError):
         )
 
 
+class CalibracionInvalidaError(OdontogramaError):
+    """La calibración de slots del odontograma no tiene el formato esperado."""
+
+    def __init__(self, razon: str):
+        super().__init__(
+            f"Calibración de slots inválida: {razon}",
+            "CALIBRACION_INVALIDA"
+        )
+
+
 # ============================================================================
 # EXCEPCIONES DE CONVERSACIÓN (WhatsApp futura)
 # ============================================================================
@@ -3,5 +3,6 @@ Inicializador del módulo conversacion (integración de conversación/WhatsApp).
 """
 
 from .conversation_service import ConversationService, ConversationReply
+from .cache_conversaciones import CacheConversaciones, EstadoConversacion
 
-__all__ = ["ConversationService", "ConversationReply"]
+__all__ = ["ConversationService", "ConversationReply", "CacheConversaciones", "EstadoConversacion"]
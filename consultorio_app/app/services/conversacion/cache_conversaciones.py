@@ -0,0 +1,145 @@
+"""
+Cache en memoria del estado de las conversaciones de WhatsApp.
+
+Write-through: cada mensaje termina en un único UPSERT de la fila y la copia en
+memoria se actualiza recién después del commit. Mientras la entrada esté viva,
+el siguiente mensaje del usuario no necesita leer la tabla conversations.
+
+- TTL igual a la expiración de la conversación; una entrada vencida se descarta
+  al consultarla (y la conversación arranca de nuevo).
+- Tamaño acotado: se desalojan las menos usadas (LRU).
+- Se asume un solo hilo por usuario a la vez (lo garantiza WhatsAppEventQueue).
+"""
+
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from app.metricas import Metricas
+from app.models import Conversation
+
+CONSULTAS = Metricas.contador('cache_consultas_total', 'Consultas a caches en memoria', ('cache', 'resultado'))
+_ACIERTOS = CONSULTAS.con('conversaciones', 'hit')
+_FALLOS = CONSULTAS.con('conversaciones', 'miss')
+
+
+class EstadoConversacion:
+    """Copia desacoplada de la sesión de una fila de conversations."""
+
+    CAMPOS = (
+        'id', 'channel_user_id', 'paso_actual', 'paciente_id',
+        'dni_propuesto', 'nombre_tmp', 'apellido_tmp', 'telefono_tmp',
+        'fecha_candidate', 'hora_candidate', 'duracion_candidate', 'detalle',
+        'expira_en', 'ultima_interaccion_ts', 'intentos_actuales', 'confirmed',
+        'created_at', 'updated_at',
+    )
+    __slots__ = CAMPOS
+
+    def __init__(self, **valores):
+        for campo in EstadoConversacion.CAMPOS:
+            setattr(self, campo, valores.get(campo))
+
+    @staticmethod
+    def nueva(channel_user_id: str, ahora: datetime, minutos_expiracion: int) -> 'EstadoConversacion':
+        """Conversación recién iniciada (todavía sin fila en la base)."""
+        return EstadoConversacion(
+            channel_user_id=channel_user_id,
+            paso_actual='solicitar_dni',
+            expira_en=ahora + timedelta(minutes=minutos_expiracion),
+            ultima_interaccion_ts=ahora,
+            intentos_actuales=0,
+            confirmed=False,
+            created_at=ahora,
+            updated_at=ahora,
+        )
+
+    @staticmethod
+    def desde_modelo(convo: Conversation) -> 'EstadoConversacion':
+        return EstadoConversacion(**{campo: getattr(convo, campo) for campo in EstadoConversacion.CAMPOS})
+
+    def copia(self) -> 'EstadoConversacion':
+        return EstadoConversacion(**self.como_dict())
+
+    def como_dict(self) -> Dict[str, object]:
+        return {campo: getattr(self, campo) for campo in EstadoConversacion.CAMPOS}
+
+
+class CacheConversaciones:
+    """Estado de conversaciones por channel_user_id, con TTL y tamaño acotado."""
+
+    MAX_ENTRADAS = 5000
+
+    _entradas: "OrderedDict[str, Tuple[EstadoConversacion, float]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def obtener(channel_user_id: str) -> Optional[EstadoConversacion]:
+        """
+        Devuelve una copia del estado cacheado (se puede modificar libremente).
+
+        Returns:
+            EstadoConversacion o None si no está o venció
+        """
+        cls = CacheConversaciones
+        with cls._lock:
+            entrada = cls._entradas.get(channel_user_id)
+            if entrada is None:
+                _FALLOS.inc()
+                return None
+            estado, vence = entrada
+            if vence <= _time.monotonic():
+                del cls._entradas[channel_user_id]
+                _FALLOS.inc()
+                return None
+            cls._entradas.move_to_end(channel_user_id)
+            _ACIERTOS.inc()
+            return estado.copia()
+
+    @staticmethod
+    def guardar(estado: EstadoConversacion, ttl_segundos: float) -> None:
+        """Cachea una copia del estado ya persistido."""
+        cls = CacheConversaciones
+        with cls._lock:
+            cls._entradas[estado.channel_user_id] = (estado.copia(), _time.monotonic() + ttl_segundos)
+            cls._entradas.move_to_end(estado.channel_user_id)
+            while len(cls._entradas) > cls.MAX_ENTRADAS:
+                cls._entradas.popitem(last=False)
+
+    @staticmethod
+    def invalidar(channel_user_id: str) -> None:
+        with CacheConversaciones._lock:
+            CacheConversaciones._entradas.pop(channel_user_id, None)
+
+    @staticmethod
+    def purgar_vencidas() -> int:
+        """
+        Desaloja las entradas cuyo TTL ya pasó.
+
+        Returns:
+            Cantidad de entradas desalojadas
+        """
+        cls = CacheConversaciones
+        ahora = _time.monotonic()
+        with cls._lock:
+            vencidas = [clave for clave, (_, vence) in cls._entradas.items() if vence <= ahora]
+            for clave in vencidas:
+                del cls._entradas[clave]
+        return len(vencidas)
+
+    @staticmethod
+    def limpiar() -> None:
+        with CacheConversaciones._lock:
+            CacheConversaciones._entradas.clear()
+
+    @staticmethod
+    def size() -> int:
+        return len(CacheConversaciones._entradas)
+
+
+def _colector_metricas():
+    yield 'cache_entradas', 'gauge', 'Entradas en caches en memoria', [({'cache': 'conversaciones'}, CacheConversaciones.size())]
+
+
+Metricas.registrar_colector(_colector_metricas)
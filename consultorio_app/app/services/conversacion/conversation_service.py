@@ -1,10 +1,12 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.database.session import DatabaseSession
 from app.models import Conversation, Paciente
 from app.services.paciente import CrearPacienteService, BuscarPacientesService
 from app.services.turno import AgendarTurnoService
 from app.services.common import PacienteDuplicadoError, DatosInvalidosPacienteError, PacienteNoEncontradoError, TurnoError
+from .cache_conversaciones import CacheConversaciones, EstadoConversacion
 
 
 class ConversationReply:
@@ -25,40 +27,65 @@ class ConversationService:
         return DatabaseSession.get_instance().session
 
     @staticmethod
-    def _get_or_create(channel_user_id: str) -> Conversation:
+    def _cargar(channel_user_id: str, now: datetime) -> EstadoConversacion:
+        """
+        Estado de la conversación: del cache si está, si no de la base (un SELECT).
+
+        Una conversación vencida arranca de nuevo desde solicitar_dni.
+        """
         import logging
         logger = logging.getLogger(__name__)
-        
-        session = ConversationService._get_session()
-        convo = session.query(Conversation).filter_by(channel_user_id=channel_user_id).first()
-        if convo:
-            logger.debug(f"[_get_or_create] Found existing: id={convo.id}, paso={convo.paso_actual}, nombre={convo.nombre_tmp}")
+
+        convo = CacheConversaciones.obtener(channel_user_id)
+        if convo is None:
+            session = ConversationService._get_session()
+            fila = session.query(Conversation).filter_by(channel_user_id=channel_user_id).first()
+            convo = EstadoConversacion.desde_modelo(fila) if fila else None
+
+        if convo and (convo.expira_en is None or convo.expira_en > now):
+            logger.debug(f"[_cargar] Found existing: id={convo.id}, paso={convo.paso_actual}, nombre={convo.nombre_tmp}")
             return convo
-        
-        logger.debug(f"[_get_or_create] Creating new conversation for {channel_user_id}")
-        now = datetime.utcnow()
-        convo = Conversation(
-            channel_user_id=channel_user_id,
-            paso_actual="solicitar_dni",
-            expira_en=now + timedelta(minutes=ConversationService.EXPIRATION_MINUTES),
-            ultima_interaccion_ts=now,
+
+        logger.debug(f"[_cargar] Starting conversation for {channel_user_id}")
+        return EstadoConversacion.nueva(channel_user_id, now, ConversationService.EXPIRATION_MINUTES)
+
+    @staticmethod
+    def _guardar(convo: EstadoConversacion) -> None:
+        """
+        Persiste el estado con un único UPSERT y, tras el commit, actualiza el cache.
+        """
+        session = ConversationService._get_session()
+        convo.updated_at = datetime.utcnow()
+        valores = convo.como_dict()
+        valores.pop('id')
+        tabla = Conversation.__table__
+        stmt = sqlite_insert(tabla).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['channel_user_id'],
+            set_={campo: stmt.excluded[campo] for campo in valores if campo not in ('channel_user_id', 'created_at')},
         )
-        session.add(convo)
+        session.execute(stmt)
         session.commit()
-        logger.debug(f"[_get_or_create] Created: id={convo.id}, paso={convo.paso_actual}")
-        return convo
+        CacheConversaciones.guardar(convo, ConversationService.EXPIRATION_MINUTES * 60)
 
     @staticmethod
     def handle_message(channel_user_id: str, text: str) -> ConversationReply:
+        """
+        Avanza la conversación un paso.
+
+        El estado se lee del cache (o de la base la primera vez) y se escribe una
+        sola vez al final. En los caminos de error no se guarda nada: el próximo
+        mensaje parte del estado anterior, igual que con un rollback.
+        """
         session = ConversationService._get_session()
-        convo = ConversationService._get_or_create(channel_user_id)
+        now = datetime.utcnow()
+        convo = ConversationService._cargar(channel_user_id, now)
         
         # Debug log
         import logging
         logger = logging.getLogger(__name__)
         logger.debug(f"[handle_message] User: {channel_user_id}, Text: {text}, Step: {convo.paso_actual}, nombre_tmp: {convo.nombre_tmp}")
         
-        now = datetime.utcnow()
         convo.ultima_interaccion_ts = now
         convo.expira_en = now + timedelta(minutes=ConversationService.EXPIRATION_MINUTES)
 
@@ -69,7 +96,7 @@ class ConversationService:
             if step == "solicitar_dni":
                 digits = "".join([c for c in message if c.isdigit()])
                 if len(digits) < 6:
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Necesito el DNI para continuar (6+ dígitos).", step)
                 convo.dni_propuesto = digits
                 # Buscar paciente
@@ -77,27 +104,27 @@ class ConversationService:
                 if paciente:
                     convo.paciente_id = paciente.id
                     convo.paso_actual = "solicitar_fecha"
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Encontré tu ficha. Indicá la fecha (YYYY-MM-DD).", convo.paso_actual)
                 else:
                     convo.paso_actual = "solicitar_nombre"
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("No encontré tu ficha. Decime tu nombre para registrarte.", convo.paso_actual)
 
             if step == "solicitar_nombre":
                 if not message:
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Necesito tu nombre.", step)
                 logger.debug(f"[solicitar_nombre] Guardando nombre_tmp='{message}'")
                 convo.nombre_tmp = message
                 convo.paso_actual = "solicitar_apellido"
-                session.commit()
-                logger.debug(f"[solicitar_nombre] Después de commit: nombre_tmp={convo.nombre_tmp}, paso={convo.paso_actual}")
+                ConversationService._guardar(convo)
+                logger.debug(f"[solicitar_nombre] Después de guardar: nombre_tmp={convo.nombre_tmp}, paso={convo.paso_actual}")
                 return ConversationReply("Gracias. Ahora tu apellido.", convo.paso_actual)
 
             if step == "solicitar_apellido":
                 if not message:
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Necesito tu apellido.", step)
                 logger.debug(f"[solicitar_apellido] ANTES de guardar: nombre_tmp={convo.nombre_tmp}, apellido_tmp={convo.apellido_tmp}")
                 convo.apellido_tmp = message
@@ -128,7 +155,7 @@ class ConversationService:
                     )
                     convo.paciente_id = paciente.id
                     convo.paso_actual = "solicitar_fecha"
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Te registré. Indicá la fecha del turno (YYYY-MM-DD).", convo.paso_actual)
                 except (PacienteDuplicadoError, DatosInvalidosPacienteError) as e:
                     session.rollback()
@@ -139,11 +166,10 @@ class ConversationService:
                     fecha = datetime.strptime(message, "%Y-%m-%d").date()
                     convo.fecha_candidate = fecha
                     convo.paso_actual = "solicitar_hora"
-                    session.commit()
-                    session.refresh(convo)
+                    ConversationService._guardar(convo)
                     return ConversationReply("Anotado. Indicá la hora (HH:MM).", convo.paso_actual)
                 except ValueError:
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Formato inválido. Usa YYYY-MM-DD.", step)
 
             if step == "solicitar_hora":
@@ -162,8 +188,7 @@ class ConversationService:
                     )
                     convo.paso_actual = "completado"
                     convo.confirmed = False
-                    session.commit()
-                    session.refresh(convo)
+                    ConversationService._guardar(convo)
                     return ConversationReply(
                         "Turno solicitado en estado Pendiente. La doctora confirmará el horario.",
                         convo.paso_actual,
@@ -173,11 +198,11 @@ class ConversationService:
                     session.rollback()
                     return ConversationReply(f"No pude agendar: {str(e)}", step)
                 except ValueError:
-                    session.commit()
+                    ConversationService._guardar(convo)
                     return ConversationReply("Formato inválido. Usa HH:MM.", step)
 
             # Default fallback
-            session.commit()
+            ConversationService._guardar(convo)
             return ConversationReply("No entendí. Podés enviar tu DNI para comenzar.", step)
         except Exception:
             session.rollback()
@@ -186,6 +211,7 @@ class ConversationService:
     @staticmethod
     def reset(channel_user_id: str):
         session = ConversationService._get_session()
+        CacheConversaciones.invalidar(channel_user_id)
         convo = session.query(Conversation).filter_by(channel_user_id=channel_user_id).first()
         if convo:
             session.delete(convo)
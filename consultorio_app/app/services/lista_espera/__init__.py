@@ -0,0 +1,13 @@
+"""
+Inicializador del módulo de servicios de lista de espera.
+"""
+
+from .agregar_lista_espera_service import AgregarListaEsperaService
+from .buscar_candidatos_lista_espera_service import BuscarCandidatosListaEsperaService
+from .ofrecer_turno_liberado_service import OfrecerTurnoLiberadoService
+
+__all__ = [
+    'AgregarListaEsperaService',
+    'BuscarCandidatosListaEsperaService',
+    'OfrecerTurnoLiberadoService',
+]
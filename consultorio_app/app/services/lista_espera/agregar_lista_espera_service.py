@@ -0,0 +1,101 @@
+"""
+AgregarListaEsperaService: Caso de uso para anotar un paciente en la lista de espera.
+
+Responsabilidades:
+- Validar que el paciente existe
+- Validar duración y franjas aceptables (día laborable, ventana horaria)
+- Persistir la entrada con sus franjas
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Tuple
+
+from app.database.session import DatabaseSession
+from app.models import ListaEspera, ListaEsperaFranja, Paciente
+from app.services.common import (
+    DatosInvalidosError,
+    PacienteNoEncontradoError,
+    TurnoDuracionInvalidaError,
+    ValidadorTurno,
+)
+
+
+class AgregarListaEsperaService:
+    """Caso de uso: agregar un paciente a la lista de espera."""
+
+    @staticmethod
+    def execute(
+        paciente_id: int,
+        franjas: Iterable[Tuple[int, time, time]],
+        duracion: int = 30,
+        detalle: str = None,
+    ) -> ListaEspera:
+        """
+        Agrega una entrada a la lista de espera.
+
+        Args:
+            paciente_id: ID del paciente (requerido)
+            franjas: Franjas aceptables como (dia_semana 0=lunes, hora_desde, hora_hasta)
+            duracion: Minutos que necesita el turno (default 30)
+            detalle: Notas (ej: motivo de consulta)
+
+        Returns:
+            ListaEspera creada
+
+        Raises:
+            PacienteNoEncontradoError: Si paciente no existe
+            TurnoDuracionInvalidaError: Si la duración es inválida
+            DatosInvalidosError: Si alguna franja es inválida o no hay franjas
+        """
+        session = DatabaseSession.get_instance().session
+
+        paciente = Paciente.query.get(paciente_id)
+        if not paciente:
+            raise PacienteNoEncontradoError(paciente_id)
+
+        es_valida, _ = ValidadorTurno.validar_duracion(duracion)
+        if not es_valida:
+            raise TurnoDuracionInvalidaError(duracion)
+
+        franjas = list(franjas or [])
+        if not franjas:
+            raise DatosInvalidosError('Indique al menos un día y horario aceptable')
+
+        entrada = ListaEspera(
+            paciente_id=paciente_id,
+            duracion=duracion,
+            detalle=detalle.strip() if detalle else None,
+        )
+        for dia_semana, hora_desde, hora_hasta in franjas:
+            AgregarListaEsperaService._validar_franja(dia_semana, hora_desde, hora_hasta, duracion)
+            entrada.franjas.append(
+                ListaEsperaFranja(dia_semana=dia_semana, hora_desde=hora_desde, hora_hasta=hora_hasta)
+            )
+
+        try:
+            session.add(entrada)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return entrada
+
+    @staticmethod
+    def _validar_franja(dia_semana: int, hora_desde: time, hora_hasta: time, duracion: int) -> None:
+        """
+        Raises:
+            DatosInvalidosError: Si la franja no es utilizable
+        """
+        if dia_semana not in ValidadorTurno.DIAS_LABORABLES:
+            raise DatosInvalidosError('Los días aceptables deben ser de lunes a sábado')
+        if hora_desde < ValidadorTurno.HORARIO_INICIO or hora_hasta > ValidadorTurno.HORARIO_FIN:
+            raise DatosInvalidosError(
+                f"Las franjas deben estar entre {ValidadorTurno.HORARIO_INICIO.strftime('%H:%M')} "
+                f"y {ValidadorTurno.HORARIO_FIN.strftime('%H:%M')}"
+            )
+        fin_minimo = datetime.combine(date.today(), hora_desde) + timedelta(minutes=duracion)
+        if fin_minimo.time() > hora_hasta or hora_hasta <= hora_desde:
+            raise DatosInvalidosError(
+                f"La franja {hora_desde.strftime('%H:%M')}-{hora_hasta.strftime('%H:%M')} "
+                f"no alcanza para un turno de {duracion} minutos"
+            )
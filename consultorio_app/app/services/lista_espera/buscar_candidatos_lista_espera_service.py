@@ -0,0 +1,76 @@
+"""
+BuscarCandidatosListaEsperaService: Caso de uso para encontrar en la lista de espera
+a quién ofrecerle un turno liberado.
+
+La búsqueda va por el índice (dia_semana, hora_desde, hora_hasta) de las franjas:
+sólo se leen las franjas de ese día que empiezan antes del hueco y terminan
+después de su inicio, nunca la lista completa. Primero van las entradas a las
+que menos ofertas se les enviaron y, entre ellas, por orden de llegada: así
+cada turno liberado llega a gente distinta en vez de siempre a las más viejas.
+"""
+
+from datetime import date, time
+from typing import List
+
+from app.models import ListaEspera, ListaEsperaFranja, Paciente
+
+
+class BuscarCandidatosListaEsperaService:
+    """Caso de uso: buscar candidatos de la lista de espera para un hueco de agenda."""
+
+    @staticmethod
+    def execute(
+        fecha: date,
+        hora: time,
+        duracion: int,
+        excluir_paciente_id: int = None,
+        limite: int = 3,
+    ) -> List[ListaEspera]:
+        """
+        Devuelve las entradas activas que pueden ocupar el hueco [hora, hora + duracion).
+
+        Una entrada es candidata si necesita a lo sumo `duracion` minutos y alguna
+        de sus franjas de ese día contiene el turno que empieza a `hora`.
+
+        Args:
+            fecha: Día del hueco
+            hora: Hora de inicio del hueco
+            duracion: Minutos libres
+            excluir_paciente_id: Paciente a no considerar (ej: el que canceló)
+            limite: Cantidad máxima de candidatos
+
+        Returns:
+            Entradas de ListaEspera, las menos ofertadas primero y luego por antigüedad
+        """
+        inicio_min = hora.hour * 60 + hora.minute
+
+        query = (
+            ListaEspera.query
+            .join(ListaEsperaFranja, ListaEsperaFranja.entrada_id == ListaEspera.id)
+            .join(Paciente, Paciente.id == ListaEspera.paciente_id)
+            .filter(
+                ListaEsperaFranja.dia_semana == fecha.weekday(),
+                ListaEsperaFranja.hora_desde <= hora,
+                ListaEsperaFranja.hora_hasta > hora,
+                ListaEspera.activa.is_(True),
+                ListaEspera.duracion <= duracion,
+            )
+            .add_columns(ListaEsperaFranja.hora_hasta)
+            .order_by(ListaEspera.ofertas_enviadas, ListaEspera.creado_en, ListaEspera.id)
+        )
+        if excluir_paciente_id:
+            query = query.filter(ListaEspera.paciente_id != excluir_paciente_id)
+
+        candidatos: List[ListaEspera] = []
+        vistos = set()
+        for entrada, hora_hasta in query:
+            if entrada.id in vistos:
+                continue
+            # El turno de la entrada tiene que terminar dentro de su franja
+            if inicio_min + entrada.duracion > hora_hasta.hour * 60 + hora_hasta.minute:
+                continue
+            vistos.add(entrada.id)
+            candidatos.append(entrada)
+            if len(candidatos) == limite:
+                break
+        return candidatos
@@ -0,0 +1,88 @@
+"""
+OfrecerTurnoLiberadoService: Caso de uso para ofrecer un turno cancelado a la lista de espera.
+
+Responsabilidades:
+- Buscar los mejores candidatos para el hueco liberado
+- Registrar la oferta en cada entrada (cantidad y fecha de la última)
+- Encolar los mensajes de WhatsApp en la cola saliente, en la misma transacción
+"""
+
+import logging
+import re
+from datetime import date, datetime, time
+from typing import List
+
+from app.database.session import DatabaseSession
+from app.services.whatsapp import ColaSalienteWorker, EncolarMensajeService
+from .buscar_candidatos_lista_espera_service import BuscarCandidatosListaEsperaService
+
+logger = logging.getLogger(__name__)
+
+
+class OfrecerTurnoLiberadoService:
+    """Caso de uso: ofrecer un turno liberado a pacientes en lista de espera."""
+
+    # Se ofrece a varios a la vez: el primero que confirma se queda con el turno
+    MAX_OFERTAS = 3
+
+    MENSAJE_OFERTA = (
+        "Hola {nombre}, se liberó un turno el {fecha} a las {hora}. "
+        "Si te sirve, respondé este mensaje o comunicate con el consultorio para reservarlo."
+    )
+
+    @staticmethod
+    def execute(fecha: date, hora: time, duracion: int, excluir_paciente_id: int = None) -> List[int]:
+        """
+        Ofrece el hueco a los primeros candidatos de la lista de espera.
+
+        Args:
+            fecha: Día del turno liberado
+            hora: Hora del turno liberado
+            duracion: Minutos liberados
+            excluir_paciente_id: Paciente que liberó el turno
+
+        Returns:
+            IDs de las entradas de ListaEspera a las que se les envió la oferta
+        """
+        session = DatabaseSession.get_instance().session
+        if fecha < date.today():
+            return []
+
+        candidatos = BuscarCandidatosListaEsperaService.execute(
+            fecha, hora, duracion,
+            excluir_paciente_id=excluir_paciente_id,
+            limite=OfrecerTurnoLiberadoService.MAX_OFERTAS,
+        )
+
+        ofertadas: List[int] = []
+        ahora = datetime.now()
+        for entrada in candidatos:
+            telefono = re.sub(r'\D', '', entrada.paciente.telefono or '')
+            if not telefono:
+                continue
+            entrada.ofertas_enviadas = (entrada.ofertas_enviadas or 0) + 1
+            entrada.ultima_oferta_en = ahora
+            ofertadas.append(entrada.id)
+            EncolarMensajeService.execute(
+                telefono,
+                texto=OfrecerTurnoLiberadoService.MENSAJE_OFERTA.format(
+                    nombre=entrada.paciente.nombre,
+                    fecha=fecha.strftime('%d/%m/%Y'),
+                    hora=hora.strftime('%H:%M'),
+                ),
+                clave=f"oferta:{entrada.id}:{fecha.isoformat()}:{hora.strftime('%H:%M')}",
+                confirmar=False,
+            )
+
+        if not ofertadas:
+            return []
+
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        ColaSalienteWorker.notificar()
+        logger.info(f"Turno liberado {fecha} {hora.strftime('%H:%M')} ofrecido a {len(ofertadas)} paciente(s) en espera")
+        return ofertadas
@@ -4,8 +4,12 @@ Inicializador del módulo de servicios de odontograma.
 
 from .obtener_odontograma_service import ObtenerOdontogramaService
 from .crear_version_odontograma_service import CrearVersionOdontogramaService
+from .calibracion_slots_service import CalibracionSlotsService
+from .renderizar_odontograma_service import RenderizarOdontogramaService
 
 __all__ = [
     'ObtenerOdontogramaService',
     'CrearVersionOdontogramaService',
+    'RenderizarOdontogramaService',
+    'CalibracionSlotsService',
 ]
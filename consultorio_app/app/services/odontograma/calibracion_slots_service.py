@@ -0,0 +1,207 @@
+"""
+CalibracionSlotsService: Caso de uso para leer y guardar la calibración de slots del odontograma.
+
+Responsabilidades:
+- Guardar cada calibración como una versión nueva e inmutable bajo data/calibracion
+- Reemplazar el puntero a la versión vigente de forma atómica (nunca un JSON a medio escribir)
+- Mantener la calibración parseada en memoria y recargarla sólo si cambia la versión
+- Exponer un ETag fuerte (hash del contenido) para cachear en el navegador
+
+La calibración de fábrica (app/media/odontograma_slots.json) es la versión 0 y
+se usa mientras no se haya guardado ninguna calibración propia.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.config import PathManager
+from app.services.common import CalibracionInvalidaError
+
+logger = logging.getLogger(__name__)
+
+
+class CalibracionSlots:
+    """Versión de calibración ya parseada, tal como se guarda en memoria."""
+
+    def __init__(self, version: int, slots: dict, contenido: bytes):
+        self.version = version
+        self.slots = slots
+        self.contenido = contenido
+        self.hash = hashlib.sha256(contenido).hexdigest()[:16]
+
+    @property
+    def etag(self) -> str:
+        return f"v{self.version}-{self.hash}"
+
+
+class CalibracionSlotsService:
+    """Caso de uso: calibración versionada de slots del odontograma con caché en memoria."""
+
+    ARCHIVO_FABRICA = 'odontograma_slots.json'
+    PUNTERO = 'actual'
+    PATRON_VERSION = re.compile(r'^slots_v(\d+)\.json$')
+    VERSIONES_CONSERVADAS = 20
+
+    _cache: Optional[CalibracionSlots] = None
+    _marca_puntero: Optional[Tuple[int, int]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def obtener() -> CalibracionSlots:
+        """
+        Devuelve la calibración vigente.
+
+        Sólo hace un stat() del puntero por llamada; el JSON se vuelve a leer y
+        parsear únicamente cuando otra escritura cambió la versión vigente.
+        """
+        cls = CalibracionSlotsService
+        marca = cls._marca(cls._ruta_puntero())
+        cache = cls._cache
+        if cache is not None and marca == cls._marca_puntero:
+            return cache
+
+        with cls._lock:
+            marca = cls._marca(cls._ruta_puntero())
+            if cls._cache is None or marca != cls._marca_puntero:
+                cls._cache = cls._cargar_vigente()
+                cls._marca_puntero = marca
+            return cls._cache
+
+    @staticmethod
+    def guardar(slots: dict) -> CalibracionSlots:
+        """
+        Guarda una nueva versión de calibración y la deja como vigente.
+
+        Args:
+            slots: Dict con claves 'config' y 'teeth'
+
+        Returns:
+            La calibración recién guardada
+
+        Raises:
+            CalibracionInvalidaError: Si el payload no tiene el formato esperado
+        """
+        cls = CalibracionSlotsService
+        cls._validar(slots)
+        contenido = json.dumps(slots, ensure_ascii=False, indent=2).encode('utf-8')
+
+        with cls._lock:
+            directorio = PathManager.get_calibracion_dir()
+            version = max(cls._versiones_en_disco(), default=0) + 1
+            cls._escribir_atomico(directorio / f"slots_v{version}.json", contenido)
+            cls._escribir_atomico(cls._ruta_puntero(), str(version).encode('ascii'))
+
+            calibracion = CalibracionSlots(version, slots, contenido)
+            cls._cache = calibracion
+            cls._marca_puntero = cls._marca(cls._ruta_puntero())
+            cls._purgar_versiones_viejas(version)
+
+        logger.info(f"Calibración de slots guardada: versión {version} ({calibracion.hash})")
+        return calibracion
+
+    @staticmethod
+    def obtener_version(version: int) -> Optional[CalibracionSlots]:
+        """Devuelve una versión puntual (0 = fábrica), o None si no existe."""
+        cls = CalibracionSlotsService
+        vigente = cls.obtener()
+        if vigente.version == version:
+            return vigente
+        if version == 0:
+            return cls._cargar_fabrica()
+        ruta = PathManager.get_calibracion_dir() / f"slots_v{version}.json"
+        try:
+            contenido = ruta.read_bytes()
+            return CalibracionSlots(version, json.loads(contenido.decode('utf-8')), contenido)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def limpiar_cache() -> None:
+        """Descarta la calibración en memoria (útil en tests)."""
+        with CalibracionSlotsService._lock:
+            CalibracionSlotsService._cache = None
+            CalibracionSlotsService._marca_puntero = None
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _ruta_puntero() -> Path:
+        return PathManager.get_calibracion_dir() / CalibracionSlotsService.PUNTERO
+
+    @staticmethod
+    def _marca(ruta: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = ruta.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _cargar_vigente() -> CalibracionSlots:
+        cls = CalibracionSlotsService
+        try:
+            version = int(cls._ruta_puntero().read_text(encoding='ascii').strip())
+            ruta = PathManager.get_calibracion_dir() / f"slots_v{version}.json"
+            contenido = ruta.read_bytes()
+            return CalibracionSlots(version, json.loads(contenido.decode('utf-8')), contenido)
+        except FileNotFoundError:
+            return cls._cargar_fabrica()
+        except (OSError, ValueError) as exc:
+            logger.error(f"Calibración de slots ilegible, usando la de fábrica: {exc}")
+            return cls._cargar_fabrica()
+
+    @staticmethod
+    def _cargar_fabrica() -> CalibracionSlots:
+        ruta = PathManager.get_app_dir() / 'media' / CalibracionSlotsService.ARCHIVO_FABRICA
+        try:
+            contenido = ruta.read_bytes()
+            slots = json.loads(contenido.decode('utf-8'))
+        except (OSError, ValueError):
+            contenido = b'{}'
+            slots = {}
+        return CalibracionSlots(0, slots, contenido)
+
+    @staticmethod
+    def _validar(slots: dict) -> None:
+        if not isinstance(slots, dict) or 'config' not in slots or 'teeth' not in slots:
+            raise CalibracionInvalidaError("faltan 'config' o 'teeth'")
+        if not isinstance(slots['config'], dict):
+            raise CalibracionInvalidaError("'config' debe ser un objeto")
+        if not isinstance(slots['teeth'], list):
+            raise CalibracionInvalidaError("'teeth' debe ser una lista")
+
+    @staticmethod
+    def _versiones_en_disco() -> list:
+        versiones = []
+        for archivo in PathManager.get_calibracion_dir().iterdir():
+            match = CalibracionSlotsService.PATRON_VERSION.match(archivo.name)
+            if match:
+                versiones.append(int(match.group(1)))
+        return versiones
+
+    @staticmethod
+    def _purgar_versiones_viejas(vigente: int) -> None:
+        limite = vigente - CalibracionSlotsService.VERSIONES_CONSERVADAS
+        for version in CalibracionSlotsService._versiones_en_disco():
+            if version <= limite:
+                try:
+                    (PathManager.get_calibracion_dir() / f"slots_v{version}.json").unlink()
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _escribir_atomico(destino: Path, contenido: bytes) -> None:
+        temporal = destino.with_name(f".{destino.name}.{threading.get_ident()}.tmp")
+        with open(temporal, 'wb') as f:
+            f.write(contenido)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, destino)
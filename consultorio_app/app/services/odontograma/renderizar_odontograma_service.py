@@ -0,0 +1,281 @@
+"""
+RenderizarOdontogramaService: Caso de uso para generar imágenes imprimibles del odontograma.
+
+Responsabilidades:
+- Componer la imagen base con las marcas de cada cara (PNG/PDF) usando Pillow
+- Cachear los renders en disco por (odontograma_id, hash de calibración de slots)
+- Generar los renders en un worker en background (sin bloquear requests)
+- Invalidar la caché cuando cambia la calibración de slots
+
+Las versiones de odontograma son inmutables (cada cambio crea una versión nueva),
+por lo que un render sólo queda obsoleto si cambia la calibración de slots.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import PathManager
+from app.database.session import DatabaseSession
+from app.models import Odontograma
+from app.services.common import OdontogramaError, OdontogramaNoEncontradoError
+from .calibracion_slots_service import CalibracionSlotsService
+
+logger = logging.getLogger(__name__)
+
+
+class RenderizarOdontogramaService:
+    """Caso de uso: renderizar odontogramas del lado del servidor con caché en disco."""
+
+    FORMATOS = {
+        'png': 'image/png',
+        'pdf': 'application/pdf',
+    }
+
+    IMAGEN_BASE = 'ODONTOGRAMA 1.png'
+
+    # Factor de escala sobre la imagen base para que la impresión no se vea pixelada
+    ESCALA = 2
+    RADIO_MARCA = 9  # en píxeles de la imagen base (se multiplica por ESCALA)
+    RESOLUCION_PDF = 150.0
+
+    COLOR_EXODONCIA = (214, 51, 108)
+    COLOR_ALERTA = (255, 193, 7)
+    COLOR_BORDE = (60, 60, 60)
+
+    TIMEOUT_SEGUNDOS = 30
+
+    # Mismos offsets por defecto que usa la vista cuando falta config
+    CONFIG_DEFECTO = {
+        'top': {'y_occlusal': 32, 'delta_vestibular': 6, 'delta_lingual': -6, 'delta_mesial': -3, 'delta_distal': 3},
+        'bottom': {'y_occlusal': 68, 'delta_vestibular': 6, 'delta_lingual': -6, 'delta_mesial': -3, 'delta_distal': 3},
+    }
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _en_curso: Dict[Path, Future] = {}
+    _lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def obtener_render(
+        odontograma_id: int,
+        formato: str = 'png',
+        esperar: bool = True,
+        paciente_id: int = None,
+    ) -> Optional[Path]:
+        """
+        Devuelve la ruta al render cacheado del odontograma, generándolo si hace falta.
+
+        Args:
+            odontograma_id: ID de la versión de odontograma
+            formato: 'png' o 'pdf'
+            esperar: Si True, espera a que el worker termine; si False sólo encola
+            paciente_id: Si se indica, valida que la versión pertenezca al paciente
+
+        Returns:
+            Path del archivo renderizado, o None si se encoló sin esperar
+
+        Raises:
+            OdontogramaNoEncontradoError: Si la versión no existe
+            OdontogramaError: Si el formato es inválido o el render falla
+        """
+        if formato not in RenderizarOdontogramaService.FORMATOS:
+            raise OdontogramaError(f"Formato de render no soportado: '{formato}'")
+
+        if paciente_id is not None:
+            RenderizarOdontogramaService._validar_pertenencia(odontograma_id, paciente_id)
+
+        slots, slots_hash = RenderizarOdontogramaService.cargar_slots()
+        destino = RenderizarOdontogramaService.ruta_cache(odontograma_id, formato, slots_hash)
+        if destino.exists():
+            return destino
+
+        # Extraer las marcas en el hilo del request: el worker no toca la BD
+        marcas = RenderizarOdontogramaService._obtener_marcas(odontograma_id)
+        future = RenderizarOdontogramaService._encolar(destino, marcas, slots, formato)
+
+        if not esperar:
+            return None
+        try:
+            return future.result(timeout=RenderizarOdontogramaService.TIMEOUT_SEGUNDOS)
+        except Exception as exc:
+            raise OdontogramaError(f"No se pudo renderizar el odontograma: {str(exc)}")
+
+    @staticmethod
+    def encolar_render(odontograma_id: int, formato: str = 'png') -> None:
+        """Pre-genera el render en background para que la impresión cargue desde caché."""
+        try:
+            RenderizarOdontogramaService.obtener_render(odontograma_id, formato, esperar=False)
+        except OdontogramaError as exc:
+            logger.warning(f"No se pudo encolar render de odontograma_id={odontograma_id}: {exc}")
+
+    @staticmethod
+    def invalidar_cache() -> int:
+        """
+        Elimina los renders generados con una calibración de slots distinta a la actual.
+
+        Returns:
+            Cantidad de archivos eliminados
+        """
+        _, slots_hash = RenderizarOdontogramaService.cargar_slots()
+        eliminados = 0
+        for archivo in PathManager.get_renders_dir().glob('odontograma_*'):
+            if f"_{slots_hash}." in archivo.name:
+                continue
+            try:
+                archivo.unlink()
+                eliminados += 1
+            except OSError as exc:
+                logger.warning(f"No se pudo eliminar render obsoleto {archivo.name}: {exc}")
+        if eliminados:
+            logger.info(f"Renders de odontograma invalidados: {eliminados}")
+        return eliminados
+
+    @staticmethod
+    def cargar_slots() -> Tuple[dict, str]:
+        """
+        Devuelve la calibración de slots vigente y su hash (clave de caché).
+
+        Returns:
+            Tupla (config_slots, hash_corto)
+        """
+        calibracion = CalibracionSlotsService.obtener()
+        slots = calibracion.slots
+        if not slots.get('teeth'):
+            slots = {'config': RenderizarOdontogramaService.CONFIG_DEFECTO, 'teeth': []}
+        return slots, calibracion.hash
+
+    @staticmethod
+    def ruta_cache(odontograma_id: int, formato: str, slots_hash: str) -> Path:
+        """Path del render en caché para (odontograma_id, hash de slots)."""
+        return PathManager.get_renders_dir() / f"odontograma_{odontograma_id}_{slots_hash}.{formato}"
+
+    @staticmethod
+    def clasificar_marca(marca_texto: Optional[str], marca_codigo: Optional[str]) -> Optional[str]:
+        """Misma clasificación que la vista interactiva: 'exodoncia', 'alerta' o None."""
+        texto = (marca_texto or '').lower()
+        codigo = (marca_codigo or '').lower()
+        if any(clave in texto for clave in ('extra', 'ausente', 'exodoncia')) or codigo in ('exo', 'x'):
+            return 'exodoncia'
+        if texto or codigo:
+            return 'alerta'
+        return None
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _validar_pertenencia(odontograma_id: int, paciente_id: int) -> None:
+        """Verifica con una consulta liviana que la versión sea del paciente."""
+        session = DatabaseSession.get_instance().session
+        existe = session.query(Odontograma.id).filter_by(
+            id=odontograma_id,
+            paciente_id=paciente_id,
+        ).first()
+        if not existe:
+            raise OdontogramaNoEncontradoError(odontograma_id)
+
+    @staticmethod
+    def _obtener_marcas(odontograma_id: int) -> List[Tuple[str, str, str]]:
+        """Devuelve [(diente, cara, tipo)] para las caras con marca."""
+        session = DatabaseSession.get_instance().session
+        odontograma = session.get(Odontograma, odontograma_id)
+        if not odontograma:
+            raise OdontogramaNoEncontradoError(odontograma_id)
+
+        marcas = []
+        for cara in odontograma.caras:
+            tipo = RenderizarOdontogramaService.clasificar_marca(cara.marca_texto, cara.marca_codigo)
+            if tipo:
+                marcas.append((cara.diente, cara.cara or 'oclusal', tipo))
+        return marcas
+
+    @staticmethod
+    def _encolar(destino: Path, marcas: list, slots: dict, formato: str) -> Future:
+        """Envía el render al worker, reutilizando el trabajo si ya está en curso."""
+        cls = RenderizarOdontogramaService
+        with cls._lock:
+            future = cls._en_curso.get(destino)
+            if future is not None:
+                return future
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='odontograma-render')
+            future = cls._executor.submit(cls._renderizar, destino, marcas, slots, formato)
+            cls._en_curso[destino] = future
+
+        def _liberar(_):
+            with cls._lock:
+                cls._en_curso.pop(destino, None)
+
+        future.add_done_callback(_liberar)
+        return future
+
+    @staticmethod
+    def _renderizar(destino: Path, marcas: list, slots: dict, formato: str) -> Path:
+        """Compone imagen base + marcas y la guarda de forma atómica."""
+        from PIL import Image, ImageDraw
+
+        cls = RenderizarOdontogramaService
+        if destino.exists():
+            return destino
+
+        base_path = PathManager.get_app_dir() / 'media' / cls.IMAGEN_BASE
+        with Image.open(base_path) as base:
+            imagen = base.convert('RGB')
+        ancho, alto = imagen.size
+        imagen = imagen.resize((ancho * cls.ESCALA, alto * cls.ESCALA), Image.LANCZOS)
+        ancho, alto = imagen.size
+
+        draw = ImageDraw.Draw(imagen)
+        dientes = {str(t.get('id')): t for t in slots.get('teeth', [])}
+        config = slots.get('config') or cls.CONFIG_DEFECTO
+        radio = cls.RADIO_MARCA * cls.ESCALA
+
+        for diente, cara, tipo in marcas:
+            pos = cls._posicion_cara(dientes.get(str(diente)), cara, config)
+            if pos is None:
+                continue
+            x = pos[0] / 100.0 * ancho
+            y = pos[1] / 100.0 * alto
+            if tipo == 'exodoncia':
+                grosor = max(2, cls.ESCALA * 2)
+                draw.line((x - radio, y - radio, x + radio, y + radio), fill=cls.COLOR_EXODONCIA, width=grosor)
+                draw.line((x - radio, y + radio, x + radio, y - radio), fill=cls.COLOR_EXODONCIA, width=grosor)
+            else:
+                rombo = [(x, y - radio), (x + radio, y), (x, y + radio), (x - radio, y)]
+                draw.polygon(rombo, fill=cls.COLOR_ALERTA, outline=cls.COLOR_BORDE)
+
+        # Escritura atómica: nunca servir un archivo a medio escribir
+        temporal = destino.with_name(f".{destino.name}.{threading.get_ident()}.tmp")
+        if formato == 'pdf':
+            imagen.save(temporal, format='PDF', resolution=cls.RESOLUCION_PDF)
+        else:
+            imagen.save(temporal, format='PNG', optimize=True)
+        os.replace(temporal, destino)
+        logger.info(f"Render de odontograma generado: {destino.name}")
+        return destino
+
+    @staticmethod
+    def _posicion_cara(diente: Optional[dict], cara: str, config: dict) -> Optional[Tuple[float, float]]:
+        """Calcula (x%, y%) de una cara replicando obtenerPosCara() del template."""
+        if not diente or not isinstance(diente.get('x'), (int, float)):
+            return None
+        cfg = config.get('top' if diente.get('row') == 'top' else 'bottom') or {}
+        base_x = diente['x']
+        base_y = diente['y'] if isinstance(diente.get('y'), (int, float)) else cfg.get('y_occlusal', 50)
+        offsets = {
+            'oclusal': (0, 0),
+            'vestibular': (0, cfg.get('delta_vestibular', 0)),
+            'lingual': (0, cfg.get('delta_lingual', 0)),
+            'mesial': (cfg.get('delta_mesial', 0), 0),
+            'distal': (cfg.get('delta_distal', 0), 0),
+        }
+        dx, dy = offsets.get(cara, offsets['oclusal'])
+        return base_x + dx, base_y + dy
@@ -112,7 +112,9 @@ class BuscarPacientesService:
         ).limit(5).all()
         
         # Obtener prestaciones recientes
-        prestaciones = Prestacion.query.filter_by(paciente_id=paciente_id).order_by(
+        prestaciones = Prestacion.query.filter_by(paciente_id=paciente_id).options(
+            Prestacion.opciones_codigos()
+        ).order_by(
             Prestacion.fecha.desc()
         ).limit(5).all()
         
@@ -12,6 +12,7 @@ from datetime import date
 from sqlalchemy import func
 from app.database.session import DatabaseSession
 from app.models import Paciente, Localidad
+from app.services.turno.proyeccion_agenda import ProyeccionAgenda
 from app.services.common import (
     PacienteError,
     PacienteNoEncontradoError,
@@ -141,6 +142,8 @@ class EditarPacienteService:
                 paciente.lugar_trabajo = lugar_trabajo.strip() if lugar_trabajo else None
             
             session.commit()
+            # Nombre/apellido/DNI se muestran en la agenda ya proyectada
+            ProyeccionAgenda.invalidar_todo()
             return paciente
             
         except (PacienteNoEncontradoError, DatosInvalidosPacienteError, 
@@ -9,6 +9,7 @@ from typing import Dict, Any
 from app.database.session import DatabaseSession
 from app.models import Paciente
 from app.services.common import PacienteNoEncontradoError
+from app.services.turno.proyeccion_agenda import ProyeccionAgenda
 
 
 class EliminarPacienteService:
@@ -34,8 +35,10 @@ class EliminarPacienteService:
         if not paciente:
             raise PacienteNoEncontradoError(paciente_id)
 
+        fechas_turnos = [t.fecha for t in paciente.turnos]
         session.delete(paciente)
         session.commit()
+        ProyeccionAgenda.invalidar(*fechas_turnos)
 
         return {
             'success': True,
@@ -10,6 +10,7 @@ Responsabilidades:
 
 from typing import List, Dict, Any, Optional
 from datetime import date
+from sqlalchemy.orm import joinedload
 from app.database.session import DatabaseSession
 from app.models import Prestacion, Paciente
 
@@ -25,7 +26,9 @@ class ListarPrestacionesService:
         Returns:
             Lista de todas las prestaciones
         """
-        return Prestacion.query.order_by(Prestacion.fecha.desc()).all()
+        return Prestacion.query.options(
+            joinedload(Prestacion.paciente), Prestacion.opciones_codigos()
+        ).order_by(Prestacion.fecha.desc()).all()
     
     @staticmethod
     def listar_por_paciente(
@@ -92,7 +95,7 @@ class ListarPrestacionesService:
         pagina_actual = max(1, min(pagina, total_paginas))
         offset = (pagina_actual - 1) * por_pagina
         
-        items = query.offset(offset).limit(por_pagina).all()
+        items = query.options(Prestacion.opciones_codigos()).offset(offset).limit(por_pagina).all()
         
         return {
             'items': items,
@@ -150,6 +153,8 @@ class ListarPrestacionesService:
         if not Paciente.query.get(paciente_id):
             raise PacienteNoEncontradoError(paciente_id)
         
-        return Prestacion.query.filter_by(paciente_id=paciente_id).order_by(
+        return Prestacion.query.filter_by(paciente_id=paciente_id).options(
+            Prestacion.opciones_codigos()
+        ).order_by(
             Prestacion.fecha.desc()
         ).limit(limite).all()
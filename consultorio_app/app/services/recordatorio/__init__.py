@@ -0,0 +1,12 @@
+"""
+Inicializador del módulo de servicios de recordatorios de turnos.
+"""
+
+from .encolar_recordatorios_service import EncolarRecordatoriosService
+from .enviar_recordatorios_service import EnviarRecordatoriosService, LimitadorEnvios
+
+__all__ = [
+    'EncolarRecordatoriosService',
+    'EnviarRecordatoriosService',
+    'LimitadorEnvios',
+]
@@ -0,0 +1,99 @@
+"""
+EncolarRecordatoriosService: Caso de uso para encolar los recordatorios de turnos de un día.
+
+Responsabilidades:
+- Seleccionar los turnos Pendiente/Confirmado del día con una sola consulta (índice por fecha)
+- Renderizar los parámetros de la plantilla de WhatsApp
+- Insertar un recordatorio por turno con clave de idempotencia (INSERT OR IGNORE)
+"""
+
+import json
+import re
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import SettingsLoader
+from app.database.session import DatabaseSession
+from app.models import Estado, Paciente, RecordatorioTurno, Turno
+
+
+class EncolarRecordatoriosService:
+    """Caso de uso: encolar recordatorios de los turnos de un día."""
+
+    ESTADOS_A_RECORDAR = ('Pendiente', 'Confirmado')
+
+    @staticmethod
+    def clave(turno_id: int, fecha: date, hora) -> str:
+        """Clave de idempotencia: cambia si el turno se reprograma."""
+        return f"turno:{turno_id}:{fecha.isoformat()}:{hora.strftime('%H:%M')}"
+
+    @staticmethod
+    def execute(fecha: Optional[date] = None) -> int:
+        """
+        Encola los recordatorios de los turnos del día indicado (por defecto, mañana).
+
+        Es seguro ejecutarlo varias veces o después de un reinicio: los turnos que
+        ya tienen recordatorio se ignoran por la restricción UNIQUE de la clave.
+
+        Args:
+            fecha: Día de los turnos a recordar
+
+        Returns:
+            Cantidad de recordatorios nuevos encolados
+        """
+        session = DatabaseSession.get_instance().session
+        fecha = fecha or date.today() + timedelta(days=1)
+        plantilla = SettingsLoader.get('whatsapp', 'recordatorio_plantilla', 'recordatorio_turno')
+        idioma = SettingsLoader.get('whatsapp', 'recordatorio_idioma', 'es_AR')
+
+        consulta = (
+            select(Turno.id, Turno.fecha, Turno.hora, Paciente.nombre, Paciente.telefono)
+            .join(Paciente, Paciente.id == Turno.paciente_id)
+            .outerjoin(Estado, Estado.id == Turno.estado_id)
+            .where(
+                Turno.fecha == fecha,
+                or_(
+                    Estado.nombre.in_(EncolarRecordatoriosService.ESTADOS_A_RECORDAR),
+                    # Turnos legacy sin FK: se usa el string de estado
+                    (Turno.estado_id.is_(None)
+                     & or_(Turno.estado.is_(None), Turno.estado.in_(EncolarRecordatoriosService.ESTADOS_A_RECORDAR))),
+                ),
+            )
+            .order_by(Turno.hora)
+        )
+
+        filas = []
+        for turno_id, fecha_turno, hora, nombre, telefono in session.execute(consulta):
+            telefono = re.sub(r'\D', '', telefono or '')
+            if not telefono:
+                continue
+            filas.append({
+                'clave': EncolarRecordatoriosService.clave(turno_id, fecha_turno, hora),
+                'turno_id': turno_id,
+                'telefono': telefono,
+                'plantilla': plantilla,
+                'idioma': idioma,
+                'parametros': json.dumps(
+                    [nombre, fecha_turno.strftime('%d/%m/%Y'), hora.strftime('%H:%M')],
+                    ensure_ascii=False,
+                ),
+                'estado': RecordatorioTurno.PENDIENTE,
+                'intentos': 0,
+            })
+
+        if not filas:
+            return 0
+
+        try:
+            resultado = session.execute(
+                sqlite_insert(RecordatorioTurno.__table__).on_conflict_do_nothing(index_elements=['clave']),
+                filas,
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return resultado.rowcount
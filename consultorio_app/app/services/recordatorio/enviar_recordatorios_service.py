@@ -0,0 +1,186 @@
+"""
+EnviarRecordatoriosService: Caso de uso para enviar los recordatorios encolados.
+
+Responsabilidades:
+- Reclamar lotes de recordatorios pendientes en forma atómica (dos envíos en paralelo no comparten filas)
+- Descartar recordatorios de turnos cancelados o reprogramados
+- Enviar cada lote en paralelo con un límite de mensajes por segundo (límites de Meta)
+- Registrar el resultado: enviado, reintento en la próxima corrida o error definitivo
+
+Los recordatorios quedan en 'enviando' mientras se envían. Si el proceso se corta
+en ese momento no se reintentan: es preferible perder un recordatorio a duplicarlo.
+"""
+
+import json
+import logging
+import threading
+import time as _time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from app.config import SettingsLoader
+from app.database.session import DatabaseSession
+from app.database.transacciones import iniciar_transaccion_inmediata
+from app.models import RecordatorioTurno, Turno
+from app.services.whatsapp import WhatsAppMessageService
+from .encolar_recordatorios_service import EncolarRecordatoriosService
+
+logger = logging.getLogger(__name__)
+
+
+class LimitadorEnvios:
+    """Espacia los envíos para no superar N mensajes por segundo entre todos los hilos."""
+
+    def __init__(self, por_segundo: float):
+        self._intervalo = 1.0 / por_segundo if por_segundo and por_segundo > 0 else 0.0
+        self._proximo = _time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self) -> None:
+        with self._lock:
+            ahora = _time.monotonic()
+            turno = max(self._proximo, ahora)
+            self._proximo = turno + self._intervalo
+        if turno > ahora:
+            _time.sleep(turno - ahora)
+
+
+class EnviarRecordatoriosService:
+    """Caso de uso: enviar por WhatsApp los recordatorios pendientes."""
+
+    TAMANIO_LOTE = 20
+    HILOS = 4
+    MAX_INTENTOS = 3
+
+    @staticmethod
+    def execute() -> Dict[str, int]:
+        """
+        Envía todos los recordatorios pendientes, lote por lote.
+
+        Returns:
+            Dict con cantidades: enviados, reintentar, fallidos, descartados
+        """
+        session = DatabaseSession.get_instance().session
+        limitador = LimitadorEnvios(SettingsLoader.get_int('whatsapp', 'mensajes_por_segundo', 10))
+        resumen = {'enviados': 0, 'reintentar': 0, 'fallidos': 0, 'descartados': 0}
+        # Cursor por id: los que vuelven a 'pendiente' se reintentan en la próxima corrida
+        cursor = [0]
+
+        with ThreadPoolExecutor(max_workers=EnviarRecordatoriosService.HILOS,
+                                thread_name_prefix='recordatorios') as pool:
+            while True:
+                lote, quedan = EnviarRecordatoriosService._reclamar_lote(session, cursor, resumen)
+                if not quedan:
+                    break
+                if not lote:
+                    continue
+
+                envios = [
+                    (r.telefono, r.plantilla, r.idioma, json.loads(r.parametros or '[]'))
+                    for r in lote
+                ]
+                resultados = list(pool.map(
+                    lambda envio: EnviarRecordatoriosService._enviar(envio, limitador), envios
+                ))
+                EnviarRecordatoriosService._registrar_resultados(session, lote, resultados, resumen)
+
+        if any(resumen.values()):
+            logger.info(f"Recordatorios de turnos: {resumen}")
+        return resumen
+
+    @staticmethod
+    def _reclamar_lote(
+        session, cursor: List[int], resumen: Dict[str, int]
+    ) -> Tuple[List[RecordatorioTurno], bool]:
+        """
+        Pasa a 'enviando' el próximo lote de pendientes bajo el lock de escritura.
+
+        Los que ya no corresponden (turno cancelado, reprogramado o pasado) se descartan.
+
+        Returns:
+            (recordatorios a enviar, si había pendientes por revisar)
+        """
+        try:
+            iniciar_transaccion_inmediata(session)
+            query = (
+                RecordatorioTurno.query
+                .filter(
+                    RecordatorioTurno.estado == RecordatorioTurno.PENDIENTE,
+                    RecordatorioTurno.id > cursor[0],
+                )
+                .order_by(RecordatorioTurno.id)
+            )
+            candidatos = query.limit(EnviarRecordatoriosService.TAMANIO_LOTE).all()
+            if candidatos:
+                cursor[0] = candidatos[-1].id
+
+            turnos = {
+                t.id: t for t in Turno.query.filter(Turno.id.in_([r.turno_id for r in candidatos])).all()
+            } if candidatos else {}
+
+            lote = []
+            for recordatorio in candidatos:
+                if EnviarRecordatoriosService._vigente(recordatorio, turnos.get(recordatorio.turno_id)):
+                    recordatorio.estado = RecordatorioTurno.ENVIANDO
+                    recordatorio.intentos = (recordatorio.intentos or 0) + 1
+                    lote.append(recordatorio)
+                else:
+                    recordatorio.estado = RecordatorioTurno.DESCARTADO
+                    resumen['descartados'] += 1
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return lote, bool(candidatos)
+
+    @staticmethod
+    def _vigente(recordatorio: RecordatorioTurno, turno: Turno) -> bool:
+        if turno is None or turno.fecha < date.today():
+            return False
+        if turno.estado_nombre not in EncolarRecordatoriosService.ESTADOS_A_RECORDAR:
+            return False
+        return recordatorio.clave == EncolarRecordatoriosService.clave(turno.id, turno.fecha, turno.hora)
+
+    @staticmethod
+    def _enviar(envio: Tuple[str, str, str, list], limitador: LimitadorEnvios) -> Tuple[bool, str]:
+        """Corre en un hilo del pool: sólo habla con la API, nunca con la base."""
+        telefono, plantilla, idioma, parametros = envio
+        limitador.esperar()
+        try:
+            return WhatsAppMessageService.send_template_message(
+                telefono, plantilla, idioma, parametros=parametros
+            )
+        except Exception as exc:
+            return False, str(exc)
+
+    @staticmethod
+    def _registrar_resultados(
+        session,
+        lote: List[RecordatorioTurno],
+        resultados: List[Tuple[bool, str]],
+        resumen: Dict[str, int],
+    ) -> None:
+        ahora = datetime.now()
+        for recordatorio, (exito, resultado) in zip(lote, resultados):
+            if exito:
+                recordatorio.estado = RecordatorioTurno.ENVIADO
+                recordatorio.message_id = resultado
+                recordatorio.enviado_en = ahora
+                recordatorio.error = None
+                resumen['enviados'] += 1
+            elif recordatorio.intentos >= EnviarRecordatoriosService.MAX_INTENTOS:
+                recordatorio.estado = RecordatorioTurno.ERROR
+                recordatorio.error = resultado
+                resumen['fallidos'] += 1
+                logger.error(f"Recordatorio {recordatorio.clave} descartado tras {recordatorio.intentos} intentos: {resultado}")
+            else:
+                recordatorio.estado = RecordatorioTurno.PENDIENTE
+                recordatorio.error = resultado
+                resumen['reintentar'] += 1
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
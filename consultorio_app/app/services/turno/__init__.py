@@ -3,19 +3,24 @@ Inicializador del módulo de servicios de turno.
 """
 
 from .agendar_turno_service import AgendarTurnoService
+from .agendar_serie_turnos_service import AgendarSerieTurnosService
 from .cambiar_estado_turno_service import CambiarEstadoTurnoService
-from .obtener_agenda_service import ObtenerAgendaService
+from .obtener_agenda_service import ObtenerAgendaService, TurnoAgenda
 from .listar_turnos_service import ListarTurnosService
 from .obtener_horarios_service import ObtenerHorariosService
 from .eliminar_turno_service import EliminarTurnoService
 from .editar_turno_service import EditarTurnoService
+from .proyeccion_agenda import ProyeccionAgenda
 
 __all__ = [
     'AgendarTurnoService',
+    'AgendarSerieTurnosService',
     'CambiarEstadoTurnoService',
     'ObtenerAgendaService',
+    'TurnoAgenda',
     'ListarTurnosService',
     'ObtenerHorariosService',
     'EliminarTurnoService',
     'EditarTurnoService',
+    'ProyeccionAgenda',
 ]
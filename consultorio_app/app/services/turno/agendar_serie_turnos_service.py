@@ -0,0 +1,305 @@
+"""
+AgendarSerieTurnosService: Caso de uso para agendar una serie de turnos recurrentes.
+
+Pensado para tratamientos largos (ej: ortodoncia cada 3-4 semanas durante un año).
+
+Responsabilidades:
+- Generar las ocurrencias de la serie (cada N semanas, día de semana, cantidad/hasta)
+- Validar una sola vez paciente, hora y duración
+- Verificar disponibilidad de toda la serie con una única consulta de ocupación
+- Insertar todos los turnos libres en una sola transacción
+- Informar los conflictos por ocurrencia con horarios alternativos, sin abortar la serie
+"""
+
+from datetime import date, time, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+from app.database.session import DatabaseSession
+from app.database.transacciones import iniciar_transaccion_inmediata
+from app.models import Turno, Paciente, Estado
+from app.services.common import (
+    DatosInvalidosError,
+    PacienteNoEncontradoError,
+    TurnoError,
+    TurnoHoraInvalidaError,
+    TurnoDuracionInvalidaError,
+    ValidadorTurno,
+)
+from .proyeccion_agenda import ProyeccionAgenda
+
+
+class AgendarSerieTurnosService:
+    """Caso de uso: agendar una serie de turnos recurrentes."""
+
+    # Un año de controles semanales como máximo
+    MAX_OCURRENCIAS = 52
+    # Paso con el que se buscan horarios alternativos
+    PASO_ALTERNATIVAS_MIN = 15
+    MAX_ALTERNATIVAS = 3
+    # Días hábiles siguientes en los que se ofrece el mismo horario
+    DIAS_ALTERNATIVOS = 3
+
+    @staticmethod
+    def generar_ocurrencias(
+        fecha_inicio: date,
+        cada_semanas: int = 1,
+        dia_semana: int = None,
+        cantidad: int = None,
+        hasta: date = None,
+    ) -> List[date]:
+        """
+        Genera las fechas de la serie (regla tipo RRULE FREQ=WEEKLY).
+
+        Args:
+            fecha_inicio: Primer día posible de la serie
+            cada_semanas: Intervalo en semanas entre turnos (INTERVAL)
+            dia_semana: Día de la semana 0=lunes..6=domingo (BYDAY); por defecto el de fecha_inicio
+            cantidad: Cantidad de turnos (COUNT)
+            hasta: Última fecha posible, inclusive (UNTIL)
+
+        Returns:
+            Lista ordenada de fechas
+
+        Raises:
+            DatosInvalidosError: Si la regla es inválida o excede MAX_OCURRENCIAS
+        """
+        maximo = AgendarSerieTurnosService.MAX_OCURRENCIAS
+        if not cada_semanas or cada_semanas < 1:
+            raise DatosInvalidosError("El intervalo de la serie debe ser de al menos 1 semana")
+        if dia_semana is not None and not 0 <= dia_semana <= 6:
+            raise DatosInvalidosError("El día de la semana debe estar entre 0 (lunes) y 6 (domingo)")
+        if cantidad is None and hasta is None:
+            raise DatosInvalidosError("Indique la cantidad de turnos o la fecha de fin de la serie")
+        if cantidad is not None and not 1 <= cantidad <= maximo:
+            raise DatosInvalidosError(f"La serie debe tener entre 1 y {maximo} turnos")
+        if hasta is not None and hasta < fecha_inicio:
+            raise DatosInvalidosError("La fecha de fin de la serie es anterior a la de inicio")
+
+        primera = fecha_inicio
+        if dia_semana is not None:
+            primera = fecha_inicio + timedelta(days=(dia_semana - fecha_inicio.weekday()) % 7)
+
+        paso = timedelta(weeks=cada_semanas)
+        ocurrencias: List[date] = []
+        fecha = primera
+        while (cantidad is None or len(ocurrencias) < cantidad) and (hasta is None or fecha <= hasta):
+            if len(ocurrencias) == maximo:
+                raise DatosInvalidosError(
+                    f"La serie excede el máximo de {maximo} turnos; acorte la fecha de fin"
+                )
+            ocurrencias.append(fecha)
+            fecha += paso
+        return ocurrencias
+
+    @staticmethod
+    def execute(
+        paciente_id: int,
+        fecha_inicio: date,
+        hora: time,
+        duracion: int = 30,
+        cada_semanas: int = 4,
+        dia_semana: int = None,
+        cantidad: int = None,
+        hasta: date = None,
+        detalle: str = None,
+        estado: str = 'Confirmado',
+        profesional_id: int = None,
+        sillon: int = None,
+    ) -> Dict[str, list]:
+        """
+        Agenda todos los turnos libres de la serie en una sola transacción.
+
+        Las ocurrencias que caen en día no laborable, en el pasado o sobre otro
+        turno no se agendan: se informan en 'conflictos' con alternativas
+        (otros horarios del mismo día y el mismo horario en días hábiles siguientes).
+
+        Args:
+            paciente_id: ID del paciente (requerido)
+            fecha_inicio: Primer día posible de la serie
+            hora: Hora de cada turno
+            duracion: Duración en minutos (default 30)
+            cada_semanas: Intervalo en semanas (default 4)
+            dia_semana: Día de la semana 0=lunes..6=domingo (opcional)
+            cantidad: Cantidad de turnos (COUNT)
+            hasta: Última fecha posible (UNTIL)
+            detalle: Detalles/notas de los turnos (opcional)
+            estado: Estado inicial de los turnos (default 'Confirmado')
+            profesional_id: Usuario profesional asignado (opcional)
+            sillon: Número de sillón (opcional)
+
+        Returns:
+            Dict con:
+            - agendados: Turnos creados
+            - conflictos: [{'fecha', 'hora', 'motivo', 'alternativas': [{'fecha', 'hora'}]}]
+
+        Raises:
+            DatosInvalidosError: Si la regla de recurrencia es inválida
+            PacienteNoEncontradoError: Si paciente no existe
+            TurnoHoraInvalidaError: Si hora es fuera de rango
+            TurnoDuracionInvalidaError: Si duración es inválida
+            TurnoError: Para otros errores
+        """
+        session = DatabaseSession.get_instance().session
+
+        try:
+            ocurrencias = AgendarSerieTurnosService.generar_ocurrencias(
+                fecha_inicio, cada_semanas, dia_semana, cantidad, hasta
+            )
+
+            paciente = Paciente.query.get(paciente_id)
+            if not paciente:
+                raise PacienteNoEncontradoError(paciente_id)
+
+            # Validaciones comunes a toda la serie (una sola vez)
+            es_valida, mensaje = ValidadorTurno.validar_hora(hora)
+            if not es_valida:
+                raise TurnoHoraInvalidaError(mensaje)
+
+            es_valida, mensaje = ValidadorTurno.validar_duracion(duracion)
+            if not es_valida:
+                raise TurnoDuracionInvalidaError(duracion)
+
+            hora_fin_turno = datetime.combine(date.today(), hora) + timedelta(minutes=duracion)
+            if hora_fin_turno.time() > ValidadorTurno.HORARIO_FIN:
+                raise TurnoError(
+                    f"El turno terminaría a las {hora_fin_turno.strftime('%H:%M')}, "
+                    f"después del horario de atención ({ValidadorTurno.HORARIO_FIN.strftime('%H:%M')}). "
+                    f"Reduzca la duración o elija un horario más temprano."
+                )
+
+            estado_nombre = estado or 'Confirmado'
+            estado_obj = Estado.query.filter_by(nombre=estado_nombre).first()
+            if not estado_obj:
+                raise TurnoError(f"Estado destino no encontrado en BD: '{estado_nombre}'")
+
+            # Verificación e inserción de toda la serie bajo el mismo lock de escritura
+            iniciar_transaccion_inmediata(session)
+            dias_consulta = {
+                fecha + timedelta(days=delta)
+                for fecha in ocurrencias
+                for delta in range(AgendarSerieTurnosService.DIAS_ALTERNATIVOS + 2)
+            }
+            ocupacion = AgendarSerieTurnosService._cargar_ocupacion(session, dias_consulta)
+
+            inicio_min = hora.hour * 60 + hora.minute
+            detalle_limpio = detalle.strip() if detalle else None
+            agendados: List[Turno] = []
+            conflictos: List[dict] = []
+
+            for fecha in ocurrencias:
+                motivo = AgendarSerieTurnosService._motivo_conflicto(
+                    fecha, hora, inicio_min, duracion, ocupacion
+                )
+                if motivo:
+                    conflictos.append({
+                        'fecha': fecha,
+                        'hora': hora,
+                        'motivo': motivo,
+                        'alternativas': AgendarSerieTurnosService._alternativas(
+                            fecha, hora, inicio_min, duracion, ocupacion
+                        ),
+                    })
+                    continue
+
+                turno = Turno(
+                    paciente_id=paciente_id,
+                    fecha=fecha,
+                    hora=hora,
+                    duracion=duracion,
+                    detalle=detalle_limpio,
+                    estado=estado_obj.nombre,
+                    estado_id=estado_obj.id,
+                    profesional_id=profesional_id,
+                    sillon=sillon,
+                )
+                session.add(turno)
+                agendados.append(turno)
+                ocupacion.setdefault(fecha, []).append((inicio_min, inicio_min + duracion))
+
+            session.commit()
+            if agendados:
+                ProyeccionAgenda.invalidar(*(t.fecha for t in agendados))
+            return {'agendados': agendados, 'conflictos': conflictos}
+
+        except (DatosInvalidosError, PacienteNoEncontradoError, TurnoHoraInvalidaError,
+                TurnoDuracionInvalidaError, TurnoError):
+            session.rollback()
+            raise
+        except Exception as exc:
+            session.rollback()
+            raise TurnoError(f"Error al agendar la serie de turnos: {str(exc)}")
+
+    @staticmethod
+    def _cargar_ocupacion(session, fechas) -> Dict[date, List[Tuple[int, int]]]:
+        """
+        Intervalos ocupados (minuto inicio, minuto fin) por día, con una sola consulta.
+
+        Los turnos Cancelados y NoAtendidos no ocupan; los que no tienen estado_id sí.
+        """
+        ids_excluir = [
+            e.id for e in Estado.query.filter(Estado.nombre.in_(['Cancelado', 'NoAtendido'])).all()
+        ]
+        query = session.query(Turno.fecha, Turno.hora, Turno.duracion).filter(Turno.fecha.in_(list(fechas)))
+        if ids_excluir:
+            query = query.filter(or_(Turno.estado_id.is_(None), ~Turno.estado_id.in_(ids_excluir)))
+
+        ocupacion: Dict[date, List[Tuple[int, int]]] = {}
+        for fecha, hora, duracion in query.all():
+            if not hora:
+                continue
+            inicio = hora.hour * 60 + hora.minute
+            ocupacion.setdefault(fecha, []).append((inicio, inicio + (duracion or 30)))
+        return ocupacion
+
+    @staticmethod
+    def _motivo_conflicto(
+        fecha: date, hora: time, inicio_min: int, duracion: int, ocupacion: Dict[date, list]
+    ) -> Optional[str]:
+        """Motivo por el que la ocurrencia no puede agendarse, o None si está libre."""
+        es_valida, mensaje = ValidadorTurno.validar_fecha(fecha)
+        if not es_valida:
+            return mensaje
+        es_valida, mensaje = ValidadorTurno.validar_fecha_hora_futura(fecha, hora)
+        if not es_valida:
+            return mensaje
+        fin_min = inicio_min + duracion
+        solapados = [
+            (ini, fin) for ini, fin in ocupacion.get(fecha, []) if inicio_min < fin and ini < fin_min
+        ]
+        if solapados:
+            return f"El horario se solapa con {len(solapados)} turno(s) existente(s)"
+        return None
+
+    @staticmethod
+    def _alternativas(
+        fecha: date, hora: time, inicio_min: int, duracion: int, ocupacion: Dict[date, list]
+    ) -> List[dict]:
+        """
+        Sugerencias para una ocurrencia en conflicto:
+        los horarios libres más cercanos del mismo día y el mismo horario en los días hábiles siguientes.
+        """
+        cls = AgendarSerieTurnosService
+        alternativas: List[dict] = []
+
+        apertura = ValidadorTurno.HORARIO_INICIO.hour * 60 + ValidadorTurno.HORARIO_INICIO.minute
+        cierre = ValidadorTurno.HORARIO_FIN.hour * 60 + ValidadorTurno.HORARIO_FIN.minute
+        candidatos = range(apertura, cierre - duracion + 1, cls.PASO_ALTERNATIVAS_MIN)
+        for minuto in sorted(candidatos, key=lambda m: (abs(m - inicio_min), m)):
+            if len(alternativas) == cls.MAX_ALTERNATIVAS:
+                break
+            if minuto == inicio_min:
+                continue
+            hora_alt = time(minuto // 60, minuto % 60)
+            if cls._motivo_conflicto(fecha, hora_alt, minuto, duracion, ocupacion) is None:
+                alternativas.append({'fecha': fecha, 'hora': hora_alt})
+
+        for delta in range(1, cls.DIAS_ALTERNATIVOS + 2):
+            otra_fecha = fecha + timedelta(days=delta)
+            if cls._motivo_conflicto(otra_fecha, hora, inicio_min, duracion, ocupacion) is None:
+                alternativas.append({'fecha': otra_fecha, 'hora': hora})
+                if len(alternativas) == 2 * cls.MAX_ALTERNATIVAS:
+                    break
+
+        return alternativas
@@ -3,14 +3,16 @@ AgendarTurnoService: Caso de uso para agendar un nuevo turno.
 
 Responsabilidades:
 - Validar datos del turno (fecha, hora, duración)
-- Verificar disponibilidad (no solapamiento)
+- Verificar disponibilidad (no solapamiento) en forma atómica con la inserción
 - Validar paciente existe
 - Los turnos web siempre se crean en estado Confirmado
 - Persistir turno
 """
 
 from datetime import date, time, datetime, timedelta
+from sqlalchemy.orm import joinedload
 from app.database.session import DatabaseSession
+from app.database.transacciones import iniciar_transaccion_inmediata
 from app.models import Turno, Paciente, Estado
 from app.services.common import (
     PacienteNoEncontradoError,
@@ -21,6 +23,7 @@ from app.services.common import (
     TurnoSolapamientoError,
     ValidadorTurno,
 )
+from .proyeccion_agenda import ProyeccionAgenda
 
 
 class AgendarTurnoService:
@@ -34,6 +37,8 @@ class AgendarTurnoService:
         duracion: int = 30,
         detalle: str = None,
         estado: str = 'Confirmado',
+        profesional_id: int = None,
+        sillon: int = None,
     ) -> Turno:
         """
         Agenda un nuevo turno.
@@ -45,6 +50,8 @@ class AgendarTurnoService:
             duracion: Duración en minutos (default 30)
             detalle: Detalles/notas del turno (opcional)
             estado: Estado inicial del turno (default 'Confirmado'; use 'Pendiente' para WhatsApp)
+            profesional_id: Usuario profesional asignado (opcional)
+            sillon: Número de sillón (opcional)
         
         Returns:
             Turno agendado
@@ -94,7 +101,9 @@ class AgendarTurnoService:
                     f"Reduzca la duración o elija un horario más temprano."
                 )
             
-            # Verificar solapamiento
+            # Verificar solapamiento e insertar bajo el mismo lock de escritura:
+            # dos reservas concurrentes (web + WhatsApp) no pueden pasar ambas la verificación
+            iniciar_transaccion_inmediata(session)
             AgendarTurnoService._verificar_solapamiento(fecha, hora, duracion)
             
             # Resolver estado por nombre (default Confirmado)
@@ -112,10 +121,13 @@ class AgendarTurnoService:
                 detalle=detalle.strip() if detalle else None,
                 estado=estado_obj.nombre,
                 estado_id=estado_obj.id,
+                profesional_id=profesional_id,
+                sillon=sillon,
             )
             
             session.add(turno)
             session.commit()
+            ProyeccionAgenda.invalidar(fecha)
             return turno
             
         except (PacienteNoEncontradoError, TurnoFechaInvalidaError, TurnoHoraInvalidaError,
@@ -142,7 +154,8 @@ class AgendarTurnoService:
         }
         ids_excluir = [eid for eid in [estados_excluir.get('Cancelado'), estados_excluir.get('NoAtendido')] if eid]
 
-        query = Turno.query.filter(Turno.fecha == fecha)
+        # El paciente se muestra en el detalle del solapamiento
+        query = Turno.query.options(joinedload(Turno.paciente)).filter(Turno.fecha == fecha)
         if ids_excluir:
             query = query.filter(~Turno.estado_id.in_(ids_excluir))
         if turno_id_excluir:
@@ -6,8 +6,10 @@ Responsabilidades:
 - Validar transiciones de estado según matriz
 - Persistir cambio y registrar historial
 - Manejar reglas especiales (ej: turnos pasados, estados finales)
+- Ofrecer el horario liberado a la lista de espera al cancelar
 """
 
+import logging
 from datetime import date, datetime
 from app.database.session import DatabaseSession
 from app.models import Turno, CambioEstado, Estado
@@ -17,6 +19,10 @@ from app.services.common import (
     TransicionEstadoInvalidaError,
     EstadoFinalError,
 )
+from app.services.lista_espera import OfrecerTurnoLiberadoService
+from .proyeccion_agenda import ProyeccionAgenda
+
+logger = logging.getLogger(__name__)
 
 
 class CambiarEstadoTurnoService:
@@ -99,6 +105,9 @@ class CambiarEstadoTurnoService:
             
             session.add(cambio)
             session.commit()
+            ProyeccionAgenda.invalidar(turno.fecha)
+            if estado_nuevo == 'Cancelado':
+                CambiarEstadoTurnoService._ofrecer_a_lista_espera(turno)
             return turno
             
         except (TurnoNoEncontradoError, TransicionEstadoInvalidaError, EstadoFinalError, TurnoError):
@@ -108,6 +117,17 @@ class CambiarEstadoTurnoService:
             session.rollback()
             raise TurnoError(f"Error al cambiar estado del turno: {str(exc)}")
     
+    @staticmethod
+    def _ofrecer_a_lista_espera(turno: Turno) -> None:
+        """Ofrece el horario cancelado a la lista de espera; un error acá no revierte la cancelación."""
+        try:
+            OfrecerTurnoLiberadoService.execute(
+                turno.fecha, turno.hora, turno.duracion or 30,
+                excluir_paciente_id=turno.paciente_id,
+            )
+        except Exception as exc:
+            logger.exception(f"No se pudo ofrecer el turno {turno.id} a la lista de espera: {exc}")
+
     @staticmethod
     def _validar_transicion(estado_actual: str, estado_nuevo: str) -> None:
         """
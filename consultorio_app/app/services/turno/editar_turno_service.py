@@ -9,8 +9,10 @@ Responsabilidades:
 """
 
 from datetime import date, time, datetime, timedelta
+from sqlalchemy.orm import joinedload
 from app.database.session import DatabaseSession
-from app.models import Turno
+from app.database.transacciones import iniciar_transaccion_inmediata
+from app.models import Turno, Estado
 from app.services.common import (
     TurnoNoEncontradoError,
     TurnoError,
@@ -21,6 +23,7 @@ from app.services.common import (
     ValidadorTurno,
     EstadoFinalError,
 )
+from .proyeccion_agenda import ProyeccionAgenda
 
 
 class EditarTurnoService:
@@ -72,6 +75,7 @@ class EditarTurnoService:
                     f"No se puede reagendar un turno en estado '{estado_actual}'. "
                     f"Solo se pueden reagendar turnos en estados: Pendiente, Confirmado."
                 )
+            fecha_original = turno.fecha
             
             # Validar y actualizar fecha si se proporciona
             if fecha is not None:
@@ -113,7 +117,8 @@ class EditarTurnoService:
                         f"Reduzca la duración o elija un horario más temprano."
                     )
                 
-                # Verificar solapamiento con la nueva fecha/hora
+                # Verificar solapamiento con la nueva fecha/hora (atómico con el commit)
+                iniciar_transaccion_inmediata(session)
                 EditarTurnoService._verificar_solapamiento(
                     fecha_check, hora_check, duracion_check, turno_id_excluir=turno_id
                 )
@@ -123,6 +128,8 @@ class EditarTurnoService:
                 turno.detalle = detalle.strip() if detalle else None
             
             session.commit()
+            # Recalcular el día de origen y el de destino si se movió
+            ProyeccionAgenda.invalidar(fecha_original, turno.fecha)
             return turno
             
         except (TurnoNoEncontradoError, EstadoFinalError, TurnoFechaInvalidaError, 
@@ -150,7 +157,8 @@ class EditarTurnoService:
         }
         ids_excluir = [eid for eid in [estados_excluir.get('Cancelado'), estados_excluir.get('NoAtendido')] if eid]
 
-        query = Turno.query.filter(Turno.fecha == fecha)
+        # El paciente se muestra en el detalle del solapamiento
+        query = Turno.query.options(joinedload(Turno.paciente)).filter(Turno.fecha == fecha)
         if ids_excluir:
             query = query.filter(~Turno.estado_id.in_(ids_excluir))
         if turno_id_excluir:
@@ -11,6 +11,7 @@ from app.services.common import (
     TurnoNoEncontradoError,
     EstadoTurnoInvalidoError,
 )
+from .proyeccion_agenda import ProyeccionAgenda
 
 
 class EliminarTurnoService:
@@ -55,8 +56,10 @@ class EliminarTurnoService:
             )
         
         # 3. Eliminar
+        fecha = turno.fecha
         session.delete(turno)
         session.commit()
+        ProyeccionAgenda.invalidar(fecha)
         
         return {
             'success': True,
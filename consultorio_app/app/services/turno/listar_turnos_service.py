@@ -10,6 +10,7 @@ from typing import Dict, List, Any, Tuple, Optional
 from app.database.session import DatabaseSession
 from app.models import Turno, Paciente, Estado
 from sqlalchemy.orm import joinedload
+from .proyeccion_agenda import ProyeccionAgenda
 
 
 class ListarTurnosService:
@@ -310,6 +311,7 @@ class ListarTurnosService:
         turnos = session.query(Turno).filter(*filtros).all()
         
         cambios = 0
+        fechas_cambiadas = set()
         for turno in turnos:
             es_vencido = False
             
@@ -326,11 +328,13 @@ class ListarTurnosService:
             if es_vencido:
                 turno.estado_id = estados.get('NoAtendido')
                 turno.estado = 'NoAtendido'
+                fechas_cambiadas.add(turno.fecha)
                 cambios += 1
         
         # Commit batch update
         if cambios > 0:
             session.commit()
+            ProyeccionAgenda.invalidar(*fechas_cambiadas)
         
         total_turnos = session.query(Turno).count()
         
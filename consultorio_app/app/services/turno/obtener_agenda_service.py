@@ -3,54 +3,82 @@ Servicio para obtener la agenda visual de turnos con cálculos de posicionamient
 
 Este servicio replica la lógica compleja de obtener_semana_agenda() del viejo
 turno_service.py, calculando porcentajes de top y height para posicionamiento visual.
+
+Todas las vistas (día, semana, mes, por sillón o por profesional) salen del mismo
+motor: obtener_rango_agenda() consulta el rango con una sola query y agrupa los
+turnos en columnas, repartiendo en sub-columnas los turnos simultáneos.
+
+La proyección de cada día se guarda en ProyeccionAgenda (por semana ISO) y sólo
+se recalcula cuando un caso de uso invalida ese día.
 """
 
 from datetime import date, datetime, timedelta, time
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
+from sqlalchemy import select, func, or_
 from app.database.session import DatabaseSession
-from app.models import Turno, Paciente, Estado
-from sqlalchemy.orm import joinedload
+from app.models import Turno, Paciente, Estado, Usuario
+from app.services.common import DatosInvalidosError
+from .proyeccion_agenda import ProyeccionAgenda
+
+
+class TurnoAgenda(NamedTuple):
+    """Fila liviana de agenda: sólo los campos que se muestran, con su posición visual."""
+
+    id: int
+    fecha: date
+    hora: time
+    hora_fin: time
+    duracion: int
+    detalle: Optional[str]
+    estado: str
+    paciente_id: int
+    paciente_nombre: str
+    paciente_apellido: str
+    paciente_dni: str
+    profesional_id: Optional[int]
+    profesional_nombre: Optional[str]
+    sillon: Optional[int]
+    top_pct: float       # % desde 8am
+    height_pct: float    # % de altura
+    truncado: bool
+    columna: int = 0     # sub-columna asignada cuando hay turnos simultáneos
+    columnas: int = 1    # cantidad de sub-columnas del grupo de solapados
 
 
 class ObtenerAgendaService:
     """Servicio para obtener agenda con visual positioning."""
-    
+
     # Constantes de horario
     HORARIO_INICIO_HORA = 8
     HORARIO_INICIO_MIN = 0
     HORARIO_FIN_HORA = 21
     HORARIO_FIN_MIN = 0
-    
+
+    DIAS_NOMBRES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+    AGRUPACIONES = ('dia', 'sillon', 'profesional')
+    MAX_DIAS_RANGO = 62
+
     @staticmethod
-    def obtener_semana_agenda(fecha_inicio: date) -> Dict[str, Any]:
+    def obtener_semana_agenda(fecha_inicio: date, agrupar_por: str = 'dia') -> Dict[str, Any]:
         """
         Obtiene la agenda de una semana con cálculos de posicionamiento visual.
-        
+
         Calcula top_pct y height_pct para cada turno para posicionarlos visualmente
         en un timeline que va de 8am a 9pm.
-        
+
         Args:
             fecha_inicio: Fecha de inicio de la semana (generalmente un lunes)
-            
+            agrupar_por: 'dia', 'sillon' o 'profesional'
+
         Returns:
             Dict con estructura:
             {
                 'fecha_inicio': date,
                 'fecha_fin': date,
-                'turnos': [
-                    {
-                        'id': int,
-                        'paciente': {'id': int, 'nombre': str, 'apellido': str, ...},
-                        'fecha': date,
-                        'hora': time,
-                        'duracion': int,
-                        'detalle': str,
-                        'estado': str,
-                        'top_pct': float,       # % desde 8am
-                        'height_pct': float,    # % de altura
-                        'hora_fin': time,
-                    }
-                ],
+                'semana': {'Lunes': {'fecha': date, 'bloques': [TurnoAgenda]}, ...},
+                'columnas': [{'fecha', 'clave', 'titulo', 'subtitulo', 'bloques'}],
+                'turnos': [TurnoAgenda],   # todos los de la semana, por fecha y hora
                 'debug': {
                     'total_minutos_dia': int,
                     'horario_inicio_minutos': int,
@@ -58,205 +86,377 @@ class ObtenerAgendaService:
                 }
             }
         """
-        session = DatabaseSession.get_instance().session
-        
-        # Calcular rango de la semana (lunes a domingo)
-        dias_hasta_lunes = fecha_inicio.weekday()
-        fecha_lunes = fecha_inicio - timedelta(days=dias_hasta_lunes)
-        fecha_domingo = fecha_lunes + timedelta(days=6)
-
-        # Armar contenedores por día (Lunes a Sábado como en UI)
-        dias_nombres = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+        # Calcular rango de la semana (Lunes a Sábado como en UI)
+        fecha_lunes = fecha_inicio - timedelta(days=fecha_inicio.weekday())
+        fecha_sabado = fecha_lunes + timedelta(days=5)
+
+        datos = ObtenerAgendaService.obtener_rango_agenda(fecha_lunes, fecha_sabado, agrupar_por)
+
         semana = {}
-        for i in range(6):
+        for i, dia_nombre in enumerate(ObtenerAgendaService.DIAS_NOMBRES[:6]):
             fecha_dia = fecha_lunes + timedelta(days=i)
-            semana[dias_nombres[i]] = {
+            semana[dia_nombre] = {
                 'fecha': fecha_dia,
-                'bloques': [],
+                'bloques': datos['por_fecha'][fecha_dia],
             }
-        
-        # Obtener id de Cancelado
-        estado_cancelado = Estado.query.filter_by(nombre='Cancelado').first()
-        estado_cancelado_id = estado_cancelado.id if estado_cancelado else None
-
-        # Query turnos de la semana, ordenados por fecha y hora
-        # Excluir solo cancelados; NoAtendido se muestra en agenda (reserva que no se atendió)
-        filtros = [
-            Turno.fecha >= fecha_lunes,
-            Turno.fecha <= fecha_domingo,
-        ]
-        if estado_cancelado_id:
-            filtros.append(Turno.estado_id != estado_cancelado_id)
-
-        turnos = session.query(Turno).options(
-            joinedload(Turno.paciente),
-            joinedload(Turno.estado_obj),
-        ).filter(*filtros).order_by(Turno.fecha, Turno.hora).all()
-        
-        # Calcular constantes de positioning
-        horario_inicio_min = ObtenerAgendaService.HORARIO_INICIO_HORA * 60 + ObtenerAgendaService.HORARIO_INICIO_MIN  # 480
-        horario_fin_min = ObtenerAgendaService.HORARIO_FIN_HORA * 60 + ObtenerAgendaService.HORARIO_FIN_MIN       # 1260
-        total_minutos_dia = horario_fin_min - horario_inicio_min  # 780
 
-        # Procesar cada turno y asignarlo al día correspondiente con posiciones visuales
-        turnos_con_visual = []
-        for turno in turnos:
-            turno_hora_min = turno.hora.hour * 60 + turno.hora.minute
-            offset_min = turno_hora_min - horario_inicio_min
+        datos.update({
+            'semana': semana,
+            'fecha_inicio': fecha_lunes,
+            'fecha_fin': fecha_sabado,
+            'semana_siguiente': fecha_lunes + timedelta(days=7),
+            'semana_anterior': fecha_lunes - timedelta(days=7),
+        })
+        return datos
 
-            # Clipping: si turno comienza antes de 8am, mostrar desde 0%
-            offset_min = max(0, offset_min)
+    @staticmethod
+    def obtener_dia_agenda(fecha: date, agrupar_por: str = 'dia') -> Dict[str, Any]:
+        """
+        Obtiene la agenda de un día específico con visual positioning.
 
-            # Calcular porcentaje desde arriba
-            top_pct = (offset_min / total_minutos_dia) * 100
+        Args:
+            fecha: Fecha del día a obtener
+            agrupar_por: 'dia', 'sillon' o 'profesional'
 
-            # Calcular altura del turno en porcentaje
-            duracion_efectiva = turno.duracion
+        Returns:
+            Dict con estructura similar a obtener_semana_agenda pero para un día
+        """
+        datos = ObtenerAgendaService.obtener_rango_agenda(fecha, fecha, agrupar_por)
+        datos.update({
+            'fecha': fecha,
+            'dia_anterior': fecha - timedelta(days=1),
+            'dia_siguiente': fecha + timedelta(days=1),
+        })
+        return datos
 
-            # Edge case: si turno termina después de 9pm, truncar altura
-            turno_fin_min = offset_min + turno.duracion
-            if turno_fin_min > total_minutos_dia:
-                duracion_efectiva = total_minutos_dia - offset_min
+    @staticmethod
+    def obtener_mes_agenda(fecha: date) -> Dict[str, Any]:
+        """
+        Obtiene la agenda del mes de la fecha como grilla de semanas (lunes a domingo).
 
-            height_pct = (duracion_efectiva / total_minutos_dia) * 100
+        Returns:
+            Dict con 'semanas': [[{'fecha', 'en_mes', 'turnos': [TurnoAgenda]}] * 7],
+            más 'mes_inicio', 'mes_anterior', 'mes_siguiente' y 'total_turnos'
+        """
+        mes_inicio = fecha.replace(day=1)
+        mes_siguiente = (mes_inicio + timedelta(days=32)).replace(day=1)
+        mes_fin = mes_siguiente - timedelta(days=1)
 
-            # Calcular hora de fin (solo informativo)
-            hora_fin = (datetime.combine(date.today(), turno.hora) + timedelta(minutes=turno.duracion)).time()
-
-            # Guardar estructura de turno visual (para APIs)
-            turnos_con_visual.append({
-                'id': turno.id,
-                'paciente': {
-                    'id': turno.paciente.id,
-                    'nombre': turno.paciente.nombre,
-                    'apellido': turno.paciente.apellido,
-                    'dni': turno.paciente.dni,
-                },
-                'fecha': turno.fecha,
-                'hora': turno.hora,
-                'hora_fin': hora_fin,
-                'duracion': turno.duracion,
-                'detalle': turno.detalle,
-                'estado': turno.estado_nombre,
-                'top_pct': round(top_pct, 2),
-                'height_pct': round(height_pct, 2),
-                'truncado': turno_fin_min > total_minutos_dia,
-            })
-
-            # Asignar a semana para la vista (usa modelo Turno para compatibilidad con plantilla)
-            dia_semana = turno.fecha.weekday()  # 0=Lunes
-            if dia_semana < 6:
-                dia_nombre = dias_nombres[dia_semana]
-                semana[dia_nombre]['bloques'].append({
-                    'turno': turno,
-                    'top_pct': round(top_pct, 2),
-                    'height_pct': round(height_pct, 2),
+        # Completar semanas enteras para la grilla
+        grilla_desde = mes_inicio - timedelta(days=mes_inicio.weekday())
+        grilla_hasta = mes_fin + timedelta(days=6 - mes_fin.weekday())
+
+        datos = ObtenerAgendaService.obtener_rango_agenda(grilla_desde, grilla_hasta)
+
+        semanas = []
+        actual = grilla_desde
+        while actual <= grilla_hasta:
+            semana = []
+            for _ in range(7):
+                semana.append({
+                    'fecha': actual,
+                    'en_mes': actual.month == mes_inicio.month,
+                    'turnos': datos['por_fecha'][actual],
                 })
+                actual += timedelta(days=1)
+            semanas.append(semana)
 
-        # Generar marcadores y labels horarios cada 1h (8 a 21)
-        horas_marcadores = []
-        horas_labels = []
-        actual = datetime.combine(date.today(), time(ObtenerAgendaService.HORARIO_INICIO_HORA, ObtenerAgendaService.HORARIO_INICIO_MIN))
-        fin = datetime.combine(date.today(), time(ObtenerAgendaService.HORARIO_FIN_HORA, ObtenerAgendaService.HORARIO_FIN_MIN))
-        while actual <= fin:
-            minutos_desde_inicio = (actual - datetime.combine(date.today(), time(ObtenerAgendaService.HORARIO_INICIO_HORA, ObtenerAgendaService.HORARIO_INICIO_MIN))).seconds // 60
-            horas_marcadores.append((minutos_desde_inicio / total_minutos_dia) * 100.0)
-            horas_labels.append(actual.strftime('%H:00'))
-            actual += timedelta(hours=1)
+        datos.update({
+            'semanas': semanas,
+            'mes_inicio': mes_inicio,
+            'mes_anterior': (mes_inicio - timedelta(days=1)).replace(day=1),
+            'mes_siguiente': mes_siguiente,
+            'total_turnos': sum(
+                len(d['turnos']) for semana in semanas for d in semana if d['en_mes']
+            ),
+        })
+        return datos
+
+    @staticmethod
+    def obtener_rango_agenda(fecha_desde: date, fecha_hasta: date, agrupar_por: str = 'dia') -> Dict[str, Any]:
+        """
+        Motor general de agenda: turnos de un rango de fechas agrupados en columnas.
+
+        Cada columna es un día ('dia') o un par (día, sillón/profesional). Dentro de
+        cada columna los turnos simultáneos se reparten en sub-columnas
+        (TurnoAgenda.columna / TurnoAgenda.columnas).
+
+        Args:
+            fecha_desde: Primer día del rango (inclusive)
+            fecha_hasta: Último día del rango (inclusive)
+            agrupar_por: 'dia', 'sillon' o 'profesional'
+
+        Returns:
+            Dict con 'columnas', 'por_fecha', 'turnos', escala horaria y 'debug'
+
+        Raises:
+            DatosInvalidosError: Si la agrupación o el rango no son válidos
+        """
+        if agrupar_por not in ObtenerAgendaService.AGRUPACIONES:
+            raise DatosInvalidosError(f"Agrupación de agenda desconocida: '{agrupar_por}'")
+        if fecha_hasta < fecha_desde:
+            raise DatosInvalidosError("La fecha final del rango es anterior a la inicial")
+        cantidad_dias = (fecha_hasta - fecha_desde).days + 1
+        if cantidad_dias > ObtenerAgendaService.MAX_DIAS_RANGO:
+            raise DatosInvalidosError(
+                f"El rango de agenda no puede superar {ObtenerAgendaService.MAX_DIAS_RANGO} días"
+            )
+
+        fechas = [fecha_desde + timedelta(days=i) for i in range(cantidad_dias)]
+
+        # Los días ya proyectados salen de la caché; los faltantes, de una sola query de rango
+        proyeccion = ProyeccionAgenda.obtener_dias(fechas, ObtenerAgendaService._proyectar_dias)
+
+        columnas = ObtenerAgendaService._armar_columnas(fechas, proyeccion, agrupar_por)
+        por_fecha: Dict[date, List[TurnoAgenda]] = {f: [] for f in fechas}
+        for columna in columnas:
+            por_fecha[columna['fecha']].extend(columna['bloques'])
+        turnos = []
+        for fecha in fechas:
+            por_fecha[fecha].sort(key=lambda t: t.hora)
+            turnos.extend(por_fecha[fecha])
+
+        horas_marcadores, horas_labels = ObtenerAgendaService._escala_horaria(
+            ObtenerAgendaService.HORARIO_INICIO_HORA, ObtenerAgendaService.HORARIO_INICIO_MIN,
+            ObtenerAgendaService.HORARIO_FIN_HORA, ObtenerAgendaService.HORARIO_FIN_MIN,
+        )
+        horario_inicio_min, horario_fin_min, total_minutos_dia = ObtenerAgendaService._ventana_minutos()
 
         return {
-            'semana': semana,
-            'fecha_inicio': fecha_lunes,
-            'fecha_fin': fecha_lunes + timedelta(days=5),  # Lunes a Sábado para la UI
-            'semana_siguiente': fecha_lunes + timedelta(days=7),
-            'semana_anterior': fecha_lunes - timedelta(days=7),
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+            'agrupar_por': agrupar_por,
+            'columnas': columnas,
+            'por_fecha': por_fecha,
+            'turnos': turnos,
             'horas_marcadores': horas_marcadores,
             'horas_labels': horas_labels,
             'total_minutos_dia': total_minutos_dia,
-            'turnos': turnos_con_visual,
             'debug': {
                 'total_minutos_dia': total_minutos_dia,
                 'horario_inicio_minutos': horario_inicio_min,
                 'horario_fin_minutos': horario_fin_min,
             }
         }
-    
+
+    @staticmethod
+    def _armar_columnas(
+        fechas: List[date],
+        proyeccion: Dict[date, List[TurnoAgenda]],
+        agrupar_por: str,
+    ) -> List[Dict[str, Any]]:
+        """Arma las columnas visibles (día o día × grupo) con el layout de solapados."""
+        columnas = []
+        if agrupar_por == 'dia':
+            for fecha in fechas:
+                columnas.append({
+                    'fecha': fecha,
+                    'clave': None,
+                    'titulo': ObtenerAgendaService.DIAS_NOMBRES[fecha.weekday()],
+                    'subtitulo': fecha.strftime('%d/%m'),
+                    'bloques': ObtenerAgendaService._asignar_columnas(proyeccion[fecha]),
+                })
+            return columnas
+
+        # Mismas columnas para todos los días del rango (aunque alguno no tenga turnos)
+        grupos: Dict[Optional[int], str] = {}
+        for fecha in fechas:
+            for turno in proyeccion[fecha]:
+                clave, titulo = ObtenerAgendaService._clave_grupo(turno, agrupar_por)
+                grupos.setdefault(clave, titulo)
+        if not grupos:
+            grupos[None] = ObtenerAgendaService._clave_grupo(None, agrupar_por)[1]
+        orden = sorted(grupos, key=lambda c: (c is None, grupos[c] if agrupar_por == 'profesional' else c or 0))
+
+        varios_dias = len(fechas) > 1
+        for fecha in fechas:
+            por_grupo: Dict[Optional[int], List[TurnoAgenda]] = {clave: [] for clave in orden}
+            for turno in proyeccion[fecha]:
+                por_grupo[ObtenerAgendaService._clave_grupo(turno, agrupar_por)[0]].append(turno)
+            for clave in orden:
+                dia = f"{ObtenerAgendaService.DIAS_NOMBRES[fecha.weekday()]} {fecha.strftime('%d/%m')}"
+                columnas.append({
+                    'fecha': fecha,
+                    'clave': clave,
+                    'titulo': grupos[clave],
+                    'subtitulo': dia if varios_dias else fecha.strftime('%d/%m'),
+                    'bloques': ObtenerAgendaService._asignar_columnas(por_grupo[clave]),
+                })
+        return columnas
+
     @staticmethod
-    def obtener_dia_agenda(fecha: date) -> Dict[str, Any]:
+    def _clave_grupo(turno: Optional[TurnoAgenda], agrupar_por: str) -> Tuple[Optional[int], str]:
+        """(clave, título) del grupo al que pertenece un turno."""
+        if agrupar_por == 'sillon':
+            sillon = turno.sillon if turno else None
+            return sillon, f"Sillón {sillon}" if sillon is not None else 'Sin sillón'
+        profesional_id = turno.profesional_id if turno else None
+        if profesional_id is None:
+            return None, 'Sin profesional'
+        return profesional_id, turno.profesional_nombre or f"Profesional #{profesional_id}"
+
+    @staticmethod
+    def _asignar_columnas(turnos: List[TurnoAgenda]) -> List[TurnoAgenda]:
         """
-        Obtiene la agenda de un día específico con visual positioning.
-        
-        Args:
-            fecha: Fecha del día a obtener
-            
+        Reparte turnos simultáneos en sub-columnas (algoritmo de barrido).
+
+        Los turnos que se solapan en forma transitiva forman un grupo; cada uno
+        toma la primera sub-columna libre y todo el grupo comparte el ancho.
+        """
+        if not turnos:
+            return []
+        ordenados = sorted(turnos, key=lambda t: (t.hora, -t.duracion))
+        resultado: List[TurnoAgenda] = []
+        grupo: List[Tuple[TurnoAgenda, int]] = []
+        fines_columna: List[int] = []
+        fin_grupo = -1
+
+        def _cerrar_grupo():
+            total = len(fines_columna)
+            resultado.extend(t._replace(columna=col, columnas=total) for t, col in grupo)
+
+        for turno in ordenados:
+            inicio = turno.hora.hour * 60 + turno.hora.minute
+            fin = inicio + turno.duracion
+            if grupo and inicio >= fin_grupo:
+                _cerrar_grupo()
+                grupo, fines_columna, fin_grupo = [], [], -1
+            for col, fin_col in enumerate(fines_columna):
+                if fin_col <= inicio:
+                    fines_columna[col] = fin
+                    break
+            else:
+                col = len(fines_columna)
+                fines_columna.append(fin)
+            grupo.append((turno, col))
+            fin_grupo = max(fin_grupo, fin)
+        _cerrar_grupo()
+        return resultado
+
+    @staticmethod
+    def _ventana_minutos() -> Tuple[int, int, int]:
+        """(inicio, fin, total) del horario de atención en minutos desde medianoche."""
+        horario_inicio_min = ObtenerAgendaService.HORARIO_INICIO_HORA * 60 + ObtenerAgendaService.HORARIO_INICIO_MIN  # 480
+        horario_fin_min = ObtenerAgendaService.HORARIO_FIN_HORA * 60 + ObtenerAgendaService.HORARIO_FIN_MIN       # 1260
+        return horario_inicio_min, horario_fin_min, horario_fin_min - horario_inicio_min
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _escala_horaria(inicio_hora: int, inicio_min: int, fin_hora: int, fin_min: int) -> Tuple[tuple, tuple]:
+        """
+        Marcadores (%) y labels cada 1h para una ventana horaria.
+
+        Depende sólo del horario de atención, así que se calcula una vez por ventana.
+        """
+        total_minutos_dia = (fin_hora * 60 + fin_min) - (inicio_hora * 60 + inicio_min)
+        horas_marcadores = []
+        horas_labels = []
+        inicio = datetime.combine(date.today(), time(inicio_hora, inicio_min))
+        actual = inicio
+        fin = datetime.combine(date.today(), time(fin_hora, fin_min))
+        while actual <= fin:
+            minutos_desde_inicio = (actual - inicio).seconds // 60
+            horas_marcadores.append((minutos_desde_inicio / total_minutos_dia) * 100.0)
+            horas_labels.append(actual.strftime('%H:00'))
+            actual += timedelta(hours=1)
+        return tuple(horas_marcadores), tuple(horas_labels)
+
+    @staticmethod
+    def _proyectar_dias(fechas: List[date]) -> Dict[date, List[TurnoAgenda]]:
+        """
+        Consulta los turnos de los días indicados y calcula su posición visual.
+
+        Usa una consulta proyectada por columnas (sin hidratar entidades Turno ni
+        Paciente): la agenda sólo necesita unos pocos campos y así no se llena el
+        identity map de la sesión en cada request. Los días se piden como un único
+        rango BETWEEN (aprovecha el índice por fecha) aunque falten días sueltos.
+
+        Excluye solo cancelados; NoAtendido se muestra en agenda (reserva que no se atendió).
+
         Returns:
-            Dict con estructura similar a obtener_semana_agenda pero para un día
+            Dict {fecha: [TurnoAgenda]} ordenados por hora
         """
         session = DatabaseSession.get_instance().session
-        
-        # Query turnos del día
-        # Excluir solo cancelados; NoAtendido se muestra en agenda (reserva que no se atendió)
-        estado_cancelado = Estado.query.filter_by(nombre='Cancelado').first()
-        estado_cancelado_id = estado_cancelado.id if estado_cancelado else None
-
-        filtros = [Turno.fecha == fecha]
-        if estado_cancelado_id:
-            filtros.append(Turno.estado_id != estado_cancelado_id)
-
-        turnos = session.query(Turno).options(
-            joinedload(Turno.paciente),
-            joinedload(Turno.estado_obj),
-        ).filter(*filtros).order_by(Turno.hora).all()
-        
-        # Calcular constantes
-        horario_inicio_min = ObtenerAgendaService.HORARIO_INICIO_HORA * 60 + ObtenerAgendaService.HORARIO_INICIO_MIN
-        horario_fin_min = ObtenerAgendaService.HORARIO_FIN_HORA * 60 + ObtenerAgendaService.HORARIO_FIN_MIN
-        total_minutos_dia = horario_fin_min - horario_inicio_min
-        
-        # Procesar turnos igual que en obtener_semana_agenda
-        turnos_con_visual = []
-        for turno in turnos:
-            turno_hora_min = turno.hora.hour * 60 + turno.hora.minute
+
+        # Mismo criterio que antes: estado_id distinto de Cancelado (si existe ese estado)
+        id_cancelado = select(Estado.id).where(Estado.nombre == 'Cancelado').limit(1).scalar_subquery()
+
+        stmt = (
+            select(
+                Turno.id,
+                Turno.fecha,
+                Turno.hora,
+                Turno.duracion,
+                Turno.detalle,
+                func.coalesce(Estado.nombre, Turno.estado, 'Pendiente').label('estado'),
+                Paciente.id.label('paciente_id'),
+                Paciente.nombre.label('paciente_nombre'),
+                Paciente.apellido.label('paciente_apellido'),
+                Paciente.dni.label('paciente_dni'),
+                Turno.profesional_id,
+                Usuario.nombre.label('profesional_nombre'),
+                Usuario.apellido.label('profesional_apellido'),
+                Turno.sillon,
+            )
+            .join(Paciente, Turno.paciente_id == Paciente.id)
+            .outerjoin(Estado, Turno.estado_id == Estado.id)
+            .outerjoin(Usuario, Turno.profesional_id == Usuario.id)
+            .where(
+                Turno.fecha.between(min(fechas), max(fechas)),
+                or_(id_cancelado.is_(None), Turno.estado_id != id_cancelado),
+            )
+            .order_by(Turno.fecha, Turno.hora)
+        )
+
+        horario_inicio_min, _, total_minutos_dia = ObtenerAgendaService._ventana_minutos()
+
+        proyeccion: Dict[date, List[TurnoAgenda]] = {f: [] for f in fechas}
+        for fila in session.execute(stmt):
+            if fila.fecha not in proyeccion:
+                continue
+
+            turno_hora_min = fila.hora.hour * 60 + fila.hora.minute
             offset_min = turno_hora_min - horario_inicio_min
+
+            # Clipping: si turno comienza antes de 8am, mostrar desde 0%
             offset_min = max(0, offset_min)
-            
+
+            # Calcular porcentaje desde arriba
             top_pct = (offset_min / total_minutos_dia) * 100
-            
-            duracion_efectiva = turno.duracion
-            turno_fin_min = offset_min + turno.duracion
+
+            # Edge case: si turno termina después de 9pm, truncar altura
+            duracion_efectiva = fila.duracion
+            turno_fin_min = offset_min + fila.duracion
             if turno_fin_min > total_minutos_dia:
                 duracion_efectiva = total_minutos_dia - offset_min
-            
+
             height_pct = (duracion_efectiva / total_minutos_dia) * 100
-            
-            hora_fin = (datetime.combine(date.today(), turno.hora) + timedelta(minutes=turno.duracion)).time()
-            
-            turno_dict = {
-                'id': turno.id,
-                'paciente': {
-                    'id': turno.paciente.id,
-                    'nombre': turno.paciente.nombre,
-                    'apellido': turno.paciente.apellido,
-                    'dni': turno.paciente.dni,
-                },
-                'fecha': turno.fecha,
-                'hora': turno.hora,
-                'hora_fin': hora_fin,
-                'duracion': turno.duracion,
-                'detalle': turno.detalle,
-                'estado': turno.estado_nombre,
-                'top_pct': round(top_pct, 2),
-                'height_pct': round(height_pct, 2),
-                'truncado': turno_fin_min > total_minutos_dia,
-            }
-            turnos_con_visual.append(turno_dict)
-        
-        return {
-            'fecha': fecha,
-            'turnos': turnos_con_visual,
-            'debug': {
-                'total_minutos_dia': total_minutos_dia,
-                'horario_inicio_minutos': horario_inicio_min,
-                'horario_fin_minutos': horario_fin_min,
-            }
-        }
+
+            # Calcular hora de fin (solo informativo)
+            hora_fin = (datetime.combine(date.today(), fila.hora) + timedelta(minutes=fila.duracion)).time()
+
+            profesional_nombre = None
+            if fila.profesional_nombre:
+                profesional_nombre = f"{fila.profesional_nombre} {fila.profesional_apellido or ''}".strip()
+
+            proyeccion[fila.fecha].append(TurnoAgenda(
+                id=fila.id,
+                fecha=fila.fecha,
+                hora=fila.hora,
+                hora_fin=hora_fin,
+                duracion=fila.duracion,
+                detalle=fila.detalle,
+                estado=fila.estado,
+                paciente_id=fila.paciente_id,
+                paciente_nombre=fila.paciente_nombre,
+                paciente_apellido=fila.paciente_apellido,
+                paciente_dni=fila.paciente_dni,
+                profesional_id=fila.profesional_id,
+                profesional_nombre=profesional_nombre,
+                sillon=fila.sillon,
+                top_pct=round(top_pct, 2),
+                height_pct=round(height_pct, 2),
+                truncado=turno_fin_min > total_minutos_dia,
+            ))
+
+        return proyeccion
@@ -7,6 +7,7 @@ y horarios de atención.
 
 from datetime import date, datetime, time, timedelta
 from typing import Dict, List, Any
+from sqlalchemy.orm import joinedload
 from app.database.session import DatabaseSession
 from app.models import Turno
 from app.services.common import ValidadorTurno
@@ -51,12 +52,12 @@ class ObtenerHorariosService:
         session = DatabaseSession.get_instance().session
         
         # Validar fecha
-        validacion = ValidadorTurno.validar_fecha(fecha)
-        if not validacion['valido']:
+        fecha_valida, error = ValidadorTurno.validar_fecha(fecha)
+        if not fecha_valida:
             return {
                 'fecha': fecha,
                 'horarios_disponibles': [],
-                'error': validacion['error'],
+                'error': error,
             }
         
         # Obtener horarios de atención
@@ -69,8 +70,8 @@ class ObtenerHorariosService:
             ValidadorTurno.HORARIO_FIN.minute
         )
         
-        # Query turnos en la fecha
-        turnos_existentes = session.query(Turno).filter(
+        # Query turnos en la fecha (con el paciente: se muestra en cada bloque ocupado)
+        turnos_existentes = session.query(Turno).options(joinedload(Turno.paciente)).filter(
             Turno.fecha == fecha
         ).all()
         
@@ -0,0 +1,125 @@
+"""
+ProyeccionAgenda: caché en memoria de la agenda ya posicionada, por semana ISO.
+
+La agenda se consulta mucho más de lo que se modifica. En lugar de recalcular
+toda la semana en cada vista de /turnos, se guarda la proyección de cada día
+(filas TurnoAgenda con top_pct/height_pct ya calculados) agrupada por semana ISO.
+
+Los casos de uso que modifican turnos llaman a invalidar(fecha) después del
+commit: sólo el día afectado se recalcula en la próxima consulta. Los datos
+guardados son tuplas inmutables (nunca entidades ORM), así que pueden
+compartirse entre requests sin depender de una sesión.
+"""
+
+import threading
+import time as _time
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app.metricas import Metricas
+
+CONSULTAS = Metricas.contador('cache_consultas_total', 'Consultas a caches en memoria', ('cache', 'resultado'))
+_ACIERTOS = CONSULTAS.con('agenda', 'hit')
+_FALLOS = CONSULTAS.con('agenda', 'miss')
+
+
+class ProyeccionAgenda:
+    """Caché de proyecciones diarias de agenda agrupadas por semana ISO."""
+
+    # Red de seguridad para escrituras que no pasan por los casos de uso
+    # (ej: SQL manual); las escrituras normales invalidan al instante.
+    TTL_SEGUNDOS = 300
+    MAX_SEMANAS = 52
+
+    _semanas: Dict[Tuple[int, int], Dict[date, Tuple[float, List[tuple]]]] = {}
+    _versiones: Dict[date, int] = {}
+    _generacion = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def clave_semana(fecha: date) -> Tuple[int, int]:
+        """(año ISO, número de semana ISO) de la fecha."""
+        iso = fecha.isocalendar()
+        return iso[0], iso[1]
+
+    @staticmethod
+    def obtener_dias(
+        fechas: Iterable[date],
+        calcular: Callable[[List[date]], Dict[date, List[tuple]]],
+    ) -> Dict[date, List[tuple]]:
+        """
+        Devuelve la proyección de cada fecha, calculando sólo las que faltan.
+
+        Args:
+            fechas: Días a consultar
+            calcular: Función que recibe los días faltantes y devuelve
+                {fecha: [turnos proyectados]} con una sola consulta
+
+        Returns:
+            Dict {fecha: [turnos proyectados]} para todas las fechas pedidas
+        """
+        cls = ProyeccionAgenda
+        fechas = list(fechas)
+        ahora = _time.monotonic()
+        resultado: Dict[date, List[tuple]] = {}
+        faltantes: List[date] = []
+
+        with cls._lock:
+            for fecha in fechas:
+                entrada = cls._semanas.get(cls.clave_semana(fecha), {}).get(fecha)
+                if entrada is not None and ahora - entrada[0] < cls.TTL_SEGUNDOS:
+                    resultado[fecha] = entrada[1]
+                else:
+                    faltantes.append(fecha)
+            _ACIERTOS.inc(len(resultado))
+            _FALLOS.inc(len(faltantes))
+            if not faltantes:
+                return resultado
+            generacion = cls._generacion
+            versiones = {f: cls._versiones.get(f, 0) for f in faltantes}
+
+        calculados = calcular(faltantes)
+
+        with cls._lock:
+            for fecha in faltantes:
+                proyeccion = calculados.get(fecha, [])
+                resultado[fecha] = proyeccion
+                # Si hubo una escritura mientras se consultaba, no guardar datos viejos
+                if generacion != cls._generacion or versiones[fecha] != cls._versiones.get(fecha, 0):
+                    continue
+                semana = cls._semanas.setdefault(cls.clave_semana(fecha), {})
+                semana[fecha] = (ahora, proyeccion)
+            cls._recortar()
+
+        return resultado
+
+    @staticmethod
+    def invalidar(*fechas: date) -> None:
+        """Descarta la proyección de los días indicados (llamar después del commit)."""
+        cls = ProyeccionAgenda
+        with cls._lock:
+            for fecha in fechas:
+                if fecha is None:
+                    continue
+                cls._versiones[fecha] = cls._versiones.get(fecha, 0) + 1
+                semana = cls._semanas.get(cls.clave_semana(fecha))
+                if semana is not None:
+                    semana.pop(fecha, None)
+
+    @staticmethod
+    def invalidar_todo() -> None:
+        """Descarta todas las proyecciones (cambios masivos o datos de paciente)."""
+        cls = ProyeccionAgenda
+        with cls._lock:
+            cls._semanas.clear()
+            cls._versiones.clear()
+            cls._generacion += 1
+
+    @staticmethod
+    def _recortar() -> None:
+        """Mantiene acotada la memoria descartando las semanas más viejas."""
+        cls = ProyeccionAgenda
+        exceso = len(cls._semanas) - cls.MAX_SEMANAS
+        if exceso > 0:
+            for clave in sorted(cls._semanas)[:exceso]:
+                del cls._semanas[clave]
@@ -0,0 +1,7 @@
+"""
+Inicializador del módulo visor_logs (lectura de logs para el panel de administración).
+"""
+
+from .leer_logs_service import LeerLogsService
+
+__all__ = ["LeerLogsService"]
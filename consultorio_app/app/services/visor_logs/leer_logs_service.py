@@ -0,0 +1,97 @@
+"""
+LeerLogsService: Caso de uso para mostrar las últimas líneas de un log.
+
+Lee desde el final del archivo hacia atrás, en bloques, y corta apenas junta
+las N líneas pedidas: el costo depende de lo que se muestra, no del tamaño del
+log. Si el archivo actual no alcanza, sigue por los rotados (app.log.1, .2, ...).
+"""
+
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+
+class LeerLogsService:
+    """Caso de uso: últimas líneas de un log, filtradas, más recientes primero."""
+
+    TAMANO_BLOQUE = 64 * 1024
+
+    @staticmethod
+    def execute(
+        log_file: Path,
+        cantidad: int = 200,
+        nivel: Optional[str] = None,
+        busqueda: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Devuelve hasta `cantidad` líneas que cumplen los filtros.
+
+        Args:
+            log_file: Log actual (ej: logs/app.log); los rotados se buscan a su lado
+            cantidad: Máximo de líneas a devolver
+            nivel: Nivel exacto (DEBUG, INFO, WARNING, ERROR); None o '' = todos
+            busqueda: Texto a buscar (sin distinguir mayúsculas); None o '' = sin filtro
+
+        Returns:
+            Líneas (con su salto de línea) de la más reciente a la más vieja
+        """
+        marca_nivel = f"| {nivel.upper():<8} |" if nivel else None
+        termino = busqueda.lower() if busqueda else None
+
+        resultado: List[str] = []
+        if cantidad <= 0:
+            return resultado
+        for archivo in LeerLogsService.archivos_rotados(Path(log_file)):
+            for linea in LeerLogsService.lineas_invertidas(archivo):
+                if marca_nivel and marca_nivel not in linea:
+                    continue
+                if termino and termino not in linea.lower():
+                    continue
+                resultado.append(linea + '\n')
+                if len(resultado) >= cantidad:
+                    return resultado
+        return resultado
+
+    @staticmethod
+    def archivos_rotados(log_file: Path) -> List[Path]:
+        """Log actual seguido de sus rotaciones existentes, de la más nueva a la más vieja."""
+        archivos = [log_file] if log_file.exists() else []
+        numero = 1
+        while True:
+            rotado = log_file.with_name(f"{log_file.name}.{numero}")
+            if not rotado.exists():
+                break
+            archivos.append(rotado)
+            numero += 1
+        return archivos
+
+    @staticmethod
+    def lineas_invertidas(archivo: Path, tamano_bloque: int = None) -> Iterator[str]:
+        """
+        Genera las líneas del archivo desde la última hasta la primera.
+
+        Lee bloques desde el final con seek; sólo mantiene en memoria el bloque
+        actual y el pedazo de línea que quedó cortado entre bloques.
+        """
+        tamano_bloque = tamano_bloque or LeerLogsService.TAMANO_BLOQUE
+        with open(archivo, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            posicion = f.tell()
+            resto = b''
+            primer_bloque = True
+            while posicion > 0:
+                leer = min(tamano_bloque, posicion)
+                posicion -= leer
+                f.seek(posicion)
+                bloque = f.read(leer) + resto
+                partes = bloque.split(b'\n')
+                # partes[0] puede estar cortada: se completa con el bloque anterior
+                resto = partes[0]
+                if primer_bloque:
+                    primer_bloque = False
+                    if partes[-1] == b'':
+                        partes.pop()  # el archivo termina en salto de línea
+                for parte in reversed(partes[1:]):
+                    yield parte.rstrip(b'\r').decode('utf-8', errors='replace')
+            if resto:
+                yield resto.rstrip(b'\r').decode('utf-8', errors='replace')
@@ -2,6 +2,11 @@
 Inicializador del módulo whatsapp (servicios de WhatsApp).
 """
 
+from .graph_http_client import GraphHttpClient
 from .whatsapp_message_service import WhatsAppMessageService
+from .cola_saliente_worker import ColaSalienteWorker
+from .encolar_mensaje_service import EncolarMensajeService
+from .deduplicador_mensajes import DeduplicadorMensajes
 
-__all__ = ["WhatsAppMessageService"]
+__all__ = ["GraphHttpClient", "WhatsAppMessageService", "ColaSalienteWorker", "EncolarMensajeService",
+           "DeduplicadorMensajes"]
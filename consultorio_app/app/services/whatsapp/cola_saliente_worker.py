@@ -0,0 +1,288 @@
+"""
+ColaSalienteWorker: pool de hilos que vacía la cola de mensajes salientes de WhatsApp.
+
+Reglas:
+- Cada mensaje se reclama bajo BEGIN IMMEDIATE: dos hilos nunca envían el mismo.
+- Orden por destinatario: sólo se toma el mensaje más viejo sin enviar de cada
+  destinatario; los siguientes esperan aunque el primero esté en backoff.
+- Reintentos con backoff exponencial y jitter; tras MAX_INTENTOS (o ante un error
+  permanente, ej: número inválido) el mensaje pasa a 'muerto' y la cola sigue.
+- El envío a la Graph API se hace sin transacción abierta y sin los reintentos
+  internos de WhatsAppMessageService (que bloquean el hilo con sleep).
+"""
+
+import atexit
+import json
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import exists, func
+from sqlalchemy.orm import aliased
+
+from app.config import SettingsLoader
+from app.database.session import DatabaseSession
+from app.database.transacciones import iniciar_transaccion_inmediata
+from app.metricas import Metricas
+from app.models import MensajeSaliente
+from .whatsapp_message_service import WhatsAppMessageService
+
+logger = logging.getLogger(__name__)
+
+
+class ColaSalienteWorker:
+    """Workers en segundo plano para la cola de mensajes salientes."""
+
+    MAX_INTENTOS = 8
+    BACKOFF_BASE_SEGUNDOS = 2
+    BACKOFF_MAX_SEGUNDOS = 900
+    # Si nadie avisa que hay trabajo, los hilos revisan la cola cada tanto (backoffs vencidos)
+    ESPERA_SIN_TRABAJO_SEGUNDOS = 1.0
+
+    ERRORES_PERMANENTES = (
+        'Bad request',
+        'Invalid phone number',
+        'WhatsApp API error (400)',
+    )
+
+    _hilos: List[threading.Thread] = []
+    _iniciado = False
+    _detener = threading.Event()
+    _hay_trabajo = threading.Event()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def iniciar(app, hilos: int = None) -> None:
+        """
+        Arranca el pool de workers (una sola vez por proceso) sin demorar el arranque de la app.
+
+        Args:
+            app: App Flask; cada hilo trabaja dentro de su app_context
+            hilos: Cantidad de hilos (default [whatsapp] cola_hilos o 4)
+        """
+        cls = ColaSalienteWorker
+        with cls._lock:
+            if cls._iniciado:
+                return
+            cls._iniciado = True
+            cls._detener.clear()
+        hilos = hilos or SettingsLoader.get_int('whatsapp', 'cola_hilos', 4)
+        threading.Thread(
+            target=cls._arrancar, args=(app, hilos), name='cola-whatsapp-arranque', daemon=True
+        ).start()
+        atexit.register(cls.detener)
+
+    @staticmethod
+    def _arrancar(app, hilos: int) -> None:
+        """Recupera los mensajes interrumpidos y recién entonces lanza los workers."""
+        cls = ColaSalienteWorker
+        try:
+            with app.app_context():
+                recuperados = cls.recuperar_interrumpidos()
+            if recuperados:
+                logger.warning(f"Cola saliente: {recuperados} mensaje(s) interrumpidos vuelven a pendiente")
+        except Exception as exc:
+            logger.warning(f"Cola saliente: no se pudieron recuperar mensajes interrumpidos: {exc}")
+
+        with cls._lock:
+            if cls._detener.is_set():
+                return
+            for numero in range(hilos):
+                hilo = threading.Thread(
+                    target=cls._bucle, args=(app,), name=f'cola-whatsapp-{numero}', daemon=True
+                )
+                hilo.start()
+                cls._hilos.append(hilo)
+        logger.info(f"Cola saliente de WhatsApp iniciada con {hilos} hilo(s)")
+
+    @staticmethod
+    def detener(timeout: float = 5.0) -> None:
+        """Pide a los hilos que terminen y espera a que suelten el mensaje en curso."""
+        cls = ColaSalienteWorker
+        with cls._lock:
+            cls._detener.set()
+            cls._hay_trabajo.set()
+            for hilo in cls._hilos:
+                hilo.join(timeout)
+            cls._hilos = []
+            cls._iniciado = False
+
+    @staticmethod
+    def notificar() -> None:
+        """Despierta a los hilos: se encoló un mensaje nuevo."""
+        ColaSalienteWorker._hay_trabajo.set()
+
+    @staticmethod
+    def recuperar_interrumpidos() -> int:
+        """
+        Devuelve a 'pendiente' los mensajes que quedaron en 'enviando' (proceso cortado).
+
+        Llamar sólo al arrancar, antes de que haya hilos enviando: un mensaje que se
+        cortó justo después de llegar a Meta puede salir dos veces (al menos una vez).
+        """
+        session = DatabaseSession.get_instance().session
+        try:
+            cantidad = (
+                MensajeSaliente.query
+                .filter(MensajeSaliente.estado == MensajeSaliente.ENVIANDO)
+                .update({MensajeSaliente.estado: MensajeSaliente.PENDIENTE}, synchronize_session=False)
+            )
+            session.commit()
+            return cantidad
+        except Exception:
+            session.rollback()
+            raise
+
+    @staticmethod
+    def contar_por_estado() -> dict:
+        """Cantidad de mensajes de la cola saliente por estado."""
+        session = DatabaseSession.get_instance().session
+        filas = (
+            session.query(MensajeSaliente.estado, func.count(MensajeSaliente.id))
+            .group_by(MensajeSaliente.estado)
+            .all()
+        )
+        return {estado: cantidad for estado, cantidad in filas}
+
+    @staticmethod
+    def procesar_uno() -> bool:
+        """
+        Reclama, envía y registra un mensaje (requiere app_context).
+
+        Returns:
+            True si había un mensaje para procesar
+        """
+        reclamado = ColaSalienteWorker._reclamar()
+        if reclamado is None:
+            return False
+        mensaje_id, destinatario, tipo, contenido, intentos = reclamado
+        exito, resultado = ColaSalienteWorker._enviar(destinatario, tipo, contenido)
+        ColaSalienteWorker._registrar(mensaje_id, intentos, exito, resultado)
+        return True
+
+    @staticmethod
+    def calcular_espera(intentos: int) -> float:
+        """Backoff exponencial con jitter: entre la mitad y el total del tope del intento."""
+        cls = ColaSalienteWorker
+        tope = min(cls.BACKOFF_MAX_SEGUNDOS, cls.BACKOFF_BASE_SEGUNDOS * 2 ** max(intentos - 1, 0))
+        return random.uniform(tope / 2, tope)
+
+    @staticmethod
+    def _bucle(app) -> None:
+        cls = ColaSalienteWorker
+        while not cls._detener.is_set():
+            # Limpiar antes de vaciar la cola: un aviso que llega mientras se envía no se pierde
+            cls._hay_trabajo.clear()
+            try:
+                # El app_context cierra la sesión al salir (teardown de Flask-SQLAlchemy)
+                with app.app_context():
+                    while not cls._detener.is_set() and cls.procesar_uno():
+                        pass
+            except Exception as exc:
+                logger.exception(f"Error en worker de cola saliente: {exc}")
+            cls._hay_trabajo.wait(cls.ESPERA_SIN_TRABAJO_SEGUNDOS)
+
+    @staticmethod
+    def _reclamar() -> Optional[Tuple[int, str, str, dict, int]]:
+        """
+        Toma el próximo mensaje enviable y lo pasa a 'enviando' (una transacción corta).
+
+        Primero busca un candidato con una lectura sin lock: un worker ocioso no
+        toma el lock de escritura de la base (y no compite con recepción) cuando
+        la cola está vacía. Sólo si hay candidato toma BEGIN IMMEDIATE y vuelve a
+        verificar el estado antes de reclamar (otro worker pudo ganarle).
+        """
+        session = DatabaseSession.get_instance().session
+        anterior = aliased(MensajeSaliente)
+        bloqueado = exists().where(
+            anterior.destinatario == MensajeSaliente.destinatario,
+            anterior.id < MensajeSaliente.id,
+            anterior.estado.in_([MensajeSaliente.PENDIENTE, MensajeSaliente.ENVIANDO]),
+        )
+
+        def enviables():
+            return (
+                MensajeSaliente.query
+                .filter(
+                    MensajeSaliente.estado == MensajeSaliente.PENDIENTE,
+                    MensajeSaliente.proximo_intento_en <= datetime.now(),
+                    ~bloqueado,
+                )
+                .order_by(MensajeSaliente.proximo_intento_en, MensajeSaliente.id)
+            )
+
+        try:
+            candidato = enviables().with_entities(MensajeSaliente.id).first()
+            # Cerrar la lectura: BEGIN IMMEDIATE necesita una conexión fuera de transacción
+            session.commit()
+            if candidato is None:
+                return None
+
+            iniciar_transaccion_inmediata(session)
+            mensaje = enviables().first()
+            if mensaje is None:
+                session.commit()
+                return None
+            mensaje.estado = MensajeSaliente.ENVIANDO
+            mensaje.intentos = (mensaje.intentos or 0) + 1
+            reclamado = (mensaje.id, mensaje.destinatario, mensaje.tipo, json.loads(mensaje.contenido), mensaje.intentos)
+            session.commit()
+            return reclamado
+        except Exception:
+            session.rollback()
+            raise
+
+    @staticmethod
+    def _enviar(destinatario: str, tipo: str, contenido: dict) -> Tuple[bool, str]:
+        try:
+            if tipo == MensajeSaliente.PLANTILLA:
+                return WhatsAppMessageService.send_template_message(
+                    destinatario,
+                    contenido['plantilla'],
+                    contenido.get('idioma', 'es_AR'),
+                    parametros=contenido.get('parametros'),
+                    reintentar=False,
+                )
+            return WhatsAppMessageService.send_text_message(
+                destinatario, contenido['texto'], reintentar=False
+            )
+        except Exception as exc:
+            return False, str(exc)
+
+    @staticmethod
+    def _registrar(mensaje_id: int, intentos: int, exito: bool, resultado: str) -> None:
+        cls = ColaSalienteWorker
+        session = DatabaseSession.get_instance().session
+        try:
+            mensaje = session.get(MensajeSaliente, mensaje_id)
+            if exito:
+                mensaje.estado = MensajeSaliente.ENVIADO
+                mensaje.message_id = resultado
+                mensaje.enviado_en = datetime.now()
+                mensaje.ultimo_error = None
+            elif intentos >= cls.MAX_INTENTOS or resultado.startswith(cls.ERRORES_PERMANENTES):
+                mensaje.estado = MensajeSaliente.MUERTO
+                mensaje.ultimo_error = resultado
+                logger.error(f"Mensaje saliente {mensaje_id} a {mensaje.destinatario} descartado tras {intentos} intento(s): {resultado}")
+            else:
+                espera = cls.calcular_espera(intentos)
+                mensaje.estado = MensajeSaliente.PENDIENTE
+                mensaje.ultimo_error = resultado
+                mensaje.proximo_intento_en = datetime.now() + timedelta(seconds=espera)
+                logger.warning(f"Mensaje saliente {mensaje_id}: reintento {intentos} en {espera:.1f}s ({resultado})")
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+
+def _colector_metricas():
+    por_estado = ColaSalienteWorker.contar_por_estado()
+    yield 'whatsapp_cola_saliente_mensajes', 'gauge', 'Mensajes de la cola saliente por estado', [
+        ({'estado': estado}, cantidad) for estado, cantidad in sorted(por_estado.items())
+    ]
+
+
+Metricas.registrar_colector(_colector_metricas)
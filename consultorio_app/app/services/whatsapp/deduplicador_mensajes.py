@@ -0,0 +1,116 @@
+"""
+DeduplicadorMensajes: registro de message ids de WhatsApp ya procesados.
+
+Meta reenvía el webhook si tardamos en responder; sin este control el mismo
+mensaje avanzaría la conversación dos veces (pacientes o turnos duplicados).
+
+- Memoria: LRU acotada (OrderedDict) con vencimiento por TTL; consulta O(1).
+- Base: tabla mensajes_procesados, para no reprocesar después de un reinicio.
+  El alta es un único INSERT ... ON CONFLICT: si dos hilos reciben el mismo id
+  a la vez, sólo uno lo registra como nuevo.
+"""
+
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import SettingsLoader
+from app.database.session import DatabaseSession
+from app.models import MensajeProcesado
+
+
+class DeduplicadorMensajes:
+    """Store de message ids procesados: LRU en memoria respaldada por SQLite."""
+
+    # Meta reintenta la entrega de un webhook durante hasta 7 días
+    TTL_HORAS = 168
+    MAX_EN_MEMORIA = 10000
+
+    _recientes: "OrderedDict[str, float]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _ttl_segundos() -> int:
+        return SettingsLoader.get_int('whatsapp', 'dedup_ttl_horas', DeduplicadorMensajes.TTL_HORAS) * 3600
+
+    @staticmethod
+    def registrar(message_id: str) -> bool:
+        """
+        Marca el mensaje como procesado.
+
+        Args:
+            message_id: Id del mensaje de WhatsApp (wamid...)
+
+        Returns:
+            True si es la primera vez que se ve (hay que procesarlo), False si es repetido
+        """
+        cls = DeduplicadorMensajes
+        ttl = cls._ttl_segundos()
+        ahora = _time.monotonic()
+        with cls._lock:
+            vence = cls._recientes.get(message_id)
+            if vence is not None and vence > ahora:
+                cls._recientes.move_to_end(message_id)
+                return False
+            # Se reserva en memoria antes de ir a la base: otro hilo con el mismo id ya lo ve repetido
+            cls._recientes[message_id] = ahora + ttl
+            cls._recientes.move_to_end(message_id)
+            maximo = SettingsLoader.get_int('whatsapp', 'dedup_en_memoria', cls.MAX_EN_MEMORIA)
+            while len(cls._recientes) > maximo:
+                cls._recientes.popitem(last=False)
+
+        try:
+            return cls._registrar_en_base(message_id, ttl)
+        except Exception:
+            with cls._lock:
+                cls._recientes.pop(message_id, None)
+            raise
+
+    @staticmethod
+    def _registrar_en_base(message_id: str, ttl: int) -> bool:
+        session = DatabaseSession.get_instance().session
+        ahora = datetime.now()
+        tabla = MensajeProcesado.__table__
+        stmt = sqlite_insert(tabla).values(message_id=message_id, recibido_en=ahora)
+        # Si la fila existe pero ya venció, se renueva y el mensaje cuenta como nuevo
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['message_id'],
+            set_={'recibido_en': stmt.excluded.recibido_en},
+            where=tabla.c.recibido_en < ahora - timedelta(seconds=ttl),
+        )
+        try:
+            resultado = session.execute(stmt)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return resultado.rowcount == 1
+
+    @staticmethod
+    def purgar() -> int:
+        """
+        Borra de la base los ids vencidos (tarea periódica).
+
+        Returns:
+            Cantidad de filas borradas
+        """
+        session = DatabaseSession.get_instance().session
+        limite = datetime.now() - timedelta(seconds=DeduplicadorMensajes._ttl_segundos())
+        try:
+            borrados = MensajeProcesado.query.filter(
+                MensajeProcesado.recibido_en < limite
+            ).delete(synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return borrados
+
+    @staticmethod
+    def limpiar_memoria() -> None:
+        """Vacía la LRU en memoria (equivale a un reinicio del proceso)."""
+        with DeduplicadorMensajes._lock:
+            DeduplicadorMensajes._recientes.clear()
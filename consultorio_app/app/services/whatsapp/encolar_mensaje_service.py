@@ -0,0 +1,86 @@
+"""
+EncolarMensajeService: Caso de uso para encolar un mensaje de WhatsApp saliente.
+
+El mensaje se guarda en la tabla mensajes_salientes y lo envía en segundo plano
+ColaSalienteWorker. Quien encola (ej: el webhook) no espera a la Graph API.
+"""
+
+import json
+import re
+from typing import List, Optional
+
+from app.database.session import DatabaseSession
+from app.models import MensajeSaliente
+from app.services.common import DatosInvalidosError
+from .cola_saliente_worker import ColaSalienteWorker
+
+
+class EncolarMensajeService:
+    """Caso de uso: encolar un mensaje saliente de WhatsApp."""
+
+    @staticmethod
+    def execute(
+        destinatario: str,
+        texto: str = None,
+        plantilla: str = None,
+        idioma: str = 'es_AR',
+        parametros: Optional[List[str]] = None,
+        clave: str = None,
+        confirmar: bool = True,
+    ) -> MensajeSaliente:
+        """
+        Encola un mensaje de texto o de plantilla.
+
+        Args:
+            destinatario: Teléfono destino (se normaliza a sólo dígitos)
+            texto: Texto libre (mensaje de tipo texto)
+            plantilla: Nombre de la plantilla aprobada (mensaje de tipo plantilla)
+            idioma: Código de idioma de la plantilla
+            parametros: Variables del cuerpo de la plantilla
+            clave: Clave de idempotencia opcional; si ya existe se devuelve ese mensaje
+            confirmar: Si es False, el commit queda a cargo de quien llama
+                (para encolar en la misma transacción que otros cambios)
+
+        Returns:
+            MensajeSaliente encolado
+
+        Raises:
+            DatosInvalidosError: Si falta destinatario o contenido
+        """
+        session = DatabaseSession.get_instance().session
+
+        destinatario = re.sub(r'\D', '', destinatario or '')
+        if not destinatario:
+            raise DatosInvalidosError('El mensaje no tiene destinatario')
+        if bool(texto) == bool(plantilla):
+            raise DatosInvalidosError('Indique texto o plantilla (uno de los dos)')
+
+        if clave:
+            existente = MensajeSaliente.query.filter_by(clave=clave).first()
+            if existente:
+                return existente
+
+        if texto:
+            tipo, contenido = MensajeSaliente.TEXTO, {'texto': texto}
+        else:
+            tipo, contenido = MensajeSaliente.PLANTILLA, {
+                'plantilla': plantilla,
+                'idioma': idioma,
+                'parametros': list(parametros or []),
+            }
+
+        mensaje = MensajeSaliente(
+            destinatario=destinatario,
+            tipo=tipo,
+            contenido=json.dumps(contenido, ensure_ascii=False),
+            clave=clave,
+        )
+        session.add(mensaje)
+        if confirmar:
+            try:
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            ColaSalienteWorker.notificar()
+        return mensaje
@@ -0,0 +1,139 @@
+"""
+GraphHttpClient: cliente HTTP compartido para la Graph API de WhatsApp.
+
+Un único requests.Session por proceso, con un pool de conexiones keep-alive:
+los hilos de la cola saliente y del envío de recordatorios reutilizan las
+conexiones TCP/TLS abiertas en lugar de hacer un handshake por mensaje.
+
+Los reintentos automáticos de urllib3 se limitan a errores de conexión (el
+request nunca llegó a Meta), que son seguros aun para POST. Los 429/5xx y los
+timeouts de lectura los sigue manejando quien llama, para no duplicar mensajes.
+"""
+
+import threading
+import time as _time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import SettingsLoader
+from app.metricas import Metricas
+
+ENVIO_SEGUNDOS = Metricas.histograma('whatsapp_envio_segundos', 'Latencia de los POST a la Graph API')
+ENVIOS = Metricas.contador('whatsapp_envios_total', 'POST a la Graph API por resultado (2xx, 4xx, 5xx, error)', ('resultado',))
+
+
+class GraphHttpClient:
+    """Session HTTP compartida y métricas del pool de conexiones."""
+
+    REINTENTOS_CONEXION = 2
+    BACKOFF_CONEXION_SEGUNDOS = 0.2
+
+    _session: Optional[requests.Session] = None
+    _adapter: Optional[HTTPAdapter] = None
+    _lock = threading.Lock()
+    _metricas = {'solicitudes': 0, 'errores': 0, 'latencia_total_ms': 0.0}
+
+    @staticmethod
+    def obtener_session() -> requests.Session:
+        """Devuelve la Session compartida, creándola la primera vez."""
+        cls = GraphHttpClient
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    tamanio_pool = SettingsLoader.get_int('whatsapp', 'http_pool_size', 10)
+                    reintentos = Retry(
+                        total=cls.REINTENTOS_CONEXION,
+                        connect=cls.REINTENTOS_CONEXION,
+                        read=0,
+                        status=0,
+                        redirect=0,
+                        backoff_factor=cls.BACKOFF_CONEXION_SEGUNDOS,
+                    )
+                    adapter = HTTPAdapter(
+                        pool_connections=2,
+                        pool_maxsize=tamanio_pool,
+                        pool_block=False,
+                        max_retries=reintentos,
+                    )
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    cls._adapter = adapter
+                    cls._session = session
+        return cls._session
+
+    @staticmethod
+    def post(url: str, **kwargs) -> requests.Response:
+        """POST por la Session compartida (misma firma que requests.post)."""
+        cls = GraphHttpClient
+        session = cls.obtener_session()
+        inicio = _time.perf_counter()
+        resultado = 'error'
+        try:
+            respuesta = session.post(url, **kwargs)
+            resultado = f"{respuesta.status_code // 100}xx"
+            return respuesta
+        except requests.exceptions.RequestException:
+            with cls._lock:
+                cls._metricas['errores'] += 1
+            raise
+        finally:
+            transcurrido = _time.perf_counter() - inicio
+            ENVIO_SEGUNDOS.observar(transcurrido)
+            ENVIOS.con(resultado).inc()
+            transcurrido_ms = transcurrido * 1000
+            with cls._lock:
+                cls._metricas['solicitudes'] += 1
+                cls._metricas['latencia_total_ms'] += transcurrido_ms
+
+    @staticmethod
+    def metricas() -> Dict[str, float]:
+        """
+        Métricas del cliente y de su pool de conexiones.
+
+        Returns:
+            Dict con solicitudes, errores, latencia_promedio_ms, pools,
+            conexiones_creadas, conexiones_reutilizadas y conexiones_libres
+        """
+        cls = GraphHttpClient
+        with cls._lock:
+            datos = dict(cls._metricas)
+        solicitudes = datos.pop('solicitudes')
+        latencia_total = datos.pop('latencia_total_ms')
+
+        creadas = usadas = libres = pools = 0
+        if cls._adapter is not None:
+            contenedor = cls._adapter.poolmanager.pools
+            for clave in contenedor.keys():
+                pool = contenedor.get(clave)
+                if pool is None:
+                    continue
+                pools += 1
+                creadas += pool.num_connections
+                usadas += pool.num_requests
+                # La cola del pool tiene None en los lugares sin conexión abierta
+                libres += sum(1 for conexion in list(pool.pool.queue) if conexion is not None) if pool.pool else 0
+
+        return {
+            'solicitudes': solicitudes,
+            'errores': datos['errores'],
+            'latencia_promedio_ms': round(latencia_total / solicitudes, 2) if solicitudes else 0.0,
+            'pools': pools,
+            'conexiones_creadas': creadas,
+            'conexiones_reutilizadas': max(usadas - creadas, 0),
+            'conexiones_libres': libres,
+        }
+
+    @staticmethod
+    def cerrar() -> None:
+        """Cierra las conexiones del pool (tests o apagado)."""
+        cls = GraphHttpClient
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+            cls._session = None
+            cls._adapter = None
+            cls._metricas = {'solicitudes': 0, 'errores': 0, 'latencia_total_ms': 0.0}
@@ -4,15 +4,19 @@ Servicio para enviar mensajes vía WhatsApp Cloud API.
 Responsabilidades:
 - Enviar ConversationReply al usuario vía WhatsApp API
 - Manejo de errores y reintentos
+- Conexiones reutilizadas vía GraphHttpClient (pool keep-alive compartido)
 - Logging de intentos y fallos
 """
 
 import os
 import logging
 import requests
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 from datetime import datetime
 
+from app.config import SettingsLoader
+from .graph_http_client import GraphHttpClient
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,11 +55,23 @@ class WhatsAppMessageService:
         
         return access_token, phone_id, biz_id
     
+    @staticmethod
+    def _get_api_base_url() -> str:
+        """
+        URL base de la Graph API.
+
+        Se puede apuntar a un servidor local (pruebas, simuladores) con la variable
+        WHATSAPP_API_BASE_URL o con [whatsapp] api_base_url en settings.ini.
+        """
+        url = os.environ.get('WHATSAPP_API_BASE_URL') or SettingsLoader.get('whatsapp', 'api_base_url', '')
+        return (url or WhatsAppMessageService.WHATSAPP_API_BASE_URL).rstrip('/')
+    
     @staticmethod
     def send_text_message(
         phone_number: str,
         message_text: str,
-        retry_count: int = 0
+        retry_count: int = 0,
+        reintentar: bool = True
     ) -> Tuple[bool, str]:
         """
         Envía un mensaje de texto a un usuario.
@@ -64,6 +80,7 @@ class WhatsAppMessageService:
             phone_number: Número de teléfono destino (formato E.164: 34612345678)
             message_text: Texto a enviar
             retry_count: Número de reintento actual (uso interno)
+            reintentar: Si es False no reintenta ante 429/timeout (la cola saliente maneja sus propios reintentos)
         
         Returns:
             Tupla (success, message_id_or_error)
@@ -80,7 +97,7 @@ class WhatsAppMessageService:
             logger.warning(f"Invalid phone number format: {phone_number}")
             return False, "Invalid phone number format (use E.164: 34612345678)"
         
-        url = f"{WhatsAppMessageService.WHATSAPP_API_BASE_URL}/{phone_id}/messages"
+        url = f"{WhatsAppMessageService._get_api_base_url()}/{phone_id}/messages"
         
         headers = {
             "Authorization": f"Bearer {access_token}",
@@ -99,7 +116,7 @@ class WhatsAppMessageService:
         try:
             logger.info(f"Sending WhatsApp message to {phone_number}")
             
-            response = requests.post(
+            response = GraphHttpClient.post(
                 url,
                 json=payload,
                 headers=headers,
@@ -115,7 +132,7 @@ class WhatsAppMessageService:
             
             elif response.status_code == 429:
                 # Rate limit: reintentar
-                if retry_count < WhatsAppMessageService.MAX_RETRIES:
+                if reintentar and retry_count < WhatsAppMessageService.MAX_RETRIES:
                     logger.warning(
                         f"Rate limited (429). Retrying... ({retry_count + 1}/{WhatsAppMessageService.MAX_RETRIES})"
                     )
@@ -148,7 +165,7 @@ class WhatsAppMessageService:
                 return False, error
         
         except requests.exceptions.Timeout:
-            if retry_count < WhatsAppMessageService.MAX_RETRIES:
+            if reintentar and retry_count < WhatsAppMessageService.MAX_RETRIES:
                 logger.warning(f"Timeout. Retrying... ({retry_count + 1}/{WhatsAppMessageService.MAX_RETRIES})")
                 import time
                 time.sleep(WhatsAppMessageService.RETRY_DELAY_SECONDS)
@@ -163,7 +180,7 @@ class WhatsAppMessageService:
                 return False, error
         
         except requests.exceptions.ConnectionError as e:
-            if retry_count < WhatsAppMessageService.MAX_RETRIES:
+            if reintentar and retry_count < WhatsAppMessageService.MAX_RETRIES:
                 logger.warning(f"Connection error. Retrying... ({retry_count + 1}/{WhatsAppMessageService.MAX_RETRIES})")
                 import time
                 time.sleep(WhatsAppMessageService.RETRY_DELAY_SECONDS)
@@ -187,7 +204,9 @@ class WhatsAppMessageService:
         phone_number: str,
         template_name: str,
         language_code: str = "en_US",
-        retry_count: int = 0
+        retry_count: int = 0,
+        parametros: Optional[List[str]] = None,
+        reintentar: bool = True
     ) -> Tuple[bool, str]:
         """
         Envía un mensaje de plantilla (template) para iniciar conversación fuera de la ventana de 24h.
@@ -198,6 +217,8 @@ class WhatsAppMessageService:
             template_name: Nombre de la plantilla aprobada (ej: "jaspers_market_plain_text_v1")
             language_code: Código de idioma de la plantilla (ej: "en_US")
             retry_count: Reintentos en caso de 429/timeout
+            parametros: Valores para las variables {{1}}, {{2}}... del cuerpo de la plantilla
+            reintentar: Si es False no reintenta ante 429/timeout
 
         Returns:
             Tupla (success, message_id_or_error)
@@ -210,7 +231,7 @@ class WhatsAppMessageService:
             logger.warning(f"Invalid phone number format: {phone_number}")
             return False, "Invalid phone number format (use E.164: 34612345678)"
 
-        url = f"{WhatsAppMessageService.WHATSAPP_API_BASE_URL}/{phone_id}/messages"
+        url = f"{WhatsAppMessageService._get_api_base_url()}/{phone_id}/messages"
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
@@ -224,10 +245,15 @@ class WhatsAppMessageService:
                 "language": {"code": language_code}
             }
         }
+        if parametros:
+            payload["template"]["components"] = [{
+                "type": "body",
+                "parameters": [{"type": "text", "text": str(valor)} for valor in parametros]
+            }]
 
         try:
             logger.info(f"Sending WhatsApp template '{template_name}' to {phone_number}")
-            response = requests.post(url, json=payload, headers=headers, timeout=WhatsAppMessageService.REQUEST_TIMEOUT)
+            response = GraphHttpClient.post(url, json=payload, headers=headers, timeout=WhatsAppMessageService.REQUEST_TIMEOUT)
 
             if response.status_code == 200:
                 data = response.json()
@@ -236,7 +262,7 @@ class WhatsAppMessageService:
                 return True, message_id
 
             elif response.status_code == 429:
-                if retry_count < WhatsAppMessageService.MAX_RETRIES:
+                if reintentar and retry_count < WhatsAppMessageService.MAX_RETRIES:
                     import time
                     logger.warning(f"Rate limited (429). Retrying... ({retry_count + 1}/{WhatsAppMessageService.MAX_RETRIES})")
                     time.sleep(WhatsAppMessageService.RETRY_DELAY_SECONDS)
@@ -244,7 +270,8 @@ class WhatsAppMessageService:
                         phone_number,
                         template_name,
                         language_code,
-                        retry_count + 1
+                        retry_count + 1,
+                        parametros
                     )
                 else:
                     error = "Rate limited (429) - max retries exceeded"
@@ -262,7 +289,7 @@ class WhatsAppMessageService:
                 return False, error
 
         except requests.exceptions.Timeout:
-            if retry_count < WhatsAppMessageService.MAX_RETRIES:
+            if reintentar and retry_count < WhatsAppMessageService.MAX_RETRIES:
                 import time
                 logger.warning(f"Timeout. Retrying... ({retry_count + 1}/{WhatsAppMessageService.MAX_RETRIES})")
                 time.sleep(WhatsAppMessageService.RETRY_DELAY_SECONDS)
@@ -270,7 +297,8 @@ class WhatsAppMessageService:
                     phone_number,
                     template_name,
                     language_code,
-                    retry_count + 1
+                    retry_count + 1,
+                    parametros
                 )
             else:
                 error = "Request timeout - max retries exceeded"
@@ -0,0 +1,136 @@
+"""
+Servidor WSGI de producción: pool fijo de hilos sobre el servidor de Werkzeug.
+
+El servidor de desarrollo (app.run) atiende con un hilo nuevo por conexión y
+keep-alive: con recepción, las pantallas de finanzas y los webhooks de
+WhatsApp a la vez, un request lento traba a los demás. Acá:
+
+- El hilo principal sólo acepta conexiones y las encola; HILOS trabajadores
+  las atienden. Si están todos ocupados, las conexiones esperan en la cola
+  del socket (backlog) en vez de crear más hilos.
+- Cada conexión tiene timeout de lectura/escritura: un cliente colgado no
+  retiene un hilo del pool para siempre.
+- Sin keep-alive (HTTP/1.0): una conexión ociosa del navegador no ocupa un hilo.
+- detener() deja de aceptar, espera a que terminen los requests en curso y
+  recién ahí devuelve el control (run.py hace el backup final después).
+
+Sólo usa la biblioteca estándar y Werkzeug (compatible con PyInstaller).
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+logger = logging.getLogger(__name__)
+
+
+class _HandlerPool(WSGIRequestHandler):
+    """Handler de Werkzeug sin keep-alive; el timeout lo fija ServidorWSGI."""
+
+    protocol_version = 'HTTP/1.0'
+
+
+class ServidorWSGI(BaseWSGIServer):
+    """Servidor HTTP multi-hilo con pool acotado y cierre ordenado."""
+
+    multithread = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app,
+        hilos: int = 8,
+        backlog: int = 64,
+        timeout: float = 30.0,
+    ):
+        """
+        Args:
+            host / port: Dirección donde escuchar (port 0 = uno libre)
+            app: Aplicación WSGI
+            hilos: Tamaño del pool de trabajadores
+            backlog: Conexiones que el sistema operativo encola mientras el pool está ocupado
+            timeout: Segundos máximos esperando datos del cliente o para enviarle la respuesta
+        """
+        self.hilos = max(1, int(hilos))
+        self.request_queue_size = max(1, int(backlog))
+        handler = type('HandlerPool', (_HandlerPool,), {'timeout': float(timeout)})
+        # Cola corta: si el pool está lleno el accept se frena y espera el backlog del socket
+        self._pendientes: queue.Queue = queue.Queue(maxsize=self.hilos)
+        self._en_curso = 0
+        self._lock = threading.Lock()
+        self._deteniendo = threading.Event()
+        super().__init__(host, port, app, handler=handler)
+
+        self._trabajadores = [
+            threading.Thread(target=self._trabajar, name=f'wsgi-{numero}', daemon=True)
+            for numero in range(self.hilos)
+        ]
+        for trabajador in self._trabajadores:
+            trabajador.start()
+
+    def process_request(self, request, client_address) -> None:
+        """Encola la conexión para el pool (bloquea si todos los hilos están ocupados)."""
+        self._pendientes.put((request, client_address))
+
+    def _trabajar(self) -> None:
+        while True:
+            conexion = self._pendientes.get()
+            if conexion is None:
+                return
+            request, client_address = conexion
+            with self._lock:
+                self._en_curso += 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._lock:
+                    self._en_curso -= 1
+
+    def en_curso(self) -> int:
+        """Requests que se están atendiendo ahora."""
+        return self._en_curso
+
+    def solicitar_detencion(self) -> None:
+        """
+        Pide que serve_forever termine, sin bloquear (se puede llamar desde un request).
+
+        Después de que serve_forever vuelve, llamar a drenar().
+        """
+        if self._deteniendo.is_set():
+            return
+        self._deteniendo.set()
+        threading.Thread(target=self.shutdown, name='wsgi-detener', daemon=True).start()
+
+    def drenar(self, espera: float = 15.0) -> bool:
+        """
+        Cierra el socket y espera a que el pool termine lo aceptado y en curso.
+
+        Returns:
+            True si todos los requests terminaron dentro de `espera` segundos
+        """
+        limite = time.monotonic() + espera
+        self._deteniendo.set()
+        self.server_close()
+        # Con la cola llena (pool trabado) el aviso de fin también respeta `espera`
+        for _ in self._trabajadores:
+            try:
+                self._pendientes.put(None, timeout=max(0.0, limite - time.monotonic()))
+            except queue.Full:
+                break
+        for trabajador in self._trabajadores:
+            trabajador.join(max(0.0, limite - time.monotonic()))
+        pendientes = sum(1 for trabajador in self._trabajadores if trabajador.is_alive())
+        if pendientes:
+            logger.warning(f"Cierre del servidor: {pendientes} hilo(s) no terminaron en {espera:g} s")
+        return not pendientes
+
+
+__all__ = ["ServidorWSGI"]
@@ -20,7 +20,8 @@ load_dotenv()
 from app import create_app
 from app.config import SettingsLoader
 from app.database import db
-from app.models import *  # Importar todos los modelos para que SQLAlchemy los reconozca
+from app.database.esquema import esquema_actualizado, marcar_esquema_actualizado
+from app.models import Estado, Localidad, ObraSocial  # app.models registra todos los modelos en SQLAlchemy
 from sqlalchemy import text
 
 
@@ -417,33 +418,73 @@ def run_migrations_sqlite():
             print(f"[ERROR] Backfill en cambios_estado: {e}")
             db.session.rollback()
 
+    # 12) Agregar profesional_id / sillon a turnos e índice por fecha (consultas de rango de agenda)
+    turnos_col_names = {c[1] for c in db.session.execute(text("PRAGMA table_info('turnos')")).fetchall()}
+    for columna in ('profesional_id', 'sillon'):
+        if columna not in turnos_col_names:
+            print(f"[TOOLS] Agregando columna {columna} a turnos...")
+            try:
+                db.session.execute(text(f"ALTER TABLE turnos ADD COLUMN {columna} INTEGER"))
+                db.session.commit()
+                print(f"[OK] Columna {columna} agregada")
+            except Exception as e:
+                print(f"[ERROR] No se pudo agregar {columna} a turnos: {e}")
+                db.session.rollback()
+    try:
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_turnos_fecha ON turnos (fecha)"))
+        db.session.commit()
+    except Exception as e:
+        print(f"[ERROR] No se pudo crear ix_turnos_fecha: {e}")
+        db.session.rollback()
+
+
+def prepare_database():
+    """
+    Deja la base lista para atender (llamar dentro del app_context).
+
+    Returns:
+        False si el esquema ya estaba al día y no se tocó nada
+    """
+    # Si es desarrollo, recrear tablas desde cero
+    reset_db = bool(os.environ.get('FLASK_RESET_DB'))
+    if reset_db:
+        print("🔄 Eliminando y recreando base de datos...")
+        db.drop_all()
+
+    run_migrations = os.environ.get('FLASK_RUN_MIGRATIONS', '').lower() in ('1', 'true', 'yes')
+    seed_flag = os.environ.get('FLASK_SEED_DEFAULTS', '').lower() in ('1', 'true', 'yes')
+
+    # Esquema ya verificado en un arranque anterior (PRAGMA user_version = huella
+    # de los modelos): no hace falta create_all ni las consultas de datos iniciales
+    if not (reset_db or run_migrations or seed_flag) and esquema_actualizado():
+        print("[SKIP] Esquema al día: se omite la verificación de tablas y datos iniciales")
+        return False
+
+    db.create_all()
+    print("[OK] Base de datos verificada")
+
+    # Ejecutar migraciones (opt-in)
+    if run_migrations:
+        run_migrations_sqlite()
+
+    # Inicializar datos por defecto solo si se solicita explícitamente
+    if seed_flag:
+        init_default_data()
+    else:
+        print("[SKIP] Carga de datos por defecto deshabilitada (FLASK_SEED_DEFAULTS no activo)")
+
+    # Crear usuarios iniciales si no existen
+    ensure_default_users()
+    marcar_esquema_actualizado()
+
+    return True
+
 
 def main():
     app = create_app()
 
     with app.app_context():
-        # Verificar si la BD existe y tiene esquema desactualizado
-        # Si es desarrollo, recrear tablas desde cero
-        if os.environ.get('FLASK_RESET_DB'):
-            print("🔄 Eliminando y recreando base de datos...")
-            db.drop_all()
-        
-        db.create_all()
-        print("[OK] Base de datos verificada")
-        
-        # Ejecutar migraciones (opt-in)
-        if os.environ.get('FLASK_RUN_MIGRATIONS', '').lower() in ('1', 'true', 'yes'):
-            run_migrations_sqlite()
-
-        # Inicializar datos por defecto solo si se solicita explícitamente
-        seed_flag = os.environ.get('FLASK_SEED_DEFAULTS', '').lower() in ('1', 'true', 'yes')
-        if seed_flag:
-            init_default_data()
-        else:
-            print("[SKIP] Carga de datos por defecto deshabilitada (FLASK_SEED_DEFAULTS no activo)")
-
-        # Crear usuarios iniciales si no existen
-        ensure_default_users()
+        prepare_database()
     
     # Configuración del servidor
     host = os.environ.get('FLASK_HOST', '127.0.0.1')
@@ -459,10 +500,8 @@ def main():
     print("[HELP] Para ver ayuda: python help.py")
     print("[QUICK] Para verificacion rapida: python quick_start.py")
     
-    # Registrar tareas periódicas (cleanup, etc) solo en el proceso servidor (evita duplicado en reloader)
-    from app.scheduler import register_background_tasks
+    # Las tareas periódicas arrancan solas después del primer request (create_app)
     if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-        register_background_tasks(app)
         # Abrir navegador automáticamente si está habilitado en settings.ini
         try:
             auto_open = SettingsLoader.get_bool('app', 'auto_open_browser', True)
@@ -473,7 +512,42 @@ def main():
             # Pequeño delay para asegurar que el servidor esté levantado
             Timer(1.0, lambda: webbrowser.open_new(url)).start()
     
-    app.run(host=host, port=port, debug=debug, use_reloader=use_reloader)
+    modo = SettingsLoader.get('servidor', 'modo', 'produccion').strip().lower()
+    if debug or modo != 'produccion':
+        app.run(host=host, port=port, debug=debug, use_reloader=use_reloader)
+    else:
+        serve_production(app, host, port)
+
+
+def serve_production(app, host, port):
+    """Sirve con el pool de hilos de app.servidor; al cerrar drena los requests y hace el backup final."""
+    from app.servidor import ServidorWSGI
+    from app.database.utils import backup_database
+
+    servidor = ServidorWSGI(
+        host, port, app,
+        hilos=SettingsLoader.get_int('servidor', 'hilos', 8),
+        backlog=SettingsLoader.get_int('servidor', 'backlog', 64),
+        timeout=SettingsLoader.get_int('servidor', 'timeout_segundos', 30),
+    )
+    # /shutdown lo busca acá para pedir el cierre ordenado
+    app.extensions['servidor_wsgi'] = servidor
+    print(f"[SERVER] Servidor de producción con {servidor.hilos} hilos (Ctrl+C para salir)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("[SHUTDOWN] Interrupción recibida")
+    finally:
+        espera = SettingsLoader.get_int('servidor', 'espera_cierre_segundos', 15)
+        print(f"[SHUTDOWN] Esperando requests en curso ({servidor.en_curso()})...")
+        if not servidor.drenar(espera):
+            print(f"[SHUTDOWN] Quedaron requests sin terminar después de {espera} s")
+        try:
+            print("[SHUTDOWN] Creando backup final...")
+            backup_database()
+        except Exception as e:
+            print(f"[SHUTDOWN] Error al crear backup: {e}")
+        print("[EXIT] Servidor detenido.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
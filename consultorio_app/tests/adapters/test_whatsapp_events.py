@@ -0,0 +1,91 @@
+"""
+Tests para el parseo de lotes del webhook y la cola de eventos por usuario.
+"""
+
+import threading
+import time
+
+from app.adapters.whatsapp import (
+    IncomingMessage,
+    StatusUpdate,
+    WhatsAppEventQueue,
+    WhatsAppPayloadParser,
+)
+
+
+def _mensaje(message_id, telefono, texto):
+    return {"from": telefono, "id": message_id, "timestamp": "1700000000", "type": "text", "text": {"body": texto}}
+
+
+def _payload_lote():
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [
+            {"id": "1", "changes": [
+                {"field": "messages", "value": {
+                    "metadata": {"phone_number_id": "123"},
+                    "messages": [_mensaje("wamid.a1", "111", "hola"), _mensaje("wamid.b1", "222", "buenas")],
+                }},
+                {"field": "messages", "value": {
+                    "statuses": [{"id": "wamid.out1", "recipient_id": "111", "status": "delivered", "timestamp": "1700000001"}],
+                }},
+            ]},
+            {"id": "2", "changes": [
+                {"field": "messages", "value": {
+                    "messages": [
+                        _mensaje("wamid.a2", "111", "12345678"),
+                        _mensaje("wamid.a1", "111", "hola"),  # repetido dentro del lote
+                        {"from": "333", "id": "wamid.c1", "type": "image", "image": {"id": "9"}},
+                    ],
+                }},
+            ]},
+        ],
+    }
+
+
+def test_parse_events_recorre_todas_las_entries_y_changes():
+    eventos = WhatsAppPayloadParser.parse_events(_payload_lote())
+
+    mensajes = [e for e in eventos if isinstance(e, IncomingMessage)]
+    estados = [e for e in eventos if isinstance(e, StatusUpdate)]
+    assert [m.message_id for m in mensajes] == ["wamid.a1", "wamid.b1", "wamid.a2", "wamid.c1"]
+    assert mensajes[0].phone_number_id == "123" and mensajes[0].timestamp == 1700000000
+    assert mensajes[3].tipo == "image" and mensajes[3].texto == ""
+    assert estados == [StatusUpdate("wamid.out1", "111", "delivered", 1700000001, [])]
+    assert WhatsAppPayloadParser.is_status_update(_payload_lote()) is False
+    assert WhatsAppPayloadParser.parse_events({"entry": "basura"}) == []
+
+
+def test_cola_ordena_por_usuario_y_paraleliza_entre_usuarios(app):
+    procesados = []
+    en_paralelo = threading.Event()
+    activos = set()
+    lock = threading.Lock()
+
+    def procesar(evento):
+        with lock:
+            activos.add(evento.channel_user_id)
+            if len(activos) > 1:
+                en_paralelo.set()
+        time.sleep(0.02)
+        with lock:
+            procesados.append((evento.channel_user_id, evento.texto))
+            activos.discard(evento.channel_user_id)
+
+    WhatsAppEventQueue.iniciar(None, hilos=3, procesar=procesar)
+    try:
+        eventos = [
+            IncomingMessage(f"wamid.cola-{usuario}-{i}", usuario, "text", str(i), None, None)
+            for i in range(5) for usuario in ("u1", "u2", "u3")
+        ]
+        assert WhatsAppEventQueue.despachar(eventos) == 15
+        # Reenvío de Meta: los mismos ids no se vuelven a procesar
+        assert WhatsAppEventQueue.despachar(eventos[:3]) == 0
+        assert WhatsAppEventQueue.esperar_vacia(timeout=5)
+    finally:
+        WhatsAppEventQueue.detener()
+
+    assert len(procesados) == 15
+    for usuario in ("u1", "u2", "u3"):
+        assert [t for u, t in procesados if u == usuario] == ["0", "1", "2", "3", "4"]
+    assert en_paralelo.is_set()
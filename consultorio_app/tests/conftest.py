@@ -1,10 +1,15 @@
 """Fixtures base para pytest."""
 
 import os
+from contextlib import contextmanager
+
 import pytest
 
 from app import create_app
 from app.database import db
+from app.instrumentacion import ContadorConsultas, InstrumentacionRequests
+from app.services.conversacion import CacheConversaciones
+from app.services.turno import ProyeccionAgenda
 
 
 @pytest.fixture(scope="session")
@@ -14,6 +19,13 @@ def app():
     os.environ.setdefault("DISABLE_SCHEDULER", "1")
     os.environ.setdefault("FLASK_LOGIN_DISABLED", "1")  # se puede habilitar por test si se requiere
 
+    # Scripts importados durante la colección (ej: test_whatsapp_local.py) pueden
+    # haber creado una app normal: sus workers no deben atender a la de tests
+    from app.adapters.whatsapp import WhatsAppEventQueue
+    from app.services.whatsapp import ColaSalienteWorker
+    WhatsAppEventQueue.detener()
+    ColaSalienteWorker.detener()
+
     flask_app = create_app()
     flask_app.config.update(
         TESTING=True,
@@ -46,3 +58,45 @@ def db_session(app):
             for table in reversed(db.metadata.sorted_tables):
                 db.session.execute(table.delete())
             db.session.commit()
+            # El borrado masivo no pasa por los servicios: descartar la agenda
+            # y las conversaciones cacheadas
+            ProyeccionAgenda.invalidar_todo()
+            CacheConversaciones.limpiar()
+
+
+@pytest.fixture
+def fake_graph_api(monkeypatch):
+    """Graph API de WhatsApp falsa en localhost, con credenciales de prueba configuradas."""
+    from app.services.whatsapp import GraphHttpClient
+    from tests.fakes.graph_api import FakeGraphAPI
+
+    GraphHttpClient.cerrar()
+    fake = FakeGraphAPI().iniciar()
+    monkeypatch.setenv("WHATSAPP_API_BASE_URL", fake.url)
+    monkeypatch.setenv("WHATSAPP_ACCESS_TOKEN", "token-de-prueba")
+    monkeypatch.setenv("WHATSAPP_PHONE_NUMBER_ID", "123456")
+    yield fake
+    GraphHttpClient.cerrar()
+    fake.detener()
+
+
+@pytest.fixture
+def presupuesto_consultas():
+    """
+    Presupuesto de consultas SQL de un bloque (una ruta o un servicio).
+
+        with presupuesto_consultas(8):
+            client.get('/prestaciones')
+
+    Falla si el bloque ejecuta más de `maximo` sentencias o si una misma forma
+    de sentencia se repite más de `repeticiones` veces (N+1).
+    """
+    @contextmanager
+    def verificar(maximo: int, repeticiones: int = InstrumentacionRequests.UMBRAL_N_MAS_UNO):
+        with ContadorConsultas() as consultas:
+            yield consultas
+        repetidas = consultas.repetidas(repeticiones)
+        assert not repetidas, f"Consultas repetidas (posible N+1):\n{consultas.resumen()}"
+        assert consultas.total <= maximo, f"Presupuesto de {maximo} consultas excedido:\n{consultas.resumen()}"
+
+    return verificar
@@ -0,0 +1,66 @@
+"""Servidor HTTP local que imita el endpoint /{phone_id}/messages de la Graph API de WhatsApp."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGraphAPI:
+    """
+    Registra cada mensaje recibido y responde como Meta.
+
+    - `respuestas`: cola de códigos HTTP a devolver antes de volver a 200 (ej: [429, 500])
+    - `latencia`: segundos de demora por request
+    """
+
+    def __init__(self):
+        self.mensajes = []
+        self.respuestas = []
+        self.latencia = 0.0
+        self._lock = threading.Lock()
+        self._contador = 0
+        fake = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 para que el cliente pueda mantener la conexión abierta
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                largo = int(self.headers.get('Content-Length') or 0)
+                cuerpo = json.loads(self.rfile.read(largo) or b'{}')
+                if fake.latencia:
+                    time.sleep(fake.latencia)
+                with fake._lock:
+                    status = fake.respuestas.pop(0) if fake.respuestas else 200
+                    if status == 200:
+                        fake._contador += 1
+                        fake.mensajes.append({'path': self.path, 'payload': cuerpo})
+                        respuesta = {'messages': [{'id': f'wamid.fake{fake._contador}'}]}
+                    else:
+                        respuesta = {'error': {'message': f'fake error {status}', 'code': status}}
+                datos = json.dumps(respuesta).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._hilo = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._server.server_address
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._server.shutdown()
+        self._server.server_close()
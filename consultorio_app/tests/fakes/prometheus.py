@@ -0,0 +1,77 @@
+"""Parser estricto del formato de texto de Prometheus (0.0.4), para verificar /admin/metrics."""
+
+import math
+import re
+
+_NOMBRE = r'[a-zA-Z_:][a-zA-Z0-9_:]*'
+_MUESTRA = re.compile(rf'^({_NOMBRE})(?:\{{(.*)\}})? (\S+)$')
+_ETIQUETA = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\\n]|\\[\\"n])*)"(,|$)')
+_TIPOS = {'counter', 'gauge', 'histogram', 'summary', 'untyped'}
+
+
+def _etiquetas(texto):
+    etiquetas, posicion = {}, 0
+    while posicion < len(texto):
+        coincidencia = _ETIQUETA.match(texto, posicion)
+        assert coincidencia, f"etiquetas mal formadas: {texto!r}"
+        clave = coincidencia.group(1)
+        assert clave not in etiquetas, f"etiqueta repetida: {clave}"
+        etiquetas[clave] = coincidencia.group(2).replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')
+        posicion = coincidencia.end()
+    return etiquetas
+
+
+def parsear_metricas(texto):
+    """
+    Devuelve {familia: {'tipo', 'ayuda', 'muestras': [(nombre, etiquetas, valor)]}}.
+
+    Falla (AssertionError) ante cualquier línea inválida, muestras sin TYPE,
+    familias repetidas o histogramas inconsistentes.
+    """
+    familias, actual = {}, None
+    assert texto.endswith('\n'), "el texto debe terminar en salto de línea"
+    for linea in texto.splitlines():
+        if not linea:
+            continue
+        if linea.startswith('# HELP '):
+            nombre = linea.split(' ', 3)[2]
+            assert re.fullmatch(_NOMBRE, nombre), linea
+            continue
+        if linea.startswith('# TYPE '):
+            _, _, nombre, tipo = linea.split(' ')
+            assert tipo in _TIPOS, linea
+            assert nombre not in familias, f"familia repetida: {nombre}"
+            actual = familias[nombre] = {'tipo': tipo, 'muestras': []}
+            continue
+        if linea.startswith('#'):
+            continue
+        coincidencia = _MUESTRA.match(linea)
+        assert coincidencia, f"muestra mal formada: {linea!r}"
+        nombre, etiquetas, valor = coincidencia.groups()
+        assert actual is not None, f"muestra sin TYPE: {linea!r}"
+        familia = next(f for f, datos in familias.items() if datos is actual)
+        sufijos = ('_bucket', '_sum', '_count') if actual['tipo'] == 'histogram' else ('',)
+        assert any(nombre == familia + sufijo for sufijo in sufijos), f"{nombre} no pertenece a {familia}"
+        actual['muestras'].append((nombre, _etiquetas(etiquetas or ''), float(valor)))
+
+    for nombre, datos in familias.items():
+        if datos['tipo'] == 'histogram':
+            _verificar_histograma(nombre, datos['muestras'])
+    return familias
+
+
+def _verificar_histograma(nombre, muestras):
+    series = {}
+    for muestra, etiquetas, valor in muestras:
+        clave = tuple(sorted((k, v) for k, v in etiquetas.items() if k != 'le'))
+        serie = series.setdefault(clave, {'buckets': [], 'count': None})
+        if muestra.endswith('_bucket'):
+            serie['buckets'].append((float(etiquetas['le']), valor))
+        elif muestra.endswith('_count'):
+            serie['count'] = valor
+    for clave, serie in series.items():
+        limites = [limite for limite, _ in serie['buckets']]
+        conteos = [conteo for _, conteo in serie['buckets']]
+        assert limites == sorted(limites) and limites[-1] == math.inf, f"{nombre}{clave}: buckets desordenados"
+        assert conteos == sorted(conteos), f"{nombre}{clave}: buckets no acumulados"
+        assert conteos[-1] == serie['count'], f"{nombre}{clave}: +Inf distinto de _count"
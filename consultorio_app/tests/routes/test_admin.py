@@ -1,5 +1,87 @@
+import logging
+
+from app.instrumentacion import InstrumentacionRequests
+
+
 def test_admin_logs_access_when_login_disabled(client):
     resp = client.get('/admin/logs')
     # Con LOGIN_DISABLED=1 en test, debe permitir acceso
     assert resp.status_code == 200
     assert b'Logs del Sistema' in resp.data
+
+
+def test_admin_logs_busca_en_el_store(client):
+    resp = client.get('/admin/logs?log_type=todos&search=Florens')
+    assert resp.status_code == 200
+    assert b'Store de logs' in resp.data
+
+
+def test_admin_dashboard_muestra_endpoints_lentos(client):
+    client.get('/admin/logs')
+    resp = client.get('/admin/dashboard')
+    assert resp.status_code == 200
+    assert b'Endpoints m\xc3\xa1s lentos' in resp.data
+    assert b'admin.ver_logs' in resp.data
+
+
+def test_instrumentacion_mide_sql_y_loggea_requests_lentos(client, db_session, monkeypatch, caplog):
+    InstrumentacionRequests.reiniciar()
+    monkeypatch.setattr(InstrumentacionRequests, "UMBRAL_LENTO_MS", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.instrumentacion"):
+        assert client.get('/admin/dashboard').status_code == 200
+
+    fila = next(f for f in InstrumentacionRequests.estadisticas() if f['endpoint'] == 'admin.dashboard')
+    assert fila['requests'] == 1 and fila['lentos'] == 1
+    assert fila['sql_sentencias'] >= 4
+    assert fila['template_ms'] > 0
+    mensaje = next(r.getMessage() for r in caplog.records if r.name == "app.instrumentacion")
+    assert mensaje.startswith("Request lento: GET admin.dashboard")
+    assert "SELECT count(*)" in mensaje
+    assert InstrumentacionRequests.top_lentos(1)[0]['endpoint'] == 'admin.dashboard'
+
+
+def test_admin_metrics_en_formato_prometheus(client, db_session):
+    from tests.fakes.prometheus import parsear_metricas
+    from app.security import RateLimiter
+
+    RateLimiter.reset()
+    for _ in range(RateLimiter.REQUESTS_PER_MINUTE + 1):
+        RateLimiter.check_rate_limit('5491100000000')
+    client.get('/turnos')
+
+    resp = client.get('/admin/metrics')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    familias = parsear_metricas(resp.get_data(as_text=True))
+
+    requests_ = familias['consultorio_http_request_segundos']
+    assert requests_['tipo'] == 'histogram'
+    assert any(m[1].get('endpoint') == 'admin.metrics' or m[1].get('blueprint') == 'main' for m in requests_['muestras'])
+    assert familias['consultorio_rate_limit_rechazos_total']['muestras'][0][2] >= 1
+    for familia in (
+        'consultorio_db_pool_conexiones', 'consultorio_db_escritura_segundos', 'consultorio_db_bloqueos_total',
+        'consultorio_whatsapp_eventos_pendientes', 'consultorio_whatsapp_cola_saliente_mensajes',
+        'consultorio_whatsapp_envio_segundos', 'consultorio_cache_hit_ratio',
+    ):
+        assert familia in familias
+    RateLimiter.reset()
+
+
+def test_admin_perfil_descarga_collapsed_stacks(client):
+    resp = client.post('/admin/perfil', data={'segundos': '0.2', 'intervalo_ms': '5'})
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    assert 'attachment; filename=perfil_' in resp.headers['Content-Disposition']
+    assert int(resp.headers['X-Perfil-Muestras']) > 0
+    for linea in resp.get_data(as_text=True).splitlines():
+        assert int(linea.rsplit(' ', 1)[1]) > 0
+
+    assert client.post('/admin/perfil', data={'segundos': 'x'}).status_code == 400
+    assert client.get('/admin/perfil').status_code == 405
+
+
+def test_admin_perfil_rechaza_valores_no_finitos(client):
+    for datos in ({'segundos': 'nan'}, {'segundos': 'inf'}, {'segundos': '0.1', 'intervalo_ms': 'nan'},
+                  {'segundos': '0.1', 'intervalo_ms': '-inf'}):
+        assert client.post('/admin/perfil', data=datos).status_code == 400
@@ -2,3 +2,20 @@ def test_login_page_loads(client):
     resp = client.get('/login')
     assert resp.status_code == 200
     assert b'Iniciar Sesi' in resp.data  # tolerante a acentos
+
+
+def test_shutdown_con_servidor_de_produccion_pide_cierre_ordenado(client, monkeypatch):
+    llamadas = []
+
+    class _Servidor:
+        def solicitar_detencion(self):
+            llamadas.append('detener')
+
+    def _backup():
+        raise AssertionError("el backup lo hace run.py después de drenar")
+
+    monkeypatch.setitem(client.application.extensions, 'servidor_wsgi', _Servidor())
+    monkeypatch.setattr('app.database.utils.backup_database', _backup)
+    resp = client.post('/shutdown')
+    assert resp.status_code == 302
+    assert llamadas == ['detener']
@@ -66,3 +66,49 @@ def test_ver_paciente_detalle(app, client, db_session):
 
     resp = client.get(f'/pacientes/{p.id}')
     assert resp.status_code == 200
+
+
+def test_slots_odontograma_etag_y_version(app, client, db_session, tmp_path, monkeypatch):
+    from app.config import PathManager
+    from app.services.odontograma import CalibracionSlotsService
+
+    monkeypatch.setattr(PathManager, 'get_calibracion_dir', classmethod(lambda cls: tmp_path))
+    CalibracionSlotsService.limpiar_cache()
+    app.config['LOGIN_DISABLED'] = False
+    make_usuario(username='odo_slots', rol='ODONTOLOGA', password='secret')
+    login(client, 'odo_slots', 'secret')
+
+    payload = {'config': {'top': {}, 'bottom': {}}, 'teeth': [{'id': '11', 'x': 10, 'row': 'top'}]}
+    resp = client.post('/odontograma/slots', json=payload)
+    assert resp.status_code == 200
+    url = resp.get_json()['url']
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.get_json()['teeth'][0]['id'] == '11'
+    assert 'immutable' in resp.headers['Cache-Control']
+    etag = resp.headers['ETag']
+
+    resp = client.get('/odontograma/slots', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+
+    assert client.post('/odontograma/slots', json={'teeth': []}).status_code == 400
+    CalibracionSlotsService.limpiar_cache()
+
+
+def test_slots_odontograma_version_de_fabrica_se_revalida(app, client, db_session, tmp_path, monkeypatch):
+    from app.config import PathManager
+    from app.services.odontograma import CalibracionSlotsService
+
+    monkeypatch.setattr(PathManager, 'get_calibracion_dir', classmethod(lambda cls: tmp_path))
+    CalibracionSlotsService.limpiar_cache()
+    app.config['LOGIN_DISABLED'] = False
+    make_usuario(username='odo_fabrica', rol='ODONTOLOGA', password='secret')
+    login(client, 'odo_fabrica', 'secret')
+
+    resp = client.get('/odontograma/slots/v0.json')
+    assert resp.status_code == 200
+    assert 'immutable' not in resp.headers['Cache-Control']
+    assert 'no-cache' in resp.headers['Cache-Control']
+    assert client.get('/odontograma/slots/v0.json', headers={'If-None-Match': resp.headers['ETag']}).status_code == 304
+    CalibracionSlotsService.limpiar_cache()
@@ -40,3 +40,44 @@ def test_nueva_prestacion_flow(app, client, db_session):
     pr = Prestacion.query.first()
     assert pr.paciente_id == p.id
     assert pr.descripcion == 'Prestación de prueba'
+
+
+def _prestaciones_con_practicas(cantidad):
+    from tests.factories.data import make_prestacion, make_prestacion_practica
+
+    practicas = [make_practica(codigo=f'PQ-{i}', descripcion=f'Práctica {i}') for i in range(3)]
+    pacientes = [make_paciente(dni=f'4400{i:04d}') for i in range(cantidad)]
+    for paciente in pacientes:
+        prestacion = make_prestacion(paciente)
+        for practica in practicas:
+            make_prestacion_practica(prestacion, practica)
+    return pacientes
+
+
+def test_listar_prestaciones_sin_n_mas_uno(app, client, db_session, presupuesto_consultas):
+    app.config['LOGIN_DISABLED'] = True
+    _prestaciones_con_practicas(12)
+
+    with presupuesto_consultas(6):
+        resp = client.get('/prestaciones')
+    assert resp.status_code == 200
+    assert b'PQ-2' in resp.data
+
+
+def test_detalle_paciente_sin_n_mas_uno(app, client, db_session, presupuesto_consultas):
+    from tests.factories.data import make_prestacion, make_prestacion_practica
+
+    app.config['LOGIN_DISABLED'] = True
+    paciente = make_paciente(dni='55001122')
+    practicas = [make_practica(codigo=f'PD-{i}', descripcion=f'Práctica {i}') for i in range(6)]
+    for _ in range(5):
+        prestacion = make_prestacion(paciente)
+        for practica in practicas:
+            make_prestacion_practica(prestacion, practica)
+
+    with presupuesto_consultas(20):
+        resp = client.get(f'/pacientes/{paciente.id}')
+    assert resp.status_code == 200
+    with presupuesto_consultas(10):
+        resp = client.get(f'/pacientes/{paciente.id}/prestaciones')
+    assert resp.status_code == 200
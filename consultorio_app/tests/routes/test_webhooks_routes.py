@@ -0,0 +1,62 @@
+import json
+import time as _time
+
+from app.models import MensajeSaliente
+
+
+def _payload_texto(telefono, texto):
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "1",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "messages": [{
+                        "from": telefono,
+                        "id": "wamid.entrante1",
+                        "timestamp": "1700000000",
+                        "type": "text",
+                        "text": {"body": texto},
+                    }],
+                },
+            }],
+        }],
+    }
+
+
+def test_webhook_encola_la_respuesta_sin_esperar_a_la_graph_api(client, db_session, fake_graph_api):
+    fake_graph_api.latencia = 2.0
+
+    inicio = _time.perf_counter()
+    resp = client.post(
+        "/webhooks/whatsapp",
+        data=json.dumps(_payload_texto("5491155556666", "hola")),
+        content_type="application/json",
+    )
+    transcurrido = _time.perf_counter() - inicio
+
+    assert resp.status_code == 200
+    assert transcurrido < 1.0
+    mensaje, = MensajeSaliente.query.all()
+    assert mensaje.destinatario == "5491155556666"
+    assert mensaje.estado == MensajeSaliente.PENDIENTE
+    assert fake_graph_api.mensajes == []
+
+
+def test_webhook_procesa_todos_los_mensajes_del_lote(client, db_session):
+    payload = _payload_texto("5491100000010", "hola")
+    segundo = dict(payload["entry"][0], id="2")
+    segundo["changes"] = [{"field": "messages", "value": {"messages": [
+        {"from": "5491100000011", "id": "wamid.lote2", "type": "text", "text": {"body": "hola"}},
+    ]}}]
+    payload["entry"][0]["changes"][0]["value"]["messages"][0]["id"] = "wamid.lote1"
+    payload["entry"].append(segundo)
+
+    for _ in range(2):  # Meta reenvía el mismo lote: no se responde dos veces
+        resp = client.post("/webhooks/whatsapp", data=json.dumps(payload), content_type="application/json")
+        assert resp.status_code == 200
+
+    destinatarios = sorted(m.destinatario for m in MensajeSaliente.query.all())
+    assert destinatarios == ["5491100000010", "5491100000011"]
@@ -0,0 +1,59 @@
+from app.adapters.whatsapp import IncomingMessage, procesar_evento
+from app.adapters.whatsapp import event_queue
+from app.security import RateLimiter
+from app.security import rate_limiter
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+def _con_reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", reloj.monotonic)
+    RateLimiter.reset()
+    return reloj
+
+
+def test_rafaga_y_recuperacion(monkeypatch):
+    reloj = _con_reloj(monkeypatch)
+
+    permitidos = [RateLimiter.check_rate_limit("u1")[0] for _ in range(RateLimiter.REQUESTS_PER_MINUTE)]
+    assert all(permitidos)
+    allowed, mensaje = RateLimiter.check_rate_limit("u1")
+    assert not allowed and "Retry in 12s" in mensaje
+    assert RateLimiter.check_rate_limit("u2")[0]
+
+    # Cada 60/REQUESTS_PER_MINUTE segundos se libera un lugar
+    reloj.ahora += 60 / RateLimiter.REQUESTS_PER_MINUTE
+    assert RateLimiter.check_rate_limit("u1")[0]
+    assert not RateLimiter.check_rate_limit("u1")[0]
+
+
+def test_barrido_borra_usuarios_con_cupo_completo(monkeypatch):
+    reloj = _con_reloj(monkeypatch)
+    for i in range(1000):
+        RateLimiter.check_rate_limit(f"usuario-{i}")
+    assert RateLimiter.size() == 1000
+
+    reloj.ahora += 30
+    RateLimiter.check_rate_limit("activo")
+    RateLimiter.check_rate_limit("activo")
+    RateLimiter.check_rate_limit("activo")
+    assert RateLimiter.cleanup_old_entries() == 1000
+    assert RateLimiter.size() == 1
+
+
+def test_mensajes_excedidos_no_llegan_a_la_conversacion(monkeypatch):
+    _con_reloj(monkeypatch)
+    recibidos = []
+    monkeypatch.setattr(event_queue.ConversationService, "handle_message", lambda u, t: recibidos.append(t))
+
+    for i in range(RateLimiter.REQUESTS_PER_MINUTE + 3):
+        procesar_evento(IncomingMessage(f"wamid.rl{i}", "5491100000020", "text", str(i), None, None))
+
+    assert recibidos == [str(i) for i in range(RateLimiter.REQUESTS_PER_MINUTE)]
@@ -0,0 +1,157 @@
+from datetime import date, time, timedelta
+
+from app.database import db
+from app.models import Estado
+
+from app.services.turno import ObtenerAgendaService, EliminarTurnoService, ProyeccionAgenda
+from tests.factories.data import make_paciente, make_turno
+
+
+def _proximo_lunes():
+    hoy = date.today()
+    return hoy + timedelta(days=7 - hoy.weekday())
+
+
+def test_semana_sale_de_cache_hasta_invalidar(db_session):
+    lunes = _proximo_lunes()
+    paciente = make_paciente(dni="70707070")
+    turno = make_turno(paciente, fecha=lunes, hora=time(9, 0))
+
+    agenda = ObtenerAgendaService.obtener_semana_agenda(lunes)
+    assert [b.id for b in agenda['semana']['Lunes']['bloques']] == [turno.id]
+    bloque = agenda['semana']['Lunes']['bloques'][0]
+    assert bloque.paciente_nombre == paciente.nombre
+    assert bloque.top_pct == round(60 / 780 * 100, 2)
+
+    # Escritura directa (sin caso de uso): la proyección cacheada no cambia
+    otro = make_turno(paciente, fecha=lunes, hora=time(11, 0))
+    agenda = ObtenerAgendaService.obtener_semana_agenda(lunes)
+    assert [b.id for b in agenda['semana']['Lunes']['bloques']] == [turno.id]
+
+    # El caso de uso invalida el día y se recalcula
+    EliminarTurnoService.execute(turno.id)
+    agenda = ObtenerAgendaService.obtener_semana_agenda(lunes)
+    assert [b.id for b in agenda['semana']['Lunes']['bloques']] == [otro.id]
+
+
+def test_solo_se_recalcula_el_dia_invalidado(db_session, monkeypatch):
+    lunes = _proximo_lunes()
+    ObtenerAgendaService.obtener_semana_agenda(lunes)
+
+    consultados = []
+    original = ObtenerAgendaService._proyectar_dias
+
+    def _espiar(fechas):
+        consultados.append(list(fechas))
+        return original(fechas)
+
+    monkeypatch.setattr(ObtenerAgendaService, '_proyectar_dias', staticmethod(_espiar))
+
+    ObtenerAgendaService.obtener_semana_agenda(lunes)
+    assert consultados == []
+
+    miercoles = lunes + timedelta(days=2)
+    ProyeccionAgenda.invalidar(miercoles)
+    ObtenerAgendaService.obtener_semana_agenda(lunes)
+    assert consultados == [[miercoles]]
+
+
+def test_escala_horaria_se_calcula_una_vez(db_session):
+    lunes = _proximo_lunes()
+    a = ObtenerAgendaService.obtener_semana_agenda(lunes)
+    b = ObtenerAgendaService.obtener_semana_agenda(lunes + timedelta(days=7))
+    assert a['horas_labels'] is b['horas_labels']
+    assert a['horas_labels'][0] == '08:00' and a['horas_labels'][-1] == '21:00'
+    assert a['horas_marcadores'][-1] == 100.0
+
+
+def test_agenda_no_hidrata_entidades_y_excluye_cancelados(db_session):
+    lunes = _proximo_lunes()
+    cancelado = Estado(nombre='Cancelado')
+    confirmado = Estado(nombre='Confirmado')
+    db.session.add_all([cancelado, confirmado])
+    db.session.commit()
+    paciente = make_paciente(dni="71717171")
+    visible = make_turno(paciente, fecha=lunes, hora=time(9, 0))
+    visible.estado_id = confirmado.id
+    oculto = make_turno(paciente, fecha=lunes, hora=time(10, 0))
+    oculto.estado_id = cancelado.id
+    db.session.commit()
+    visible_id = visible.id
+    db.session.expunge_all()
+
+    dia = ObtenerAgendaService.obtener_dia_agenda(lunes)
+
+    assert [(t.id, t.estado) for t in dia['turnos']] == [(visible_id, 'Confirmado')]
+    assert len(db.session.identity_map) == 0
+
+
+def test_turnos_simultaneos_se_reparten_en_subcolumnas(db_session):
+    lunes = _proximo_lunes()
+    paciente = make_paciente(dni="72727272")
+    a = make_turno(paciente, fecha=lunes, hora=time(9, 0))
+    a.duracion = 60
+    b = make_turno(paciente, fecha=lunes, hora=time(9, 30))
+    b.duracion = 15
+    c = make_turno(paciente, fecha=lunes, hora=time(9, 45))
+    d = make_turno(paciente, fecha=lunes, hora=time(12, 0))
+    db.session.commit()
+
+    bloques = {t.id: t for t in ObtenerAgendaService.obtener_dia_agenda(lunes)['turnos']}
+
+    assert (bloques[a.id].columna, bloques[a.id].columnas) == (0, 2)
+    assert (bloques[b.id].columna, bloques[b.id].columnas) == (1, 2)
+    # c empieza cuando termina b: reutiliza su sub-columna dentro del mismo grupo
+    assert (bloques[c.id].columna, bloques[c.id].columnas) == (1, 2)
+    assert (bloques[d.id].columna, bloques[d.id].columnas) == (0, 1)
+
+
+def test_agrupar_por_sillon(db_session):
+    lunes = _proximo_lunes()
+    paciente = make_paciente(dni="73737373")
+    uno = make_turno(paciente, fecha=lunes, hora=time(9, 0))
+    uno.sillon = 1
+    dos = make_turno(paciente, fecha=lunes, hora=time(9, 0))
+    dos.sillon = 2
+    db.session.commit()
+
+    agenda = ObtenerAgendaService.obtener_semana_agenda(lunes, agrupar_por='sillon')
+
+    # 6 días x 2 sillones, mismas columnas todos los días
+    assert len(agenda['columnas']) == 12
+    lunes_cols = [c for c in agenda['columnas'] if c['fecha'] == lunes]
+    assert [c['titulo'] for c in lunes_cols] == ['Sillón 1', 'Sillón 2']
+    assert [[t.id for t in c['bloques']] for c in lunes_cols] == [[uno.id], [dos.id]]
+    # En columnas distintas no se consideran solapados
+    assert all(t.columnas == 1 for c in lunes_cols for t in c['bloques'])
+
+
+def test_mes_y_rango_usan_una_sola_consulta(db_session, monkeypatch):
+    lunes = _proximo_lunes()
+    paciente = make_paciente(dni="74747474")
+    turno = make_turno(paciente, fecha=lunes, hora=time(9, 0))
+
+    consultas = []
+    original = ObtenerAgendaService._proyectar_dias
+    monkeypatch.setattr(
+        ObtenerAgendaService, '_proyectar_dias',
+        staticmethod(lambda fechas: consultas.append(len(fechas)) or original(fechas)),
+    )
+
+    mes = ObtenerAgendaService.obtener_mes_agenda(lunes)
+
+    assert len(consultas) == 1
+    assert all(len(semana) == 7 for semana in mes['semanas'])
+    dias = [d for semana in mes['semanas'] for d in semana if d['fecha'] == lunes]
+    assert [t.id for t in dias[0]['turnos']] == [turno.id]
+
+
+def test_rango_invalido(db_session):
+    import pytest
+    from app.services.common import DatosInvalidosError
+
+    hoy = date.today()
+    with pytest.raises(DatosInvalidosError):
+        ObtenerAgendaService.obtener_rango_agenda(hoy, hoy - timedelta(days=1))
+    with pytest.raises(DatosInvalidosError):
+        ObtenerAgendaService.obtener_rango_agenda(hoy, hoy, agrupar_por='color')
@@ -0,0 +1,93 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from app.database import db
+from app.models import Estado, Turno
+from app.services.common import DatosInvalidosError
+from app.services.turno import AgendarSerieTurnosService, ObtenerAgendaService
+from tests.factories.data import make_paciente, make_turno
+
+
+def _proximo_lunes():
+    hoy = date.today()
+    return hoy + timedelta(days=7 - hoy.weekday())
+
+
+def _seed_estados():
+    for nombre in ("Confirmado", "Cancelado", "NoAtendido"):
+        db.session.add(Estado(nombre=nombre))
+    db.session.commit()
+
+
+def test_generar_ocurrencias_cada_n_semanas_en_dia_fijo():
+    lunes = _proximo_lunes()
+    fechas = AgendarSerieTurnosService.generar_ocurrencias(lunes, cada_semanas=3, dia_semana=2, cantidad=4)
+    assert fechas == [lunes + timedelta(days=2 + 21 * i) for i in range(4)]
+
+    hasta = lunes + timedelta(weeks=8)
+    fechas = AgendarSerieTurnosService.generar_ocurrencias(lunes, cada_semanas=4, hasta=hasta)
+    assert fechas == [lunes, lunes + timedelta(weeks=4), hasta]
+
+    with pytest.raises(DatosInvalidosError):
+        AgendarSerieTurnosService.generar_ocurrencias(lunes, cada_semanas=1, hasta=lunes + timedelta(weeks=60))
+    with pytest.raises(DatosInvalidosError):
+        AgendarSerieTurnosService.generar_ocurrencias(lunes, cada_semanas=4)
+
+
+def test_serie_agenda_libres_e_informa_conflictos(db_session):
+    _seed_estados()
+    lunes = _proximo_lunes()
+    paciente = make_paciente(dni="80808080")
+    otro = make_paciente(nombre="Luis", apellido="Diaz", dni="80808081")
+    ocupado = lunes + timedelta(weeks=4)
+    make_turno(otro, fecha=ocupado, hora=time(10, 0), estado="Confirmado")
+    # Un turno cancelado no bloquea el horario
+    cancelado = make_turno(otro, fecha=lunes + timedelta(weeks=8), hora=time(10, 0), estado="Cancelado")
+    cancelado.estado_id = Estado.query.filter_by(nombre="Cancelado").first().id
+    db.session.commit()
+
+    ObtenerAgendaService.obtener_semana_agenda(ocupado + timedelta(weeks=4))  # calienta la caché
+
+    resultado = AgendarSerieTurnosService.execute(
+        paciente_id=paciente.id,
+        fecha_inicio=lunes,
+        hora=time(10, 0),
+        duracion=30,
+        cada_semanas=4,
+        cantidad=3,
+    )
+
+    assert [t.fecha for t in resultado["agendados"]] == [lunes, lunes + timedelta(weeks=8)]
+    assert Turno.query.filter_by(paciente_id=paciente.id).count() == 2
+
+    conflicto, = resultado["conflictos"]
+    assert conflicto["fecha"] == ocupado
+    assert "solapa" in conflicto["motivo"]
+    alternativas = conflicto["alternativas"]
+    assert {"fecha": ocupado, "hora": time(10, 30)} in alternativas
+    assert {"fecha": ocupado + timedelta(days=1), "hora": time(10, 0)} in alternativas
+
+    # La caché de la semana afectada se invalidó
+    agenda = ObtenerAgendaService.obtener_semana_agenda(lunes + timedelta(weeks=8))
+    assert any(b.paciente_id == paciente.id for b in agenda["semana"]["Lunes"]["bloques"])
+
+
+def test_serie_en_domingo_sugiere_dias_habiles(db_session):
+    _seed_estados()
+    domingo = _proximo_lunes() + timedelta(days=6)
+    paciente = make_paciente(dni="80808082")
+
+    resultado = AgendarSerieTurnosService.execute(
+        paciente_id=paciente.id,
+        fecha_inicio=domingo,
+        hora=time(9, 0),
+        cada_semanas=2,
+        cantidad=2,
+    )
+
+    assert resultado["agendados"] == []
+    assert len(resultado["conflictos"]) == 2
+    for conflicto in resultado["conflictos"]:
+        assert all(a["fecha"].weekday() != 6 for a in conflicto["alternativas"])
+        assert {"fecha": conflicto["fecha"] + timedelta(days=1), "hora": time(9, 0)} in conflicto["alternativas"]
@@ -0,0 +1,111 @@
+"""
+Benchmark de arranque: import de la app + create_app + preparar la base.
+
+Corre en procesos nuevos (el de pytest ya tiene todo importado) contra una
+base temporal. El primer arranque crea el esquema; los siguientes tienen que
+saltear create_all y los datos iniciales y entrar en el presupuesto de tiempo.
+El presupuesto se puede ajustar en CI con PRESUPUESTO_ARRANQUE_MS.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PRESUPUESTO_ARRANQUE_MS = float(os.environ.get('PRESUPUESTO_ARRANQUE_MS', 2000))
+RAIZ = Path(__file__).resolve().parents[2]
+
+_SCRIPT = r"""
+import json, sys, time
+inicio = time.perf_counter()
+from pathlib import Path
+from app.config import PathManager
+PathManager._base_dir = Path(sys.argv[1])
+
+import run
+from app.instrumentacion import ContadorConsultas
+
+app = run.create_app()
+with app.app_context():
+    with ContadorConsultas() as consultas:
+        verifico = run.prepare_database()
+listo = time.perf_counter()
+
+print(json.dumps({
+    'ms': (listo - inicio) * 1000,
+    'verifico_esquema': verifico,
+    'sentencias': consultas.total,
+    'modulos': sorted(m for m in ('flasgger', 'apscheduler', 'jsonschema') if m in sys.modules),
+}))
+"""
+
+
+def _arrancar(base_dir):
+    entorno = {
+        **os.environ,
+        'TESTING': '',
+        'DISABLE_SCHEDULER': '1',
+        'FLASK_RESET_DB': '',
+        'FLASK_RUN_MIGRATIONS': '',
+        'FLASK_SEED_DEFAULTS': '',
+    }
+    salida = subprocess.run(
+        [sys.executable, '-c', _SCRIPT, str(base_dir)],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, timeout=120,
+    )
+    assert salida.returncode == 0, salida.stderr
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def test_arranque_en_presupuesto_y_sin_verificar_esquema_al_dia(tmp_path):
+    primero = _arrancar(tmp_path)
+    assert primero['verifico_esquema'] is True
+
+    siguientes = [_arrancar(tmp_path) for _ in range(2)]
+    for arranque in siguientes:
+        assert arranque['verifico_esquema'] is False
+        # Sólo el PRAGMA user_version
+        assert arranque['sentencias'] <= 2
+        # Flasgger y APScheduler se cargan recién al usarse
+        assert arranque['modulos'] == []
+
+    mejor = min(arranque['ms'] for arranque in siguientes)
+    assert mejor <= PRESUPUESTO_ARRANQUE_MS, (
+        f"Arranque en {mejor:.0f} ms, presupuesto {PRESUPUESTO_ARRANQUE_MS:.0f} ms"
+    )
+
+
+def test_huella_cambia_con_los_modelos(app):
+    from sqlalchemy import Column, Integer, MetaData, String, Table
+    from app.database import db
+    from app.database.esquema import huella_esquema
+
+    with app.app_context():
+        actual = huella_esquema()
+        assert actual == huella_esquema() and 0 < actual < 2 ** 31
+
+        otra = MetaData()
+        for tabla in db.metadata.tables.values():
+            tabla.to_metadata(otra)
+        Table('tabla_nueva', otra, Column('id', Integer, primary_key=True), Column('nombre', String(10)))
+        assert huella_esquema(otra) != actual
+
+
+def test_scheduler_arranca_una_vez_despues_del_primer_request(monkeypatch):
+    from flask import Flask
+    import app.scheduler as scheduler
+
+    llamadas = []
+    monkeypatch.setattr(scheduler, 'register_background_tasks', lambda app: llamadas.append(app))
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule('/', 'inicio', lambda: 'ok')
+    scheduler.diferir_background_tasks(flask_app)
+
+    cliente = flask_app.test_client()
+    assert llamadas == []
+    respuesta = cliente.get('/')
+    respuesta.close()
+    assert llamadas == [flask_app]
+    cliente.get('/').close()
+    assert llamadas == [flask_app]
@@ -0,0 +1,54 @@
+import pytest
+from app.config import PathManager
+from app.services.odontograma import CalibracionSlotsService
+from app.services.common import CalibracionInvalidaError
+
+
+@pytest.fixture
+def calibracion_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(PathManager, 'get_calibracion_dir', classmethod(lambda cls: tmp_path))
+    CalibracionSlotsService.limpiar_cache()
+    yield tmp_path
+    CalibracionSlotsService.limpiar_cache()
+
+
+def _slots(x=10.0):
+    return {'config': {'top': {'y_occlusal': 30}}, 'teeth': [{'id': '11', 'x': x, 'row': 'top'}]}
+
+
+def test_sin_calibracion_usa_la_de_fabrica(calibracion_dir):
+    cal = CalibracionSlotsService.obtener()
+    assert cal.version == 0
+    assert cal.slots['teeth']
+
+
+def test_guardar_crea_versiones_y_actualiza_cache(calibracion_dir):
+    v1 = CalibracionSlotsService.guardar(_slots(10.0))
+    v2 = CalibracionSlotsService.guardar(_slots(20.0))
+
+    assert (v1.version, v2.version) == (1, 2)
+    assert v1.etag != v2.etag
+    assert CalibracionSlotsService.obtener() is v2
+    assert CalibracionSlotsService.obtener_version(1).slots['teeth'][0]['x'] == 10.0
+    # Sin archivos temporales colgando
+    assert sorted(p.name for p in calibracion_dir.iterdir()) == ['actual', 'slots_v1.json', 'slots_v2.json']
+
+
+def test_recarga_solo_si_cambia_la_version(calibracion_dir):
+    CalibracionSlotsService.guardar(_slots(10.0))
+    primera = CalibracionSlotsService.obtener()
+    assert CalibracionSlotsService.obtener() is primera
+
+    # Otro proceso deja una versión nueva como vigente
+    (calibracion_dir / 'slots_v7.json').write_text('{"config": {}, "teeth": [{"id": "11", "x": 55}]}')
+    (calibracion_dir / 'actual').write_text('7')
+
+    recargada = CalibracionSlotsService.obtener()
+    assert recargada.version == 7
+    assert recargada.slots['teeth'][0]['x'] == 55
+
+
+def test_guardar_valida_payload(calibracion_dir):
+    with pytest.raises(CalibracionInvalidaError):
+        CalibracionSlotsService.guardar({'teeth': []})
+    assert not (calibracion_dir / 'actual').exists()
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from app.database import db
+from app.models import MensajeSaliente
+from app.services.whatsapp import ColaSalienteWorker, EncolarMensajeService
+
+
+def _vaciar_cola():
+    while ColaSalienteWorker.procesar_uno():
+        pass
+
+
+def _textos_enviados(fake):
+    return [(m["payload"]["to"], m["payload"]["text"]["body"]) for m in fake.mensajes]
+
+
+def test_orden_por_destinatario_y_backoff(db_session, fake_graph_api):
+    a1 = EncolarMensajeService.execute("5491100000001", texto="A1")
+    EncolarMensajeService.execute("5491100000001", texto="A2")
+    EncolarMensajeService.execute("+54 9 11 0000-0002", texto="B1")
+
+    # El primer envío (A1) falla: queda en backoff y A2 no puede adelantarse
+    fake_graph_api.respuestas = [503]
+    _vaciar_cola()
+
+    assert _textos_enviados(fake_graph_api) == [("5491100000002", "B1")]
+    a1 = db.session.get(MensajeSaliente, a1.id)
+    assert a1.estado == MensajeSaliente.PENDIENTE
+    assert a1.intentos == 1
+    assert a1.proximo_intento_en > datetime.now()
+
+    # Vencido el backoff, sale A1 y recién después A2
+    a1.proximo_intento_en = datetime.now()
+    db.session.commit()
+    _vaciar_cola()
+
+    assert _textos_enviados(fake_graph_api)[1:] == [("5491100000001", "A1"), ("5491100000001", "A2")]
+    assert MensajeSaliente.query.filter_by(estado=MensajeSaliente.ENVIADO).count() == 3
+
+
+def test_error_permanente_va_a_mensajes_muertos(db_session, fake_graph_api):
+    invalido = EncolarMensajeService.execute("0123", texto="nunca sale")
+    EncolarMensajeService.execute("5491100000003", texto="sale igual")
+    _vaciar_cola()
+
+    assert db.session.get(MensajeSaliente, invalido.id).estado == MensajeSaliente.MUERTO
+    assert _textos_enviados(fake_graph_api) == [("5491100000003", "sale igual")]
+
+
+def test_agotar_reintentos_y_clave_idempotente(db_session, fake_graph_api):
+    mensaje = EncolarMensajeService.execute("5491100000004", texto="x", clave="unico")
+    assert EncolarMensajeService.execute("5491100000004", texto="x", clave="unico").id == mensaje.id
+
+    fake_graph_api.respuestas = [500] * ColaSalienteWorker.MAX_INTENTOS
+    for _ in range(ColaSalienteWorker.MAX_INTENTOS):
+        mensaje = db.session.get(MensajeSaliente, mensaje.id)
+        mensaje.proximo_intento_en = datetime.now()
+        db.session.commit()
+        assert ColaSalienteWorker.procesar_uno()
+
+    mensaje = db.session.get(MensajeSaliente, mensaje.id)
+    assert mensaje.estado == MensajeSaliente.MUERTO
+    assert mensaje.intentos == ColaSalienteWorker.MAX_INTENTOS
+    assert fake_graph_api.mensajes == []
+
+
+def test_backoff_exponencial_con_jitter():
+    for intento in range(1, 6):
+        tope = ColaSalienteWorker.BACKOFF_BASE_SEGUNDOS * 2 ** (intento - 1)
+        espera = ColaSalienteWorker.calcular_espera(intento)
+        assert tope / 2 <= espera <= tope
+    assert ColaSalienteWorker.calcular_espera(50) <= ColaSalienteWorker.BACKOFF_MAX_SEGUNDOS
+
+
+def test_cola_vacia_no_toma_el_lock_de_escritura(db_session, fake_graph_api):
+    from app.instrumentacion import ContadorConsultas
+
+    with ContadorConsultas() as consultas:
+        assert not ColaSalienteWorker.procesar_uno()
+    assert not any(s.upper().startswith('BEGIN') for s in consultas.sentencias)
+
+    EncolarMensajeService.execute("5491100000005", texto="hay trabajo")
+    with ContadorConsultas() as consultas:
+        assert ColaSalienteWorker.procesar_uno()
+    assert any(s.upper().startswith('BEGIN IMMEDIATE') for s in consultas.sentencias)
@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from app.database import db
+from app.models import Conversation, Paciente
+from app.services.conversacion import CacheConversaciones, ConversationService
+
+
+def _contar_sentencias():
+    sentencias = []
+
+    def registrar(conn, cursor, statement, *args):
+        sentencias.append(statement.split()[0].upper())
+
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    return sentencias, lambda: event.remove(db.engine, "before_cursor_execute", registrar)
+
+
+def test_cada_mensaje_es_una_sola_escritura(db_session):
+    CacheConversaciones.limpiar()
+    ConversationService.handle_message("5491100000030", "hola")  # primer mensaje: lee la base
+
+    sentencias, detener = _contar_sentencias()
+    try:
+        reply = ConversationService.handle_message("5491100000030", "30123456")
+    finally:
+        detener()
+
+    assert reply.step == "solicitar_nombre"
+    # Un SELECT del paciente por DNI (dominio) y un único INSERT ... ON CONFLICT de la conversación
+    assert sentencias.count("INSERT") == 1
+    assert sentencias.count("SELECT") == 1
+    assert "UPDATE" not in sentencias
+
+
+def test_flujo_completo_persistido_tras_reinicio_del_cache(db_session):
+    paciente = Paciente(nombre="Ana", apellido="Cache", dni="30123457", fecha_nac=date(1990, 1, 1))
+    db.session.add(paciente)
+    db.session.commit()
+    usuario = "5491100000031"
+
+    ConversationService.handle_message(usuario, "hola")
+    assert ConversationService.handle_message(usuario, "30123457").step == "solicitar_fecha"
+
+    CacheConversaciones.limpiar()  # reinicio: el estado sale de la base
+    fecha = (date.today() + timedelta(days=7)).isoformat()
+    assert ConversationService.handle_message(usuario, fecha).step == "solicitar_hora"
+
+    convo = Conversation.query.filter_by(channel_user_id=usuario).one()
+    assert convo.paciente_id == paciente.id
+    assert convo.fecha_candidate.isoformat() == fecha
+    assert Conversation.query.count() == 1
+
+
+def test_conversacion_vencida_arranca_de_nuevo(db_session):
+    usuario = "5491100000032"
+    ConversationService.handle_message(usuario, "hola")
+    ConversationService.handle_message(usuario, "30123458")
+    convo = Conversation.query.filter_by(channel_user_id=usuario).one()
+    convo.expira_en = datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+    CacheConversaciones.limpiar()
+
+    reply = ConversationService.handle_message(usuario, "hola")
+
+    assert reply.step == "solicitar_dni"
+    db.session.expire_all()
+    assert Conversation.query.filter_by(channel_user_id=usuario).one().dni_propuesto is None
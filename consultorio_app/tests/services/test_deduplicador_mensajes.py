@@ -0,0 +1,65 @@
+import threading
+from datetime import datetime, timedelta
+
+from app.config import SettingsLoader
+from app.database import db
+from app.models import MensajeProcesado
+from app.services.whatsapp import DeduplicadorMensajes
+
+
+def test_repetido_en_memoria_y_despues_de_reiniciar(db_session):
+    assert DeduplicadorMensajes.registrar("wamid.dedup1") is True
+    assert DeduplicadorMensajes.registrar("wamid.dedup1") is False
+
+    DeduplicadorMensajes.limpiar_memoria()  # reinicio: sólo queda la tabla
+    assert DeduplicadorMensajes.registrar("wamid.dedup1") is False
+    assert MensajeProcesado.query.count() == 1
+
+
+def test_ttl_vencido_vuelve_a_procesar_y_se_purga(db_session):
+    DeduplicadorMensajes.registrar("wamid.dedup2")
+    DeduplicadorMensajes.registrar("wamid.dedup3")
+    viejo = datetime.now() - timedelta(hours=DeduplicadorMensajes.TTL_HORAS + 1)
+    db.session.get(MensajeProcesado, "wamid.dedup2").recibido_en = viejo
+    db.session.commit()
+    DeduplicadorMensajes.limpiar_memoria()
+
+    assert DeduplicadorMensajes.registrar("wamid.dedup2") is True
+
+    db.session.get(MensajeProcesado, "wamid.dedup3").recibido_en = viejo
+    db.session.commit()
+    assert DeduplicadorMensajes.purgar() == 1
+    assert [m.message_id for m in MensajeProcesado.query.all()] == ["wamid.dedup2"]
+
+
+def test_memoria_acotada(db_session, monkeypatch):
+    get_int = SettingsLoader.get_int
+    monkeypatch.setattr(
+        SettingsLoader, "get_int",
+        staticmethod(lambda s, k, f=0: 5 if k == "dedup_en_memoria" else get_int(s, k, f)),
+    )
+    DeduplicadorMensajes.limpiar_memoria()
+    for i in range(50):
+        DeduplicadorMensajes.registrar(f"wamid.lru{i}")
+
+    assert len(DeduplicadorMensajes._recientes) == 5
+    # Los desalojados de memoria siguen siendo repetidos gracias a la tabla
+    assert DeduplicadorMensajes.registrar("wamid.lru0") is False
+
+
+def test_mismo_id_en_paralelo_se_procesa_una_vez(app, db_session):
+    resultados = []
+    barrera = threading.Barrier(8)
+
+    def registrar():
+        with app.app_context():
+            barrera.wait()
+            resultados.append(DeduplicadorMensajes.registrar("wamid.paralelo"))
+
+    hilos = [threading.Thread(target=registrar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert sorted(resultados) == [False] * 7 + [True]
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.whatsapp import GraphHttpClient, WhatsAppMessageService
+
+
+def test_envios_reutilizan_la_conexion(fake_graph_api):
+    for i in range(5):
+        exito, resultado = WhatsAppMessageService.send_text_message("5491100000001", f"hola {i}")
+        assert exito, resultado
+
+    metricas = GraphHttpClient.metricas()
+    assert len(fake_graph_api.mensajes) == 5
+    assert metricas["solicitudes"] == 5
+    assert metricas["conexiones_creadas"] == 1
+    assert metricas["conexiones_reutilizadas"] == 4
+    assert metricas["conexiones_libres"] == 1
+
+
+def test_hilos_comparten_el_pool(fake_graph_api):
+    fake_graph_api.latencia = 0.05
+
+    def enviar(i):
+        return WhatsAppMessageService.send_text_message("5491100000002", f"hilo {i}")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        resultados = list(pool.map(enviar, range(20)))
+    assert all(exito for exito, _ in resultados), resultados
+
+    metricas = GraphHttpClient.metricas()
+    assert metricas["solicitudes"] == 20
+    assert metricas["errores"] == 0
+    assert metricas["conexiones_creadas"] <= 4
+    assert metricas["conexiones_reutilizadas"] >= 16
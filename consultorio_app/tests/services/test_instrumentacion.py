@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from app.instrumentacion import (
+    ConsultasRepetidasError,
+    HistogramaLatencias,
+    InstrumentacionRequests,
+    MedicionRequest,
+    normalizar_sentencia,
+)
+
+
+def test_histograma_percentiles_con_error_acotado():
+    rng = random.Random(7)
+    valores = sorted(rng.uniform(0.0005, 2.0) for _ in range(20000))
+    histograma = HistogramaLatencias()
+    for valor in valores:
+        histograma.registrar(valor)
+
+    assert histograma.cantidad == 20000
+    for p in (50, 95, 99):
+        exacto = valores[int(p / 100 * len(valores)) - 1] * 1000
+        assert abs(histograma.percentil(p) - exacto) / exacto < 1 / HistogramaLatencias.SUB_BUCKETS
+    assert abs(histograma.percentil(100) - valores[-1] * 1000) < 0.001
+    assert histograma.acumulado_hasta(10_000) == 20000
+    assert HistogramaLatencias().percentil(99) == 0.0
+
+
+def test_histograma_buckets_contiguos():
+    anterior = -1
+    for indice in range(len(HistogramaLatencias().conteos) - 1):
+        limite = HistogramaLatencias.limite_superior(indice)
+        assert limite > anterior
+        assert HistogramaLatencias._indice(limite) == indice
+        assert HistogramaLatencias._indice(anterior + 1) == indice
+        anterior = limite
+
+
+def test_normalizar_sentencia_agrupa_por_forma():
+    assert normalizar_sentencia("SELECT *\n  FROM t WHERE id IN (?, ?, ?) AND x = 5 AND n = 'a''b'") == \
+        normalizar_sentencia("SELECT * FROM t WHERE id IN (?) AND x = 12 AND n = 'c'")
+    assert normalizar_sentencia("SELECT turnos_1.id FROM turnos AS turnos_1") == "SELECT turnos_1.id FROM turnos AS turnos_1"
+
+
+def test_detector_marca_la_forma_repetida_con_su_pila(monkeypatch):
+    monkeypatch.setattr(InstrumentacionRequests, "UMBRAL_N_MAS_UNO", 3)
+    medicion = MedicionRequest()
+    for paciente_id in range(5):
+        InstrumentacionRequests._contar_forma(medicion, f"SELECT * FROM pacientes WHERE id = {paciente_id}")
+    InstrumentacionRequests._contar_forma(medicion, "SELECT count(*) FROM turnos")
+
+    assert list(medicion.repetidas) == ["SELECT * FROM pacientes WHERE id = ?"]
+    assert medicion.formas["SELECT * FROM pacientes WHERE id = ?"] == 5
+
+    monkeypatch.setattr(InstrumentacionRequests, "N_MAS_UNO_ESTRICTO", True)
+    estricta = MedicionRequest()
+    with pytest.raises(ConsultasRepetidasError) as error:
+        for _ in range(4):
+            InstrumentacionRequests._contar_forma(estricta, "SELECT * FROM prestacion_practica WHERE prestacion_id = ?")
+    assert error.value.cantidad == 4
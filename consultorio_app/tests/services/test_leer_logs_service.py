@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.visor_logs import LeerLogsService
+
+
+def _linea(i, nivel="INFO"):
+    return f"2026-01-01 10:00:{i % 60:02d} | {nivel:<8} | app.test | mensaje {i} ñandú"
+
+
+@pytest.mark.parametrize("bloque", [7, 64, 4096])
+def test_lineas_invertidas_en_cualquier_tamano_de_bloque(tmp_path, bloque):
+    archivo = tmp_path / "app.log"
+    lineas = [_linea(i) for i in range(200)]
+    archivo.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+
+    assert list(LeerLogsService.lineas_invertidas(archivo, bloque)) == lineas[::-1]
+
+    archivo.write_bytes(b"uno\r\ndos\r\ntres")  # CRLF y sin salto final
+    assert list(LeerLogsService.lineas_invertidas(archivo, bloque)) == ["tres", "dos", "uno"]
+
+
+def test_filtra_y_sigue_por_los_rotados(tmp_path):
+    actual = tmp_path / "app.log"
+    rotado = tmp_path / "app.log.1"
+    rotado.write_text("\n".join(_linea(i, "ERROR" if i % 10 == 0 else "INFO") for i in range(100)) + "\n", encoding="utf-8")
+    actual.write_text("\n".join(_linea(i) for i in range(100, 105)) + "\n", encoding="utf-8")
+
+    ultimas = LeerLogsService.execute(actual, 8)
+    assert [l.split("mensaje ")[1].split()[0] for l in ultimas] == ["104", "103", "102", "101", "100", "99", "98", "97"]
+    assert all(l.endswith("\n") for l in ultimas)
+
+    errores = LeerLogsService.execute(actual, 3, nivel="error")
+    assert [l.split("mensaje ")[1].split()[0] for l in errores] == ["90", "80", "70"]
+
+    assert len(LeerLogsService.execute(actual, 1000, busqueda="MENSAJE 5")) == 11  # 5 y 50..59
+    assert LeerLogsService.execute(tmp_path / "no_existe.log", 10) == []
@@ -0,0 +1,112 @@
+import time as _time
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.database import db
+from app.models import Estado, ListaEspera, ListaEsperaFranja, MensajeSaliente, Paciente
+from app.services.common import DatosInvalidosError
+from app.services.lista_espera import (
+    AgregarListaEsperaService,
+    BuscarCandidatosListaEsperaService,
+    OfrecerTurnoLiberadoService,
+)
+from app.services.turno import CambiarEstadoTurnoService
+from tests.factories.data import make_paciente, make_turno
+
+
+def _proximo_lunes():
+    hoy = date.today()
+    return hoy + timedelta(days=7 - hoy.weekday())
+
+
+def test_agregar_valida_franjas(db_session):
+    paciente = make_paciente(dni="60606060")
+
+    with pytest.raises(DatosInvalidosError):
+        AgregarListaEsperaService.execute(paciente.id, [(6, time(9, 0), time(12, 0))])
+    with pytest.raises(DatosInvalidosError):
+        AgregarListaEsperaService.execute(paciente.id, [(0, time(9, 0), time(9, 20))], duracion=30)
+
+    entrada = AgregarListaEsperaService.execute(paciente.id, [(0, time(9, 0), time(12, 0))], duracion=45)
+    assert entrada.activa and len(entrada.franjas) == 1
+
+
+def test_candidatos_por_dia_ventana_y_duracion(db_session):
+    lunes = _proximo_lunes()
+    p1 = make_paciente(nombre="Uno", dni="60606061")
+    p2 = make_paciente(nombre="Dos", dni="60606062")
+    p3 = make_paciente(nombre="Tres", dni="60606063")
+    p4 = make_paciente(nombre="Cuatro", dni="60606064")
+
+    AgregarListaEsperaService.execute(p1.id, [(0, time(9, 0), time(12, 0))])
+    AgregarListaEsperaService.execute(p2.id, [(1, time(9, 0), time(12, 0))])  # otro día
+    AgregarListaEsperaService.execute(p3.id, [(0, time(10, 0), time(10, 20))], duracion=15)  # termina antes del turno
+    AgregarListaEsperaService.execute(p4.id, [(0, time(8, 0), time(20, 0))], duracion=60)  # necesita más tiempo
+
+    candidatos = BuscarCandidatosListaEsperaService.execute(lunes, time(10, 0), 30)
+    assert [c.paciente_id for c in candidatos] == [p1.id, p3.id]
+
+    candidatos = BuscarCandidatosListaEsperaService.execute(lunes, time(10, 0), 30, excluir_paciente_id=p1.id)
+    assert [c.paciente_id for c in candidatos] == [p3.id]
+
+
+def test_cancelar_turno_ofrece_el_hueco(db_session):
+    for nombre in ("Confirmado", "Cancelado"):
+        db.session.add(Estado(nombre=nombre))
+    db.session.commit()
+    lunes = _proximo_lunes()
+    titular = make_paciente(nombre="Titular", dni="60606065")
+    espera = make_paciente(nombre="Espera", dni="60606066")
+    espera.telefono = "5491122334455"
+    db.session.commit()
+    entrada = AgregarListaEsperaService.execute(espera.id, [(0, time(9, 0), time(12, 0))])
+    turno = make_turno(titular, fecha=lunes, hora=time(10, 0), estado="Confirmado")
+
+    CambiarEstadoTurnoService.execute(turno.id, "Cancelado")
+
+    mensaje, = MensajeSaliente.query.all()
+    assert mensaje.destinatario == "5491122334455"
+    assert "10:00" in mensaje.contenido and lunes.strftime("%d/%m/%Y") in mensaje.contenido
+    assert db.session.get(ListaEspera, entrada.id).ofertas_enviadas == 1
+
+
+def test_candidatos_con_miles_de_entradas_es_rapido(db_session):
+    paciente = Paciente(nombre="Masivo", apellido="Test", dni="60600000", fecha_nac=date(1990, 1, 1))
+    db.session.add(paciente)
+    db.session.flush()
+    creado = datetime(2024, 1, 1)
+    for i in range(5000):
+        entrada = ListaEspera(paciente_id=paciente.id, duracion=30, creado_en=creado + timedelta(minutes=i))
+        dia = i % 6
+        desde = time(8 + (i % 12), 0)
+        entrada.franjas.append(ListaEsperaFranja(dia_semana=dia, hora_desde=desde, hora_hasta=time(desde.hour + 1, 0)))
+        db.session.add(entrada)
+    db.session.commit()
+
+    lunes = _proximo_lunes()
+    inicio = _time.perf_counter()
+    candidatos = BuscarCandidatosListaEsperaService.execute(lunes, time(14, 0), 30)
+    transcurrido = _time.perf_counter() - inicio
+
+    assert len(candidatos) == 3
+    assert all(c.franjas[0].dia_semana == 0 for c in candidatos)
+    assert transcurrido < 0.1
+
+
+def test_huecos_consecutivos_rotan_entre_los_candidatos(db_session):
+    lunes = _proximo_lunes()
+    entradas = []
+    for i in range(5):
+        paciente = make_paciente(nombre=f"Espera{i}", dni=f"6161616{i}")
+        paciente.telefono = f"549112233440{i}"
+        db.session.commit()
+        entradas.append(AgregarListaEsperaService.execute(paciente.id, [(0, time(9, 0), time(12, 0))]).id)
+
+    primeras = OfrecerTurnoLiberadoService.execute(lunes, time(9, 0), 30)
+    segundas = OfrecerTurnoLiberadoService.execute(lunes, time(10, 0), 30)
+
+    assert primeras == entradas[:3]
+    # Primero las que todavía no recibieron ofertas, después la más vieja
+    assert segundas == entradas[3:] + entradas[:1]
+    assert [db.session.get(ListaEspera, e).ofertas_enviadas for e in entradas] == [2, 1, 1, 1, 1]
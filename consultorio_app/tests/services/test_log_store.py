@@ -0,0 +1,84 @@
+import logging
+import queue
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener
+
+from app.log_store import LogStore, SQLiteLogHandler
+
+
+def _registrar(loggers_y_mensajes):
+    cola = queue.SimpleQueue()
+    handler = SQLiteLogHandler()
+    listener = QueueListener(cola, handler)
+    queue_handler = QueueHandler(cola)
+    listener.start()
+    try:
+        for nombre, nivel, mensaje, extra in loggers_y_mensajes:
+            log = logging.getLogger(nombre)
+            log.addHandler(queue_handler)
+            log.setLevel(logging.DEBUG)
+            log.propagate = False
+            log.log(nivel, mensaje, extra=extra)
+            log.removeHandler(queue_handler)
+    finally:
+        listener.stop()
+        handler.close()
+
+
+def test_busqueda_por_texto_nivel_logger_y_canal(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogStore, "_ruta", None)
+    LogStore.inicializar(tmp_path / "registros.db")
+    _registrar([
+        ("app.services.turno", logging.INFO, "Turno 15 agendado", {"turno_id": 15}),
+        ("app.services.turno", logging.ERROR, "Fallo al agendar turno 16", None),
+        ("app.routes", logging.WARNING, "Ruta lenta /turnos", None),
+        ("whatsapp.cola", logging.INFO, "Mensaje enviado a la cola", None),
+        ("security", logging.WARNING, "Login fallido", None),
+    ])
+
+    assert [r["mensaje"] for r in LogStore.buscar(texto="agend")] == ["Fallo al agendar turno 16", "Turno 15 agendado"]
+    assert LogStore.buscar(texto="agend")[1]["datos"] == {"turno_id": 15}
+    assert [r["mensaje"] for r in LogStore.buscar(nivel="warning")] == ["Login fallido", "Ruta lenta /turnos"]
+    assert len(LogStore.buscar(logger="app.services")) == 2
+    assert [r["canal"] for r in LogStore.buscar(canal="whatsapp")] == ["whatsapp"]
+    assert [r["mensaje"] for r in LogStore.buscar(canal="errors")] == ["Fallo al agendar turno 16"]
+    assert LogStore.buscar(texto='comillas " raras') == []
+    assert len(LogStore.buscar(desde=datetime.now() - timedelta(minutes=1))) == 5
+    assert LogStore.buscar(hasta=datetime.now() - timedelta(minutes=1)) == []
+
+
+def test_retencion_y_busqueda_rapida(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogStore, "_ruta", None)
+    LogStore.inicializar(tmp_path / "registros.db")
+    viejo = (datetime.now() - timedelta(days=40)).timestamp()
+    conexion = LogStore._conectar()
+    LogStore.insertar(conexion, [
+        (viejo if i % 2 else time.time(), logging.INFO, "INFO", "app.test", "app", f"registro numero {i}", None)
+        for i in range(20000)
+    ])
+    conexion.close()
+
+    inicio = time.perf_counter()
+    encontrados = LogStore.buscar(texto="numero 19998")
+    assert (time.perf_counter() - inicio) < 0.2
+    assert [r["mensaje"] for r in encontrados] == ["registro numero 19998"]
+
+    assert LogStore.purgar(30) == 10000
+    assert LogStore.buscar(texto="numero 19999") == []
+    assert len(LogStore.buscar(limite=50000)) == 10000
+
+
+
+def test_filtro_por_logger_no_trata_guion_bajo_como_comodin(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogStore, "_ruta", None)
+    LogStore.inicializar(tmp_path / "registros.db")
+    _registrar([
+        ("app.services.lista_espera", logging.INFO, "Padre", None),
+        ("app.services.lista_espera.ofertas", logging.INFO, "Hijo", None),
+        ("app.services.listaXespera.otro", logging.INFO, "Parecido", None),
+        ("app.services.lista%espera", logging.INFO, "Porcentaje", None),
+    ])
+
+    assert sorted(r["mensaje"] for r in LogStore.buscar(logger="app.services.lista_espera")) == ["Hijo", "Padre"]
+    assert [r["mensaje"] for r in LogStore.buscar(logger="app.services.lista%espera")] == ["Porcentaje"]
@@ -0,0 +1,65 @@
+import logging
+import queue
+import threading
+from logging.handlers import RotatingFileHandler
+
+from app import logging_config
+from app.logging_config import BoundedQueueHandler, CanalFilter, detener_logging, estadisticas_logging
+
+
+def _logger(nombre):
+    log = logging.getLogger(nombre)
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    return log
+
+
+def test_los_archivos_se_escriben_desde_el_listener_y_se_vacian_al_detener(tmp_path):
+    app_handler = RotatingFileHandler(tmp_path / "app.log", encoding="utf-8")
+    app_handler.addFilter(CanalFilter("app"))
+    wa_handler = RotatingFileHandler(tmp_path / "whatsapp.log", encoding="utf-8")
+    wa_handler.addFilter(CanalFilter("whatsapp"))
+    hilos = []
+
+    class HiloHandler(logging.Handler):
+        def emit(self, record):
+            hilos.append(threading.current_thread().name)
+
+    app_log, wa_log = _logger("prueba_cola_app"), _logger("whatsapp.prueba_cola")
+    logging_config._iniciar_listener([app_handler, wa_handler, HiloHandler()], [app_log, wa_log])
+    try:
+        for i in range(500):
+            app_log.info("turno %s", i)
+        wa_log.info("mensaje enviado")
+    finally:
+        detener_logging()
+
+    lineas_app = (tmp_path / "app.log").read_text(encoding="utf-8").splitlines()
+    assert len(lineas_app) == 500 and lineas_app[-1] == "turno 499"
+    assert (tmp_path / "whatsapp.log").read_text(encoding="utf-8").splitlines() == ["mensaje enviado"]
+    assert threading.current_thread().name not in hilos
+    assert app_log.handlers == [] and wa_log.handlers == []
+    assert estadisticas_logging()["capacidad"] == 0
+
+
+def test_cola_llena_descarta_debug_primero():
+    cola = queue.Queue(maxsize=10)
+    handler = BoundedQueueHandler(cola)
+    handler.ESPERA_MAXIMA = 0.01
+    log = _logger("prueba_cola_llena")
+    log.addHandler(handler)
+    try:
+        for i in range(8):
+            log.info("info %s", i)
+        log.debug("debug bajo presion")
+        log.warning("warning con lugar")
+        log.warning("otro warning")
+        log.warning("sin lugar")
+    finally:
+        log.removeHandler(handler)
+
+    mensajes = [cola.get_nowait().getMessage() for _ in range(cola.qsize())]
+    assert "debug bajo presion" not in mensajes
+    assert mensajes[-2:] == ["warning con lugar", "otro warning"]
+    assert handler.descartados_debug == 1
+    assert handler.descartados == 1
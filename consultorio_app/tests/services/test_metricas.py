@@ -0,0 +1,83 @@
+import threading
+import time
+
+from app.metricas import Metricas
+from app.scheduler import medir_job
+from tests.fakes.prometheus import parsear_metricas
+
+
+def test_contadores_por_hilo_sin_perder_incrementos():
+    contador = Metricas.contador('prueba_hilos_total', 'Prueba', ('hilo',))
+
+    def trabajar():
+        for _ in range(20000):
+            contador.con('todos').inc()
+
+    hilos = [threading.Thread(target=trabajar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert contador.con('todos').valor() == 160000
+
+
+def test_exportacion_con_formato_de_prometheus():
+    histograma = Metricas.histograma('prueba_latencia_segundos', 'Latencia "de prueba"\ncon salto', ('ruta',))
+    for valor in (0.001, 0.02, 0.3, 20):
+        histograma.con('a\\b"c').observar(valor)
+    Metricas.contador('prueba_eventos_total', 'Eventos').inc(3)
+
+    familias = parsear_metricas(Metricas.exportar())
+
+    muestras = familias['consultorio_prueba_latencia_segundos']['muestras']
+    buckets = {m[1]['le']: m[2] for m in muestras if m[0].endswith('_bucket')}
+    assert buckets['0.005'] == 1 and buckets['0.5'] == 3 and buckets['+Inf'] == 4
+    assert muestras[0][1]['ruta'] == 'a\\b"c'
+    assert familias['consultorio_prueba_eventos_total']['muestras'] == [('consultorio_prueba_eventos_total', {}, 3.0)]
+
+
+def test_jobs_del_scheduler_registran_duracion_y_resultado():
+    def falla():
+        raise RuntimeError('boom')
+
+    medir_job('prueba_ok', lambda: 1)()
+    try:
+        medir_job('prueba_falla', falla)()
+    except RuntimeError:
+        pass
+
+    familias = parsear_metricas(Metricas.exportar())
+    jobs = {(m[1]['job'], m[1]['resultado']): m[2] for m in familias['consultorio_scheduler_jobs_total']['muestras']}
+    assert jobs[('prueba_ok', 'ok')] == 1 and jobs[('prueba_falla', 'error')] == 1
+    assert any(
+        m[0].endswith('_count') and m[1] == {'job': 'prueba_ok'}
+        for m in familias['consultorio_scheduler_job_segundos']['muestras']
+    )
+
+
+def test_incrementar_es_barato():
+    contador = Metricas.contador('prueba_costo_total', 'Prueba', ('endpoint',))
+    histograma = Metricas.histograma('prueba_costo_segundos', 'Prueba')
+    inicio = time.perf_counter()
+    for _ in range(100000):
+        contador.con('main.index').inc()
+        histograma.observar(0.012)
+    por_operacion = (time.perf_counter() - inicio) / 100000
+    # Un request liviano tarda varios ms: unos pocos µs por métrica quedan muy por debajo del 1%
+    assert por_operacion < 1e-5
+
+
+def test_hilos_que_terminan_no_acumulan_celdas():
+    contador = Metricas.contador('prueba_hilos_cortos_total', 'Prueba')
+    celdas = contador.con()._celdas
+
+    for _ in range(10):
+        hilos = [threading.Thread(target=contador.inc) for _ in range(200)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+    assert contador.con().valor() == 2000
+    # Sólo quedan las celdas de hilos vivos (a lo sumo algún hilo recién terminado)
+    assert celdas.cantidad() <= 5
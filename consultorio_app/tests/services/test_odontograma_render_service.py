@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime
+from app.config import PathManager
+from app.database import db
+from app.models import Odontograma, OdontogramaCara
+from app.services.odontograma import RenderizarOdontogramaService
+from app.services.common import OdontogramaNoEncontradoError
+from tests.factories.data import make_paciente
+
+
+@pytest.fixture
+def renders_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(PathManager, 'get_renders_dir', classmethod(lambda cls: tmp_path))
+    return tmp_path
+
+
+def _crear_odontograma(paciente):
+    od = Odontograma(paciente_id=paciente.id, version_seq=1, es_actual=True,
+                     creado_en=datetime.now(), actualizado_en=datetime.now())
+    db.session.add(od)
+    db.session.flush()
+    db.session.add(OdontogramaCara(odontograma_id=od.id, diente='11', cara='oclusal', marca_texto='Exodoncia'))
+    db.session.add(OdontogramaCara(odontograma_id=od.id, diente='36', cara='mesial', marca_codigo='C1'))
+    db.session.commit()
+    return od
+
+
+def test_render_png_y_pdf_se_cachean(db_session, renders_dir):
+    od = _crear_odontograma(make_paciente(dni="40404040"))
+
+    png = RenderizarOdontogramaService.obtener_render(od.id, 'png')
+    pdf = RenderizarOdontogramaService.obtener_render(od.id, 'pdf')
+
+    assert png.read_bytes().startswith(b'\x89PNG')
+    assert pdf.read_bytes().startswith(b'%PDF')
+    mtime = png.stat().st_mtime_ns
+    # Segunda llamada sale de la caché sin regenerar
+    assert RenderizarOdontogramaService.obtener_render(od.id, 'png') == png
+    assert png.stat().st_mtime_ns == mtime
+
+
+def test_render_valida_paciente(db_session, renders_dir):
+    od = _crear_odontograma(make_paciente(dni="41414141"))
+    otro = make_paciente(dni="42424242")
+    with pytest.raises(OdontogramaNoEncontradoError):
+        RenderizarOdontogramaService.obtener_render(od.id, 'png', paciente_id=otro.id)
+
+
+def test_invalidar_cache_al_cambiar_calibracion(db_session, renders_dir, monkeypatch):
+    od = _crear_odontograma(make_paciente(dni="43434343"))
+    viejo = RenderizarOdontogramaService.obtener_render(od.id, 'png')
+
+    slots, _ = RenderizarOdontogramaService.cargar_slots()
+    monkeypatch.setattr(RenderizarOdontogramaService, 'cargar_slots', staticmethod(lambda: (slots, 'nuevohash')))
+
+    assert RenderizarOdontogramaService.invalidar_cache() == 1
+    assert not viejo.exists()
+    nuevo = RenderizarOdontogramaService.obtener_render(od.id, 'png')
+    assert nuevo.name.endswith('_nuevohash.png')
+
+
+def test_clasificar_marca():
+    assert RenderizarOdontogramaService.clasificar_marca('Pieza ausente', None) == 'exodoncia'
+    assert RenderizarOdontogramaService.clasificar_marca(None, 'X') == 'exodoncia'
+    assert RenderizarOdontogramaService.clasificar_marca('Caries', None) == 'alerta'
+    assert RenderizarOdontogramaService.clasificar_marca('', None) is None
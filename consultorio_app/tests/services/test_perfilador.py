@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from app.perfilador import PerfiladorMuestreo, PerfiladorOcupadoError
+
+
+def _girar_en_funcion_conocida(detener):
+    while not detener.is_set():
+        sum(range(200))
+
+
+def test_perfil_incluye_pilas_de_otros_hilos_en_formato_collapsed():
+    detener = threading.Event()
+    hilo = threading.Thread(target=_girar_en_funcion_conocida, args=(detener,), name='trabajador-prueba')
+    hilo.start()
+    try:
+        perfil = PerfiladorMuestreo.perfilar(0.3, 0.005)
+    finally:
+        detener.set()
+        hilo.join()
+
+    assert perfil.muestras >= 10
+    lineas = perfil.plegado().splitlines()
+    for linea in lineas:
+        pila, cantidad = linea.rsplit(' ', 1)
+        assert int(cantidad) > 0 and ';' in pila
+    propia = [l for l in lineas if l.startswith('trabajador-prueba;')]
+    assert propia and all(';_girar_en_funcion_conocida (' in l and 'test_perfilador.py:' in l for l in propia)
+    # Ni el hilo que pidió el perfil ni el muestreador aparecen
+    assert not any(l.startswith(('perfilador;', threading.current_thread().name + ';')) for l in lineas)
+
+
+def test_una_sola_medicion_a_la_vez():
+    resultado = {}
+    hilo = threading.Thread(target=lambda: resultado.update(perfil=PerfiladorMuestreo.perfilar(0.3, 0.01)))
+    hilo.start()
+    try:
+        for _ in range(100):
+            if PerfiladorMuestreo.ocupado():
+                break
+            threading.Event().wait(0.005)
+        with pytest.raises(PerfiladorOcupadoError):
+            PerfiladorMuestreo.perfilar(0.1)
+    finally:
+        hilo.join()
+    assert resultado['perfil'].muestras > 0
+    assert not PerfiladorMuestreo.ocupado()
+
+
+def test_duracion_recortada_al_maximo():
+    perfil = PerfiladorMuestreo.perfilar(30, 0.01, max_segundos=0.05)
+    assert perfil.duracion < 1
+    assert perfil.resumen()['intervalo_ms'] == 10
+
+
+def test_pilas_distintas_acotadas(monkeypatch):
+    monkeypatch.setattr(PerfiladorMuestreo, 'MAX_PILAS', 1)
+    perfil = PerfiladorMuestreo.perfilar(0.05, 0.005)
+    if len(threading.enumerate()) > 1:
+        assert perfil.truncadas > 0
+        assert any(PerfiladorMuestreo.PILA_DESCARTADA in pila for pila in perfil.pilas)
+
+
+@pytest.mark.parametrize('segundos, intervalo', [
+    (float('nan'), 0.01),
+    (0.05, float('nan')),
+    (float('inf'), 0.01),
+    (0.05, float('inf')),
+])
+def test_valores_no_finitos_no_cuelgan_el_perfilador(segundos, intervalo):
+    resultado = {}
+    hilo = threading.Thread(
+        target=lambda: resultado.update(perfil=PerfiladorMuestreo.perfilar(segundos, intervalo, max_segundos=0.2)),
+        daemon=True,
+    )
+    hilo.start()
+    hilo.join(3)
+    assert not hilo.is_alive()
+    assert resultado['perfil'].duracion < 1
+    assert not PerfiladorMuestreo.ocupado()
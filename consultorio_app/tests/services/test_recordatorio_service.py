@@ -0,0 +1,96 @@
+import time as _time
+from datetime import date, time, timedelta
+
+from app.database import db
+from app.models import Estado, RecordatorioTurno
+from app.services.recordatorio import EncolarRecordatoriosService, EnviarRecordatoriosService
+from app.services.turno import CambiarEstadoTurnoService
+from tests.factories.data import make_paciente, make_turno
+
+
+def _manana_con_turnos(cantidad, telefono="549111234{:04d}"):
+    estados = {}
+    for nombre in ("Pendiente", "Confirmado", "Cancelado"):
+        estado = Estado(nombre=nombre)
+        db.session.add(estado)
+        estados[nombre] = estado
+    db.session.commit()
+
+    manana = date.today() + timedelta(days=1)
+    turnos = []
+    for i in range(cantidad):
+        paciente = make_paciente(nombre=f"Paciente{i}", dni=f"5{i:07d}")
+        paciente.telefono = telefono.format(i)
+        turno = make_turno(paciente, fecha=manana, hora=time(8 + i % 12, 5 * (i // 12)), estado="Confirmado")
+        turno.estado_id = estados["Confirmado"].id
+        turnos.append(turno)
+    db.session.commit()
+    return manana, turnos
+
+
+def test_encolar_es_idempotente_y_solo_toma_pendientes_y_confirmados(db_session):
+    manana, turnos = _manana_con_turnos(3)
+    cancelado = turnos[2]
+    cancelado.estado = "Cancelado"
+    cancelado.estado_id = Estado.query.filter_by(nombre="Cancelado").first().id
+    paciente_sin_telefono = make_paciente(nombre="Sin", dni="59999999")
+    paciente_sin_telefono.telefono = None
+    sin_telefono = make_turno(paciente_sin_telefono, fecha=manana, hora=time(18, 0))
+    otro_dia = make_turno(turnos[0].paciente, fecha=manana + timedelta(days=1), hora=time(9, 0))
+    db.session.commit()
+
+    assert EncolarRecordatoriosService.execute(manana) == 2
+    assert EncolarRecordatoriosService.execute(manana) == 0
+
+    recordatorios = RecordatorioTurno.query.order_by(RecordatorioTurno.id).all()
+    assert {r.turno_id for r in recordatorios} == {turnos[0].id, turnos[1].id}
+    assert sin_telefono.id not in {r.turno_id for r in recordatorios}
+    assert otro_dia.id not in {r.turno_id for r in recordatorios}
+    assert "Paciente0" in recordatorios[0].parametros
+
+
+def test_enviar_contra_graph_api_falsa_sin_duplicar(db_session, fake_graph_api, monkeypatch):
+    monkeypatch.setattr("app.services.whatsapp.WhatsAppMessageService.RETRY_DELAY_SECONDS", 0)
+    manana, turnos = _manana_con_turnos(3)
+    EncolarRecordatoriosService.execute(manana)
+
+    # El turno cancelado después de encolar no se recuerda
+    CambiarEstadoTurnoService.execute(turnos[2].id, "Cancelado")
+    # Un 500 deja el recordatorio para la próxima corrida
+    fake_graph_api.respuestas = [500]
+
+    resumen = EnviarRecordatoriosService.execute()
+    assert resumen == {"enviados": 1, "reintentar": 1, "fallidos": 0, "descartados": 1}
+
+    resumen = EnviarRecordatoriosService.execute()
+    assert resumen["enviados"] == 1
+
+    # Reinicio: volver a encolar y enviar no repite mensajes
+    EncolarRecordatoriosService.execute(manana)
+    assert EnviarRecordatoriosService.execute()["enviados"] == 0
+
+    assert len(fake_graph_api.mensajes) == 2
+    payload = fake_graph_api.mensajes[0]["payload"]
+    assert payload["type"] == "template"
+    assert payload["template"]["name"] == "recordatorio_turno"
+    parametros = [p["text"] for p in payload["template"]["components"][0]["parameters"]]
+    assert parametros[1] == manana.strftime("%d/%m/%Y")
+    assert RecordatorioTurno.query.filter_by(estado=RecordatorioTurno.ENVIADO).count() == 2
+
+
+def test_envio_respeta_el_limite_de_mensajes_por_segundo(db_session, fake_graph_api, monkeypatch):
+    monkeypatch.setattr(
+        "app.services.recordatorio.enviar_recordatorios_service.SettingsLoader.get_int",
+        lambda seccion, clave, fallback=0: 50 if clave == "mensajes_por_segundo" else fallback,
+    )
+    manana, _ = _manana_con_turnos(40)
+    EncolarRecordatoriosService.execute(manana)
+
+    inicio = _time.perf_counter()
+    resumen = EnviarRecordatoriosService.execute()
+    transcurrido = _time.perf_counter() - inicio
+
+    assert resumen["enviados"] == 40
+    assert len(fake_graph_api.mensajes) == 40
+    # 40 mensajes a 50/s: no menos de ~0.8 s
+    assert transcurrido >= 0.75
@@ -0,0 +1,107 @@
+import socket
+import threading
+import time
+
+import requests
+
+from app.servidor import ServidorWSGI
+
+
+def _app_lenta(demora):
+    def app(environ, start_response):
+        time.sleep(demora)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [environ['PATH_INFO'].encode()]
+    return app
+
+
+def _levantar(app, **kwargs):
+    servidor = ServidorWSGI('127.0.0.1', 0, app, **kwargs)
+    hilo = threading.Thread(target=servidor.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    hilo.start()
+    return servidor, hilo, f"http://127.0.0.1:{servidor.server_port}"
+
+
+def test_pool_atiende_requests_en_paralelo():
+    servidor, hilo, url = _levantar(_app_lenta(0.3), hilos=4, backlog=16)
+    try:
+        respuestas = []
+        inicio = time.perf_counter()
+        clientes = [
+            threading.Thread(target=lambda n=n: respuestas.append(requests.get(f"{url}/r{n}", timeout=5)))
+            for n in range(4)
+        ]
+        for cliente in clientes:
+            cliente.start()
+        for cliente in clientes:
+            cliente.join()
+        assert time.perf_counter() - inicio < 1.0
+        assert sorted(r.text for r in respuestas) == ['/r0', '/r1', '/r2', '/r3']
+        assert servidor.request_queue_size == 16
+    finally:
+        servidor.solicitar_detencion()
+        hilo.join(2)
+        servidor.drenar(2)
+
+
+def test_detencion_espera_los_requests_en_curso():
+    servidor, hilo, url = _levantar(_app_lenta(0.4), hilos=2)
+    resultado = {}
+    cliente = threading.Thread(target=lambda: resultado.update(r=requests.get(f"{url}/lento", timeout=5)))
+    cliente.start()
+    while servidor.en_curso() == 0:
+        time.sleep(0.01)
+
+    servidor.solicitar_detencion()
+    hilo.join(2)
+    assert not hilo.is_alive()
+    assert servidor.drenar(5)
+    cliente.join(2)
+    assert resultado['r'].status_code == 200 and resultado['r'].text == '/lento'
+    assert servidor.en_curso() == 0
+
+
+def test_cliente_colgado_libera_el_hilo_al_vencer_el_timeout():
+    servidor, hilo, url = _levantar(_app_lenta(0), hilos=1, timeout=0.2)
+    try:
+        colgado = socket.create_connection(('127.0.0.1', servidor.server_port))
+        colgado.settimeout(3)
+        # No manda nada: el servidor corta la conexión al vencer el timeout
+        assert colgado.recv(1024) == b''
+        colgado.close()
+        assert requests.get(f"{url}/ok", timeout=3).text == '/ok'
+    finally:
+        servidor.solicitar_detencion()
+        hilo.join(2)
+        servidor.drenar(2)
+
+
+def test_drenar_con_el_pool_trabado_respeta_la_espera():
+    liberar = threading.Event()
+
+    def app(environ, start_response):
+        liberar.wait(5)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    servidor, hilo, url = _levantar(app, hilos=1)
+    clientes = [
+        threading.Thread(target=lambda: requests.get(f"{url}/trabado", timeout=5), daemon=True)
+        for _ in range(2)
+    ]
+    try:
+        for cliente in clientes:
+            cliente.start()
+        # Un request en curso y otro esperando: la cola del pool queda llena
+        while not (servidor.en_curso() == 1 and servidor._pendientes.full()):
+            time.sleep(0.01)
+        servidor.solicitar_detencion()
+        hilo.join(2)
+
+        inicio = time.perf_counter()
+        assert servidor.drenar(0.3) is False
+        assert time.perf_counter() - inicio < 1.0
+    finally:
+        liberar.set()
+        for cliente in clientes:
+            cliente.join(5)
@@ -0,0 +1,98 @@
+"""Reservas concurrentes contra una base SQLite en archivo (la de memoria comparte una sola conexión)."""
+
+import threading
+import time as _time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+
+import pytest
+from flask import Flask
+
+from app.database import db
+from app.database.config import opciones_engine_sqlite
+from app.models import Estado, Paciente, Turno
+from app.services.turno import AgendarTurnoService
+from app.services.common import TurnoSolapamientoError
+
+
+@pytest.fixture
+def app_archivo(tmp_path):
+    app = Flask('stress_turnos')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'stress.db'}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_engine_sqlite()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Estado(nombre='Confirmado'))
+        db.session.add(Paciente(nombre='Ana', apellido='Perez', dni='90000001', fecha_nac=date(1990, 1, 1)))
+        db.session.commit()
+        paciente_id = Paciente.query.first().id
+    yield app, paciente_id
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _dia_habil():
+    # Un lunes dentro de dos semanas: fecha futura y dentro del horario de atención
+    hoy = date.today()
+    return hoy + timedelta(days=14 - hoy.weekday())
+
+
+def _reservar(app, paciente_id, fecha, hora, largada):
+    with app.app_context():
+        largada.wait()
+        try:
+            AgendarTurnoService.execute(paciente_id=paciente_id, fecha=fecha, hora=hora, duracion=30)
+            return 'ok'
+        except TurnoSolapamientoError:
+            return 'solapado'
+        finally:
+            db.session.remove()
+
+
+def test_reservas_simultaneas_mismo_horario_gana_una(app_archivo):
+    app, paciente_id = app_archivo
+    fecha = _dia_habil()
+    intentos = 200
+    largada = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        futuros = [
+            pool.submit(_reservar, app, paciente_id, fecha, time(10, 0), largada)
+            for _ in range(intentos)
+        ]
+        largada.set()
+        resultados = [f.result() for f in futuros]
+
+    assert resultados.count('ok') == 1
+    assert resultados.count('solapado') == intentos - 1
+    with app.app_context():
+        assert Turno.query.filter_by(fecha=fecha).count() == 1
+
+
+def test_reservas_sin_conflicto_no_se_bloquean(app_archivo):
+    app, paciente_id = app_archivo
+    fecha = _dia_habil()
+    horarios = [
+        (fecha + timedelta(days=dia), time(8 + i // 2, 30 * (i % 2)))
+        for dia in range(5) for i in range(24)
+    ]
+    largada = threading.Event()
+
+    inicio = _time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futuros = [
+            pool.submit(_reservar, app, paciente_id, fecha_hora[0], fecha_hora[1], largada)
+            for fecha_hora in horarios
+        ]
+        largada.set()
+        resultados = [f.result() for f in futuros]
+    transcurrido = _time.perf_counter() - inicio
+
+    assert resultados == ['ok'] * len(horarios)
+    with app.app_context():
+        assert Turno.query.count() == len(horarios)
+    # 120 reservas serializadas por el lock de escritura deben seguir siendo rápidas
+    assert transcurrido < 20
@@ -42,3 +42,20 @@ def test_agendar_turno_paciente_inexistente(db_session):
             hora=time(11, 0),
             duracion=30,
         )
+
+
+def test_horarios_disponibles_sin_consulta_por_turno(db_session, presupuesto_consultas):
+    from datetime import timedelta
+    from app.services.turno.obtener_horarios_service import ObtenerHorariosService
+    from tests.factories.data import make_turno
+
+    fecha = date.today() + timedelta(days=1)
+    while fecha.weekday() >= 5:
+        fecha += timedelta(days=1)
+    for i in range(8):
+        make_turno(make_paciente(dni=f"7700{i:04d}", nombre=f"Paciente{i}"), fecha=fecha, hora=time(9 + i, 0))
+
+    with presupuesto_consultas(2):
+        resultado = ObtenerHorariosService.obtener_horarios_disponibles(fecha)
+    ocupados = [h['conflicto_con'] for h in resultado['horarios_disponibles'] if not h['disponible']]
+    assert 'Paciente7 Perez' in ocupados
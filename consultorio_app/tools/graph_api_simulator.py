@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Simulador local de la Graph API de WhatsApp (endpoint /{phone_number_id}/messages).
+
+Sirve para probar el bot sin tokens de Meta y para medir carga: cada request
+espera una latencia configurable y una fracción responde 429 (rate limit de
+Meta) o 500. Registra cada mensaje aceptado con el instante de llegada.
+
+Uso:
+    python tools/graph_api_simulator.py --puerto 8999 --latencia-ms 150 --tasa-429 0.05
+
+    # y en otra consola, apuntar la app al simulador:
+    set WHATSAPP_API_BASE_URL=http://127.0.0.1:8999
+    set WHATSAPP_ACCESS_TOKEN=simulado
+    set WHATSAPP_PHONE_NUMBER_ID=123456
+
+GET /stats devuelve los contadores en JSON.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+class GraphApiSimulator:
+    """Servidor HTTP que imita a Meta, con latencia y errores configurables."""
+
+    def __init__(self, puerto: int = 0, latencia_ms: float = 0.0, jitter_ms: float = 0.0,
+                 tasa_429: float = 0.0, tasa_500: float = 0.0, semilla: int = None):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_429 = tasa_429
+        self.tasa_500 = tasa_500
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._hay_mensaje = threading.Condition(self._lock)
+        self._contador = 0
+        self.respuestas: Dict[int, int] = defaultdict(int)
+        # destinatario -> [(perf_counter de llegada, texto)]
+        self.recibidos: Dict[str, List[tuple]] = defaultdict(list)
+        simulador = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path.rstrip('/') != '/stats':
+                    self._responder(404, {'error': {'message': 'not found'}})
+                    return
+                self._responder(200, simulador.stats())
+
+            def do_POST(self):
+                largo = int(self.headers.get('Content-Length') or 0)
+                try:
+                    cuerpo = json.loads(self.rfile.read(largo) or b'{}')
+                except ValueError:
+                    self._responder(400, {'error': {'message': 'Invalid JSON', 'code': 100}})
+                    return
+                status, respuesta = simulador._procesar(self.path, cuerpo)
+                self._responder(status, respuesta)
+
+            def _responder(self, status, respuesta):
+                datos = json.dumps(respuesta).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(datos)))
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', puerto), _Handler)
+        self._server.daemon_threads = True
+        self._hilo = threading.Thread(target=self._server.serve_forever, name='graph-api-simulador', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._server.server_address
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self) -> 'GraphApiSimulator':
+        self._hilo.start()
+        return self
+
+    def detener(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _procesar(self, path: str, cuerpo: dict):
+        if not path.rstrip('/').endswith('/messages'):
+            return 404, {'error': {'message': 'Unknown path', 'code': 100}}
+
+        espera = self.latencia_ms + (self._azar.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if espera > 0:
+            time.sleep(espera / 1000)
+
+        with self._lock:
+            sorteo = self._azar.random()
+            if sorteo < self.tasa_429:
+                status = 429
+            elif sorteo < self.tasa_429 + self.tasa_500:
+                status = 500
+            else:
+                status = 200
+            self.respuestas[status] += 1
+            if status == 429:
+                return status, {'error': {'message': '(#130429) Rate limit hit', 'code': 130429}}
+            if status == 500:
+                return status, {'error': {'message': 'Simulated server error', 'code': 1}}
+
+            self._contador += 1
+            destinatario = cuerpo.get('to', '')
+            texto = (cuerpo.get('text') or {}).get('body') or (cuerpo.get('template') or {}).get('name', '')
+            self.recibidos[destinatario].append((time.perf_counter(), texto))
+            self._hay_mensaje.notify_all()
+            return 200, {
+                'messaging_product': 'whatsapp',
+                'contacts': [{'input': destinatario, 'wa_id': destinatario}],
+                'messages': [{'id': f'wamid.sim{self._contador}'}],
+            }
+
+    def esperar_mensajes(self, destinatario: str, cantidad: int, timeout: float) -> bool:
+        """Bloquea hasta que el destinatario haya recibido `cantidad` mensajes."""
+        with self._hay_mensaje:
+            return self._hay_mensaje.wait_for(lambda: len(self.recibidos[destinatario]) >= cantidad, timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'mensajes': self._contador,
+                'destinatarios': len(self.recibidos),
+                'respuestas': {str(status): cantidad for status, cantidad in sorted(self.respuestas.items())},
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulador local de la Graph API de WhatsApp')
+    parser.add_argument('--puerto', type=int, default=8999)
+    parser.add_argument('--latencia-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=30.0)
+    parser.add_argument('--tasa-429', type=float, default=0.0, help='Fracción de requests que reciben 429 (0-1)')
+    parser.add_argument('--tasa-500', type=float, default=0.0, help='Fracción de requests que reciben 500 (0-1)')
+    args = parser.parse_args()
+
+    simulador = GraphApiSimulator(args.puerto, args.latencia_ms, args.jitter_ms, args.tasa_429, args.tasa_500).iniciar()
+    print(f"[OK] Simulador de Graph API escuchando en {simulador.url} (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[stats] {json.dumps(simulador.stats())}")
+    except KeyboardInterrupt:
+        simulador.detener()
+
+
+if __name__ == '__main__':
+    main()
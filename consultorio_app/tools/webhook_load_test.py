@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del webhook de WhatsApp contra el simulador local de la Graph API.
+
+Levanta la app con una base temporal, la sirve por HTTP en localhost, arranca la
+cola de eventos y la cola saliente, y simula N pacientes que completan el flujo
+del bot (DNI, nombre, apellido, fecha y hora) con payloads firmados como Meta.
+Cada paciente manda su siguiente mensaje recién cuando le llega la respuesta.
+
+Reporta:
+- Latencia del ACK del webhook (lo que ve Meta) p50/p95/p99
+- Latencia de punta a punta: POST del mensaje -> respuesta recibida por el simulador
+- Esperas de la base: duración de las escrituras y errores "database is locked"
+
+Uso:
+    python tools/webhook_load_test.py --usuarios 200 --concurrencia 50
+    python tools/webhook_load_test.py --latencia-ms 300 --tasa-429 0.05 --reporte-json carga.json
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+# Agregar directorio raíz al path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from graph_api_simulator import GraphApiSimulator
+
+APP_SECRET = 'secreto-de-carga'
+PHONE_NUMBER_ID = '123456'
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano (0 si no hay valores)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumen(valores: List[float]) -> Dict[str, float]:
+    return {
+        'n': len(valores),
+        'p50_ms': round(percentil(valores, 50) * 1000, 1),
+        'p95_ms': round(percentil(valores, 95) * 1000, 1),
+        'p99_ms': round(percentil(valores, 99) * 1000, 1),
+        'max_ms': round(max(valores) * 1000, 1) if valores else 0.0,
+    }
+
+
+class MedidorBase:
+    """Mide cuánto tardan las escrituras en SQLite (incluye la espera por el lock)."""
+
+    ESCRITURAS = ('INSERT', 'UPDATE', 'DELETE', 'BEGIN', 'COMMIT')
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.escrituras: List[float] = []
+        self.bloqueos = 0
+        self._lock = threading.Lock()
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _antes(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('inicio_sentencia', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _despues(conn, cursor, statement, parameters, context, executemany):
+            inicio = conn.info['inicio_sentencia'].pop()
+            if statement.lstrip().split(' ', 1)[0].upper() in MedidorBase.ESCRITURAS:
+                with self._lock:
+                    self.escrituras.append(time.perf_counter() - inicio)
+
+        @event.listens_for(engine, 'handle_error')
+        def _error(contexto):
+            pila = contexto.connection.info.get('inicio_sentencia') if contexto.connection else None
+            if pila:
+                pila.pop()
+            if 'database is locked' in str(contexto.original_exception):
+                with self._lock:
+                    self.bloqueos += 1
+
+
+def payload(telefono: str, message_id: str, texto: str) -> str:
+    return json.dumps({
+        'object': 'whatsapp_business_account',
+        'entry': [{
+            'id': 'carga',
+            'changes': [{
+                'field': 'messages',
+                'value': {
+                    'messaging_product': 'whatsapp',
+                    'metadata': {'phone_number_id': PHONE_NUMBER_ID},
+                    'contacts': [{'wa_id': telefono, 'profile': {'name': 'Carga'}}],
+                    'messages': [{
+                        'from': telefono,
+                        'id': message_id,
+                        'timestamp': str(int(time.time())),
+                        'type': 'text',
+                        'text': {'body': texto},
+                    }],
+                },
+            }],
+        }],
+    })
+
+
+def firmar(body: str) -> str:
+    return 'sha256=' + hmac.new(APP_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
+
+
+def flujo_paciente(numero: int) -> List[str]:
+    """Mensajes de un paciente nuevo que pide turno (cada uno en un horario distinto)."""
+    dia = date.today() + timedelta(days=1 + numero // 16)
+    while dia.weekday() >= 5:
+        dia += timedelta(days=1)
+    minutos = 9 * 60 + (numero % 16) * 30
+    return [
+        str(30000000 + numero),
+        random.choice(['Ana', 'Luis', 'Sofía', 'Pedro', 'Lucía', 'Diego']),
+        random.choice(['García', 'López', 'Pérez', 'Gómez', 'Díaz']),
+        dia.isoformat(),
+        f"{minutos // 60:02d}:{minutos % 60:02d}",
+    ]
+
+
+def simular_paciente(url: str, simulador: GraphApiSimulator, numero: int, timeout: float, resultados: dict) -> None:
+    telefono = f"54911{numero:08d}"
+    session = requests.Session()
+    for paso, texto in enumerate(flujo_paciente(numero)):
+        body = payload(telefono, f"wamid.carga.{numero}.{paso}", texto)
+        inicio = time.perf_counter()
+        try:
+            resp = session.post(url, data=body, timeout=timeout, headers={
+                'Content-Type': 'application/json',
+                'X-Hub-Signature-256': firmar(body),
+            })
+        except requests.RequestException:
+            resultados['errores_http'].append(numero)
+            return
+        ack = time.perf_counter()
+        resultados['ack'].append(ack - inicio)
+        if resp.status_code != 200:
+            resultados['errores_http'].append(numero)
+            return
+
+        if not simulador.esperar_mensajes(telefono, paso + 1, timeout):
+            resultados['sin_respuesta'].append(numero)
+            return
+        llegada, _ = simulador.recibidos[telefono][paso]
+        resultados['punta_a_punta'].append(llegada - inicio)
+    resultados['completos'].append(numero)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del webhook de WhatsApp')
+    parser.add_argument('--usuarios', type=int, default=200, help='Pacientes simulados')
+    parser.add_argument('--concurrencia', type=int, default=50, help='Pacientes escribiendo a la vez')
+    parser.add_argument('--latencia-ms', type=float, default=100.0, help='Latencia de la Graph API simulada')
+    parser.add_argument('--jitter-ms', type=float, default=30.0)
+    parser.add_argument('--tasa-429', type=float, default=0.0, help='Fracción de envíos con 429 (0-1)')
+    parser.add_argument('--tasa-500', type=float, default=0.0, help='Fracción de envíos con 500 (0-1)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Segundos máximos de espera por respuesta')
+    parser.add_argument('--reporte-json', help='Guardar el reporte en este archivo')
+    args = parser.parse_args()
+
+    simulador = GraphApiSimulator(
+        latencia_ms=args.latencia_ms, jitter_ms=args.jitter_ms,
+        tasa_429=args.tasa_429, tasa_500=args.tasa_500, semilla=1,
+    ).iniciar()
+
+    directorio = tempfile.mkdtemp(prefix='carga_whatsapp_')
+    os.environ.update({
+        'WHATSAPP_API_BASE_URL': simulador.url,
+        'WHATSAPP_ACCESS_TOKEN': 'simulado',
+        'WHATSAPP_PHONE_NUMBER_ID': PHONE_NUMBER_ID,
+        'META_APP_SECRET': APP_SECRET,
+        'DISABLE_SCHEDULER': '1',
+    })
+
+    from app.config import PathManager
+    PathManager._base_dir = Path(directorio)
+
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.adapters.whatsapp import WhatsAppEventQueue
+    from app.database import db
+    from app.models import Estado
+    from app.services.whatsapp import ColaSalienteWorker
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for nombre in ('Pendiente', 'Confirmado', 'Cancelado', 'NoAtendido', 'Atendido'):
+            if not Estado.query.filter_by(nombre=nombre).first():
+                db.session.add(Estado(nombre=nombre))
+        db.session.commit()
+        medidor = MedidorBase(db.engine)
+
+    ColaSalienteWorker.iniciar(app)
+    WhatsAppEventQueue.iniciar(app)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name='webhook-carga', daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/webhooks/whatsapp"
+
+    print(f"[INFO] Base temporal: {directorio}")
+    print(f"[INFO] {args.usuarios} pacientes, concurrencia {args.concurrencia}, Graph API {args.latencia_ms:.0f} ms, 429 {args.tasa_429:.0%}")
+
+    resultados = {'ack': [], 'punta_a_punta': [], 'completos': [], 'sin_respuesta': [], 'errores_http': []}
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        for numero in range(args.usuarios):
+            pool.submit(simular_paciente, url, simulador, numero, args.timeout, resultados)
+    duracion = time.perf_counter() - inicio
+
+    servidor.shutdown()
+    WhatsAppEventQueue.detener()
+    ColaSalienteWorker.detener()
+    simulador.detener()
+
+    reporte = {
+        'duracion_s': round(duracion, 2),
+        'mensajes_por_segundo': round(len(resultados['ack']) / duracion, 1) if duracion else 0.0,
+        'pacientes_completos': len(resultados['completos']),
+        'sin_respuesta': len(resultados['sin_respuesta']),
+        'errores_http': len(resultados['errores_http']),
+        'ack_webhook': resumen(resultados['ack']),
+        'punta_a_punta': resumen(resultados['punta_a_punta']),
+        'escrituras_db': resumen(medidor.escrituras),
+        'escrituras_db_mayores_100ms': sum(1 for d in medidor.escrituras if d > 0.1),
+        'db_locked': medidor.bloqueos,
+        'graph_api': simulador.stats(),
+    }
+    print(json.dumps(reporte, indent=2, ensure_ascii=False))
+    if args.reporte_json:
+        Path(args.reporte_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"[OK] Reporte guardado en {args.reporte_json}")
+
+    return 0 if not resultados['sin_respuesta'] and not resultados['errores_http'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())